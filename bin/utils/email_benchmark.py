@@ -0,0 +1,81 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+"""Compare sending emails one by one and in batches.
+
+A local debugging SMTP server is started which accepts all emails and
+discards them.  The same emails are then sent once with a new SMTP
+connection for each email (like the `send_email` task does) and once
+over a single connection (like the `send_email_batch` task does).
+
+Since connecting to a local server is much faster than connecting to a
+real mail server (which usually involves TLS and authentication), the
+server can optionally delay each new connection to simulate this.
+"""
+
+import asyncore
+import smtpd
+import threading
+import time
+
+import click
+
+from indico.core.emails import do_send_email, do_send_email_batch
+from indico.core.notifications import make_email
+from indico.util.console import cformat
+from indico.web.flask.app import make_app
+
+
+class _DebuggingServer(smtpd.SMTPServer):
+    def __init__(self, connect_delay):
+        super().__init__(('127.0.0.1', 0), None, decode_data=False)
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self.messages = 0
+
+    def handle_accepted(self, conn, addr):
+        self.connections += 1
+        time.sleep(self.connect_delay)
+        super().handle_accepted(conn, addr)
+
+    def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+        self.messages += 1
+
+
+def _run(server, label, fn):
+    server.connections = server.messages = 0
+    start = time.perf_counter()
+    fn()
+    duration = time.perf_counter() - start
+    click.echo(cformat('%{white!}{}').format(label))
+    click.echo(f'  emails:      {server.messages:10d}')
+    click.echo(f'  connections: {server.connections:10d}')
+    click.echo(f'  time:        {duration:10.2f} s')
+    click.echo(f'  throughput:  {server.messages / duration:10.1f} emails/s')
+
+
+@click.command()
+@click.option('--emails', '-n', 'num_emails', type=int, default=1000, help='How many emails to send')
+@click.option('--connect-delay', '-d', type=float, default=0,
+              help='How long (in milliseconds) the server takes to accept a new connection')
+def main(num_emails, connect_delay):
+    server = _DebuggingServer(connect_delay / 1000)
+    thread = threading.Thread(target=asyncore.loop, kwargs={'timeout': 0.1}, daemon=True)
+    thread.start()
+    host, port = server.socket.getsockname()
+    config_override = {'SMTP_SERVER': (host, port), 'SMTP_USE_TLS': False, 'SMTP_LOGIN': None,
+                       'SMTP_PASSWORD': None, 'SMTP_RATE_LIMIT': None}
+    with make_app(config_override=config_override).app_context():
+        emails = [make_email(f'user{i}@example.com', subject=f'Test email {i}', body='Lorem ipsum\n' * 50)
+                  for i in range(num_emails)]
+        _run(server, 'one connection per email', lambda: [do_send_email(email) for email in emails])
+        _run(server, 'batched', lambda: do_send_email_batch([(email, None) for email in emails]))
+    server.close()
+
+
+if __name__ == '__main__':
+    main()
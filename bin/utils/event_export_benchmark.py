@@ -0,0 +1,117 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+"""Compare the YAML and binary event export formats.
+
+A synthetic conference with the given number of contributions (each
+with a speaker, a timetable entry and some of them with an attached
+file) is created, then exported and imported again using both formats.
+Everything happens inside a transaction which is rolled back at the end,
+so the script can be run against any database with an up-to-date schema.
+The files saved in the attachment storage are deleted afterwards.
+"""
+
+import time
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import click
+import pytz
+
+from indico.core.db import db
+from indico.core.storage.backend import get_storage
+from indico.modules.attachments.models.attachments import Attachment, AttachmentFile, AttachmentType
+from indico.modules.attachments.models.folders import AttachmentFolder
+from indico.modules.categories import Category
+from indico.modules.events import Event
+from indico.modules.events.contributions import Contribution
+from indico.modules.events.contributions.models.persons import ContributionPersonLink
+from indico.modules.events.export import export_event, import_event
+from indico.modules.events.models.events import EventType
+from indico.modules.events.models.persons import EventPerson
+from indico.modules.events.timetable.models.entries import TimetableEntry
+from indico.modules.users import User
+from indico.util.console import cformat
+from indico.web.flask.app import make_app
+
+
+def _create_event(num_contributions, num_files):
+    start_dt = pytz.utc.localize(datetime(2022, 3, 1, 8, 0))
+    event = Event(category=Category.get_root(), title='Export benchmark', type_=EventType.conference,
+                  creator=User.get_system_user(), start_dt=start_dt, end_dt=start_dt + timedelta(days=30),
+                  timezone='UTC')
+    db.session.add(event)
+    contribs = []
+    for i in range(num_contributions):
+        person = EventPerson(event=event, first_name=f'Speaker {i}', last_name='Pig', email=f'pig{i}@example.com',
+                             affiliation='ACME')
+        contrib = Contribution(event=event, title=f'Contribution {i}', description='Lorem ipsum ' * 20,
+                               duration=timedelta(minutes=20),
+                               person_links=[ContributionPersonLink(person=person, is_speaker=True)])
+        event.timetable_entries.append(TimetableEntry(object=contrib, start_dt=start_dt + timedelta(minutes=20 * i)))
+        contribs.append(contrib)
+    # the storage path of the files contains the ids
+    db.session.flush()
+    for i, contrib in enumerate(contribs[:num_files]):
+        folder = AttachmentFolder(object=contrib, title='Slides')
+        file_ = AttachmentFile(user=event.creator, filename=f'slides-{i}.txt', content_type='text/plain')
+        Attachment(folder=folder, user=event.creator, title='Slides', type=AttachmentType.file, file=file_)
+        with db.session.no_autoflush:
+            file_.save(BytesIO(b'slide data ' * 10000))
+    db.session.flush()
+    return event
+
+
+def _export(event, binary):
+    f = BytesIO()
+    start = time.perf_counter()
+    export_event(event, f, binary=binary)
+    return f, time.perf_counter() - start
+
+
+def _import(f):
+    f.seek(0)
+    start = time.perf_counter()
+    event = import_event(f, create_users=False)
+    return event, time.perf_counter() - start
+
+
+def _delete_files(events):
+    query = (AttachmentFile.query
+             .join(AttachmentFile.attachment)
+             .join(Attachment.folder)
+             .filter(AttachmentFolder.event_id.in_([e.id for e in events])))
+    for file_ in query:
+        get_storage(file_.storage_backend).delete(file_.storage_file_id)
+
+
+@click.command()
+@click.option('--contributions', '-c', 'num_contributions', type=int, default=10000,
+              help='How many contributions the event has')
+@click.option('--files', '-f', 'num_files', type=int, default=100, help='How many contributions have a file')
+def main(num_contributions, num_files):
+    with make_app().app_context():
+        events = []
+        try:
+            click.echo(f'Creating an event with {num_contributions} contributions...')
+            event = _create_event(num_contributions, num_files)
+            events.append(event)
+            for label, binary in (('yaml', False), ('binary', True)):
+                f, export_time = _export(event, binary)
+                imported, import_time = _import(f)
+                events.append(imported)
+                click.echo(cformat('%{white!}{}').format(label))
+                click.echo(f'  size:   {len(f.getvalue()) / 1024 / 1024:10.2f} MB')
+                click.echo(f'  export: {export_time:10.2f} s')
+                click.echo(f'  import: {import_time:10.2f} s')
+        finally:
+            _delete_files(events)
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    main()
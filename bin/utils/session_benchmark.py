@@ -0,0 +1,149 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+"""Compare the size and speed of the session serialization formats.
+
+Besides the size and (de)serialization time of typical sessions in the
+pickle format used by older Indico versions and the current binary
+format, it measures the cost of opening and saving a session in requests
+which do not use the session, which only read it and which modify it.
+The storage is replaced with a dict, so the time needed to send the
+data to Redis is not included.
+"""
+
+import pickle
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+import click
+from flask import Response
+
+from indico.util.console import cformat
+from indico.web.flask.app import make_app
+from indico.web.flask.session import IndicoSessionInterface
+
+
+SESSIONS = {
+    'anonymous': {
+        '_lang': 'en_GB',
+        '_timezone': 'LOCAL',
+    },
+    'logged in': {
+        '_user_id': 1337,
+        '_lang': 'en_GB',
+        '_csrf_token': str(uuid.uuid4()),
+        '_timezone': 'Europe/Zurich',
+        '_permanent': True,
+    },
+    'registration manager': {
+        '_user_id': 1337,
+        '_lang': 'en_GB',
+        '_csrf_token': str(uuid.uuid4()),
+        '_timezone': 'Europe/Zurich',
+        '_permanent': True,
+        '_flashes': [('success', 'The registration has been modified.')],
+        'access_keys': {'123': 'secret'},
+        'registration_notify_user_default': True,
+        **{f'registration_config_{i}': {'items': ['affiliation', 'reg_date', 'state', 'price', 12, 34],
+                                        'filters': {'fields': {}, 'items': {}}}
+           for i in range(5)},
+    },
+}
+
+
+class _MemoryStorage(dict):
+    def set(self, key, value, timeout=None):
+        self[key] = value
+
+    def delete(self, key):
+        self.pop(key, None)
+
+
+class _PickleSerializer:
+    def dumps(self, data, persistent=None):
+        return pickle.dumps(dict(data))
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+
+class _LegacySessionInterface(IndicoSessionInterface):
+    """Behaves like the session interface of older Indico versions.
+
+    The session is pickled, always loaded at the beginning of a request
+    and saved whenever it has been marked as modified.
+    """
+
+    serializer = _PickleSerializer()
+
+    def open_session(self, app, request):
+        session = super().open_session(app, request)
+        session.get('_user_id')
+        return session
+
+    def get_changed_data(self, session):
+        return b'' if session.modified else None
+
+
+def _time(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def _benchmark_request(app, interface, use_session, number):
+    def _request():
+        session = interface.open_session(app, ctx.request)
+        if use_session:
+            use_session(session)
+        interface.save_session(app, session, Response())
+
+    with app.test_request_context(headers={'Cookie': 'indico_session_http=sid'}) as ctx:
+        return _time(_request, number)
+
+
+@click.command()
+@click.option('--number', '-n', type=int, default=10000, help='How many iterations to run')
+def main(number):
+    app = make_app()
+    interface = IndicoSessionInterface()
+    interface.storage = _MemoryStorage()
+    legacy_interface = _LegacySessionInterface()
+    legacy_interface.storage = _MemoryStorage()
+    serializer = interface.serializer
+    requests = {
+        'not using the session': None,
+        'reading the session': lambda s: s.get('_csrf_token'),
+        'writing unchanged data': lambda s: s.setdefault('_lang', 'en_GB'),
+        'modifying the session': lambda s: s.__setitem__('last_access', datetime.now()),
+    }
+    for name, data in SESSIONS.items():
+        data = dict(data, _expires=datetime.now() + timedelta(days=7), _secure=False)
+        pickled = pickle.dumps(data)
+        packed = serializer.dumps(data)
+        click.echo(cformat('%{white!}{}').format(name))
+        click.echo(f'  size:   pickle {len(pickled):5d} bytes, binary {len(packed):5d} bytes')
+        click.echo('  dumps:  pickle {:8.2f} us, binary {:8.2f} us'.format(
+            _time(lambda: pickle.dumps(data), number),
+            _time(lambda: serializer.dumps(data), number)
+        ))
+        click.echo('  loads:  pickle {:8.2f} us, binary {:8.2f} us'.format(
+            _time(lambda: pickle.loads(pickled), number),
+            _time(lambda: serializer.loads(packed), number)
+        ))
+        for label, use_session in requests.items():
+            # the session may have been replaced during the previous iteration
+            interface.storage['sid'] = packed
+            legacy_interface.storage['sid'] = pickled
+            click.echo('  request {:24} pickle {:8.2f} us, binary {:8.2f} us'.format(
+                label + ':',
+                _benchmark_request(app, legacy_interface, use_session, number),
+                _benchmark_request(app, interface, use_session, number)
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -108,6 +108,23 @@ def resend_email(paths):
     resend_failed_emails_cmd(paths)
 
 
+@cli.command(short_help='Generate a token to profile requests.')
+@click.option('--hours', type=click.IntRange(1), default=24, metavar='N',
+              help='How long the token is valid (default: 24 hours)')
+def profile_token(hours):
+    """Generate a token to profile the database queries of requests.
+
+    When sending the token in the `X-Indico-Profile` header of a
+    request, detailed information about the executed queries is
+    collected.  It is returned in the `Server-Timing` header and, if
+    the request was slow, logged.
+    """
+    from datetime import timedelta
+
+    from indico.web.flask.stats import PROFILE_HEADER, generate_profile_token
+    click.echo(f'{PROFILE_HEADER}: {generate_profile_token(timedelta(hours=hours))}')
+
+
 @cli.command(short_help='Delete old temporary files.')
 @click.option('--temp', is_flag=True, help='Delete old files in the temp dir')
 @click.option('--cache', is_flag=True, help='Delete old files in the cache dir')
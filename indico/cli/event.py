@@ -47,12 +47,14 @@ def restore(event_id, user_id, message):
 @cli.command()
 @click.argument('event_id', type=int)
 @click.argument('target_file', type=click.File('wb'))
-def export(event_id, target_file):
+@click.option('--binary', is_flag=True, help='Use the binary format, which is much faster for large events')
+def export(event_id, target_file, binary):
     """Export all data associated with an event.
 
     This exports the whole event as an archive which can be imported
     on another other Indico instance.  Importing an event is only
     guaranteed to work if it was exported on the same Indico version.
+    The format of the archive is detected automatically when importing.
     """
     event = Event.get(event_id)
     if event is None:
@@ -61,7 +63,7 @@ def export(event_id, target_file):
     elif event.is_deleted:
         click.secho('This event has been deleted', fg='yellow')
         click.confirm('Export it anyway?', abort=True)
-    export_event(event, target_file)
+    export_event(event, target_file, binary=binary)
 
 
 @cli.command('import')
@@ -101,3 +101,47 @@ def fix_event_role_acls():
                   default=True, abort=True)
     db.session.commit()
     click.secho('Success!', fg='green')
+
+
+@cli.command()
+def rebuild_protection_index():
+    """Rebuild the effective protection index used by the search.
+
+    This is only needed when enabling the index for the first time or
+    in case it got out of sync; afterwards it is kept up to date
+    automatically whenever the protection of an object changes.
+    """
+    from indico.modules.search.protection import rebuild_protection_index
+    click.echo('Rebuilding protection index; this may take a while...')
+    rebuild_protection_index()
+    click.secho('Protection index rebuilt', fg='green')
+
+
+@cli.command()
+def rebuild_room_occupancy():
+    """Rebuild the room occupancy used for room booking statistics.
+
+    This is needed after upgrading to a version that includes the room
+    occupancy table or in case it got out of sync; afterwards it is
+    kept up to date automatically whenever bookings change.
+    """
+    from indico.modules.rb.statistics import rebuild_room_occupancy
+    click.echo('Rebuilding room occupancy; this may take a while...')
+    rebuild_room_occupancy()
+    db.session.commit()
+    click.secho('Room occupancy rebuilt', fg='green')
+
+
+@cli.command()
+def rebuild_category_stats():
+    """Rebuild the event statistics of all categories.
+
+    This is needed after upgrading to a version that includes the
+    category statistics table or in case it got out of sync; afterwards
+    it is kept up to date automatically whenever events change.
+    """
+    from indico.modules.categories.statistics import rebuild_category_stats
+    click.echo('Rebuilding category statistics; this may take a while...')
+    rebuild_category_stats()
+    db.session.commit()
+    click.secho('Category statistics rebuilt', fg='green')
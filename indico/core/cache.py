@@ -100,7 +100,7 @@ class ScopedCache:
     def add(self, key, value, timeout=None):
         if isinstance(timeout, timedelta):
             timeout = int(timeout.total_seconds())
-        self.cache.add(self._scoped(key), value, timeout=timeout)
+        return self.cache.add(self._scoped(key), value, timeout=timeout)
 
     def delete(self, key):
         self.cache.delete(self._scoped(key))
@@ -161,14 +161,20 @@ class IndicoCache(Cache):
             _logger.exception('set(%r) failed', key)
 
     def add(self, key, value, timeout=None):
+        """Set a value unless the key already exists.
+
+        :return: Whether the value has been set, or ``None`` if the
+                 operation failed.
+        """
         if isinstance(timeout, timedelta):
             timeout = int(timeout.total_seconds())
         try:
-            super().add(key, value, timeout=timeout)
+            return super().add(key, value, timeout=timeout)
         except RedisError:
             if config.DEBUG:
                 raise
             _logger.exception('add(%r) failed', key)
+            return None
 
     def delete(self, key):
         try:
@@ -51,6 +51,8 @@ DEFAULTS = {
     'HELP_URL': 'https://learn.getindico.io',
     'FAILED_LOGIN_RATE_LIMIT': '5 per 15 minutes; 10 per day',
     'IDENTITY_PROVIDERS': {},
+    'LATEX_CACHE_SIZE': 1024,
+    'LATEX_CACHE_STORAGE': None,
     'LOCAL_IDENTITIES': True,
     'LOCAL_MODERATION': False,
     'LOCAL_REGISTRATION': True,
@@ -64,6 +66,8 @@ DEFAULTS = {
     'NO_REPLY_EMAIL': None,
     'PLUGINS': set(),
     'PROFILE': False,
+    'PROFILE_QUERIES': False,
+    'PROFILE_QUERIES_LOG_THRESHOLD': 1,
     'PROVIDER_MAP': {},
     'PUBLIC_SUPPORT_EMAIL': None,
     'REDIS_CACHE_URL': None,
@@ -74,10 +78,12 @@ DEFAULTS = {
     'SENTRY_LOGGING_LEVEL': 'WARNING',
     'SESSION_LIFETIME': 86400 * 31,
     'SMTP_ALLOWED_SENDERS': set(),
+    'SMTP_BATCH_SIZE': 100,
     'SMTP_CERTFILE': None,
     'SMTP_KEYFILE': None,
     'SMTP_LOGIN': None,
     'SMTP_PASSWORD': None,
+    'SMTP_RATE_LIMIT': None,
     'SMTP_SENDER_FALLBACK': None,
     'SMTP_SERVER': ('localhost', 25),
     'SMTP_TIMEOUT': 30,
@@ -165,6 +171,7 @@ def _convert_key(name):
 def _postprocess_config(data):
     data['BASE_URL'] = data['BASE_URL'].rstrip('/')
     data['STATIC_SITE_STORAGE'] = data['STATIC_SITE_STORAGE'] or data['ATTACHMENT_STORAGE']
+    data['LATEX_CACHE_STORAGE'] = data['LATEX_CACHE_STORAGE'] or data['ATTACHMENT_STORAGE']
     if data['DISABLE_CELERY_CHECK'] is None:
         data['DISABLE_CELERY_CHECK'] = data['DEBUG']
 
@@ -57,12 +57,20 @@ def handle_sqlalchemy_database_error():
     raise ConstraintViolated(msg, exc.orig) from exc
 
 
+def _before_commit(*args, **kwargs):
+    signals.core.before_commit.send()
+
+
 def _after_commit(*args, **kwargs):
     signals.core.after_commit.send()
     if hasattr(g, 'memoize_cache'):
         del g.memoize_cache
 
 
+def _after_rollback(*args, **kwargs):
+    signals.core.after_rollback.send()
+
+
 class IndicoSQLAlchemy(SQLAlchemy):
     Model: t.Type[IndicoModel]
 
@@ -72,7 +80,9 @@ class IndicoSQLAlchemy(SQLAlchemy):
 
     def create_session(self, *args, **kwargs):
         session = super().create_session(*args, **kwargs)
+        listen(session, 'before_commit', _before_commit)
         listen(session, 'after_commit', _after_commit)
+        listen(session, 'after_soft_rollback', _after_rollback)
         return session
 
     def enforce_constraints(self):
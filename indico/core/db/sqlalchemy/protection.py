@@ -12,6 +12,7 @@ from sqlalchemy import inspect
 from sqlalchemy.event import listens_for
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm.base import NEVER_SET, NO_VALUE
 
 from indico.core import signals
@@ -57,6 +58,10 @@ class ProtectionMixin:
     allow_no_access_contact = False
     #: Whether the object can have no protection parent
     allow_none_protection_parent = False
+    #: The relationships needed to get the protection parent.  They
+    #: are eager-loaded when checking access for many objects at once
+    #: using :meth:`can_access_many`.
+    protection_parent_relationships = ()
 
     @classmethod
     def register_protection_events(cls):
@@ -239,6 +244,47 @@ class ProtectionMixin:
         override = self._check_can_access_override(user, allow_admin=allow_admin, authorized=rv)
         return override if override is not None else rv
 
+    @classmethod
+    def can_access_many(cls, objs, user, allow_admin=True):
+        """Check if the user can access each of the given objects.
+
+        This is equivalent to calling :meth:`can_access` on each
+        object, but the ACL entries of all the objects and their
+        protection parents are loaded in bulk first, so the number
+        of queries does not depend on the number of objects.
+
+        :param objs: The objects to check.
+        :param user: The :class:`.User` to check. May be None if the
+                     user is not logged in.
+        :param allow_admin: If admin users should always have access
+        :return: A dict mapping each object to a boolean indicating
+                 whether the user can access it.
+        """
+        if cls.disable_protection_mode:
+            raise NotImplementedError
+        objs = list(objs)
+        if not allow_admin or not user or not cls.is_user_admin(user):
+            preload_protection_data(objs)
+        return {obj: obj.can_access(user, allow_admin=allow_admin) for obj in objs}
+
+    @classmethod
+    def _preload_protection_data(cls, objs):
+        """Load the ACL entries and protection parents of many objects.
+
+        :param objs: Objects of this type.
+        """
+        relationships = ('acl_entries', *cls.protection_parent_relationships)
+        states = [state for state in map(inspect, objs) if state.persistent and state.unloaded]
+        unloaded = set().union(*(state.unloaded for state in states)).intersection(relationships)
+        if not unloaded:
+            return
+        pk_col, = inspect(cls).primary_key
+        ids = {state.identity[0] for state in states if not state.unloaded.isdisjoint(unloaded)}
+        (cls.query
+         .filter(pk_col.in_(ids))
+         .options(*(selectinload(getattr(cls, rel)) for rel in unloaded))
+         .all())
+
     def check_access_key(self, access_key=None):
         """Check whether an access key is valid for the object.
 
@@ -528,6 +574,34 @@ class ProtectionManagersMixin(ProtectionMixin):
             return set()
 
 
+def preload_protection_data(objs):
+    """Load the data needed to check access for many objects.
+
+    This walks up the protection parents of the objects level by level
+    and loads the ACL entries and parents of each level with one query
+    per object type.
+
+    :param objs: An iterable of objects using :class:`ProtectionMixin`.
+    """
+    seen = set()
+    objs = set(objs)
+    while objs:
+        seen |= objs
+        parents = set()
+        for cls, items in itertools.groupby(sorted(objs, key=_type_name), key=type):
+            if not issubclass(cls, ProtectionMixin):
+                continue
+            items = list(items)
+            cls._preload_protection_data(items)
+            parents.update(obj.protection_parent for obj in items)
+        parents.discard(None)
+        objs = parents - seen
+
+
+def _type_name(obj):
+    return type(obj).__name__
+
+
 def _get_acl_data(obj, principal):
     """Helper function to get the necessary data for ACL modifications.
 
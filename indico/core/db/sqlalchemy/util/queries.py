@@ -10,6 +10,8 @@ import re
 from sqlalchemy import func, inspect, over
 from sqlalchemy.sql import update
 
+from indico.util.iterables import grouper
+
 
 TS_REGEX = re.compile(r'([@<>!()&|:\'\\])')
 
@@ -179,6 +181,30 @@ def get_n_matching(query, n, predicate, *, prefetch_factor=5, preload_bulk=None)
     return results[:n]
 
 
+def iter_query_chunks(query, chunk_size=100, options=()):
+    """Iterate over the objects returned by a query in chunks.
+
+    The primary keys of the matching objects are fetched using a
+    server-side cursor and the objects themselves are then loaded one
+    chunk at a time.  Unlike ``yield_per`` this works fine with eager
+    loading options, while still not keeping the whole result set in
+    memory.
+
+    :param query: A sqlalchemy query returning a single entity
+    :param chunk_size: The number of objects to load at once
+    :param options: Query options used when loading the objects
+    :return: An iterator yielding lists of objects, in the order in
+             which they were returned by the query
+    """
+    entity = query.column_descriptions[0]['entity']
+    pk_col, = inspect(entity).primary_key
+    id_query = query.with_entities(pk_col).yield_per(chunk_size)
+    for chunk in grouper(id_query, chunk_size, skip_missing=True):
+        positions = {id_: i for i, (id_,) in enumerate(chunk)}
+        objects = entity.query.filter(pk_col.in_(list(positions))).options(*options).all()
+        yield sorted(objects, key=lambda obj: positions[inspect(obj).identity[0]])
+
+
 def with_total_rows(query, single_entity=True):
     """Get the result of a query and its total row count.
 
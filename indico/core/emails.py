@@ -8,6 +8,8 @@
 import os
 import pickle
 import tempfile
+import time
+from contextlib import suppress
 from datetime import date
 from email.headerregistry import parser
 from email.utils import make_msgid
@@ -77,7 +79,74 @@ def _rewrite_sender(msg: EmailMessage):
         msg.from_email = config.SMTP_SENDER_FALLBACK
 
 
-def do_send_email(email, log_entry=None, _from_task=False):
+@celery.task(name='send_email_batch')
+def send_email_batch_task(emails):
+    """Send many emails over a single SMTP connection.
+
+    Emails which could not be sent are passed on to `send_email_task`
+    so they are retried individually.
+
+    :param emails: A list of ``(email, log_entry_id)`` tuples
+    """
+    from indico.modules.logs import EventLogEntry
+    log_entry_ids = {log_entry_id for __, log_entry_id in emails if log_entry_id is not None}
+    log_entries = ({le.id: le for le in EventLogEntry.query.filter(EventLogEntry.id.in_(log_entry_ids))}
+                   if log_entry_ids else {})
+    failed = do_send_email_batch([(email, log_entries.get(log_entry_id)) for email, log_entry_id in emails])
+    # commit the log entry state changes
+    db.session.commit()
+    for email, log_entry in failed:
+        send_email_task.delay(email, log_entry)
+
+
+def do_send_email_batch(emails):
+    """Send many emails over a single SMTP connection.
+
+    The number of emails sent per second is limited by the
+    :data:`SMTP_RATE_LIMIT` setting.  If sending an email fails,
+    a new connection is used for the next one.
+
+    :param emails: A list of ``(email, log_entry)`` tuples
+    :return: A list of the ``(email, log_entry)`` tuples which could
+             not be sent
+    """
+    failed = []
+    interval = (1 / config.SMTP_RATE_LIMIT) if config.SMTP_RATE_LIMIT else 0
+    connection = get_connection()
+    try:
+        for email, log_entry in emails:
+            started = time.monotonic()
+            try:
+                do_send_email(email, log_entry, _from_task=True, connection=connection)
+            except Exception as exc:
+                logger.warning('Could not send email "%s" [%s]', truncate(email['subject'], 100), exc)
+                failed.append((email, log_entry))
+                with suppress(Exception):
+                    connection.close()
+            else:
+                logger.info('Sent email "%s"', truncate(email['subject'], 100))
+            if interval and (delay := interval - (time.monotonic() - started)) > 0:
+                time.sleep(delay)
+    finally:
+        with suppress(Exception):
+            connection.close()
+    return failed
+
+
+def _make_message(email, connection):
+    msg = EmailMessage(subject=email['subject'], body=email['body'], from_email=email['from'],
+                       to=email['to'], cc=email['cc'], bcc=email['bcc'], reply_to=email['reply_to'],
+                       attachments=email['attachments'], connection=connection)
+    if not msg.to:
+        msg.extra_headers['To'] = 'Undisclosed-recipients:;'
+    _rewrite_sender(msg)
+    if email['html']:
+        msg.content_subtype = 'html'
+    msg.extra_headers['message-id'] = make_msgid(domain=url_parse(config.BASE_URL).host)
+    return msg
+
+
+def do_send_email(email, log_entry=None, _from_task=False, connection=None):
     """Send an email.
 
     This function should not be called directly unless your
@@ -93,18 +162,16 @@ def do_send_email(email, log_entry=None, _from_task=False):
                       to indicate that the email has been sent.
     :param _from_task: Indicates that this function is called from
                        the celery task responsible for sending emails.
+    :param connection: An email backend to use instead of opening a
+                       new connection.  If the backend is not connected
+                       yet, it connects and the connection is kept open.
     """
-    with get_connection() as conn:
-        msg = EmailMessage(subject=email['subject'], body=email['body'], from_email=email['from'],
-                           to=email['to'], cc=email['cc'], bcc=email['bcc'], reply_to=email['reply_to'],
-                           attachments=email['attachments'], connection=conn)
-        if not msg.to:
-            msg.extra_headers['To'] = 'Undisclosed-recipients:;'
-        _rewrite_sender(msg)
-        if email['html']:
-            msg.content_subtype = 'html'
-        msg.extra_headers['message-id'] = make_msgid(domain=url_parse(config.BASE_URL).host)
-        msg.send()
+    if connection is not None:
+        connection.open()
+        _make_message(email, connection).send()
+    else:
+        with get_connection() as conn:
+            _make_message(email, conn).send()
     if not _from_task:
         logger.info('Sent email "%s"', truncate(email['subject'], 100))
     if log_entry:
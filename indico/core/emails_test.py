@@ -5,9 +5,13 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
+from smtplib import SMTP, SMTPServerDisconnected
+
 import pytest
 
-from indico.core.emails import _rewrite_sender
+from indico.core.emails import _rewrite_sender, do_send_email_batch
+from indico.core.notifications import make_email
+from indico.vendor.django_mail.backends.smtp import EmailBackend
 from indico.vendor.django_mail.message import EmailMessage
 
 
@@ -42,3 +46,33 @@ def test_rewrite_sender_notset():
     _rewrite_sender(msg)
     assert msg.from_email == 'foo@example.com'
     assert msg.message()['From'] == 'foo@example.com'
+
+
+def _make_emails(count):
+    return [(make_email(f'user{i}@example.com', subject=f'Email {i}', body='Test'), None) for i in range(count)]
+
+
+@pytest.mark.usefixtures('request_context')
+def test_send_email_batch(smtp, mocker):
+    connect = mocker.spy(SMTP, 'connect')
+    assert do_send_email_batch(_make_emails(50)) == []
+    assert len(smtp.outbox) == 50
+    assert connect.call_count == 1
+
+
+@pytest.mark.usefixtures('request_context')
+def test_send_email_batch_failure(smtp, mocker):
+    orig_send = EmailBackend._send
+
+    def _send(self, message):
+        if message.subject == 'Email 3':
+            raise SMTPServerDisconnected
+        return orig_send(self, message)
+
+    mocker.patch.object(EmailBackend, '_send', _send)
+    connect = mocker.spy(SMTP, 'connect')
+    emails = _make_emails(10)
+    assert do_send_email_batch(emails) == [emails[3]]
+    assert len(smtp.outbox) == 9
+    # a new connection is used after a failure
+    assert connect.call_count == 2
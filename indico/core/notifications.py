@@ -15,6 +15,7 @@ from flask import g
 from indico.core.config import config
 from indico.core.db import db
 from indico.core.logger import Logger
+from indico.util.iterables import grouper
 from indico.util.string import truncate
 
 
@@ -50,14 +51,16 @@ def send_email(email, event=None, module=None, user=None, log_metadata=None):
     :param log_metadata: A metadata dictionary to be saved in the event's log
     """
     from indico.core.emails import do_send_email, send_email_task
-    fn = send_email_task.delay if config.SMTP_USE_CELERY else do_send_email
+
     # we log the email immediately (as pending).  if we don't commit,
     # the log message will simply be thrown away later
     log_entry = _log_email(email, event, module, user, log_metadata)
     if 'email_queue' in g:
-        g.email_queue.append((fn, email, log_entry))
+        g.email_queue.append((email, log_entry))
+    elif config.SMTP_USE_CELERY:
+        send_email_task.delay(email, log_entry)
     else:
-        fn(email, log_entry)
+        do_send_email(email, log_entry)
 
 
 def _log_email(email, event, module, user, meta=None):
@@ -87,35 +90,55 @@ def init_email_queue():
 def flush_email_queue():
     """Send all the emails in the queue.
 
+    When using celery, the emails are passed on in batches of
+    :data:`SMTP_BATCH_SIZE` emails which are then sent over a single
+    SMTP connection.
+
     Note: This function does a database commit to update states
     in case of failures or immediately-sent emails.  It should only
     be called if the session is in a state safe to commit or after
     doing a commit/rollback of any other changes that might have
     been pending.
     """
-    from indico.core.emails import store_failed_email, update_email_log_state
+    from indico.core.emails import do_send_email_batch, store_failed_email, update_email_log_state
     queue = g.get('email_queue', [])
     if not queue:
         return
     logger.debug('Sending %d queued emails', len(queue))
-    for fn, email, log_entry in queue:
+    if config.SMTP_USE_CELERY:
+        failed = _queue_email_batches(queue)
+    else:
+        failed = do_send_email_batch(queue)
+    for email, log_entry in failed:
+        # Flushing the email queue happens after a commit.
+        # If anything goes wrong here we keep going and just log
+        # it to avoid losing (more) emails in case celery is not
+        # used for email sending or there is a temporary issue
+        # with celery.
+        if log_entry:
+            update_email_log_state(log_entry, failed=True)
+        path = store_failed_email(email, log_entry)
+        logger.error('Flushing queued email "%s" failed; stored data in %s', truncate(email['subject'], 100), path)
+    del queue[:]
+    db.session.commit()
+
+
+def _queue_email_batches(queue):
+    from indico.core.emails import send_email_batch_task, send_email_task
+    failed = []
+    for batch in grouper(queue, config.SMTP_BATCH_SIZE, skip_missing=True):
         try:
-            fn(email, log_entry)
+            if len(batch) == 1:
+                send_email_task.delay(*batch[0])
+            else:
+                send_email_batch_task.delay([(email, log_entry.id if log_entry else None)
+                                             for email, log_entry in batch])
         except Exception:
-            # Flushing the email queue happens after a commit.
-            # If anything goes wrong here we keep going and just log
-            # it to avoid losing (more) emails in case celery is not
-            # used for email sending or there is a temporary issue
-            # with celery.
-            if log_entry:
-                update_email_log_state(log_entry, failed=True)
-            path = store_failed_email(email, log_entry)
-            logger.exception('Flushing queued email "%s" failed; stored data in %s',
-                             truncate(email['subject'], 100), path)
+            logger.exception('Could not queue %d emails', len(batch))
+            failed += batch
             # Wait for a short moment in case it's a very temporary issue
             time.sleep(0.25)
-    del queue[:]
-    db.session.commit()
+    return failed
 
 
 def make_email(to_list=None, cc_list=None, bcc_list=None, from_address=None, reply_address=None, attachments=None,
@@ -7,12 +7,14 @@
 
 from collections import defaultdict
 from enum import Enum
+from functools import partial
 
 from flask import g, has_request_context
 from sqlalchemy.dialects.postgresql import JSONB
 
 from indico.core.db import db
 from indico.core.db.sqlalchemy.principals import PrincipalMixin, PrincipalType
+from indico.core.settings.util import load_settings_cached, mark_settings_modified
 from indico.util.decorators import strict_classproperty
 
 
@@ -82,6 +84,7 @@ class SettingsBase:
 
     @staticmethod
     def _clear_cache():
+        mark_settings_modified()
         if has_request_context():
             g.pop('global_settings_cache', None)
 
@@ -110,10 +113,16 @@ class JSONSettingsBase(SettingsBase):
         if hit:
             return cache[module]
         else:
-            for s in cls.query.filter_by(**kwargs):
-                cache[s.module][s.name] = s.value
+            cache.update(load_settings_cached(cls, kwargs, partial(cls._load_all, kwargs)))
             return cache[module]
 
+    @classmethod
+    def _load_all(cls, kwargs):
+        rv = defaultdict(dict)
+        for s in cls.query.filter_by(**kwargs):
+            rv[s.module][s.name] = s.value
+        return rv
+
     @classmethod
     def get(cls, module, name, default=None, **kwargs):
         setting = cls.get_setting(module, name, **kwargs)
@@ -10,8 +10,10 @@ from datetime import datetime, timedelta
 import pytest
 import pytz
 
+from indico.core import signals
 from indico.core.settings import PrefixSettingsProxy, SettingsProxy
 from indico.core.settings.converters import DatetimeConverter, TimedeltaConverter
+from indico.core.settings.util import _ProcessSettingsCache
 from indico.modules.events.settings import EventSettingsProxy
 from indico.modules.users import User
 
@@ -194,3 +196,53 @@ def test_prefix_settings(dummy_event, with_arg):
     proxy.set_multi({'foo_a': 11, 'bar_x': 33}, **kw)
     proxy.delete_all(**kw)
     assert proxy.get_all(no_defaults=True, **kw) == {}
+
+
+def test_process_settings_cache():
+    cache = _ProcessSettingsCache(2)
+    pytest.raises(KeyError, cache.get, 'a', 'v1')
+    cache.set('a', 1, 'v1')
+    cache.set('b', 2, 'v1')
+    assert cache.get('a', 'v1') == 1
+    cache.set('c', 3, 'v1')
+    # least recently used entry is evicted
+    pytest.raises(KeyError, cache.get, 'b', 'v1')
+    assert cache.get('a', 'v1') == 1
+    assert cache.get('c', 'v1') == 3
+    # a different version invalidates everything
+    pytest.raises(KeyError, cache.get, 'a', 'v2')
+    pytest.raises(KeyError, cache.get, 'c', 'v2')
+    # storing data for an outdated version does nothing
+    cache.set('a', 1, 'v1')
+    pytest.raises(KeyError, cache.get, 'a', 'v2')
+
+
+def test_process_settings_cache_disabled_in_tests(app, db, count_queries):
+    proxy = SettingsProxy('test', {'hello': 'world'})
+    proxy.set('hello', 'earth')
+    signals.core.after_commit.send()
+    with app.app_context():
+        assert proxy.get('hello') == 'earth'
+    with app.app_context(), count_queries() as cnt:
+        assert proxy.get('hello') == 'earth'
+    assert cnt() == 1
+
+
+def test_process_settings_cache_across_requests(mocker, app, db, count_queries):
+    mocker.patch.dict(app.config, {'TESTING': False})
+    proxy = SettingsProxy('test', {'hello': 'world'})
+    proxy.set('hello', 'earth')
+    # the tests never commit, so we need to trigger the invalidation manually
+    signals.core.after_commit.send()
+    with app.app_context():
+        assert proxy.get('hello') == 'earth'
+    with app.app_context(), count_queries() as cnt:
+        assert proxy.get('hello') == 'earth'
+        assert proxy.get_all() == {'hello': 'earth'}
+    assert cnt() == 0
+    with app.app_context():
+        proxy.set('hello', 'mars')
+        assert proxy.get('hello') == 'mars'
+        signals.core.after_commit.send()
+    with app.app_context():
+        assert proxy.get('hello') == 'mars'
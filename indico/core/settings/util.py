@@ -5,10 +5,127 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
-from copy import copy
+from collections import OrderedDict
+from copy import copy, deepcopy
+from threading import Lock
+from uuid import uuid4
+
+from flask import current_app, g, has_app_context
+
+from indico.core import signals
+from indico.core.cache import make_scoped_cache
+from indico.core.db import db
 
 
 _not_in_db = object()
+_version_cache = make_scoped_cache('settings')
+
+
+class _ProcessSettingsCache:
+    """A process-wide LRU cache for settings loaded from the database.
+
+    The cache is tagged with a version which is stored in Redis and
+    changed whenever settings are modified, so all processes discard
+    their cached settings when another process changed them.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.version = None
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            if version != self.version:
+                self._data.clear()
+                self.version = version
+                raise KeyError(key)
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value, version):
+        with self._lock:
+            if version != self.version:
+                return
+            self._data[key] = value
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_process_cache = _ProcessSettingsCache(10000)
+
+
+def _get_cache_version():
+    """Get the version of the process-wide settings cache.
+
+    The version is retrieved from Redis only once per request (or
+    app context in case of Celery tasks and CLI commands).  If it
+    cannot be retrieved, settings have been modified in the current
+    transaction or we are running tests (which never commit and thus
+    never invalidate the cache), ``None`` is returned and the cache
+    must not be used.
+    """
+    if (not has_app_context() or current_app.config['TESTING'] or
+            db.session.info.get('settings_modified')):
+        return None
+    try:
+        return g.settings_cache_version
+    except AttributeError:
+        pass
+    version = _version_cache.get('version')
+    if version is None:
+        _version_cache.add('version', uuid4().hex)
+        version = _version_cache.get('version')
+    g.settings_cache_version = version
+    return version
+
+
+def mark_settings_modified():
+    """Invalidate the process-wide settings cache.
+
+    The local cache is cleared immediately and not used anymore until
+    the end of the transaction, while the caches in other processes
+    are invalidated once the transaction has been committed.
+    """
+    _process_cache.clear()
+    if has_app_context():
+        db.session.info['settings_modified'] = True
+        g.pop('settings_cache_version', None)
+
+
+@signals.core.after_commit.connect
+def _invalidate_settings_cache(sender, **kwargs):
+    if not db.session.info.pop('settings_modified', False):
+        return
+    _version_cache.set('version', uuid4().hex)
+    g.pop('settings_cache_version', None)
+
+
+def load_settings_cached(cls, kwargs, load):
+    """Load settings using the process-wide settings cache.
+
+    :param cls: The settings model class
+    :param kwargs: The arguments identifying the settings' object
+    :param load: A callable which loads the settings from the database
+    :return: The return value of `load`, possibly from the cache
+    """
+    version = _get_cache_version()
+    if version is None:
+        return load()
+    cache_key = cls, frozenset(kwargs.items())
+    try:
+        settings = _process_cache.get(cache_key, version)
+    except KeyError:
+        settings = load()
+        _process_cache.set(cache_key, deepcopy(settings), version)
+        return settings
+    # the settings in the process-wide cache must never be modified
+    return deepcopy(settings)
 
 
 def _get_cache_key(proxy, name, kwargs):
@@ -28,12 +28,27 @@ also be triggered by CLI utilities that result in other signals being
 triggered.
 ''')
 
+before_commit = _signals.signal('before-commit', '''
+Called before an SQL transaction is committed.  Unlike `after_commit`,
+handlers may still emit SQL, so this is the place to write data which
+has been queued during the transaction.  Since it is sent for every
+commit, this also works outside requests, e.g. in Celery tasks or CLI
+commands.
+''')
+
 after_commit = _signals.signal('after-commit', '''
 Called after an SQL transaction has been committed.  Note that the
 session is in 'committed' state when this signal is called, so no SQL
 can be emitted while this signal is being handled.
 ''')
 
+after_rollback = _signals.signal('after-rollback', '''
+Called after an SQL transaction (or a savepoint) has been rolled back.
+Any data queued during the transaction to be written when committing
+should be discarded here, since it may come from the changes which
+have just been rolled back.
+''')
+
 get_storage_backends = _signals.signal('get-storage-backends', '''
 Expected to return one or more Storage subclasses.
 ''')
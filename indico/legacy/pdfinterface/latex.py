@@ -6,9 +6,12 @@
 # LICENSE file for more details.
 
 import codecs
+import hashlib
 import os
+import shutil
 import subprocess
 import tempfile
+from datetime import date
 from io import BytesIO
 from operator import attrgetter
 from zipfile import ZipFile
@@ -21,17 +24,21 @@ from jinja2 import Environment, FileSystemLoader, StrictUndefined
 from jinja2.ext import Extension
 from jinja2.lexer import Token
 from pytz import timezone
+from sqlalchemy.exc import IntegrityError
 
 from indico.core.config import config
+from indico.core.db import db
 from indico.core.logger import Logger
+from indico.core.storage import StorageError
 from indico.legacy.pdfinterface.base import escape
 from indico.modules.events.abstracts.models.abstracts import AbstractReviewingState, AbstractState
 from indico.modules.events.abstracts.models.reviews import AbstractAction
 from indico.modules.events.abstracts.settings import BOACorrespondingAuthorType, boa_settings
 from indico.modules.events.contributions.util import sort_contribs
 from indico.modules.events.util import create_event_logo_tmp_file
+from indico.modules.files.models.latex_cache import LatexCacheEntry
 from indico.util import mdx_latex
-from indico.util.date_time import format_date, format_human_timedelta, format_time
+from indico.util.date_time import format_date, format_human_timedelta, format_time, now_utc
 from indico.util.fs import chmod_umask
 from indico.util.i18n import _, ngettext
 from indico.util.string import render_markdown
@@ -200,10 +207,64 @@ class LatexRunner:
         os.symlink(font_dir, os.path.join(self.source_dir, 'fonts'))
         return source_filename, target_filename
 
+    def _get_cache_key(self, source_filename):
+        """Get a hash identifying the PDF generated from a LaTeX source.
+
+        Besides the source itself, the PDF depends on the other files
+        in the source directory (such as images).  Since those files
+        have random names, their names are replaced with a hash of their
+        contents before hashing the source.
+        """
+        with open(source_filename, encoding='utf-8') as f:
+            source = f.read()
+        for name in sorted(os.listdir(self.source_dir)):
+            path = os.path.join(self.source_dir, name)
+            if path == source_filename or os.path.islink(path) or not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as f:
+                source = source.replace(name, hashlib.sha256(f.read()).hexdigest())
+        fonts_version = pkg_resources.get_distribution('indico-fonts').version
+        # LaTeX's `\today` is the only thing in the PDF which depends on when it was generated
+        today = date.today().isoformat() if r'\today' in source else ''
+        key = '\0'.join([config.XELATEX_PATH, fonts_version, str(self.has_toc), today, source])
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _load_cached_pdf(self, cache_key, target_filename):
+        entry = LatexCacheEntry.query.filter_by(hash=cache_key).first()
+        if entry is None:
+            return False
+        try:
+            with entry.open() as src, open(target_filename, 'wb') as dest:
+                shutil.copyfileobj(src, dest)
+        except StorageError:
+            Logger.get('pdflatex').exception('Could not load cached PDF %r', entry)
+            return False
+        entry.accessed_dt = now_utc()
+        return True
+
+    def _cache_pdf(self, cache_key, target_filename):
+        entry = LatexCacheEntry(hash=cache_key, filename=os.path.basename(target_filename),
+                                content_type='application/pdf')
+        try:
+            with open(target_filename, 'rb') as f:
+                entry.save(f)
+        except StorageError:
+            Logger.get('pdflatex').exception('Could not cache PDF %r', entry)
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.add(entry)
+        except IntegrityError:
+            # the same PDF has been generated and cached concurrently
+            entry.storage.delete(entry.storage_file_id)
+
     def run(self, template_name, **kwargs):
         if not config.LATEX_ENABLED:
             raise RuntimeError('LaTeX is not enabled')
         source_filename, target_filename = self.prepare(template_name, **kwargs)
+        cache_key = self._get_cache_key(source_filename) if config.LATEX_CACHE_SIZE else None
+        if cache_key and self._load_cached_pdf(cache_key, target_filename):
+            return target_filename
         log_filename = os.path.join(self.source_dir, 'output.log')
         log_file = open(log_filename, 'a+')
         try:
@@ -217,6 +278,8 @@ class LatexRunner:
                 # something went terribly wrong, no LaTeX file was produced
                 raise LaTeXRuntimeException(source_filename, log_filename)
 
+        if cache_key:
+            self._cache_pdf(cache_key, target_filename)
         return target_filename
 
 
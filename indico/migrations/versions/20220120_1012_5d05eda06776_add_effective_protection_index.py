@@ -0,0 +1,41 @@
+"""Add effective protection index
+
+Revision ID: 5d05eda06776
+Revises: 3dafee32ba7d
+Create Date: 2022-01-20 10:12:31.521348
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+from indico.core.db.sqlalchemy import PyIntEnum
+from indico.core.db.sqlalchemy.protection import ProtectionMode
+from indico.modules.search.base import SearchTarget
+
+
+# revision identifiers, used by Alembic.
+revision = '5d05eda06776'
+down_revision = '3dafee32ba7d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'effective_protection',
+        sa.Column('object_type', PyIntEnum(SearchTarget), nullable=False),
+        sa.Column('object_id', sa.Integer(), nullable=False, autoincrement=False),
+        sa.Column('protection_mode', PyIntEnum(ProtectionMode, exclude_values={ProtectionMode.inheriting}),
+                  nullable=False),
+        sa.Column('principals', postgresql.ARRAY(sa.String()), nullable=False),
+        sa.Column('needs_check', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('object_type', 'object_id'),
+        schema='indico'
+    )
+    op.create_index(None, 'effective_protection', ['principals'], unique=False, schema='indico',
+                    postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_table('effective_protection', schema='indico')
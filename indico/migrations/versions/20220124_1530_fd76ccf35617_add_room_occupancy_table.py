@@ -0,0 +1,49 @@
+"""Add room occupancy table
+
+Revision ID: fd76ccf35617
+Revises: 5d05eda06776
+Create Date: 2022-01-24 15:30:12.482913
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'fd76ccf35617'
+down_revision = '5d05eda06776'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'room_occupancy',
+        sa.Column('room_id', sa.Integer(), nullable=False, autoincrement=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('booked_time', sa.Integer(), nullable=False),
+        sa.Column('bookings', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['room_id'], ['roombooking.rooms.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('room_id', 'date'),
+        schema='roombooking'
+    )
+    # the booked time only includes the working hours (8:30-12:30 and 13:30-17:30)
+    op.execute('''
+        INSERT INTO roombooking.room_occupancy (room_id, date, booked_time, bookings)
+        SELECT r.room_id, o.start_dt::date,
+               sum(
+                   greatest(0, extract(epoch FROM least(o.end_dt::time, '12:30'::time) -
+                                                  greatest(o.start_dt::time, '08:30'::time))) +
+                   greatest(0, extract(epoch FROM least(o.end_dt::time, '17:30'::time) -
+                                                  greatest(o.start_dt::time, '13:30'::time)))
+               )::int,
+               count(*)
+        FROM roombooking.reservation_occurrences o
+        JOIN roombooking.reservations r ON r.id = o.reservation_id
+        WHERE o.state = 2
+        GROUP BY r.room_id, o.start_dt::date;
+    ''')
+
+
+def downgrade():
+    op.drop_table('room_occupancy', schema='roombooking')
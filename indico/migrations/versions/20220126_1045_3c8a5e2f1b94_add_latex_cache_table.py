@@ -0,0 +1,40 @@
+"""Add LaTeX cache table
+
+Revision ID: 3c8a5e2f1b94
+Revises: fd76ccf35617
+Create Date: 2022-01-26 10:45:51.208331
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from indico.core.db.sqlalchemy import UTCDateTime
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8a5e2f1b94'
+down_revision = 'fd76ccf35617'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'latex_cache_entries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('hash', sa.String(), nullable=False, unique=True),
+        sa.Column('accessed_dt', UTCDateTime, nullable=False, index=True),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('storage_backend', sa.String(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=False),
+        sa.Column('md5', sa.String(), nullable=False),
+        sa.Column('storage_file_id', sa.String(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('created_dt', UTCDateTime, nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        schema='indico'
+    )
+
+
+def downgrade():
+    op.drop_table('latex_cache_entries', schema='indico')
@@ -0,0 +1,81 @@
+"""Add category statistics table
+
+Revision ID: 8b1f4c2d7e6a
+Revises: 3c8a5e2f1b94
+Create Date: 2022-01-28 11:30:24.613920
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1f4c2d7e6a'
+down_revision = '3c8a5e2f1b94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'statistics',
+        sa.Column('category_id', sa.Integer(), nullable=False, autoincrement=False),
+        sa.Column('year', sa.Integer(), nullable=False, autoincrement=False),
+        sa.Column('event_count', sa.Integer(), nullable=False),
+        sa.Column('created_event_count', sa.Integer(), nullable=False),
+        sa.Column('contribution_count', sa.Integer(), nullable=False),
+        sa.Column('attachment_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.categories.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('category_id', 'year'),
+        schema='categories'
+    )
+    op.execute('''
+        INSERT INTO categories.statistics
+            (category_id, year, event_count, created_event_count, contribution_count, attachment_count)
+        SELECT category_id, year, sum(event_count), sum(created_event_count), sum(contribution_count),
+               sum(attachment_count)
+        FROM (
+            SELECT e.category_id, extract(year FROM e.start_dt)::int AS year,
+                   count(*) AS event_count, 0 AS created_event_count, 0 AS contribution_count,
+                   0 AS attachment_count
+            FROM events.events e
+            WHERE NOT e.is_deleted AND e.category_id IS NOT NULL
+            GROUP BY e.category_id, year
+
+            UNION ALL
+
+            SELECT e.category_id, extract(year FROM e.created_dt)::int AS year, 0, count(*), 0, 0
+            FROM events.events e
+            WHERE NOT e.is_deleted AND e.category_id IS NOT NULL
+            GROUP BY e.category_id, year
+
+            UNION ALL
+
+            SELECT e.category_id, extract(year FROM tt.start_dt)::int AS year, 0, 0, count(*), 0
+            FROM events.timetable_entries tt
+            JOIN events.events e ON e.id = tt.event_id
+            WHERE tt.type = 2 AND NOT e.is_deleted AND e.category_id IS NOT NULL
+            GROUP BY e.category_id, year
+
+            UNION ALL
+
+            SELECT e.category_id, extract(year FROM e.start_dt)::int AS year, 0, 0, 0, count(*)
+            FROM attachments.attachments a
+            JOIN attachments.folders f ON f.id = a.folder_id
+            JOIN events.events e ON e.id = f.event_id
+            LEFT JOIN events.sessions s ON s.id = f.session_id
+            LEFT JOIN events.contributions c ON c.id = f.contribution_id
+            LEFT JOIN events.subcontributions sc ON sc.id = f.subcontribution_id
+            LEFT JOIN events.contributions sc_c ON sc_c.id = sc.contribution_id
+            WHERE f.link_type != 1 AND NOT a.is_deleted AND NOT f.is_deleted AND
+                  NOT coalesce(s.is_deleted, c.is_deleted, sc.is_deleted, false) AND
+                  (sc_c.is_deleted IS NULL OR NOT sc_c.is_deleted) AND
+                  NOT e.is_deleted AND e.category_id IS NOT NULL
+            GROUP BY e.category_id, year
+        ) counts
+        GROUP BY category_id, year;
+    ''')
+
+
+def downgrade():
+    op.drop_table('statistics', schema='categories')
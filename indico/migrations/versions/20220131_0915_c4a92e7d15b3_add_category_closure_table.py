@@ -0,0 +1,84 @@
+"""Add category closure table
+
+Revision ID: c4a92e7d15b3
+Revises: 8b1f4c2d7e6a
+Create Date: 2022-01-31 09:15:42.187305
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a92e7d15b3'
+down_revision = '8b1f4c2d7e6a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'closure',
+        sa.Column('ancestor_id', sa.Integer(), nullable=False, autoincrement=False),
+        sa.Column('descendant_id', sa.Integer(), nullable=False, autoincrement=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['categories.categories.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['descendant_id'], ['categories.categories.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+        schema='categories'
+    )
+    op.create_index(None, 'closure', ['descendant_id', 'depth'], schema='categories')
+    op.execute('''
+        CREATE FUNCTION categories.update_closure() RETURNS trigger AS
+        $BODY$
+        BEGIN
+            IF TG_OP = 'UPDATE' THEN
+                IF NEW.parent_id IS NOT DISTINCT FROM OLD.parent_id THEN
+                    RETURN NULL;
+                END IF;
+                -- detach the subtree from the ancestors of its old parent
+                DELETE FROM categories.closure c
+                USING categories.closure sub
+                WHERE sub.ancestor_id = NEW.id AND c.descendant_id = sub.descendant_id AND c.depth > sub.depth;
+            ELSE
+                INSERT INTO categories.closure (ancestor_id, descendant_id, depth) VALUES (NEW.id, NEW.id, 0);
+            END IF;
+            -- attach the subtree to the new parent and its ancestors
+            INSERT INTO categories.closure (ancestor_id, descendant_id, depth)
+            SELECT parent.ancestor_id, sub.descendant_id, parent.depth + sub.depth + 1
+            FROM categories.closure parent, categories.closure sub
+            WHERE parent.descendant_id = NEW.parent_id AND sub.ancestor_id = NEW.id;
+            RETURN NULL;
+        END;
+        $BODY$
+        LANGUAGE plpgsql
+    ''')
+    op.execute('''
+        CREATE TRIGGER update_closure
+        AFTER INSERT OR UPDATE OF parent_id
+        ON categories.categories
+        FOR EACH ROW
+        EXECUTE PROCEDURE categories.update_closure();
+    ''')
+    op.execute('''
+        INSERT INTO categories.closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE chains(id, path) AS (
+            SELECT id, ARRAY[id]
+            FROM categories.categories
+            WHERE parent_id IS NULL
+
+            UNION ALL
+
+            SELECT cat.id, chains.path || cat.id
+            FROM categories.categories cat, chains
+            WHERE cat.parent_id = chains.id
+        )
+        SELECT p.ancestor_id, chains.id, array_length(chains.path, 1) - p.position
+        FROM chains, unnest(chains.path) WITH ORDINALITY AS p(ancestor_id, position);
+    ''')
+
+
+def downgrade():
+    op.execute('DROP TRIGGER update_closure ON categories.categories')
+    op.execute('DROP FUNCTION categories.update_closure()')
+    op.drop_table('closure', schema='categories')
@@ -0,0 +1,26 @@
+"""Add user search name index
+
+Revision ID: e3b71d9a2c58
+Revises: c4a92e7d15b3
+Create Date: 2022-02-02 14:20:47.118356
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b71d9a2c58'
+down_revision = 'c4a92e7d15b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('''
+        CREATE INDEX ix_users_search_name_unaccent ON users.users
+        USING gin (indico.indico_unaccent(lower((first_name || ' ') || last_name)) gin_trgm_ops);
+    ''')
+
+
+def downgrade():
+    op.drop_index('ix_users_search_name_unaccent', table_name='users', schema='users')
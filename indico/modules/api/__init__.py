@@ -65,3 +65,84 @@ def _extend_admin_menu(sender, **kwargs):
 @signals.menu.items.connect_via('user-profile-sidemenu')
 def _extend_profile_sidemenu(sender, **kwargs):
     yield SideMenuItem('api', _('HTTP API'), url_for('api.user_profile'), 30)
+
+
+@signals.event.created.connect
+@signals.event.updated.connect
+@signals.event.deleted.connect
+@signals.event.restored.connect
+@signals.event.type_changed.connect
+@signals.event.session_updated.connect
+@signals.event.session_deleted.connect
+@signals.event.session_block_updated.connect
+@signals.event.session_block_deleted.connect
+@signals.event.contribution_created.connect
+@signals.event.contribution_updated.connect
+@signals.event.contribution_deleted.connect
+@signals.event.subcontribution_created.connect
+@signals.event.subcontribution_updated.connect
+@signals.event.subcontribution_deleted.connect
+@signals.event.timetable_entry_created.connect
+@signals.event.timetable_entry_updated.connect
+@signals.event.timetable_entry_deleted.connect
+@signals.event.notes.note_added.connect
+@signals.event.notes.note_modified.connect
+@signals.event.notes.note_deleted.connect
+@signals.event.notes.note_restored.connect
+@signals.attachments.folder_created.connect
+@signals.attachments.folder_updated.connect
+@signals.attachments.folder_deleted.connect
+def _event_data_changed(obj, **kwargs):
+    from indico.web.http_api.cache import invalidate_event_cache
+    if obj.event is not None:
+        invalidate_event_cache(obj.event)
+
+
+@signals.attachments.attachment_created.connect
+@signals.attachments.attachment_updated.connect
+@signals.attachments.attachment_deleted.connect
+def _attachment_changed(attachment, **kwargs):
+    _event_data_changed(attachment.folder)
+
+
+@signals.event.times_changed.connect
+@signals.event.location_changed.connect
+def _event_obj_changed(sender, obj, **kwargs):
+    _event_data_changed(obj)
+
+
+@signals.event.moved.connect
+def _event_moved(event, old_parent, **kwargs):
+    from indico.web.http_api.cache import invalidate_event_cache
+    invalidate_event_cache(event, old_category=old_parent)
+
+
+@signals.category.updated.connect
+def _category_updated(category, **kwargs):
+    from indico.web.http_api.cache import invalidate_category_cache
+    invalidate_category_cache(category)
+
+
+@signals.category.moved.connect
+@signals.category.deleted.connect
+def _category_tree_changed(category, old_parent=None, **kwargs):
+    from indico.web.http_api.cache import invalidate_category_cache
+    invalidate_category_cache(category, old_parent=old_parent, tree=True)
+
+
+@signals.acl.protection_changed.connect
+@signals.acl.entry_changed.connect
+def _protection_changed(sender, obj, **kwargs):
+    from indico.modules.categories import Category
+    from indico.modules.events import Event
+    from indico.web.http_api.cache import invalidate_category_cache, invalidate_event_cache
+    if isinstance(obj, Category):
+        invalidate_category_cache(obj, tree=True)
+    elif isinstance(event := getattr(obj, 'event', None), Event):
+        invalidate_event_cache(event)
+
+
+@signals.core.after_commit.connect
+def _flush_http_api_cache_invalidations(sender, **kwargs):
+    from indico.web.http_api.cache import flush_cache_invalidations
+    flush_cache_invalidations()
@@ -10,6 +10,7 @@ from collections import defaultdict
 from flask import g
 from sqlalchemy.orm import joinedload
 
+from indico.core.db.sqlalchemy.protection import preload_protection_data
 from indico.modules.attachments.models.attachments import AttachmentType
 from indico.modules.attachments.models.folders import AttachmentFolder
 from indico.modules.attachments.util import get_attached_folders, get_event
@@ -81,6 +82,7 @@ def build_folders_api_data(linked_object):
     folders = get_attached_folders(linked_object, preload_event=True)
     if not folders:
         return []
+    preload_protection_data(folders + [attachment for folder in folders for attachment in folder.attachments])
     return [_f for _f in map(_build_folder_api_data, folders) if _f]
 
 
@@ -15,7 +15,9 @@ from indico.core.db.sqlalchemy.util.models import get_simple_column_attrs
 from indico.modules.attachments.models.attachments import Attachment, AttachmentFile, AttachmentType
 from indico.modules.attachments.models.folders import AttachmentFolder
 from indico.modules.attachments.models.principals import AttachmentFolderPrincipal, AttachmentPrincipal
-from indico.modules.events.cloning import EventCloner
+from indico.modules.events.cloning import (ClonedObjectMap, EventCloner, clone_principal_rows, clone_rows, get_id_map,
+                                           in_id_map)
+from indico.util.date_time import now_utc
 from indico.util.i18n import _
 
 
@@ -23,6 +25,7 @@ class AttachmentCloner(EventCloner):
     name = 'attachments'
     friendly_name = _('Materials')
     uses = {'sessions', 'contributions', 'event_roles', 'registration_forms'}
+    supports_bulk = True
 
     @property
     def is_available(self):
@@ -52,6 +55,30 @@ class AttachmentCloner(EventCloner):
             for attachment in self._attachment_map.values():
                 signals.attachments.attachment_created.send(attachment, user=attachment.user)
 
+    def run_bulk(self, new_event, cloners, shared_data):
+        event_role_map = shared_data['event_roles']['event_role_map'] if 'event_roles' in cloners else None
+        regform_map = shared_data['registration_forms']['form_map'] if 'registration_forms' in cloners else None
+        folder_criterion = ((AttachmentFolder.link_type == LinkType.event) &
+                            (AttachmentFolder.linked_event_id == self.old_event.id))
+        id_maps = {}
+        if cloners >= {'sessions', 'contributions'}:
+            # folders of deleted objects are skipped since those objects have not been cloned
+            id_maps = {'session_id': get_id_map(shared_data['sessions']['session_map']),
+                       'contribution_id': get_id_map(shared_data['contributions']['contrib_map']),
+                       'subcontribution_id': get_id_map(shared_data['contributions']['subcontrib_map'])}
+            for column, id_map in id_maps.items():
+                folder_criterion |= in_id_map(AttachmentFolder.__table__.c[column], id_map)
+        linked_event_id = db.case([(AttachmentFolder.link_type == LinkType.event, new_event.id)])
+        folder_map = clone_rows(AttachmentFolder, folder_criterion, ~AttachmentFolder.is_deleted,
+                                values={'event_id': new_event.id, 'linked_event_id': linked_event_id},
+                                id_maps=id_maps)
+        attachment_map = clone_rows(Attachment, in_id_map(Attachment.folder_id, folder_map), ~Attachment.is_deleted,
+                                    values={'modified_dt': now_utc()}, id_maps={'folder_id': folder_map},
+                                    extra_columns={'user_id'})
+        clone_principal_rows(AttachmentFolderPrincipal, 'folder_id', folder_map, event_role_map, regform_map)
+        clone_principal_rows(AttachmentPrincipal, 'attachment_id', attachment_map, event_role_map, regform_map)
+        self._clone_attachment_files(ClonedObjectMap(Attachment, attachment_map))
+
     def _has_content(self, event):
         return (event.all_attachment_folders
                 .filter(~AttachmentFolder.is_deleted, AttachmentFolder.attachments.any(is_deleted=False))
@@ -105,3 +132,16 @@ class AttachmentCloner(EventCloner):
                                                  content_type=old_file.content_type)
                 with old_file.open() as fd:
                     attachment.file.save(fd)
+
+    def _clone_attachment_files(self, attachment_map):
+        # the files need to be copied in the storage backend, so this cannot be done in SQL
+        query = (Attachment.query
+                 .filter(in_id_map(Attachment.id, attachment_map.id_map), Attachment.type == AttachmentType.file)
+                 .options(joinedload('file')))
+        for old_attachment in query:
+            attachment = attachment_map[old_attachment]
+            old_file = old_attachment.file
+            attachment.file = AttachmentFile(attachment=attachment, user_id=old_file.user_id,
+                                             filename=old_file.filename, content_type=old_file.content_type)
+            with old_file.open() as fd:
+                attachment.file.save(fd)
@@ -74,7 +74,8 @@ class AttachmentPackageGeneratorMixin(ZipGeneratorMixin):
         return self._filter_protected(attachments)
 
     def _filter_protected(self, attachments):
-        return [attachment for attachment in attachments if attachment.can_access(session.user)]
+        access = Attachment.can_access_many(attachments, session.user)
+        return [attachment for attachment in attachments if access[attachment]]
 
     def _get_all_attachments(self, added_since):
         query = self._build_base_query(added_since)
@@ -116,6 +116,7 @@ class AttachmentFile(StoredFileMixin, db.Model):
 
 class Attachment(SearchableTitleMixin, ProtectionMixin, VersionedResourceMixin, db.Model):
     __tablename__ = 'attachments'
+    protection_parent_relationships = ('folder',)
     __auto_table_args = (
         # links: url but no file
         db.CheckConstraint(f'type != {AttachmentType.link.value} OR (link_url IS NOT NULL AND file_id IS NULL)',
@@ -8,6 +8,7 @@
 from flask import session
 
 from indico.core.db import db
+from indico.core.db.sqlalchemy.protection import preload_protection_data
 
 
 def get_attached_folders(linked_object, include_empty=True, include_hidden=True, preload_event=False):
@@ -24,6 +25,7 @@ def get_attached_folders(linked_object, include_empty=True, include_hidden=True,
     folders = AttachmentFolder.get_for_linked_object(linked_object, preload_event=preload_event)
 
     if not include_hidden:
+        preload_protection_data(folders)
         folders = [f for f in folders if f.can_view(session.user)]
 
     if not include_empty:
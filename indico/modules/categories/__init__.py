@@ -5,7 +5,8 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
-from flask import session
+from flask import has_app_context, session
+from pytz import utc
 
 from indico.core import signals
 from indico.core.db.sqlalchemy.protection import make_acl_log_fn
@@ -98,3 +99,129 @@ class EventMoveRequestPermission(ManagementPermission):
     friendly_name = _('Request event move')
     description = _('Allows requesting for an event to be moved to this category')
     user_selectable = True
+
+
+@signals.event.created.connect
+@signals.event.restored.connect
+def _event_added(event, **kwargs):
+    from indico.modules.categories.statistics import queue_event_stats_change
+    queue_event_stats_change(event)
+
+
+@signals.event.deleted.connect
+def _event_deleted(event, **kwargs):
+    from indico.modules.categories.statistics import queue_event_stats_change
+    queue_event_stats_change(event, sign=-1)
+
+
+@signals.event.moved.connect
+def _event_moved(event, old_parent, **kwargs):
+    from indico.modules.categories.statistics import queue_event_stats_change
+    if old_parent is not None:
+        queue_event_stats_change(event, old_parent.id, sign=-1)
+    queue_event_stats_change(event)
+
+
+@signals.event.cloned.connect
+def _event_cloned(event, new_event, **kwargs):
+    from indico.modules.categories.statistics import queue_category_stats_refresh
+    queue_category_stats_refresh(new_event.category_id)
+
+
+@signals.event.imported.connect
+@signals.event.session_deleted.connect
+def _event_contents_changed(sender, **kwargs):
+    from indico.modules.categories.statistics import queue_category_stats_refresh
+
+    # bulk changes which do not trigger signals for each affected object
+    queue_category_stats_refresh(sender.event.category_id)
+
+
+def _queue_contribution_entry_change(entry, count):
+    from indico.modules.categories.statistics import queue_category_stats_change
+    from indico.modules.events.timetable.models.entries import TimetableEntryType
+    if entry.type == TimetableEntryType.CONTRIBUTION:
+        queue_category_stats_change(entry.event.category_id, entry.start_dt.astimezone(utc).year,
+                                    contribution_count=count)
+
+
+@signals.event.timetable_entry_created.connect
+def _timetable_entry_created(entry, **kwargs):
+    _queue_contribution_entry_change(entry, 1)
+
+
+@signals.event.timetable_entry_deleted.connect
+def _timetable_entry_deleted(entry, **kwargs):
+    _queue_contribution_entry_change(entry, -1)
+
+
+@signals.event.times_changed.connect
+def _times_changed(sender, entry, obj, changes, **kwargs):
+    from indico.modules.categories.statistics import get_event_attachment_count, queue_category_stats_change
+    from indico.modules.events.timetable.models.entries import TimetableEntryType
+    if 'start_dt' not in changes:
+        return
+    old_year, new_year = (dt.astimezone(utc).year for dt in changes['start_dt'])
+    if old_year == new_year:
+        return
+    if entry is None:
+        # the attachments of an event are counted in the year the event starts
+        counts = {'event_count': 1, 'attachment_count': get_event_attachment_count(obj)}
+        category_id = obj.category_id
+    elif entry.type == TimetableEntryType.CONTRIBUTION:
+        counts = {'contribution_count': 1}
+        category_id = entry.event.category_id
+    else:
+        return
+    queue_category_stats_change(category_id, old_year, **{col: -value for col, value in counts.items()})
+    queue_category_stats_change(category_id, new_year, **counts)
+
+
+@signals.event.contribution_deleted.connect
+def _contribution_deleted(contrib, **kwargs):
+    from indico.modules.attachments.models.folders import AttachmentFolder
+    from indico.modules.categories.statistics import get_linked_attachment_count, queue_attachment_stats_change
+    subcontrib_ids = [sc.id for sc in contrib.subcontributions]
+    count = get_linked_attachment_count((AttachmentFolder.contribution_id == contrib.id) |
+                                        AttachmentFolder.subcontribution_id.in_(subcontrib_ids))
+    queue_attachment_stats_change(contrib.event, -count)
+
+
+@signals.event.subcontribution_deleted.connect
+def _subcontribution_deleted(subcontrib, **kwargs):
+    from indico.modules.attachments.models.folders import AttachmentFolder
+    from indico.modules.categories.statistics import get_linked_attachment_count, queue_attachment_stats_change
+    count = get_linked_attachment_count(AttachmentFolder.subcontribution_id == subcontrib.id)
+    queue_attachment_stats_change(subcontrib.event, -count)
+
+
+@signals.attachments.attachment_created.connect
+def _attachment_created(attachment, **kwargs):
+    from indico.modules.categories.statistics import queue_attachment_stats_change
+    queue_attachment_stats_change(attachment.folder.event, 1)
+
+
+@signals.attachments.attachment_deleted.connect
+def _attachment_deleted(attachment, **kwargs):
+    from indico.modules.categories.statistics import queue_attachment_stats_change
+    queue_attachment_stats_change(attachment.folder.event, -1)
+
+
+@signals.attachments.folder_deleted.connect
+def _folder_deleted(folder, **kwargs):
+    from indico.modules.categories.statistics import queue_attachment_stats_change
+    queue_attachment_stats_change(folder.event, -len(folder.attachments))
+
+
+@signals.core.before_commit.connect
+def _update_category_stats(sender, **kwargs):
+    from indico.modules.categories.statistics import flush_category_stats_queue
+    if has_app_context():
+        flush_category_stats_queue()
+
+
+@signals.core.after_rollback.connect
+def _discard_category_stats(sender, **kwargs):
+    from indico.modules.categories.statistics import discard_category_stats_queue
+    if has_app_context():
+        discard_category_stats_queue()
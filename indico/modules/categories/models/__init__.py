@@ -106,3 +106,33 @@ def _create_check_cycles(sender, connection, **kwargs):
         LANGUAGE plpgsql
     ''')
     DDL(sql).execute(connection)
+
+
+@signals.core.db_schema_created.connect_via('categories')
+def _create_update_closure(sender, connection, **kwargs):
+    sql = textwrap.dedent('''
+        CREATE FUNCTION categories.update_closure() RETURNS trigger AS
+        $BODY$
+        BEGIN
+            IF TG_OP = 'UPDATE' THEN
+                IF NEW.parent_id IS NOT DISTINCT FROM OLD.parent_id THEN
+                    RETURN NULL;
+                END IF;
+                -- detach the subtree from the ancestors of its old parent
+                DELETE FROM categories.closure c
+                USING categories.closure sub
+                WHERE sub.ancestor_id = NEW.id AND c.descendant_id = sub.descendant_id AND c.depth > sub.depth;
+            ELSE
+                INSERT INTO categories.closure (ancestor_id, descendant_id, depth) VALUES (NEW.id, NEW.id, 0);
+            END IF;
+            -- attach the subtree to the new parent and its ancestors
+            INSERT INTO categories.closure (ancestor_id, descendant_id, depth)
+            SELECT parent.ancestor_id, sub.descendant_id, parent.depth + sub.depth + 1
+            FROM categories.closure parent, categories.closure sub
+            WHERE parent.descendant_id = NEW.parent_id AND sub.ancestor_id = NEW.id;
+            RETURN NULL;
+        END;
+        $BODY$
+        LANGUAGE plpgsql
+    ''')
+    DDL(sql).execute(connection)
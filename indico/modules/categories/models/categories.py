@@ -8,7 +8,7 @@
 import pytz
 from flask import session
 from sqlalchemy import DDL, orm
-from sqlalchemy.dialects.postgresql import ARRAY, JSONB, array
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, aggregate_order_by
 from sqlalchemy.event import listens_for
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.ext.hybrid import hybrid_property
@@ -24,6 +24,7 @@ from indico.core.db.sqlalchemy.descriptions import DescriptionMixin, RenderMode
 from indico.core.db.sqlalchemy.protection import ProtectionManagersMixin, ProtectionMode
 from indico.core.db.sqlalchemy.searchable import SearchableTitleMixin
 from indico.core.db.sqlalchemy.util.models import auto_table_args
+from indico.modules.categories.models.closure import CategoryClosure
 from indico.modules.logs.models.entries import CategoryLogEntry, CategoryLogRealm, LogKind
 from indico.util.date_time import get_display_tz
 from indico.util.decorators import strict_classproperty
@@ -72,6 +73,7 @@ class Category(SearchableTitleMixin, DescriptionMixin, ProtectionManagersMixin,
     possible_render_modes = {RenderMode.markdown}
     default_render_mode = RenderMode.markdown
     allow_no_access_contact = True
+    protection_parent_relationships = ('parent',)
     allow_relationship_preloading = True
     ATTACHMENT_FOLDER_ID_COLUMN = 'category_id'
 
@@ -370,7 +372,12 @@ class Category(SearchableTitleMixin, DescriptionMixin, ProtectionManagersMixin,
         - ``id`` -- the category id
         - ``path`` -- an array containing the path from the root to
                       the category itself
-        - ``is_deleted`` -- whether the category is deleted
+        - ``is_deleted`` -- whether the category or any of its parents
+                            is deleted
+
+        It is not recursive but based on the closure table, so filtering
+        it by ``id`` is cheap.  To filter by subtree, use
+        :meth:`get_subtree_ids_query` instead of the ``path`` column.
 
         :param col: The name of the column to use in the path or a
                     callable receiving the category alias that must
@@ -382,26 +389,40 @@ class Category(SearchableTitleMixin, DescriptionMixin, ProtectionManagersMixin,
             path_column = col(cat_alias)
         else:
             path_column = getattr(cat_alias, col)
-        cte_query = (select([cat_alias.id, array([path_column]).label('path'), cat_alias.is_deleted])
-                     .where(cat_alias.parent_id.is_(None))
-                     .cte(recursive=True))
-        rec_query = (select([cat_alias.id,
-                             cte_query.c.path.op('||')(path_column),
-                             cte_query.c.is_deleted | cat_alias.is_deleted])
-                     .where(cat_alias.parent_id == cte_query.c.id))
-        return cte_query.union_all(rec_query)
+        return (select([CategoryClosure.descendant_id.label('id'),
+                        func.array_agg(aggregate_order_by(path_column, CategoryClosure.depth.desc())).label('path'),
+                        func.bool_or(cat_alias.is_deleted).label('is_deleted')])
+                .select_from(db.join(CategoryClosure, cat_alias, cat_alias.id == CategoryClosure.ancestor_id))
+                .group_by(CategoryClosure.descendant_id)
+                .alias('category_tree'))
+
+    @staticmethod
+    def get_subtree_ids_query(category_ids, include_self=True):
+        """Create a query for the ids of all categories in subtrees.
+
+        :param category_ids: A list of category ids or a single
+                             category id
+        :param include_self: Whether to include the given categories
+                             themselves
+        """
+        if not isinstance(category_ids, (list, tuple, set)):
+            category_ids = [category_ids]
+        query = select([CategoryClosure.descendant_id]).where(CategoryClosure.ancestor_id.in_(category_ids))
+        if not include_self:
+            query = query.where(CategoryClosure.depth > 0)
+        return query
 
     @classmethod
     def get_protection_cte(cls):
+        # the closest category (in case of the category itself or one of
+        # its parents) which does not inherit its protection mode
         cat_alias = db.aliased(cls)
-        cte_query = (select([cat_alias.id, cat_alias.protection_mode])
-                     .where(cat_alias.parent_id.is_(None))
-                     .cte(recursive=True))
-        rec_query = (select([cat_alias.id,
-                             db.case({ProtectionMode.inheriting.value: cte_query.c.protection_mode},
-                                     else_=cat_alias.protection_mode, value=cat_alias.protection_mode)])
-                     .where(cat_alias.parent_id == cte_query.c.id))
-        return cte_query.union_all(rec_query)
+        return (select([CategoryClosure.descendant_id.label('id'), cat_alias.protection_mode])
+                .select_from(db.join(CategoryClosure, cat_alias, cat_alias.id == CategoryClosure.ancestor_id))
+                .where(cat_alias.protection_mode != ProtectionMode.inheriting)
+                .distinct(CategoryClosure.descendant_id)
+                .order_by(CategoryClosure.descendant_id, CategoryClosure.depth)
+                .alias('category_protection'))
 
     def get_protection_parent_cte(self):
         cte_query = (select([Category.id, db.cast(literal(None), db.Integer).label('protection_parent')])
@@ -434,22 +455,20 @@ class Category(SearchableTitleMixin, DescriptionMixin, ProtectionManagersMixin,
 
         This includes subcategories at any level of nesting.
         """
-        cte = Category.get_tree_cte()
+        # subcategories of deleted categories are always deleted as well
         return (Category.query
-                .join(cte, Category.id == cte.c.id)
-                .filter(cte.c.path.contains([self.id]),
-                        cte.c.id != self.id,
-                        ~cte.c.is_deleted))
+                .join(CategoryClosure, CategoryClosure.descendant_id == Category.id)
+                .filter(CategoryClosure.ancestor_id == self.id,
+                        CategoryClosure.depth > 0,
+                        ~Category.is_deleted))
 
     @staticmethod
     def _get_chain_query(start_criterion):
-        cte_query = (select([Category.id, Category.parent_id, literal(0).label('level')])
-                     .where(start_criterion)
-                     .cte('category_chain', recursive=True))
-        parent_query = (select([Category.id, Category.parent_id, cte_query.c.level + 1])
-                        .where(Category.id == cte_query.c.parent_id))
-        cte_query = cte_query.union_all(parent_query)
-        return Category.query.join(cte_query, Category.id == cte_query.c.id).order_by(cte_query.c.level.desc())
+        start_ids = select([Category.id]).where(start_criterion)
+        return (Category.query
+                .join(CategoryClosure, CategoryClosure.ancestor_id == Category.id)
+                .filter(CategoryClosure.descendant_id.in_(start_ids))
+                .order_by(CategoryClosure.depth.desc()))
 
     @property
     def chain_query(self):
@@ -537,14 +556,21 @@ class Category(SearchableTitleMixin, DescriptionMixin, ProtectionManagersMixin,
         Get a sqlalchemy select for the visible categories within
         the given category, including the category itself.
         """
-        cte_query = (select([Category.id, literal(0).label('level')])
-                     .where((Category.id == category_id) & (Category.visibility.is_(None) | (Category.visibility > 0)))
-                     .cte(recursive=True))
-        parent_query = (select([Category.id, cte_query.c.level + 1])
-                        .where(db.and_(Category.parent_id == cte_query.c.id,
-                                       db.or_(Category.visibility.is_(None),
-                                              Category.visibility > cte_query.c.level + 1))))
-        return cte_query.union_all(parent_query)
+        # a category is hidden if it or any category between it and the
+        # given category has a visibility lower than its depth below the
+        # given category
+        path = db.aliased(CategoryClosure)
+        relative = db.aliased(CategoryClosure)
+        cat_alias = db.aliased(Category)
+        hidden = (select([1])
+                  .select_from(db.join(path, cat_alias, cat_alias.id == path.ancestor_id)
+                               .join(relative, relative.descendant_id == cat_alias.id))
+                  .where(db.and_(path.descendant_id == CategoryClosure.descendant_id,
+                                 relative.ancestor_id == category_id,
+                                 cat_alias.visibility <= relative.depth)))
+        return (select([CategoryClosure.descendant_id.label('id'), CategoryClosure.depth.label('level')])
+                .where(db.and_(CategoryClosure.ancestor_id == category_id, ~exists(hidden)))
+                .alias('visible_categories'))
 
     @property
     def visible_categories_query(self):
@@ -656,20 +682,22 @@ def _mappers_configured():
 
     # Category.deep_events_count -- the number of events in the category
     # or any child category (excluding deleted events)
-    cte = Category.get_tree_cte()
-    crit = db.and_(cte.c.id == Event.category_id,
-                   cte.c.path.contains(array([Category.id])),
-                   ~cte.c.is_deleted,
+    closure = db.aliased(CategoryClosure)
+    crit = db.and_(closure.ancestor_id == Category.id,
+                   closure.descendant_id == Event.category_id,
                    ~Event.is_deleted)
-    query = select([db.func.count()]).where(crit).correlate_except(Event).scalar_subquery()
+    query = select([db.func.count()]).where(crit).correlate_except(closure, Event).scalar_subquery()
     Category.deep_events_count = column_property(query, deferred=True)
 
     # Category.deep_children_count -- the number of subcategories in the
     # category or any child category (excluding deleted ones)
-    cte = Category.get_tree_cte()
-    crit = db.and_(cte.c.path.contains(array([Category.id])),
-                   cte.c.id != Category.id, ~cte.c.is_deleted)
-    query = select([db.func.count()]).where(crit).correlate_except(cte).scalar_subquery()
+    closure = db.aliased(CategoryClosure)
+    cat_alias = db.aliased(Category)
+    crit = db.and_(closure.ancestor_id == Category.id,
+                   closure.depth > 0,
+                   cat_alias.id == closure.descendant_id,
+                   ~cat_alias.is_deleted)
+    query = select([db.func.count()]).where(crit).correlate_except(closure, cat_alias).scalar_subquery()
     Category.deep_children_count = column_property(query, deferred=True)
 
 
@@ -686,6 +714,18 @@ def _add_deletion_consistency_trigger(target, conn, **kw):
     DDL(sql).execute(conn)
 
 
+@listens_for(Category.__table__, 'after_create')
+def _add_closure_trigger(target, conn, **kw):
+    sql = '''
+        CREATE TRIGGER update_closure
+        AFTER INSERT OR UPDATE OF parent_id
+        ON {table}
+        FOR EACH ROW
+        EXECUTE PROCEDURE categories.update_closure();
+    '''.format(table=target.fullname)
+    DDL(sql).execute(conn)
+
+
 @listens_for(Category.__table__, 'after_create')
 def _add_cycle_check_trigger(target, conn, **kw):
     sql = '''
@@ -11,6 +11,7 @@ from sqlalchemy.orm import undefer
 from indico.core.db.sqlalchemy.protection import ProtectionMode
 from indico.modules.categories import Category
 from indico.modules.categories.models.categories import EventCreationMode
+from indico.modules.categories.models.closure import CategoryClosure
 
 
 @pytest.mark.parametrize(('protection_mode', 'creation_mode', 'acl', 'allowed'), (
@@ -156,3 +157,51 @@ def test_visibility_horizon_limitation(category_family, create_category):
     assert son.real_visibility_horizon == dad
     assert grandson.real_visibility_horizon == dad
     assert sibling.real_visibility_horizon == dad
+
+
+def _get_closure():
+    return {(c.ancestor_id, c.descendant_id): c.depth for c in CategoryClosure.query}
+
+
+@pytest.mark.usefixtures('request_context')
+def test_closure(category_family, create_category, db):
+    grandpa, dad, son, sibling = category_family
+    grandson = create_category(4, title='Grandson', parent=son)
+    db.session.flush()
+    assert _get_closure() == {
+        (0, 0): 0, (1, 1): 0, (2, 2): 0, (3, 3): 0, (4, 4): 0,
+        (0, 1): 1, (0, 2): 2, (0, 3): 2, (0, 4): 3,
+        (1, 2): 1, (1, 3): 1, (1, 4): 2,
+        (2, 4): 1,
+    }
+    assert set(dad.deep_children_query) == {son, sibling, grandson}
+    assert list(grandson.chain_query) == [grandpa, dad, son, grandson]
+    # moving a category updates the entries of the whole subtree
+    son.move(sibling)
+    db.session.flush()
+    assert list(grandson.parent_chain_query) == [grandpa, dad, sibling, son]
+    assert _get_closure() == {
+        (0, 0): 0, (1, 1): 0, (2, 2): 0, (3, 3): 0, (4, 4): 0,
+        (0, 1): 1, (0, 2): 3, (0, 3): 2, (0, 4): 4,
+        (1, 2): 2, (1, 3): 1, (1, 4): 3,
+        (3, 2): 1, (3, 4): 2,
+        (2, 4): 1,
+    }
+    assert set(sibling.deep_children_query) == {son, grandson}
+    assert db.session.query(Category.chain_ids).filter_by(id=grandson.id).scalar() == [0, 1, 3, 2, 4]
+
+
+def test_visible_categories(category_family, create_category, db):
+    grandpa, dad, son, sibling = category_family
+    grandson = create_category(4, title='Grandson', parent=son)
+    db.session.flush()
+    assert set(dad.visible_categories_query) == {dad, son, sibling, grandson}
+    son.visibility = 1  # only visible in itself
+    db.session.flush()
+    assert set(dad.visible_categories_query) == {dad, sibling}
+    assert set(son.visible_categories_query) == {son, grandson}
+    son.visibility = None
+    grandson.visibility = 2  # visible in its parent
+    db.session.flush()
+    assert set(dad.visible_categories_query) == {dad, son, sibling}
+    assert set(son.visible_categories_query) == {son, grandson}
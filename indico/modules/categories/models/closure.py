@@ -0,0 +1,47 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from indico.core.db import db
+from indico.util.string import format_repr
+
+
+class CategoryClosure(db.Model):
+    """An ancestor/descendant relationship in the category tree.
+
+    There is one entry for every category and each of its ancestors
+    (including the category itself with a depth of 0), so the parent
+    chain and the subtree of a category can be retrieved without
+    recursive queries.  The table is maintained by a trigger on the
+    categories table and must not be modified manually.
+    """
+
+    __tablename__ = 'closure'
+    __table_args__ = (db.Index(None, 'descendant_id', 'depth'),
+                      {'schema': 'categories'})
+
+    #: The ID of the ancestor category
+    ancestor_id = db.Column(
+        db.Integer,
+        db.ForeignKey('categories.categories.id', ondelete='CASCADE'),
+        primary_key=True,
+        autoincrement=False
+    )
+    #: The ID of the descendant category
+    descendant_id = db.Column(
+        db.Integer,
+        db.ForeignKey('categories.categories.id', ondelete='CASCADE'),
+        primary_key=True,
+        autoincrement=False
+    )
+    #: The number of levels between the two categories
+    depth = db.Column(
+        db.Integer,
+        nullable=False
+    )
+
+    def __repr__(self):
+        return format_repr(self, 'ancestor_id', 'descendant_id', 'depth')
@@ -0,0 +1,64 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from indico.core.db import db
+from indico.util.string import format_repr
+
+
+class CategoryStatistics(db.Model):
+    """Aggregated statistics of the events directly inside a category.
+
+    Events, contributions and attachments are counted by year; for
+    attachments the year of the event they belong to is used.  The
+    entries are kept up to date whenever events or their contents
+    change; the statistics of a category including its subcategories
+    are obtained by summing up the entries of all its subcategories.
+    """
+
+    __tablename__ = 'statistics'
+    __table_args__ = {'schema': 'categories'}
+
+    #: The ID of the category
+    category_id = db.Column(
+        db.Integer,
+        db.ForeignKey('categories.categories.id', ondelete='CASCADE'),
+        primary_key=True,
+        autoincrement=False
+    )
+    #: The year the counts apply to
+    year = db.Column(
+        db.Integer,
+        primary_key=True,
+        autoincrement=False
+    )
+    #: The number of events starting in that year
+    event_count = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0
+    )
+    #: The number of events created in that year
+    created_event_count = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0
+    )
+    #: The number of contributions scheduled in that year
+    contribution_count = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0
+    )
+    #: The number of attachments in events starting in that year
+    attachment_count = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0
+    )
+
+    def __repr__(self):
+        return format_repr(self, 'category_id', 'year', 'event_count', 'contribution_count', 'attachment_count')
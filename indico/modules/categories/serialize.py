@@ -8,15 +8,40 @@
 from io import BytesIO
 
 from feedgen.feed import FeedGenerator
-from flask import session
+from flask import g, session
 from sqlalchemy.orm import joinedload, load_only, subqueryload, undefer
 
+from indico.core.db.sqlalchemy.util.queries import iter_query_chunks
 from indico.modules.categories import Category
 from indico.modules.events import Event
-from indico.modules.events.ical import events_to_ical
+from indico.modules.events.ical import events_to_ical, stream_events_ical
 from indico.util.string import sanitize_html
 
 
+def _get_categories_ical_query(category_ids, event_filter, update_query):
+    query = (Event.query
+             .filter(Event.category_chain_overlaps(category_ids),
+                     ~Event.is_deleted,
+                     event_filter)
+             .order_by(Event.start_dt))
+    if update_query:
+        query = update_query(query)
+    return query
+
+
+def _get_categories_ical_query_options():
+    own_room_strategy = joinedload('own_room')
+    own_room_strategy.load_only('building', 'floor', 'number', 'verbose_name')
+    own_room_strategy.lazyload('owner')
+    own_venue_strategy = joinedload('own_venue').load_only('name')
+    return (load_only('id', 'category_id', 'start_dt', 'end_dt', 'title', 'description', 'own_venue_name',
+                      'own_room_name', 'protection_mode', 'access_key'),
+            subqueryload('acl_entries'),
+            joinedload('person_links'),
+            own_room_strategy,
+            own_venue_strategy)
+
+
 def serialize_categories_ical(category_ids, user, event_filter=True, event_filter_fn=None, update_query=None):
     """Export the events in a category to iCal.
 
@@ -29,23 +54,8 @@ def serialize_categories_ical(category_ids, user, event_filter=True, event_filte
     :param update_query: A callable that can update the query used to retrieve the events.
                          Must return the updated query object.
     """
-    own_room_strategy = joinedload('own_room')
-    own_room_strategy.load_only('building', 'floor', 'number', 'verbose_name')
-    own_room_strategy.lazyload('owner')
-    own_venue_strategy = joinedload('own_venue').load_only('name')
-    query = (Event.query
-             .filter(Event.category_chain_overlaps(category_ids),
-                     ~Event.is_deleted,
-                     event_filter)
-             .options(load_only('id', 'category_id', 'start_dt', 'end_dt', 'title', 'description', 'own_venue_name',
-                                'own_room_name', 'protection_mode', 'access_key'),
-                      subqueryload('acl_entries'),
-                      joinedload('person_links'),
-                      own_room_strategy,
-                      own_venue_strategy)
-             .order_by(Event.start_dt))
-    if update_query:
-        query = update_query(query)
+    query = (_get_categories_ical_query(category_ids, event_filter, update_query)
+             .options(*_get_categories_ical_query_options()))
     it = iter(query)
     if event_filter_fn:
         it = filter(event_filter_fn, it)
@@ -60,6 +70,28 @@ def serialize_categories_ical(category_ids, user, event_filter=True, event_filte
     return BytesIO(events_to_ical(events, user))
 
 
+def _iter_ical_chunks(query):
+    for chunk in iter_query_chunks(query, options=_get_categories_ical_query_options()):
+        yield chunk
+        # per-request caches would otherwise keep all the events alive
+        g.pop('memoize_cache', None)
+
+
+def stream_categories_ical(category_ids, user, event_filter=True, event_filter_fn=None, update_query=None):
+    """Export the events in a category to iCal incrementally.
+
+    This takes the same arguments as :func:`serialize_categories_ical`
+    but returns an iterator yielding chunks of the iCal data.  The
+    events are loaded in chunks, so the memory usage does not depend
+    on the number of events.
+    """
+    query = _get_categories_ical_query(category_ids, event_filter, update_query)
+    chunks = _iter_ical_chunks(query)
+    if event_filter_fn:
+        chunks = ([e for e in events if event_filter_fn(e)] for events in chunks)
+    return stream_events_ical(chunks, user)
+
+
 def serialize_category_atom(category, url, user, event_filter):
     """Export the events in a category to Atom.
 
@@ -78,7 +110,9 @@ def serialize_category_atom(category, url, user, event_filter):
                                 'access_key'),
                       subqueryload('acl_entries'))
              .order_by(Event.start_dt))
-    events = [e for e in query if e.can_access(user)]
+    events = query.all()
+    access = Event.can_access_many(events, user)
+    events = [e for e in events if access[e]]
 
     feed = FeedGenerator()
     feed.id(url)
@@ -0,0 +1,33 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+import pytest
+from flask import current_app, g
+
+from indico.core.db.sqlalchemy.util.queries import iter_query_chunks
+from indico.modules.categories.serialize import stream_categories_ical
+
+
+@pytest.mark.usefixtures('request_context')
+def test_stream_categories_ical_clears_cache(db, mocker, dummy_user, create_category, create_event):
+    category = create_category(101)
+    for i in range(3):
+        create_event(i + 1, category=category)
+    cache_sizes = []
+
+    def _iter_query_chunks(query, chunk_size=100, options=()):
+        for chunk in iter_query_chunks(query, 1, options):
+            # the next chunk is only loaded once the previous one has been serialized
+            cache_sizes.append(len(g.get('memoize_cache', {})))
+            yield chunk
+
+    mocker.patch('indico.modules.categories.serialize.iter_query_chunks', _iter_query_chunks)
+    # memoization is disabled in tests
+    mocker.patch.dict(current_app.config, {'TESTING': False})
+    data = b''.join(stream_categories_ical([category.id], dummy_user))
+    assert data.count(b'BEGIN:VEVENT') == 3
+    assert cache_sizes == [0, 0, 0]
@@ -0,0 +1,246 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from collections import Counter, defaultdict
+
+from flask import g, has_app_context
+from pytz import utc
+from sqlalchemy.dialects.postgresql import insert
+
+from indico.core.db import db
+from indico.core.db.sqlalchemy.links import LinkType
+from indico.modules.attachments import Attachment
+from indico.modules.attachments.models.folders import AttachmentFolder
+from indico.modules.categories.models.statistics import CategoryStatistics
+from indico.modules.events import Event
+from indico.modules.events.contributions import Contribution
+from indico.modules.events.contributions.models.subcontributions import SubContribution
+from indico.modules.events.sessions import Session
+from indico.modules.events.timetable.models.entries import TimetableEntry, TimetableEntryType
+
+
+COUNT_COLUMNS = ('event_count', 'created_event_count', 'contribution_count', 'attachment_count')
+
+
+def _year(column):
+    return db.cast(db.extract('year', column), db.Integer)
+
+
+def _attachment_query(*entities):
+    """Create a query for attachments counted in the statistics.
+
+    Only attachments which are visible in events are included, i.e.
+    attachments of deleted folders or in deleted sessions/contributions
+    are not counted, regardless of the event being deleted or not.
+    """
+    subcontrib_contrib = db.aliased(Contribution)
+    return (db.session
+            .query(*entities)
+            .select_from(Attachment)
+            .join(Attachment.folder)
+            .join(AttachmentFolder.event)
+            .outerjoin(AttachmentFolder.session)
+            .outerjoin(AttachmentFolder.contribution)
+            .outerjoin(AttachmentFolder.subcontribution)
+            .outerjoin(subcontrib_contrib, subcontrib_contrib.id == SubContribution.contribution_id)
+            .filter(AttachmentFolder.link_type != LinkType.category,
+                    ~Attachment.is_deleted,
+                    ~AttachmentFolder.is_deleted,
+                    # we have exactly one of those or none if the attachment is on the event itself
+                    ~db.func.coalesce(Session.is_deleted, Contribution.is_deleted, SubContribution.is_deleted,
+                                      False),
+                    # in case of a subcontribution we also need to check that the contrib is not deleted
+                    (subcontrib_contrib.is_deleted.is_(None) | ~subcontrib_contrib.is_deleted)))
+
+
+def _contribution_entry_query(*entities):
+    return (db.session
+            .query(*entities)
+            .select_from(TimetableEntry)
+            .join(TimetableEntry.event)
+            .filter(TimetableEntry.type == TimetableEntryType.CONTRIBUTION))
+
+
+def _store_category_stats(*criteria):
+    """Calculate the statistics of the events matching the criteria from scratch."""
+    def _counts(column):
+        return [(db.func.count() if col == column else db.literal(0)).label(col) for col in COUNT_COLUMNS]
+
+    category_id = Event.category_id.label('category_id')
+    event_filter = (~Event.is_deleted, Event.category_id.isnot(None), *criteria)
+    queries = [
+        (db.session.query(category_id, _year(Event.start_dt).label('year'), *_counts('event_count'))
+         .filter(*event_filter)
+         .group_by(Event.category_id, 'year')),
+        (db.session.query(category_id, _year(Event.created_dt).label('year'), *_counts('created_event_count'))
+         .filter(*event_filter)
+         .group_by(Event.category_id, 'year')),
+        (_contribution_entry_query(category_id, _year(TimetableEntry.start_dt).label('year'),
+                                   *_counts('contribution_count'))
+         .filter(*event_filter)
+         .group_by(Event.category_id, 'year')),
+        (_attachment_query(category_id, _year(Event.start_dt).label('year'), *_counts('attachment_count'))
+         .filter(*event_filter)
+         .group_by(Event.category_id, 'year')),
+    ]
+    counts = queries[0].union_all(*queries[1:]).subquery()
+    query = (db.session.query(counts.c.category_id, counts.c.year,
+                              *(db.cast(db.func.sum(counts.c[col]), db.Integer) for col in COUNT_COLUMNS))
+             .group_by(counts.c.category_id, counts.c.year))
+    stmt = insert(CategoryStatistics.__table__).from_select(['category_id', 'year', *COUNT_COLUMNS], query.statement)
+    db.session.execute(stmt)
+
+
+def refresh_category_stats(category_ids):
+    """Recalculate the statistics of the given categories from scratch.
+
+    Only the events directly inside the categories are taken into
+    account, so this does not need to be done for parent categories.
+    """
+    category_ids = set(category_ids)
+    (CategoryStatistics.query
+     .filter(CategoryStatistics.category_id.in_(category_ids))
+     .delete(synchronize_session=False))
+    _store_category_stats(Event.category_id.in_(category_ids))
+
+
+def rebuild_category_stats():
+    """Recalculate the statistics of all categories from scratch."""
+    # queued changes are already included in the new statistics
+    if has_app_context():
+        g.pop('category_stats_queue', None)
+    db.session.flush()
+    CategoryStatistics.query.delete(synchronize_session=False)
+    _store_category_stats()
+
+
+def apply_category_stats_changes(changes):
+    """Apply changes to the statistics of categories.
+
+    :param changes: A dict mapping ``(category_id, year)`` tuples to
+                    dicts/counters containing the value to add to each
+                    of the count columns.
+    """
+    rows = [dict({col: counts.get(col, 0) for col in COUNT_COLUMNS}, category_id=category_id, year=year)
+            for (category_id, year), counts in changes.items()
+            if any(counts.values())]
+    if not rows:
+        return
+    table = CategoryStatistics.__table__
+    stmt = insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(index_elements=['category_id', 'year'],
+                                      set_={col: table.c[col] + stmt.excluded[col] for col in COUNT_COLUMNS})
+    db.session.execute(stmt)
+
+
+def _get_year(dt):
+    return dt.astimezone(utc).year
+
+
+def get_event_stats(event, contents=True):
+    """Get the numbers an event adds to the statistics of its category.
+
+    :param event: An `Event`
+    :param contents: Whether to include contributions and attachments
+    :return: A dict mapping years to counters with the counts of the
+             event in that year.
+    """
+    year = _get_year(event.start_dt)
+    stats = defaultdict(Counter)
+    stats[year]['event_count'] += 1
+    stats[_get_year(event.created_dt)]['created_event_count'] += 1
+    if contents:
+        for entry_year, count in (_contribution_entry_query(_year(TimetableEntry.start_dt), db.func.count())
+                                  .filter(TimetableEntry.event_id == event.id)
+                                  .group_by(_year(TimetableEntry.start_dt))):
+            stats[entry_year]['contribution_count'] += count
+        stats[year]['attachment_count'] += get_event_attachment_count(event)
+    return stats
+
+
+def get_event_attachment_count(event):
+    """Get the number of attachments of an event counted in the statistics."""
+    return _attachment_query(db.func.count(Attachment.id)).filter(AttachmentFolder.event_id == event.id).scalar()
+
+
+def get_linked_attachment_count(*criteria):
+    """Get the number of attachments in folders matching the criteria.
+
+    Unlike :func:`get_event_attachment_count` this does not check
+    whether the objects the folders are linked to have been deleted.
+    """
+    return (db.session.query(db.func.count(Attachment.id))
+            .join(Attachment.folder)
+            .filter(~Attachment.is_deleted, ~AttachmentFolder.is_deleted, *criteria)
+            .scalar())
+
+
+def _get_queue():
+    return g.setdefault('category_stats_queue', {'changes': defaultdict(Counter), 'refresh': set()})
+
+
+def queue_category_stats_change(category_id, year, **counts):
+    """Queue a change of the statistics of a category.
+
+    The keyword arguments are the count columns of
+    :class:`CategoryStatistics` and the values added to them.
+    """
+    if category_id is None or not has_app_context():
+        return
+    _get_queue()['changes'][(category_id, year)].update(counts)
+
+
+def queue_event_stats_change(event, category_id=None, sign=1, contents=True):
+    """Queue adding (or removing) an event to/from the statistics of its category.
+
+    :param event: An `Event`
+    :param category_id: The category to update; defaults to the
+                        category of the event
+    :param sign: 1 to add the event, -1 to remove it
+    :param contents: Whether to include contributions and attachments
+    """
+    if category_id is None:
+        category_id = event.category_id
+    if category_id is None or not has_app_context():
+        return
+    for year, counts in get_event_stats(event, contents=contents).items():
+        queue_category_stats_change(category_id, year, **{col: sign * value for col, value in counts.items()})
+
+
+def queue_attachment_stats_change(event, count):
+    """Queue a change of the number of attachments in an event."""
+    if event is not None and count:
+        queue_category_stats_change(event.category_id, _get_year(event.start_dt), attachment_count=count)
+
+
+def queue_category_stats_refresh(category_id):
+    """Queue recalculating the statistics of a category from scratch.
+
+    This is meant for bulk changes where the exact changes of the
+    counts are not known.
+    """
+    if category_id is None or not has_app_context():
+        return
+    _get_queue()['refresh'].add(category_id)
+
+
+def discard_category_stats_queue():
+    """Discard all queued changes to the category statistics."""
+    g.pop('category_stats_queue', None)
+
+
+def flush_category_stats_queue():
+    """Write all queued changes to the category statistics."""
+    queue = g.pop('category_stats_queue', None)
+    if not queue:
+        return
+    db.session.flush()
+    refresh = queue['refresh']
+    # recalculating a category includes any other changes made to it
+    apply_category_stats_changes({key: counts for key, counts in queue['changes'].items() if key[0] not in refresh})
+    if refresh:
+        refresh_category_stats(refresh)
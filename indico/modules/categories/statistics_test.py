@@ -0,0 +1,98 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from datetime import datetime
+
+import pytest
+from pytz import utc
+
+from indico.modules.categories.models.statistics import CategoryStatistics
+from indico.modules.categories.statistics import flush_category_stats_queue, rebuild_category_stats
+from indico.modules.categories.util import get_category_stats
+from indico.modules.events.contributions.operations import delete_contribution
+from indico.modules.events.timetable.operations import schedule_contribution
+
+
+def _dt(year, month=1):
+    return datetime(year, month, 1, 12, tzinfo=utc)
+
+
+def _get_stored_stats():
+    return {(s.category_id, s.year): (s.event_count, s.created_event_count, s.contribution_count, s.attachment_count)
+            for s in CategoryStatistics.query
+            if s.event_count or s.created_event_count or s.contribution_count or s.attachment_count}
+
+
+@pytest.fixture
+def stats_events(create_category, create_event, create_contribution):
+    parent = create_category(101)
+    child = create_category(102, parent=parent)
+    old_event = create_event(101, category=parent, start_dt=_dt(2020), end_dt=_dt(2020, 2), created_dt=_dt(2019))
+    event = create_event(102, category=child, start_dt=_dt(2021), end_dt=_dt(2021, 2), created_dt=_dt(2021))
+    for i in range(3):
+        schedule_contribution(create_contribution(event, f'Talk {i}'), _dt(2021))
+    return parent, child, old_event, event
+
+
+@pytest.mark.usefixtures('request_context')
+def test_category_stats(db, stats_events):
+    parent, child, old_event, event = stats_events
+    rebuild_category_stats()
+    stats = get_category_stats(parent.id)
+    assert stats['events_by_year'] == {2020: 1, 2021: 1}
+    assert stats['contribs_by_year'] == {2021: 3}
+    assert stats['min_year'] == 2019
+    stats = get_category_stats(child.id)
+    assert stats['events_by_year'] == {2021: 1}
+    assert stats['contribs_by_year'] == {2021: 3}
+    assert stats['min_year'] == 2021
+
+
+@pytest.mark.usefixtures('request_context')
+def test_category_stats_incremental(db, stats_events, create_contribution):
+    parent, child, old_event, event = stats_events
+    rebuild_category_stats()
+    schedule_contribution(create_contribution(event, 'Late talk'), _dt(2022))
+    delete_contribution(event.contributions[0])
+    old_event.move(child)
+    flush_category_stats_queue()
+    updated = _get_stored_stats()
+    assert updated == {
+        (child.id, 2019): (0, 1, 0, 0),
+        (child.id, 2020): (1, 0, 0, 0),
+        (child.id, 2021): (1, 1, 2, 0),
+        (child.id, 2022): (0, 0, 1, 0),
+    }
+    event.delete('Testing')
+    flush_category_stats_queue()
+    updated = _get_stored_stats()
+    # the incremental updates must match what we'd get from scratch
+    rebuild_category_stats()
+    assert _get_stored_stats() == updated
+    assert get_category_stats(parent.id)['events_by_year'] == {2020: 1}
+
+
+@pytest.mark.usefixtures('request_context')
+def test_category_stats_flushed_on_commit(db, stats_events):
+    parent, child, old_event, event = stats_events
+    rebuild_category_stats()
+    old_event.move(child)
+    assert get_category_stats(child.id)['events_by_year'] == {2021: 1}
+    db.session.commit()
+    assert get_category_stats(child.id)['events_by_year'] == {2020: 1, 2021: 1}
+
+
+@pytest.mark.usefixtures('request_context')
+def test_category_stats_discarded_on_rollback(db, stats_events):
+    parent, child, old_event, event = stats_events
+    rebuild_category_stats()
+    with pytest.raises(ZeroDivisionError), db.session.begin_nested():
+        old_event.move(child)
+        1 / 0
+    db.session.commit()
+    assert get_category_stats(child.id)['events_by_year'] == {2021: 1}
+    assert old_event.category == parent
@@ -21,6 +21,7 @@ from reportlab.platypus import Paragraph
 from indico.core import signals
 from indico.legacy.pdfinterface.base import setTTFonts
 from indico.modules.designer import PageOrientation
+from indico.util.placeholders import get_placeholders
 from indico.util.signals import values_from_signal
 from indico.util.string import strip_tags
 
@@ -64,6 +65,8 @@ class DesignerPDFBase:
         if self.config.page_orientation == PageOrientation.landscape:
             self.page_size = pagesizes.landscape(self.page_size)
         self.width, self.height = self.page_size
+        self._background_images = {}
+        self._placeholders = None
         setTTFonts()
 
     def _process_tpl_data(self, tpl_data):
@@ -85,6 +88,26 @@ class DesignerPDFBase:
         fd.seek(0)
         return fd
 
+    def _get_background_image(self, template):
+        """Get the background image of a template.
+
+        The image is only loaded once per PDF even if it is drawn on
+        many pages, which also allows ReportLab to embed it only once.
+        """
+        try:
+            return self._background_images[template.id]
+        except KeyError:
+            with template.background_image.open() as f:
+                data = BytesIO(self._remove_transparency(f).read())
+            img = self._background_images[template.id] = ImageReader(data)
+            return img
+
+    @property
+    def placeholders(self):
+        if self._placeholders is None:
+            self._placeholders = get_placeholders('designer-fields')
+        return self._placeholders
+
     def get_pdf(self):
         data = BytesIO()
         canvas = Canvas(data, pagesize=self.page_size)
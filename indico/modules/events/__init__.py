@@ -178,6 +178,11 @@ def _check_cloners(app, **kwargs):
     get_event_cloners()
 
 
+@signals.core.import_tasks.connect
+def _import_tasks(sender, **kwargs):
+    import indico.modules.events.tasks  # noqa: F401
+
+
 @signals.event_management.get_cloners.connect
 def _get_cloners(sender, **kwargs):
     from indico.modules.events import clone
@@ -196,3 +201,41 @@ def _event_cloned(old_event, new_event, **kwargs):
     new_event.contact_title = old_event.contact_title
     new_event.contact_emails = old_event.contact_emails
     new_event.contact_phones = old_event.contact_phones
+
+
+@signals.event.updated.connect
+@signals.event.restored.connect
+@signals.event.session_updated.connect
+@signals.event.session_deleted.connect
+@signals.event.session_block_updated.connect
+@signals.event.session_block_deleted.connect
+@signals.event.contribution_created.connect
+@signals.event.contribution_updated.connect
+@signals.event.contribution_deleted.connect
+@signals.event.timetable_entry_created.connect
+@signals.event.timetable_entry_updated.connect
+@signals.event.timetable_entry_deleted.connect
+@signals.event.person_updated.connect
+def _invalidate_ical_cache(obj, **kwargs):
+    from indico.modules.events.ical import invalidate_event_ical_cache
+    if obj.event is not None:
+        invalidate_event_ical_cache(obj.event)
+
+
+@signals.event.times_changed.connect
+@signals.event.location_changed.connect
+def _event_obj_changed(sender, obj, **kwargs):
+    _invalidate_ical_cache(obj)
+
+
+@signals.acl.protection_changed.connect_via(Event)
+@signals.acl.entry_changed.connect_via(Event)
+def _event_protection_changed(sender, obj, **kwargs):
+    # the event logo is only included in the iCalendar data of public events
+    _invalidate_ical_cache(obj)
+
+
+@signals.core.after_commit.connect
+def _flush_ical_cache_invalidations(sender, **kwargs):
+    from indico.modules.events.ical import flush_ical_cache_invalidations
+    flush_ical_cache_invalidations()
@@ -5,7 +5,7 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
-from flask import render_template, session
+from flask import g, has_app_context, render_template, session
 
 from indico.core import signals
 from indico.core.config import config
@@ -36,14 +36,32 @@ logger = Logger.get('events.abstracts')
 @signals.event.person_updated.connect
 @signals.event.times_changed.connect
 def _clear_boa_cache(sender, obj=None, **kwargs):
+    from indico.modules.events.abstracts.settings import boa_settings
     from indico.modules.events.abstracts.util import clear_boa_cache
     if isinstance(obj, Break):
         # breaks do not show up in the BoA
         return
     event = (obj or sender).event
+    if config.LATEX_ENABLED and config.LATEX_CACHE_SIZE and boa_settings.get(event, 'cache_path'):
+        # the BoA has been generated before, so it is likely to be downloaded again
+        g.setdefault('boa_pregenerate_events', set()).add(event.id)
     clear_boa_cache(event)
 
 
+@signals.core.after_commit.connect
+def _pregenerate_boa(sender, **kwargs):
+    from indico.modules.events.abstracts.tasks import pregenerate_boa
+    if not has_app_context() or not (event_ids := g.pop('boa_pregenerate_events', None)):
+        return
+    # wait a bit since changes to contributions often come in batches
+    pregenerate_boa.apply_async([sorted(event_ids)], countdown=300)
+
+
+@signals.core.import_tasks.connect
+def _import_tasks(sender, **kwargs):
+    import indico.modules.events.abstracts.tasks  # noqa: F401
+
+
 @signals.menu.items.connect_via('event-management-sidemenu')
 def _extend_event_management_menu(sender, event, **kwargs):
     if not event.can_manage(session.user, permission='abstracts') or not AbstractsFeature.is_allowed_for_event(event):
@@ -46,6 +46,9 @@ class RHManageAbstractsActionsBase(RHAbstractListBase):
     """Base class for RHs performing actions on selected abstracts."""
 
     _abstract_query_options = ()
+    #: Whether to load all selected abstracts into `abstracts`.
+    #: When disabled, they need to be loaded from `abstracts_query`.
+    load_abstracts = True
 
     @property
     def _abstract_query(self):
@@ -57,7 +60,8 @@ class RHManageAbstractsActionsBase(RHAbstractListBase):
     def _process_args(self):
         RHAbstractListBase._process_args(self)
         ids = request.form.getlist('abstract_id', type=int)
-        self.abstracts = self._abstract_query.filter(Abstract.id.in_(ids)).all()
+        self.abstracts_query = self._abstract_query.filter(Abstract.id.in_(ids))
+        self.abstracts = self.abstracts_query.all() if self.load_abstracts else None
 
 
 class RHBulkAbstractJudgment(RHManageAbstractsActionsBase):
@@ -9,10 +9,13 @@ import os
 from operator import attrgetter
 
 from flask import redirect
+from sqlalchemy.orm import joinedload, selectinload
 from werkzeug.exceptions import NotFound
 
 from indico.core.config import config
+from indico.core.db.sqlalchemy.util.queries import iter_query_chunks
 from indico.legacy.pdfinterface.latex import AbstractsToPDF, ConfManagerAbstractsToPDF
+from indico.modules.events.abstracts.models.abstracts import Abstract
 from indico.modules.events.abstracts.models.files import AbstractFile
 from indico.modules.events.abstracts.util import generate_spreadsheet_from_abstracts
 from indico.modules.events.util import ZipGeneratorMixin
@@ -75,11 +78,28 @@ class AbstractsExportPDFMixin:
 
 
 class _AbstractsExportBaseMixin:
-    """Base mixin for all abstract list spreadsheet export mixins."""
+    """Base mixin for all abstract list spreadsheet export mixins.
+
+    The abstracts are loaded in chunks while writing the spreadsheet,
+    so exporting a huge number of abstracts does not require them to
+    be in memory at the same time.
+    """
+
+    load_abstracts = False
+    spreadsheet_query_options = (selectinload('field_values'), selectinload('person_links'),
+                                 selectinload('submitted_for_tracks'), selectinload('reviewed_for_tracks'),
+                                 selectinload('reviews').joinedload('ratings').joinedload('question'),
+                                 joinedload('submitter'), joinedload('accepted_track'),
+                                 joinedload('accepted_contrib_type'), joinedload('submitted_contrib_type'))
+
+    def _iter_abstracts(self):
+        query = self.abstracts_query.order_by(Abstract.friendly_id)
+        for chunk in iter_query_chunks(query, chunk_size=500, options=self.spreadsheet_query_options):
+            yield from chunk
 
     def _generate_spreadsheet(self):
         export_config = self.list_generator.get_list_export_config()
-        return generate_spreadsheet_from_abstracts(self.abstracts, export_config['static_item_ids'],
+        return generate_spreadsheet_from_abstracts(self._iter_abstracts(), export_config['static_item_ids'],
                                                    export_config['dynamic_items'])
 
 
@@ -87,7 +107,7 @@ class AbstractsExportCSV(_AbstractsExportBaseMixin):
     """Export list of abstracts to CSV."""
 
     def _process(self):
-        return send_csv('abstracts.csv', *self._generate_spreadsheet())
+        return send_csv('abstracts.csv', *self._generate_spreadsheet(), stream=True)
 
 
 class AbstractsExportExcel(_AbstractsExportBaseMixin):
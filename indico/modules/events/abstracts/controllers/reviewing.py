@@ -254,10 +254,17 @@ class RHDisplayAbstractListCustomize(CustomizeAbstractListMixin, RHDisplayAbstra
 class RHDisplayAbstractsActionsBase(RHDisplayAbstractListBase):
     """Base class for classes performing actions on abstract."""
 
+    #: Whether to load all selected abstracts into `abstracts`.
+    #: When disabled, they need to be loaded from `abstracts_query`.
+    load_abstracts = True
+
     def _process_args(self):
         RHDisplayAbstractListBase._process_args(self)
         ids = request.form.getlist('abstract_id', type=int)
-        self.abstracts = Abstract.query.with_parent(self.track, 'abstracts_reviewed').filter(Abstract.id.in_(ids)).all()
+        self.abstracts_query = (Abstract.query
+                                .with_parent(self.track, 'abstracts_reviewed')
+                                .filter(Abstract.id.in_(ids)))
+        self.abstracts = self.abstracts_query.all() if self.load_abstracts else None
 
 
 class RHDisplayAbstractsDownloadAttachments(AbstractsDownloadAttachmentsMixin, RHDisplayAbstractsActionsBase):
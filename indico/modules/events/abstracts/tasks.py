@@ -0,0 +1,29 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from indico.core.celery import celery
+from indico.core.db import db
+from indico.modules.events import Event
+from indico.modules.events.abstracts import logger
+from indico.modules.events.abstracts.util import create_boa
+from indico.modules.events.contributions import contribution_settings
+
+
+@celery.task(request_context=True)
+def pregenerate_boa(event_ids):
+    """Generate the book of abstracts of events after it changed.
+
+    This avoids having to wait for LaTeX when it is downloaded the
+    next time.
+    """
+    events = Event.query.filter(Event.id.in_(event_ids), ~Event.is_deleted).all()
+    for event in events:
+        if event.has_custom_boa or not contribution_settings.get(event, 'published'):
+            continue
+        logger.info('Generating book of abstracts of %r', event)
+        create_boa(event)
+        db.session.commit()
@@ -50,9 +50,13 @@ def build_default_email_template(event, tpl_type):
 def generate_spreadsheet_from_abstracts(abstracts, static_item_ids, dynamic_items):
     """Generate a spreadsheet data from a given abstract list.
 
-    :param abstracts: The list of abstracts to include in the file
+    :param abstracts: The abstracts to include in the file; any
+                      iterable works and it is only consumed while
+                      iterating over the rows
     :param static_item_ids: The abstract properties to be used as columns
     :param dynamic_items: Contribution fields as extra columns
+    :return: A tuple containing the column names and an iterator
+             yielding the rows
     """
     field_names = ['Id', 'Title']
     static_item_mapping = {
@@ -73,23 +77,25 @@ def generate_spreadsheet_from_abstracts(abstracts, static_item_ids, dynamic_item
     }
     field_names.extend(unique_col(item.title, item.id) for item in dynamic_items)
     field_names.extend(title for name, (title, fn) in static_item_mapping.items() if name in static_item_ids)
-    rows = []
-    for abstract in abstracts:
-        data = abstract.data_by_field
-        abstract_dict = {
-            'Id': abstract.friendly_id,
-            'Title': abstract.title
-        }
-        for item in dynamic_items:
-            key = unique_col(item.title, item.id)
-            abstract_dict[key] = data[item.id].friendly_data if item.id in data else ''
-        for name, (title, fn) in static_item_mapping.items():
-            if name not in static_item_ids:
-                continue
-            value = fn(abstract)
-            abstract_dict[title] = value
-        rows.append(abstract_dict)
-    return field_names, rows
+
+    def _iter_rows():
+        for abstract in abstracts:
+            data = abstract.data_by_field
+            abstract_dict = {
+                'Id': abstract.friendly_id,
+                'Title': abstract.title
+            }
+            for item in dynamic_items:
+                key = unique_col(item.title, item.id)
+                abstract_dict[key] = data[item.id].friendly_data if item.id in data else ''
+            for name, (title, fn) in static_item_mapping.items():
+                if name not in static_item_ids:
+                    continue
+                value = fn(abstract)
+                abstract_dict[title] = value
+            yield abstract_dict
+
+    return field_names, _iter_rows()
 
 
 @no_autoflush
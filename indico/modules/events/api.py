@@ -10,12 +10,13 @@ import re
 from collections import defaultdict
 from datetime import datetime
 from hashlib import md5
+from itertools import chain
 from operator import attrgetter
 
 import pytz
-from flask import request
+from flask import current_app, g, request, stream_with_context
 from sqlalchemy import Date, cast
-from sqlalchemy.orm import joinedload, subqueryload, undefer
+from sqlalchemy.orm import joinedload, load_only, subqueryload, undefer
 from werkzeug.exceptions import ServiceUnavailable
 
 from indico.core import signals
@@ -25,7 +26,7 @@ from indico.core.db.sqlalchemy.protection import ProtectionMode
 from indico.modules.attachments.api.util import build_folders_api_data, build_material_legacy_api_data
 from indico.modules.categories import Category
 from indico.modules.categories.models.legacy_mapping import LegacyCategoryMapping
-from indico.modules.categories.serialize import serialize_categories_ical
+from indico.modules.categories.serialize import serialize_categories_ical, stream_categories_ical
 from indico.modules.events import Event
 from indico.modules.events.contributions import contribution_settings
 from indico.modules.events.models.persons import PersonLinkBase
@@ -37,6 +38,7 @@ from indico.modules.rb.models.reservation_occurrences import ReservationOccurren
 from indico.util.date_time import iterdays
 from indico.util.signals import values_from_signal
 from indico.web.flask.util import send_file, url_for
+from indico.web.http_api.cache import get_category_cache_tags, get_event_cache_tags
 from indico.web.http_api.hooks.base import HTTPAPIHook, IteratedDataFetcher
 from indico.web.http_api.responses import HTTPAPIError
 from indico.web.http_api.util import get_query_parameter
@@ -98,6 +100,8 @@ class CategoryEventHook(HTTPAPIHook):
     TYPES = ('event', 'categ')
     RE = r'(?P<idlist>\w+(?:-\w+)*)'
     DEFAULT_DETAIL = 'events'
+    STREAMABLE = True
+    STREAM_EXTRA_KEYS = ('categoryId',)
     MAX_RECORDS = {
         'events': 1000,
         'contributions': 500,
@@ -127,6 +131,7 @@ class CategoryEventHook(HTTPAPIHook):
         legacy_query = LegacyCategoryMapping.query.filter(LegacyCategoryMapping.legacy_category_id.in_(id_list))
         legacy_id_map = {m.legacy_category_id: m.category_id for m in legacy_query}
         id_list = {str(legacy_id_map.get(id_, id_)) for id_ in id_list}
+        self._category_ids = id_list
         return expInt.category(id_list, self._format)
 
     def export_categ_extra(self, user, resultList):
@@ -138,6 +143,21 @@ class CategoryEventHook(HTTPAPIHook):
         expInt = CategoryEventFetcher(user, self)
         return expInt.event(self._idList)
 
+    def get_cache_tags(self):
+        if self._type == 'categ':
+            if self._wantFavorites:
+                # the favorite categories of the user may change at any time
+                return None
+            query = (Category.query
+                     .filter(Category.id.in_(list(map(int, self._category_ids))))
+                     .options(load_only('id'), undefer('chain_ids')))
+            return set(chain.from_iterable(get_category_cache_tags(c.chain_ids) for c in query))
+        else:
+            query = (Event.query
+                     .filter(Event.id.in_(list(map(int, self._idList))))
+                     .options(load_only('id', 'category_id'), undefer('category_chain')))
+            return set(chain.from_iterable(get_event_cache_tags(e.id, e.category_chain or ()) for e in query))
+
 
 class SerializerBase:
     """Common methods for different serializers."""
@@ -468,19 +488,23 @@ class CategoryEventFetcher(IteratedDataFetcher, SerializerBase):
         except ValueError:
             raise HTTPAPIError('Category IDs must be numeric', 400)
         if format == 'ics':
+            if self._stream:
+                data = stream_categories_ical(idlist, self.user,
+                                              event_filter=Event.happens_between(self._fromDT, self._toDT),
+                                              event_filter_fn=self._filter_event,
+                                              update_query=self._update_query)
+                return current_app.response_class(stream_with_context(data), mimetype='text/calendar',
+                                                  headers={'Content-Disposition': 'inline; filename=events.ics'})
             buf = serialize_categories_ical(idlist, self.user,
                                             event_filter=Event.happens_between(self._fromDT, self._toDT),
                                             event_filter_fn=self._filter_event,
                                             update_query=self._update_query)
             return send_file('events.ics', buf, 'text/calendar')
-        else:
-            query = (Event.query
-                     .filter(~Event.is_deleted,
-                             Event.category_chain_overlaps(idlist),
-                             Event.happens_between(self._fromDT, self._toDT))
-                     .options(*self._get_query_options(self._detail_level)))
-        query = self._update_query(query)
-        return self.serialize_events(x for x in query if self._filter_event(x) and x.can_access(self.user))
+        query = (Event.query
+                 .filter(~Event.is_deleted,
+                         Event.category_chain_overlaps(idlist),
+                         Event.happens_between(self._fromDT, self._toDT)))
+        return self._get_events(self._update_query(query))
 
     def category_extra(self, ids):
         if self._toDT is None:
@@ -501,10 +525,26 @@ class CategoryEventFetcher(IteratedDataFetcher, SerializerBase):
         query = (Event.query
                  .filter(Event.id.in_(idlist),
                          ~Event.is_deleted,
-                         Event.happens_between(self._fromDT, self._toDT))
-                 .options(*self._get_query_options(self._detail_level)))
-        query = self._update_query(query)
-        return self.serialize_events(x for x in query if self._filter_event(x) and x.can_access(self.user))
+                         Event.happens_between(self._fromDT, self._toDT)))
+        return self._get_events(self._update_query(query))
+
+    def _get_events(self, query):
+        options = self._get_query_options(self._detail_level)
+        if self._stream:
+            return self._iter_events(query, options)
+        return self.serialize_events(self._get_accessible_events(query.options(*options)))
+
+    def _iter_events(self, query, options):
+        for events in self._iter_chunked(query, options):
+            yield from self.serialize_events(self._get_accessible_events(events))
+            # those caches only contain data for the events of the current chunk
+            g.pop('event_attachments', None)
+            g.pop('legacy_api_event_attachments', None)
+
+    def _get_accessible_events(self, events):
+        events = [x for x in events if self._filter_event(x)]
+        access = Event.can_access_many(events, self.user)
+        return [x for x in events if access[x]]
 
     def _filter_event(self, event):
         if self._room or self._location or self._eventType:
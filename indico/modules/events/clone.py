@@ -9,7 +9,7 @@ from indico.core import signals
 from indico.core.db import db
 from indico.core.db.sqlalchemy.principals import clone_principals
 from indico.core.db.sqlalchemy.util.models import get_simple_column_attrs
-from indico.modules.events.cloning import EventCloner
+from indico.modules.events.cloning import ClonedObjectMap, EventCloner, clone_rows, get_id_map
 from indico.modules.events.models.events import EventType
 from indico.modules.events.models.persons import EventPerson, EventPersonLink
 from indico.modules.events.models.principals import EventPrincipal
@@ -50,6 +50,7 @@ class EventPersonCloner(EventCloner):
     friendly_name = _('Persons')
     is_internal = True
     is_default = True
+    supports_bulk = True
 
     # We do not override `is_available` as we have cloners depending
     # on this internal cloner even if it won't clone anything.
@@ -65,6 +66,11 @@ class EventPersonCloner(EventCloner):
         db.session.flush()
         return {'person_map': self._person_map}
 
+    def run_bulk(self, new_event, cloners, shared_data):
+        person_map = clone_rows(EventPerson, EventPerson.event_id == self.old_event.id,
+                                values={'event_id': new_event.id}, extra_columns={'user_id'})
+        return {'person_map': ClonedObjectMap(EventPerson, person_map)}
+
     def _clone_persons(self, new_event):
         attrs = get_simple_column_attrs(EventPerson) | {'user'}
         for old_person in self.old_event.persons:
@@ -78,6 +84,7 @@ class EventPersonLinkCloner(EventCloner):
     name = 'event_person_links'
     requires = {'event_persons'}
     is_default = True
+    supports_bulk = True
 
     @property
     def friendly_name(self):
@@ -103,6 +110,11 @@ class EventPersonLinkCloner(EventCloner):
             self._clone_person_links(new_event)
         db.session.flush()
 
+    def run_bulk(self, new_event, cloners, shared_data):
+        clone_rows(EventPersonLink, EventPersonLink.event_id == self.old_event.id,
+                   values={'event_id': new_event.id},
+                   id_maps={'person_id': get_id_map(shared_data['event_persons']['person_map'])})
+
     def _has_content(self, event):
         return bool(event.person_links)
 
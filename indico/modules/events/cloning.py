@@ -5,9 +5,16 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
+from collections.abc import Mapping
 from operator import attrgetter
 
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import ClauseElement
+from werkzeug.utils import cached_property
+
 from indico.core import signals
+from indico.core.db import db
+from indico.core.db.sqlalchemy.principals import PrincipalType
 from indico.util.caching import memoize_request
 from indico.util.decorators import cached_classproperty
 from indico.util.i18n import _
@@ -59,6 +66,9 @@ class EventCloner:
     #: Whether this cloner only allows cloning into new events and
     #: is not available when importing into an existing event.
     new_event_only = False
+    #: Whether this cloner implements :meth:`run_bulk` to copy the
+    #: data using set-based SQL statements instead of the ORM.
+    supports_bulk = False
 
     @classmethod
     def get_cloners(cls, old_event):
@@ -67,7 +77,7 @@ class EventCloner:
                       key=attrgetter('friendly_name'))
 
     @classmethod
-    def run_cloners(cls, old_event, new_event, cloners, n_occurrence=0, event_exists=False):
+    def run_cloners(cls, old_event, new_event, cloners, n_occurrence=0, event_exists=False, bulk=False):
         all_cloners = {name: cloner_cls(old_event, n_occurrence)
                        for name, cloner_cls in get_event_cloners().items()}
         if any(cloner.is_internal for name, cloner in all_cloners.items() if name in cloners):
@@ -99,8 +109,16 @@ class EventCloner:
         shared_data = {}
         cloner_names = set(active_cloners)
         for name, cloner in active_cloners.items():
-            shared_data[name] = cloner.run(new_event, cloner_names, cloner._prepare_shared_data(shared_data),
-                                           event_exists=event_exists)
+            cloner_shared_data = cloner._prepare_shared_data(shared_data)
+            if bulk and cloner.supports_bulk and not event_exists:
+                # bulk cloners write to the database directly, so anything pending needs to be
+                # flushed first and anything loaded on the new event may be outdated afterwards
+                db.session.flush()
+                shared_data[name] = cloner.run_bulk(new_event, cloner_names, cloner_shared_data)
+                db.session.flush()
+                db.session.expire(new_event)
+            else:
+                shared_data[name] = cloner.run(new_event, cloner_names, cloner_shared_data, event_exists=event_exists)
         return active_cloners
 
     @cached_classproperty
@@ -157,6 +175,20 @@ class EventCloner:
         """
         raise NotImplementedError
 
+    def run_bulk(self, new_event, cloners, shared_data):
+        """Perform the cloning operation using set-based SQL statements.
+
+        This is only used when cloning into a new event and if
+        `supports_bulk` is set.  Instead of creating ORM objects, the
+        rows should be copied using :func:`clone_rows` and the data
+        returned for other cloners should contain a
+        :class:`ClonedObjectMap` where :meth:`run` returns a dict
+        mapping old objects to new ones.
+
+        The arguments and return value are the same as in :meth:`run`.
+        """
+        raise NotImplementedError
+
     @property
     def is_visible(self):
         """Whether the clone operation should be shown at all.
@@ -220,3 +252,188 @@ def get_event_cloners():
     """
     cloners = named_objects_from_signal(signals.event_management.get_cloners.send(), plugin_attr='plugin')
     return dict(_resolve_dependencies(cloners))
+
+
+class ClonedObjectMap(Mapping):
+    """A mapping between original and cloned objects based on their ids.
+
+    Bulk cloners only know the ids of the rows they created.  This
+    mapping behaves like the dicts returned by ORM-based cloners and
+    loads the objects only once they are actually accessed.
+
+    :param model: The model of the cloned objects
+    :param id_map: A dict mapping old ids to new ids
+    """
+
+    def __init__(self, model, id_map):
+        self.model = model
+        self.id_map = id_map
+
+    def _load(self, ids):
+        if not ids:
+            return {}
+        return {obj.id: obj for obj in self.model.query.filter(in_id_map(self.model.id, ids)).order_by(self.model.id)}
+
+    @cached_property
+    def _old_objects(self):
+        return self._load(list(self.id_map))
+
+    @cached_property
+    def _new_objects(self):
+        return self._load(list(self.id_map.values()))
+
+    def __getitem__(self, old_obj):
+        return self._new_objects[self.id_map[old_obj.id]]
+
+    def __iter__(self):
+        return iter(self._old_objects.values())
+
+    def __len__(self):
+        return len(self.id_map)
+
+
+def get_id_map(mapping):
+    """Get a dict mapping old to new ids from the object mapping of a cloner.
+
+    :param mapping: A :class:`ClonedObjectMap` or a dict mapping old
+                    objects to new ones
+    """
+    if isinstance(mapping, ClonedObjectMap):
+        return mapping.id_map
+    return {old.id: new.id for old, new in mapping.items()}
+
+
+def _id_array(ids):
+    return db.literal(list(ids), ARRAY(db.Integer))
+
+
+def _id_map_table(id_map, name):
+    return (db.func.unnest(_id_array(id_map), _id_array(id_map.values()))
+            .table_valued('old_id', 'new_id')
+            .render_derived(name=name))
+
+
+def in_id_map(column, ids):
+    """Create a criterion checking whether a column contains one of the ids.
+
+    Unlike ``column.in_(ids)`` this passes the ids as a single array,
+    which is much faster for large numbers of ids.
+
+    :param column: The column to check
+    :param ids: A collection of ids, e.g. the keys of an id mapping
+    """
+    return column == db.func.any(_id_array(ids))
+
+
+def clone_rows(model, *criteria, values=None, id_maps=None, extra_columns=frozenset(), exclude=frozenset()):
+    """Copy rows of a table using a single ``INSERT ... SELECT``.
+
+    All columns which are neither primary nor foreign keys are copied,
+    similar to what :func:`~indico.core.db.sqlalchemy.util.models.get_simple_column_attrs`
+    is used for when cloning objects using the ORM.  Foreign keys
+    pointing to other cloned objects are remapped using `id_maps`.
+
+    :param model: The model whose rows are copied
+    :param criteria: Criteria selecting the rows to copy
+    :param values: A dict mapping column names to values or SQL
+                   expressions (which may reference the original row)
+                   to use in the new rows
+    :param id_maps: A dict mapping foreign key column names to dicts
+                    mapping old to new ids.  References to ids which
+                    are not in the mapping are set to ``NULL``.
+    :param extra_columns: Names of foreign key columns to copy as they
+                          are, e.g. references to users or rooms
+    :param exclude: Names of columns which should not be copied
+    :return: A dict mapping the ids of the original rows to the ids of
+             the new rows or ``None`` if the table has no ``id``
+             primary key
+    """
+    values = values or {}
+    id_maps = id_maps or {}
+    table = model.__table__
+    columns = {}
+    from_ = table
+    for col in table.columns:
+        if col.name in values:
+            value = values[col.name]
+            columns[col.name] = value if isinstance(value, ClauseElement) else db.literal(value, col.type)
+        elif col.name in id_maps:
+            mapping = _id_map_table(id_maps[col.name], f'{col.name}_map')
+            from_ = from_.outerjoin(mapping, col == mapping.c.old_id)
+            columns[col.name] = mapping.c.new_id
+        elif col.name not in exclude and (col.name in extra_columns or not (col.primary_key or col.foreign_keys)):
+            columns[col.name] = col
+    if 'id' not in table.c or not table.c.id.primary_key:
+        query = db.select(list(columns.values())).select_from(from_).where(db.and_(*criteria))
+        db.session.execute(table.insert().from_select(list(columns), query))
+        return None
+    old_id_query = db.select([table.c.id]).where(db.and_(*criteria)).order_by(table.c.id)
+    old_ids = [id_ for id_, in db.session.execute(old_id_query)]
+    if not old_ids:
+        return {}
+    sequence = db.func.pg_get_serial_sequence(table.fullname, 'id')
+    new_id_query = db.select([db.func.nextval(sequence)]).select_from(db.func.generate_series(1, len(old_ids)))
+    new_ids = sorted(id_ for id_, in db.session.execute(new_id_query))
+    id_map = dict(zip(old_ids, new_ids))
+    # joining the id mapping already limits the query to the selected rows
+    mapping = _id_map_table(id_map, 'id_map')
+    from_ = from_.join(mapping, table.c.id == mapping.c.old_id)
+    columns['id'] = mapping.c.new_id
+    query = db.select(list(columns.values())).select_from(from_)
+    db.session.execute(table.insert().from_select(list(columns), query))
+    return id_map
+
+
+def remap_cloned_column(model, column, id_map, value_map):
+    """Set a foreign key of rows copied using :func:`clone_rows` afterwards.
+
+    This is needed when two tables reference each other, since the
+    rows of one of them need to exist before the other one is copied.
+
+    :param model: The model of the copied rows
+    :param column: The name of the foreign key column to update
+    :param id_map: The id mapping returned when copying the rows
+    :param value_map: A dict mapping the old values of the column to
+                      the new ones
+    """
+    if not id_map or not value_map:
+        return
+    table = model.__table__
+    old_rows = table.alias('old_rows')
+    row_mapping = _id_map_table(id_map, 'row_map')
+    value_mapping = _id_map_table(value_map, 'value_map')
+    stmt = (table.update()
+            .values({column: value_mapping.c.new_id})
+            .where(table.c.id == row_mapping.c.new_id,
+                   old_rows.c.id == row_mapping.c.old_id,
+                   old_rows.c[column] == value_mapping.c.old_id))
+    db.session.execute(stmt)
+
+
+def clone_principal_rows(model, parent_column, parent_map, event_role_map=None, regform_map=None):
+    """Copy the ACL entries of objects cloned using :func:`clone_rows`.
+
+    Like :func:`~indico.core.db.sqlalchemy.principals.clone_principals`,
+    event role and registration form principals are skipped if the
+    corresponding mapping is ``None``.
+
+    :param model: The principal model (a `PrincipalMixin` subclass)
+    :param parent_column: The name of the column referencing the
+                          object the ACL entry belongs to
+    :param parent_map: A dict mapping old to new ids of those objects
+    :param event_role_map: The mapping from old to new event roles
+    :param regform_map: The mapping from old to new registration forms
+    """
+    table = model.__table__
+    criteria = [in_id_map(table.c[parent_column], parent_map)]
+    id_maps = {parent_column: parent_map}
+    for column, principal_type, mapping in (('event_role_id', PrincipalType.event_role, event_role_map),
+                                            ('registration_form_id', PrincipalType.registration_form, regform_map)):
+        if column not in table.c:
+            continue
+        elif mapping is None:
+            criteria.append(table.c.type != principal_type)
+        else:
+            id_maps[column] = get_id_map(mapping)
+    return clone_rows(model, *criteria, id_maps=id_maps,
+                      extra_columns={'user_id', 'local_group_id', 'ip_network_group_id', 'category_role_id'})
@@ -5,17 +5,45 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
-from datetime import datetime
+import json
+from datetime import date, datetime, timedelta
 
 import pytest
+from flask import request, session
 from pytz import timezone
 
-from indico.modules.events.management.controllers.cloning import (CloneCalculator, IntervalCloneCalculator,
-                                                                  PatternCloneCalculator)
+from indico.modules.attachments.models.attachments import Attachment, AttachmentFile, AttachmentType
+from indico.modules.attachments.models.folders import AttachmentFolder
+from indico.modules.attachments.models.principals import AttachmentFolderPrincipal
+from indico.modules.categories.statistics import rebuild_category_stats
+from indico.modules.categories.util import get_category_stats
+from indico.modules.events.contributions.models.contributions import Contribution
+from indico.modules.events.contributions.models.fields import ContributionField, ContributionFieldValue
+from indico.modules.events.contributions.models.persons import ContributionPersonLink, SubContributionPersonLink
+from indico.modules.events.contributions.models.principals import ContributionPrincipal
+from indico.modules.events.contributions.models.subcontributions import SubContribution
+from indico.modules.events.contributions.models.types import ContributionType
+from indico.modules.events.management.controllers.cloning import (MAX_INLINE_CLONES, CloneCalculator,
+                                                                  IntervalCloneCalculator, PatternCloneCalculator,
+                                                                  RHCloneEvent)
 from indico.modules.events.management.forms import CloneRepeatIntervalForm, CloneRepeatPatternForm
+from indico.modules.events.models.events import EventType
+from indico.modules.events.models.persons import EventPerson, EventPersonLink
+from indico.modules.events.operations import clone_event
+from indico.modules.events.sessions.models.blocks import SessionBlock
+from indico.modules.events.sessions.models.persons import SessionBlockPersonLink
+from indico.modules.events.sessions.models.principals import SessionPrincipal
+from indico.modules.events.sessions.models.sessions import Session
+from indico.modules.events.tasks import clone_event_occurrence
+from indico.modules.events.timetable.models.breaks import Break
+from indico.modules.events.timetable.models.entries import TimetableEntry
 from indico.util.date_time import relativedelta
 
 
+pytest_plugins = ('indico.modules.events.registration.testing.fixtures',
+                  'indico.modules.events.timetable.testing.fixtures')
+
+
 @pytest.mark.parametrize(('start_dt', 'delta', 'stop_criterion', 'num_times', 'until_dt',
                           'expected_dates', 'expected_flag'), (
     (datetime(2017, 2, 28, 3, 0, 0), relativedelta(years=1), 'num_times', 2, None,
@@ -81,3 +109,152 @@ def test_dst_change(event_date, event_timezone, dummy_event):
     clone_calulator = CloneCalculator(dummy_event)
     event_local_date = clone_calulator._tzify([event_date])[0]
     assert event_local_date == timezone(event_timezone).localize(event_date)
+
+
+@pytest.fixture
+def event_to_clone(db, dummy_event, dummy_user, dummy_regform, create_entry):
+    dummy_event.type_ = EventType.conference
+    dummy_event.start_dt = dummy_event.tzinfo.localize(datetime(2022, 2, 7, 9, 0))
+    dummy_event.end_dt = dummy_event.tzinfo.localize(datetime(2022, 2, 7, 18, 0))
+    speaker = EventPerson.create_from_user(dummy_user, dummy_event)
+    chair = EventPerson(event=dummy_event, first_name='Guinea', last_name='Pig', email='pig@example.com')
+    dummy_event.person_links = [EventPersonLink(person=chair)]
+    contrib_type = ContributionType(event=dummy_event, name='Talk')
+    contrib_field = ContributionField(event=dummy_event, title='Level', field_type='text')
+    sess = Session(event=dummy_event, title='Session',
+                   acl_entries={SessionPrincipal(principal=dummy_user, permissions={'coordinate'})})
+    block = SessionBlock(session=sess, title='Block', duration=timedelta(hours=2),
+                         person_links=[SessionBlockPersonLink(person=chair)])
+    contrib = Contribution(event=dummy_event, title='Contribution', duration=timedelta(minutes=30), type=contrib_type,
+                           session=sess, session_block=block,
+                           person_links=[ContributionPersonLink(person=speaker, is_speaker=True)],
+                           field_values=[ContributionFieldValue(contribution_field=contrib_field, data='expert')],
+                           acl_entries={ContributionPrincipal(principal=dummy_user, permissions={'submit'})})
+    SubContribution(contribution=contrib, title='Subcontribution', duration=timedelta(minutes=10),
+                    person_links=[SubContributionPersonLink(person=speaker)])
+    top_contrib = Contribution(event=dummy_event, title='Keynote', duration=timedelta(minutes=45))
+    Contribution(event=dummy_event, title='Deleted', duration=timedelta(minutes=20), is_deleted=True)
+    break_ = Break(title='Coffee', duration=timedelta(minutes=15))
+    db.session.flush()
+    block_entry = create_entry(block, dummy_event.start_dt)
+    dummy_event.timetable_entries.append(TimetableEntry(parent=block_entry, object=contrib,
+                                                        start_dt=dummy_event.start_dt))
+    create_entry(top_contrib, dummy_event.start_dt + timedelta(hours=3))
+    dummy_event.timetable_entries.append(TimetableEntry(object=break_,
+                                                        start_dt=dummy_event.start_dt + timedelta(hours=2)))
+    folder = AttachmentFolder(object=contrib, title='Slides')
+    file_ = AttachmentFile(user=dummy_user, filename='slides.txt', content_type='text/plain')
+    Attachment(folder=folder, user=dummy_user, title='Slides', type=AttachmentType.file, file=file_)
+    with db.session.no_autoflush:
+        file_.save(b'slide data')
+    event_folder = AttachmentFolder(object=dummy_event, title='Minutes',
+                                    acl_entries={AttachmentFolderPrincipal(principal=dummy_user)})
+    Attachment(folder=event_folder, user=dummy_user, title='Link', type=AttachmentType.link,
+               link_url='https://example.com')
+    db.session.flush()
+    return dummy_event
+
+
+def _get_clone_data(event):
+    def _persons(links):
+        return sorted((link.full_name, link.person.user_id) for link in links)
+
+    def _acl(entries):
+        return sorted((entry.principal.identifier, sorted(getattr(entry, 'permissions', []))) for entry in entries)
+
+    return {
+        'persons': sorted((p.full_name, p.email, p.user_id) for p in event.persons),
+        'person_links': _persons(event.person_links),
+        'contributions': sorted((c.title, c.friendly_id, c.duration, c.type.name if c.type else None,
+                                 c.session.title if c.session else None,
+                                 c.session_block.title if c.session_block else None,
+                                 _persons(c.person_links), _acl(c.acl_entries),
+                                 [(fv.contribution_field.title, fv.data) for fv in c.field_values],
+                                 [(sc.title, _persons(sc.person_links)) for sc in c.subcontributions])
+                                for c in event.contributions),
+        'sessions': sorted((s.title, s.friendly_id, _acl(s.acl_entries),
+                            [(b.title, _persons(b.person_links)) for b in s.blocks])
+                           for s in event.sessions),
+        'timetable': sorted((e.type.name, e.start_dt - event.start_dt, e.object.title,
+                             e.parent.object.title if e.parent else None)
+                            for e in event.timetable_entries),
+        'regforms': [(f.title, [(s.title, sorted((i.title, i.current_data.versioned_data if i.is_field else None)
+                                                 for i in s.children))
+                                for s in f.sections])
+                     for f in event.registration_forms],
+        'attachments': sorted((f.title, f.link_type.name, getattr(f.object, 'title', None), _acl(f.acl_entries),
+                               [(a.title, a.link_url, a.file.open().read() if a.file else None)
+                                for a in f.attachments])
+                              for f in event.all_attachment_folders),
+        'last_friendly_ids': (event._last_friendly_contribution_id, event._last_friendly_session_id),
+    }
+
+
+@pytest.mark.usefixtures('request_context')
+def test_clone_event_bulk(db, event_to_clone, dummy_user):
+    session.set_session_user(dummy_user)
+    cloners = {'event_person_links', 'timetable', 'registration_forms', 'attachments'}
+    start_dt = event_to_clone.start_dt + timedelta(days=7)
+    orm_clone = clone_event(event_to_clone, 0, start_dt, set(cloners))
+    bulk_clone = clone_event(event_to_clone, 1, start_dt, set(cloners), bulk=True)
+    db.session.flush()
+    db.session.expire_all()
+    expected = _get_clone_data(orm_clone)
+    assert expected['contributions']
+    assert expected['timetable']
+    assert expected['attachments']
+    assert _get_clone_data(bulk_clone) == expected
+    assert {c.id for c in bulk_clone.contributions}.isdisjoint(c.id for c in event_to_clone.contributions)
+
+
+@pytest.mark.usefixtures('request_context')
+def test_clone_event_occurrence_task(db, event_to_clone, dummy_user, create_category):
+    category = create_category(1337)
+    rebuild_category_stats()
+    start_dt = event_to_clone.start_dt + timedelta(days=364)
+    clone_event_occurrence(event_to_clone, 1, start_dt, {'timetable'}, category, False, dummy_user)
+    db.session.expire_all()
+    clone = category.events[0]
+    assert clone.start_dt == start_dt
+    assert {c.title for c in clone.contributions} == {'Contribution', 'Keynote'}
+    # the statistics queued inside the task have been written when it committed
+    stats = get_category_stats(category.id)
+    assert stats['events_by_year'] == {2023: 1}
+    assert stats['contribs_by_year'] == {2023: 2}
+
+
+@pytest.mark.usefixtures('request_context')
+def test_clone_event_occurrence_task_failed(db, mocker, event_to_clone, dummy_user, dummy_category):
+    mocker.patch('indico.modules.events.tasks.clone_event', side_effect=RuntimeError('clone failed'))
+    notify = mocker.patch('indico.modules.events.tasks.notify_clone_failed')
+    start_dt = event_to_clone.start_dt + timedelta(days=7)
+    with pytest.raises(RuntimeError):
+        clone_event_occurrence(event_to_clone, 1, start_dt, {'timetable'}, dummy_category, False, dummy_user)
+    notify.assert_called_once_with(event_to_clone, start_dt, dummy_user)
+
+
+@pytest.mark.parametrize('num_times', (MAX_INLINE_CLONES, MAX_INLINE_CLONES + 1))
+def test_clone_event_recurring(db, app, mocker, event_to_clone, dummy_user, create_category, num_times):
+    delay = mocker.patch('indico.modules.events.management.controllers.cloning.clone_event_occurrence.delay')
+    category = create_category(1337)
+    category.update_principal(dummy_user, full_access=True)
+    db.session.flush()
+    data = {'step': '5', 'repeatability': 'interval', 'selected_items': ['timetable'],
+            'category': json.dumps({'id': category.id}), 'start_dt': ['14/02/2022', '09:00'],
+            'recurrence': ['1', 'weeks'], 'stop_criterion': 'num_times', 'num_times': str(num_times)}
+    with app.test_request_context(method='POST', data=data):
+        session.set_session_user(dummy_user)
+        request.form = request.form.copy()
+        request.form['csrf_token'] = session.csrf_token
+        rh = RHCloneEvent()
+        rh.event = event_to_clone
+        rh._process()
+    db.session.expire_all()
+    if num_times <= MAX_INLINE_CLONES:
+        # small series are cloned right away
+        assert not delay.called
+        expected = [date(2022, 2, 14) + timedelta(weeks=i) for i in range(num_times)]
+        assert sorted(e.start_dt.date() for e in category.events) == expected
+    else:
+        assert not category.events
+        assert [c.args[1] for c in delay.call_args_list] == list(range(1, num_times + 1))
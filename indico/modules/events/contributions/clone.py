@@ -15,7 +15,8 @@ from indico.core.db import db
 from indico.core.db.sqlalchemy.principals import clone_principals
 from indico.core.db.sqlalchemy.util.models import get_simple_column_attrs
 from indico.core.db.sqlalchemy.util.session import no_autoflush
-from indico.modules.events.cloning import EventCloner
+from indico.modules.events.cloning import (ClonedObjectMap, EventCloner, clone_principal_rows, clone_rows, get_id_map,
+                                           in_id_map)
 from indico.modules.events.contributions import Contribution
 from indico.modules.events.contributions import logger as contributions_logger
 from indico.modules.events.contributions.models.fields import ContributionField, ContributionFieldValue
@@ -33,6 +34,7 @@ class ContributionTypeCloner(EventCloner):
     name = 'contribution_types'
     friendly_name = _('Contribution types')
     is_internal = True
+    supports_bulk = True
 
     # We do not override `is_available` as we have cloners depending
     # on this internal cloner even if it won't clone anything.
@@ -47,6 +49,11 @@ class ContributionTypeCloner(EventCloner):
         db.session.flush()
         return {'contrib_type_map': self._contrib_type_map}
 
+    def run_bulk(self, new_event, cloners, shared_data):
+        contrib_type_map = clone_rows(ContributionType, ContributionType.event_id == self.old_event.id,
+                                      values={'event_id': new_event.id})
+        return {'contrib_type_map': ClonedObjectMap(ContributionType, contrib_type_map)}
+
     def _clone_contrib_types(self, new_event):
         attrs = get_simple_column_attrs(ContributionType)
         for old_contrib_type in self.old_event.contribution_types:
@@ -60,6 +67,7 @@ class ContributionFieldCloner(EventCloner):
     name = 'contribution_fields'
     friendly_name = _('Contribution fields')
     is_internal = True  # XXX: does it make sense to expose this cloner?
+    supports_bulk = True
 
     # We do not override `is_available` as we have cloners depending
     # on this internal cloner even if it won't clone anything.
@@ -74,6 +82,11 @@ class ContributionFieldCloner(EventCloner):
         db.session.flush()
         return {'contrib_field_map': self._contrib_field_map}
 
+    def run_bulk(self, new_event, cloners, shared_data):
+        contrib_field_map = clone_rows(ContributionField, ContributionField.event_id == self.old_event.id,
+                                       values={'event_id': new_event.id})
+        return {'contrib_field_map': ClonedObjectMap(ContributionField, contrib_field_map)}
+
     def _clone_contrib_fields(self, new_event):
         attrs = get_simple_column_attrs(ContributionField) - {'field_data'}
         for old_contrib_field in self.old_event.contribution_fields:
@@ -90,6 +103,7 @@ class ContributionCloner(EventCloner):
     requires = {'event_persons', 'sessions', 'contribution_types', 'contribution_fields'}
     uses = {'event_roles'}
     is_internal = True
+    supports_bulk = True
 
     # We do not override `is_available` as we have cloners depending
     # on this internal cloner even if it won't clone anything.
@@ -161,6 +175,36 @@ class ContributionCloner(EventCloner):
         db.session.flush()
         return {'contrib_map': self._contrib_map, 'subcontrib_map': self._subcontrib_map}
 
+    def run_bulk(self, new_event, cloners, shared_data):
+        event_role_map = shared_data['event_roles']['event_role_map'] if 'event_roles' in cloners else None
+        person_map = get_id_map(shared_data['event_persons']['person_map'])
+        session_map = get_id_map(shared_data['sessions']['session_map'])
+        session_block_map = get_id_map(shared_data['sessions']['session_block_map'])
+        contrib_type_map = get_id_map(shared_data['contribution_types']['contrib_type_map'])
+        contrib_field_map = get_id_map(shared_data['contribution_fields']['contrib_field_map'])
+        contrib_map = clone_rows(Contribution, Contribution.event_id == self.old_event.id, ~Contribution.is_deleted,
+                                 values={'event_id': new_event.id},
+                                 id_maps={'session_id': session_map, 'session_block_id': session_block_map,
+                                          'type_id': contrib_type_map},
+                                 extra_columns={'room_id', 'venue_id'})
+        subcontrib_map = clone_rows(SubContribution, in_id_map(SubContribution.contribution_id, contrib_map),
+                                    ~SubContribution.is_deleted,
+                                    id_maps={'contribution_id': contrib_map})
+        for cls, parent_column, parent_map in ((ContributionReference, 'contribution_id', contrib_map),
+                                               (SubContributionReference, 'subcontribution_id', subcontrib_map)):
+            clone_rows(cls, in_id_map(cls.__table__.c[parent_column], parent_map),
+                       id_maps={parent_column: parent_map}, extra_columns={'reference_type_id'})
+        for cls, parent_column, parent_map in ((ContributionPersonLink, 'contribution_id', contrib_map),
+                                               (SubContributionPersonLink, 'subcontribution_id', subcontrib_map)):
+            clone_rows(cls, in_id_map(cls.__table__.c[parent_column], parent_map),
+                       id_maps={parent_column: parent_map, 'person_id': person_map})
+        clone_rows(ContributionFieldValue, in_id_map(ContributionFieldValue.contribution_id, contrib_map),
+                   id_maps={'contribution_id': contrib_map, 'contribution_field_id': contrib_field_map})
+        clone_principal_rows(ContributionPrincipal, 'contribution_id', contrib_map, event_role_map)
+        self._synchronize_friendly_id(new_event)
+        return {'contrib_map': ClonedObjectMap(Contribution, contrib_map),
+                'subcontrib_map': ClonedObjectMap(SubContribution, subcontrib_map)}
+
     def _create_new_contribution(self, event, old_contrib, preserve_session=True, excluded_attrs=None,
                                  event_exists=False):
         attrs = (get_simple_column_attrs(Contribution) | {'own_room', 'own_venue'}) - {'abstract_id'}
@@ -120,10 +120,15 @@ class RHManageSubContributionBase(RHManageContributionBase):
 class RHManageContributionsActionsBase(RHManageContributionsBase):
     """Base class for classes performing actions on event contributions."""
 
+    #: Whether to load all selected contributions into `contribs`.
+    #: When disabled, they need to be loaded from `contribs_query`.
+    load_contribs = True
+
     def _process_args(self):
         RHManageContributionsBase._process_args(self)
         self.contrib_ids = [int(x) for x in request.form.getlist('contribution_id')]
-        self.contribs = Contribution.query.with_parent(self.event).filter(Contribution.id.in_(self.contrib_ids)).all()
+        self.contribs_query = Contribution.query.with_parent(self.event).filter(Contribution.id.in_(self.contrib_ids))
+        self.contribs = self.contribs_query.all() if self.load_contribs else None
 
 
 class RHManageSubContributionsActionsBase(RHManageContributionBase):
@@ -449,7 +454,8 @@ class RHManageContributionsExportActionsBase(RHManageContributionsActionsBase):
         RHManageContributionsActionsBase._process_args(self)
         # some PDF export options do not sort the contribution list so we keep
         # the order in which they were displayed when the user selected them
-        self.contribs.sort(key=lambda c: self.contrib_ids.index(c.id))
+        if self.contribs is not None:
+            self.contribs.sort(key=lambda c: self.contrib_ids.index(c.id))
 
 
 class RHContributionsMaterialPackage(RHManageContributionsExportActionsBase, AttachmentPackageGeneratorMixin):
@@ -466,25 +472,35 @@ class RHContributionsMaterialPackage(RHManageContributionsExportActionsBase, Att
         return self._generate_zip_file(attachments, name_suffix=self.event.id)
 
 
-class RHContributionsExportCSV(RHManageContributionsExportActionsBase):
+class RHContributionsExportSpreadsheetBase(RHManageContributionsExportActionsBase):
+    """Base class for contribution list spreadsheet export RHs.
+
+    The contributions are loaded in chunks while writing the
+    spreadsheet instead of loading all of them upfront.
+    """
+
+    load_contribs = False
+
+
+class RHContributionsExportCSV(RHContributionsExportSpreadsheetBase):
     """Export list of contributions to CSV."""
 
     @use_kwargs({
         'affiliations': fields.Bool(load_default=False)
     }, location='query')
     def _process(self, affiliations):
-        headers, rows = generate_spreadsheet_from_contributions(self.contribs, affiliations=affiliations)
-        return send_csv('contributions.csv', headers, rows)
+        headers, rows = generate_spreadsheet_from_contributions(self.contribs_query, affiliations=affiliations)
+        return send_csv('contributions.csv', headers, rows, stream=True)
 
 
-class RHContributionsExportExcel(RHManageContributionsExportActionsBase):
+class RHContributionsExportExcel(RHContributionsExportSpreadsheetBase):
     """Export list of contributions to XLSX."""
 
     @use_kwargs({
         'affiliations': fields.Bool(load_default=False)
     }, location='query')
     def _process(self, affiliations):
-        headers, rows = generate_spreadsheet_from_contributions(self.contribs, affiliations=affiliations)
+        headers, rows = generate_spreadsheet_from_contributions(self.contribs_query, affiliations=affiliations)
         return send_xlsx('contributions.xlsx', headers, rows, tz=self.event.tzinfo)
 
 
@@ -136,10 +136,13 @@ class ContributionListGenerator(ListGeneratorBase):
         if self.check_access:
             self.event.preload_all_acl_entries()
         contributions_query = self._build_query()
-        total_entries = (sum(1 for c in contributions_query if c.can_access(session.user)) if self.check_access else
-                         contributions_query.count())
+        if self.check_access:
+            access = Contribution.can_access_many(contributions_query, session.user)
+            total_entries = sum(access.values())
+        else:
+            total_entries = contributions_query.count()
         contributions = [c for c in self._filter_list_entries(contributions_query, self.list_config['filters'])
-                         if not self.check_access or c.can_access(session.user)]
+                         if not self.check_access or access[c]]
         sessions = [{'id': s.id, 'title': s.title, 'colors': s.colors} for s in self.event.sessions]
         tracks = [{'id': int(t.id), 'title': t.title_with_group} for t in self.event.tracks]
         total_duration = (sum((c.duration for c in contributions), timedelta()),
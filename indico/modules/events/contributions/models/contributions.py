@@ -93,6 +93,7 @@ class Contribution(SearchableTitleMixin, SearchableDescriptionMixin, ProtectionM
     location_backref_name = 'contributions'
     disallowed_protection_modes = frozenset()
     inheriting_have_acl = True
+    protection_parent_relationships = ('session', 'event')
     possible_render_modes = {RenderMode.html, RenderMode.markdown}
     default_render_mode = RenderMode.markdown
     allow_relationship_preloading = True
@@ -12,10 +12,11 @@ from operator import attrgetter
 
 import dateutil.parser
 from flask import session
-from sqlalchemy.orm import contains_eager, joinedload, load_only, noload
+from sqlalchemy.orm import Query, contains_eager, joinedload, load_only, noload, selectinload
 
 from indico.core.config import config
 from indico.core.db import db
+from indico.core.db.sqlalchemy.util.queries import iter_query_chunks
 from indico.core.errors import UserValueError
 from indico.modules.attachments.util import get_attached_items
 from indico.modules.events.abstracts.settings import BOASortField
@@ -122,6 +123,14 @@ def generate_spreadsheet_from_contributions(contributions, *, affiliations=False
     """
     Return a tuple consisting of spreadsheet columns and respective
     contribution values.
+
+    When passing a query, the rows are generated lazily while iterating
+    over them, loading the contributions in chunks, so they never need
+    to be in memory at the same time.  When passing a list of
+    contributions, the rows are returned as a list.
+
+    :param contributions: A query returning the contributions to include
+                          or a list of contributions
     """
 
     def _format_person(person):
@@ -129,46 +138,65 @@ def generate_spreadsheet_from_contributions(contributions, *, affiliations=False
             return f'{person.full_name} ({person.affiliation})'
         return person.full_name
 
-    has_board_number = any(c.board_number for c in contributions)
-    has_authors = any(pl.author_type != AuthorType.none for c in contributions for pl in c.person_links)
+    is_query = isinstance(contributions, Query)
+    if is_query:
+        has_board_number = contributions.filter(Contribution.board_number != '').has_rows()
+        has_authors = (contributions
+                       .filter(Contribution.person_links.any(ContributionPersonLink.author_type != AuthorType.none))
+                       .has_rows())
+    else:
+        has_board_number = any(c.board_number for c in contributions)
+        has_authors = any(pl.author_type != AuthorType.none for c in contributions for pl in c.person_links)
     headers = ['Id', 'Title', 'Description', 'Date', 'Duration', 'Type', 'Session', 'Track', 'Presenters', 'Materials',
                'Program Code']
     if has_authors:
         headers += ['Authors', 'Co-Authors']
     if has_board_number:
         headers.append('Board number')
-    rows = []
-    for c in sort_contribs(contributions, sort_by='friendly_id'):
-        contrib_data = {'Id': c.friendly_id, 'Title': c.title, 'Description': c.description,
-                        'Duration': format_human_timedelta(c.duration),
-                        'Date': c.timetable_entry.start_dt if c.timetable_entry else None,
-                        'Type': c.type.name if c.type else None,
-                        'Session': c.session.title if c.session else None,
-                        'Track': c.track.title if c.track else None,
-                        'Materials': None,
-                        'Presenters': ', '.join(_format_person(speaker) for speaker in c.speakers),
-                        'Program Code': c.code}
-        if has_authors:
-            contrib_data.update({
-                'Authors': ', '.join(_format_person(author) for author in c.primary_authors),
-                'Co-Authors': ', '.join(_format_person(author) for author in c.secondary_authors)
-            })
-        if has_board_number:
-            contrib_data['Board number'] = c.board_number
-
-        attachments = []
-        attached_items = get_attached_items(c)
-        for attachment in attached_items.get('files', []):
-            attachments.append(attachment.absolute_download_url)
-
-        for folder in attached_items.get('folders', []):
-            for attachment in folder.attachments:
+
+    def _iter_contributions():
+        if not is_query:
+            yield from sort_contribs(contributions, sort_by='friendly_id')
+            return
+        options = (selectinload('person_links'), joinedload('timetable_entry'), joinedload('type'),
+                   joinedload('session'), joinedload('track'))
+        query = contributions.order_by(Contribution.friendly_id)
+        for chunk in iter_query_chunks(query, chunk_size=500, options=options):
+            yield from chunk
+
+    def _iter_rows():
+        for c in _iter_contributions():
+            contrib_data = {'Id': c.friendly_id, 'Title': c.title, 'Description': c.description,
+                            'Duration': format_human_timedelta(c.duration),
+                            'Date': c.timetable_entry.start_dt if c.timetable_entry else None,
+                            'Type': c.type.name if c.type else None,
+                            'Session': c.session.title if c.session else None,
+                            'Track': c.track.title if c.track else None,
+                            'Materials': None,
+                            'Presenters': ', '.join(_format_person(speaker) for speaker in c.speakers),
+                            'Program Code': c.code}
+            if has_authors:
+                contrib_data.update({
+                    'Authors': ', '.join(_format_person(author) for author in c.primary_authors),
+                    'Co-Authors': ', '.join(_format_person(author) for author in c.secondary_authors)
+                })
+            if has_board_number:
+                contrib_data['Board number'] = c.board_number
+
+            attachments = []
+            attached_items = get_attached_items(c)
+            for attachment in attached_items.get('files', []):
                 attachments.append(attachment.absolute_download_url)
 
-        if attachments:
-            contrib_data['Materials'] = ', '.join(attachments)
-        rows.append(contrib_data)
-    return headers, rows
+            for folder in attached_items.get('folders', []):
+                for attachment in folder.attachments:
+                    attachments.append(attachment.absolute_download_url)
+
+            if attachments:
+                contrib_data['Materials'] = ', '.join(attachments)
+            yield contrib_data
+
+    return headers, (_iter_rows() if is_query else list(_iter_rows()))
 
 
 def make_contribution_form(event):
@@ -10,8 +10,11 @@ from io import BytesIO
 
 import pytest
 
+from indico.core.db.sqlalchemy.util.queries import iter_query_chunks
 from indico.core.errors import UserValueError
-from indico.modules.events.contributions.util import import_contributions_from_csv
+from indico.modules.events.contributions import Contribution
+from indico.modules.events.contributions.util import (generate_spreadsheet_from_contributions,
+                                                      import_contributions_from_csv)
 from indico.util.date_time import as_utc
 
 
@@ -117,3 +120,24 @@ def test_import_contributions_errors(db, dummy_event):
 
     e = _check_importer_exception(dummy_event, b'2010-02-23T00:00:00,15,Test,Test,Test,Test,foobar')
     assert 'invalid email' in str(e)
+
+
+def test_generate_spreadsheet_from_contributions(mocker, dummy_event, create_contribution):
+    mocker.patch('indico.modules.events.contributions.util.iter_query_chunks',
+                 side_effect=lambda query, chunk_size, options: iter_query_chunks(query, 1, options))
+    contribs = [create_contribution(dummy_event, f'Contribution {i}') for i in range(3)]
+    contribs[1].board_number = '42'
+    query = Contribution.query.with_parent(dummy_event).filter(Contribution.id.in_([c.id for c in contribs[1:]]))
+    headers, rows = generate_spreadsheet_from_contributions(query)
+    assert 'Board number' in headers
+    assert 'Authors' not in headers
+    assert [(r['Title'], r['Board number']) for r in rows] == [('Contribution 1', '42'), ('Contribution 2', '')]
+
+
+def test_generate_spreadsheet_from_contributions_list(dummy_event, create_contribution):
+    contribs = [create_contribution(dummy_event, f'Contribution {i}') for i in range(3)]
+    contribs[1].board_number = '42'
+    headers, rows = generate_spreadsheet_from_contributions(contribs[:0:-1])
+    assert 'Board number' in headers
+    assert 'Authors' not in headers
+    assert [(r['Title'], r['Board number']) for r in rows] == [('Contribution 1', '42'), ('Contribution 2', '')]
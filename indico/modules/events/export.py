@@ -8,11 +8,15 @@
 import os
 import posixpath
 import re
+import shutil
 import tarfile
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
+from enum import Enum
 from io import BytesIO
 from operator import itemgetter
+from tempfile import SpooledTemporaryFile
 from uuid import uuid4
 
 import click
@@ -25,6 +29,7 @@ from terminaltables import AsciiTable
 import indico
 from indico.core.config import config
 from indico.core.db import db
+from indico.core.db.sqlalchemy import PyIntEnum
 from indico.core.db.sqlalchemy.principals import PrincipalType
 from indico.core.db.sqlalchemy.util.models import get_all_models
 from indico.core.storage.backend import get_storage
@@ -38,22 +43,29 @@ from indico.modules.events.sessions import Session
 from indico.modules.events.sessions.models.principals import SessionPrincipal
 from indico.modules.logs.models.entries import LogKind
 from indico.modules.users import User
-from indico.modules.users.util import get_user_by_email
+from indico.modules.users.models.users import UserTitle
 from indico.util.console import cformat
 from indico.util.date_time import now_utc
+from indico.util.packing import pack, unpack
 from indico.util.string import strict_str
 
 
 _notset = object()
 
+#: The archive member containing the metadata of the binary format
+BINARY_METADATA_FILE = 'metadata.bin'
 
-def export_event(event, target_file):
+
+def export_event(event, target_file, binary=False):
     """Export the specified event with all its data to a file.
 
     :param event: the `Event` to export
     :param target_file: a file object to write the data to
+    :param binary: whether to use the binary format, which is much
+                   faster to export and import for large events
     """
-    exporter = EventExporter(event, target_file)
+    exporter_cls = BinaryEventExporter if binary else EventExporter
+    exporter = exporter_cls(event, target_file)
     exporter.serialize()
 
 
@@ -71,10 +83,20 @@ def import_event(source_file, category_id=0, create_users=None, verbose=False, f
     :param force: Whether to ignore version conflicts.
     :return: The imported event.
     """
-    importer = EventImporter(source_file, category_id, create_users, verbose, force)
+    importer_cls = BinaryEventImporter if _is_binary_archive(source_file) else EventImporter
+    importer = importer_cls(source_file, category_id, create_users, verbose, force)
     return importer.deserialize()
 
 
+def _is_binary_archive(source_file):
+    """Check if an archive has been exported using the binary format."""
+    pos = source_file.tell()
+    with tarfile.open(fileobj=source_file) as archive:
+        rv = BINARY_METADATA_FILE in archive.getnames()
+    source_file.seek(pos)
+    return rv
+
+
 def _model_to_table(name):
     """Resolve a model name to a full table name (unless it's already one)."""
     return getattr(db.m, name).__table__.fullname if name[0].isupper() else name
@@ -137,6 +159,78 @@ def _get_inserted_pk(result):
     return result.inserted_primary_key[0]
 
 
+def _get_unique_users_by_email(emails):
+    """Find the users matching a list of email addresses.
+
+    This behaves like :func:`~indico.modules.users.util.get_user_by_email`
+    but uses a single query for all the email addresses.
+
+    :return: A dict mapping the (normalized) email addresses to the
+             users.  Email addresses not matching exactly one user
+             are not included.
+    """
+    emails = {email.lower().strip() for email in emails} - {''}
+    if not emails:
+        return {}
+    users = defaultdict(set)
+    for user in User.query.filter(~User.is_deleted, User.all_emails.in_(emails)):
+        for email in set(user.all_emails) & emails:
+            users[email].add(user)
+    return {email: next(iter(matches)) for email, matches in users.items() if len(matches) == 1}
+
+
+def _iter_idrefs(value):
+    """Get the UUIDs of all ID references in an exported value."""
+    if isinstance(value, tuple):
+        if value[0] == 'idref':
+            yield value[1]
+    elif isinstance(value, (list, set)):
+        for item in value:
+            yield from _iter_idrefs(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_idrefs(item)
+
+
+def _get_insert_order(tables, dependencies):
+    """Sort tables so rows are inserted after the rows they reference.
+
+    Circular references are broken by inserting a table before the
+    ones it references if all those references may be set afterwards.
+
+    :param tables: The names of the tables in the order in which they
+                   were exported, which is kept as much as possible
+    :param dependencies: A dict mapping table names to dicts which map
+                         the names of referenced tables to a bool
+                         indicating whether these references may be
+                         set after inserting the rows
+    :return: A list of table names
+    """
+    remaining = list(tables)
+    order = []
+    while remaining:
+        # only references to tables which still need to be inserted matter here
+        ready = [name for name in remaining if not any(dep in remaining for dep in dependencies.get(name, {}))]
+        if not ready:
+            ready = [name for name in remaining
+                     if all(deferrable or dep not in remaining
+                            for dep, deferrable in dependencies.get(name, {}).items())]
+            if not ready:
+                raise ValueError('Circular references between tables: {}'.format(', '.join(remaining)))
+        remaining.remove(ready[0])
+        order.append(ready[0])
+    return order
+
+
+def _read_storage_file(storage, file_id):
+    """Copy a file from storage into a temporary file."""
+    buf = SpooledTemporaryFile(max_size=(4 * 1024 * 1024))
+    with storage.open(file_id) as f:
+        shutil.copyfileobj(f, buf)
+    buf.seek(0)
+    return buf
+
+
 class EventExporter:
     def __init__(self, event, target_file):
         self.event = event
@@ -299,12 +393,15 @@ class EventExporter:
         size = data.pop('size')
         md5 = data.pop('md5')
         uuid = self._get_uuid()
-        with get_storage(storage_backend).open(storage_file_id) as f:
-            self._add_file(uuid, size, f)
+        self._add_storage_file(uuid, size, get_storage(storage_backend), storage_file_id)
         data['__file__'] = ('file', {'uuid': uuid, 'filename': filename, 'content_type': content_type, 'size': size,
                                      'md5': md5})
 
-    def _serialize_objects(self, table, filter_):
+    def _add_storage_file(self, name, size, storage, file_id):
+        with storage.open(file_id) as f:
+            self._add_file(name, size, f)
+
+    def _query_rows(self, table, filter_):
         spec = self.spec[table.fullname]
         query = db.session.query(table).filter(filter_)
         if spec['order']:
@@ -316,63 +413,78 @@ class EventExporter:
             if not isinstance(order, tuple):
                 order = (order,)
             query = query.order_by(*order)
-        query = query.order_by(*table.primary_key.columns)
+        return query.order_by(*table.primary_key.columns)
+
+    def _serialize_row(self, table, row):
+        """Convert a row to the exported data.
+
+        :return: A dict containing the exported data or `None` if the
+                 row is skipped.
+        """
+        spec = self.spec[table.fullname]
+        if spec['skipif'] and eval(spec['skipif'], _make_globals(ROW=row)):
+            return None
+        rowdict = row._asdict()
+        pk = tuple(v for k, v in rowdict.items() if table.c[k].primary_key)
+        if (table.fullname, pk) in self.seen_rows:
+            if spec['allow_duplicates']:
+                return None
+            else:
+                raise Exception('Trying to serialize already-serialized row')
+        self.seen_rows.add((table.fullname, pk))
+        data = {}
+        for col, value in rowdict.items():
+            col = str(col)  # col names are `quoted_name` objects
+            col_fullname = f'{table.fullname}.{col}'
+            col_custom = spec['cols'].get(col, _notset)
+            colspec = table.c[col]
+            if col_custom is None:
+                # column is explicitly excluded
+                continue
+            elif col_custom is not _notset:
+                # column has custom code to process its value (and possibly name)
+                if value is not None:
+                    def _get_event_idref():
+                        key = f'{Event.__table__.fullname}.{Event.id.name}'
+                        assert key in self.id_map
+                        return 'idref', self.id_map[key][self.event.id]
+
+                    def _make_id_ref(target, id_):
+                        return self._make_idref(None, id_, target_column=_resolve_col(target))
+
+                    data.update(_exec_custom(col_custom, VALUE=value, MAKE_EVENT_REF=_get_event_idref,
+                                             MAKE_ID_REF=_make_id_ref))
+            elif col_fullname in self.fk_map:
+                # an FK references this column -> generate a uuid
+                data[col] = self._make_idref(colspec, value, incoming=colspec.primary_key)
+            elif colspec.foreign_keys:
+                # column is an FK
+                data[col] = self._make_idref(colspec, value)
+            elif colspec.primary_key:
+                # column is a PK with no incoming FKs -> no need to track the ID
+                pass
+            else:
+                # not an fk
+                data.setdefault(col, self._make_value(value))
+        self._process_file(data)
+        return data
+
+    def _serialize_objects(self, table, filter_):
+        spec = self.spec[table.fullname]
         cascaded = []
-        for row in query:
-            if spec['skipif'] and eval(spec['skipif'], _make_globals(ROW=row)):
+        for row in self._query_rows(table, filter_):
+            data = self._serialize_row(table, row)
+            if data is None:
                 continue
-            rowdict = row._asdict()
-            pk = tuple(v for k, v in rowdict.items() if table.c[k].primary_key)
-            if (table.fullname, pk) in self.seen_rows:
-                if spec['allow_duplicates']:
-                    continue
-                else:
-                    raise Exception('Trying to serialize already-serialized row')
-            self.seen_rows.add((table.fullname, pk))
-            data = {}
-            for col, value in rowdict.items():
-                col = str(col)  # col names are `quoted_name` objects
-                col_fullname = f'{table.fullname}.{col}'
-                col_custom = spec['cols'].get(col, _notset)
-                colspec = table.c[col]
-                if col_custom is None:
-                    # column is explicitly excluded
-                    continue
-                elif col_custom is not _notset:
-                    # column has custom code to process its value (and possibly name)
-                    if value is not None:
-                        def _get_event_idref():
-                            key = f'{Event.__table__.fullname}.{Event.id.name}'
-                            assert key in self.id_map
-                            return 'idref', self.id_map[key][self.event.id]
-
-                        def _make_id_ref(target, id_):
-                            return self._make_idref(None, id_, target_column=_resolve_col(target))
-
-                        data.update(_exec_custom(col_custom, VALUE=value, MAKE_EVENT_REF=_get_event_idref,
-                                                 MAKE_ID_REF=_make_id_ref))
-                elif col_fullname in self.fk_map:
-                    # an FK references this column -> generate a uuid
-                    data[col] = self._make_idref(colspec, value, incoming=colspec.primary_key)
-                elif colspec.foreign_keys:
-                    # column is an FK
-                    data[col] = self._make_idref(colspec, value)
-                elif colspec.primary_key:
-                    # column is a PK with no incoming FKs -> no need to track the ID
-                    pass
-                else:
-                    # not an fk
-                    data.setdefault(col, self._make_value(value))
-            self._process_file(data)
             # export objects referenced in outgoing FKs before the row
             # itself as the FK column might not be nullable
             for col, fk in spec['fks_out'].items():
-                value = rowdict[col]
+                value = row._mapping[col]
                 yield from self._serialize_objects(fk.table, value == fk)
             yield table.fullname, data
             # serialize objects referencing the current row, but don't export them yet
             for col, fks in spec['fks'].items():
-                value = rowdict[col]
+                value = row._mapping[col]
                 cascaded += [x for fk in fks for x in self._serialize_objects(fk.table, value == fk)]
         # we only add incoming fks after being done with all objects in case one
         # of the referenced objects references another object from the current table
@@ -380,6 +492,138 @@ class EventExporter:
         yield from cascaded
 
 
+class BinaryEventExporter(EventExporter):
+    """Export an event using the binary format.
+
+    The exported rows are written in columnar batches packed using
+    :mod:`indico.util.packing`, which are much faster to write and
+    read than YAML.  The metadata contains the order in which the
+    tables need to be imported so each table can be inserted at once.
+    Files are read from storage by a thread pool while the rows are
+    being serialized.
+    """
+
+    #: The maximum number of rows in a batch
+    batch_size = 10000
+    #: The number of threads used to read files from storage
+    file_workers = 8
+    #: The maximum number of files read in advance
+    max_pending_files = 32
+
+    def __init__(self, event, target_file):
+        super().__init__(event, target_file)
+        self.batches = {}
+        self.batch_names = defaultdict(list)
+        self.table_dependencies = defaultdict(dict)
+        self.idref_tables = {}
+        self.pending_files = deque()
+        self.executor = None
+
+    def serialize(self):
+        self.executor = ThreadPoolExecutor(self.file_workers, thread_name_prefix='event-export')
+        with self.executor:
+            for tablename, data in self._serialize_objects(Event.__table__, Event.id == self.event.id):
+                self._add_row(tablename, data)
+            self._write_pending_files()
+        for tablename, columns in list(self.batches):
+            self._write_batch(tablename, columns)
+        order = _get_insert_order(self.batch_names, self.table_dependencies)
+        metadata = {
+            'timestamp': now_utc(),
+            'indico_version': indico.__version__,
+            'tables': [{'name': name, 'batches': self.batch_names[name]} for name in order],
+            'users': {uuid: userdata and dict(userdata, title=userdata['title'].value)
+                      for uuid, userdata in self.users.items()}
+        }
+        packed = pack(metadata, allow_pickle=False)
+        self._add_file(BINARY_METADATA_FILE, len(packed), packed)
+        self.archive.close()
+
+    def _serialize_objects(self, table, filter_):
+        # The order of the rows only matters within a table since the tables are
+        # imported separately, so the related rows of all the rows are exported
+        # together instead of querying them separately for each row.
+        spec = self.spec[table.fullname]
+        rows = []
+        for row in self._query_rows(table, filter_):
+            data = self._serialize_row(table, row)
+            if data is not None:
+                rows.append((row, data))
+        for col, fk in spec['fks_out'].items():
+            yield from self._serialize_related(fk.table, fk, {row._mapping[col] for row, __ in rows})
+        for row, data in rows:
+            yield table.fullname, data
+        for col, fks in spec['fks'].items():
+            values = {row._mapping[col] for row, __ in rows}
+            for fk in fks:
+                yield from self._serialize_related(fk.table, fk, values)
+
+    def _serialize_related(self, table, column, values):
+        values = sorted(values - {None})
+        if values:
+            yield from self._serialize_objects(table, column.in_(values))
+
+    def _make_idref(self, column, value, incoming=False, target_column=None):
+        rv = super()._make_idref(column, value, incoming=incoming, target_column=target_column)
+        if rv is not None and rv[0] == 'idref':
+            # keep track of the referenced tables to determine the order of the tables
+            if target_column is None:
+                target_column = _get_single_fk(column).column
+            self.idref_tables[rv[1]] = target_column.table.fullname
+        return rv
+
+    def _make_value(self, value):
+        # dates and binary data are supported by the binary format, but enums are
+        # only supported by the column type so we store their plain value
+        if isinstance(value, Enum):
+            return value.value
+        elif isinstance(value, tuple):
+            raise ValueError('tuples not handled')
+        else:
+            return value
+
+    def _add_storage_file(self, name, size, storage, file_id):
+        self.pending_files.append((name, size, self.executor.submit(_read_storage_file, storage, file_id)))
+        self._write_pending_files(self.max_pending_files)
+
+    def _write_pending_files(self, keep=0):
+        # files are added in the order in which they were queued, regardless
+        # of which ones have been read first
+        while len(self.pending_files) > keep:
+            name, size, future = self.pending_files.popleft()
+            with future.result() as f:
+                self._add_file(name, size, f)
+
+    def _add_row(self, tablename, data):
+        table = db.metadata.tables[tablename]
+        dependencies = self.table_dependencies[tablename]
+        for col, value in data.items():
+            # only direct references in nullable columns can be set after inserting the row
+            deferrable = isinstance(value, tuple) and col in table.c and table.c[col].nullable
+            for uuid in _iter_idrefs(value):
+                target = self.idref_tables[uuid]
+                if target != tablename:
+                    dependencies[target] = dependencies.get(target, True) and deferrable
+        columns = tuple(data)
+        batch = self.batches.get((tablename, columns))
+        if batch is None:
+            batch = self.batches[(tablename, columns)] = {'columns': list(columns), 'count': 0,
+                                                          'values': [[] for __ in columns]}
+        for values, value in zip(batch['values'], data.values()):
+            values.append(value)
+        batch['count'] += 1
+        if batch['count'] >= self.batch_size:
+            self._write_batch(tablename, columns)
+
+    def _write_batch(self, tablename, columns):
+        batch = self.batches.pop((tablename, columns))
+        names = self.batch_names[tablename]
+        name = f'tables/{tablename}/{len(names)}'
+        names.append(name)
+        packed = pack(batch, allow_pickle=False)
+        self._add_file(name, len(packed), packed)
+
+
 class EventImporter:
     def __init__(self, source_file, category_id=0, create_users=None, verbose=False, force=False):
         self.source_file = source_file
@@ -388,7 +632,7 @@ class EventImporter:
         self.verbose = verbose
         self.force = force
         self.archive = tarfile.open(fileobj=source_file)
-        self.data = yaml.unsafe_load(self.archive.extractfile('data.yaml'))
+        self.data = self._load_data()
         self.id_map = {}
         self.user_map = {}
         self.event_id = None
@@ -396,6 +640,9 @@ class EventImporter:
         self.spec = self._load_spec()
         self.deferred_idrefs = defaultdict(set)
 
+    def _load_data(self):
+        return yaml.unsafe_load(self.archive.extractfile('data.yaml'))
+
     def _load_spec(self):
         def _resolve_col_name(col):
             colspec = _resolve_col(col)
@@ -476,11 +723,7 @@ class EventImporter:
                         .format(self.data['indico_version'], indico.__version__), fg='red')
             return None
         self._load_users(self.data)
-        # we need the event first since it generates the event id, which may be needed
-        # in case of outgoing FKs on the event model
-        objects = sorted(self.data['objects'], key=lambda x: x[0] != 'events.events')
-        for tablename, tabledata in objects:
-            self._deserialize_object(db.metadata.tables[tablename], tabledata)
+        self._deserialize_objects()
         if self.deferred_idrefs:
             # Any reference to an ID that was exported need to be replaced
             # with an actual ID at some point - either immediately (if the
@@ -499,6 +742,13 @@ class EventImporter:
         db.session.flush()
         return event
 
+    def _deserialize_objects(self):
+        # we need the event first since it generates the event id, which may be needed
+        # in case of outgoing FKs on the event model
+        objects = sorted(self.data['objects'], key=lambda x: x[0] != 'events.events')
+        for tablename, tabledata in objects:
+            self._deserialize_object(db.metadata.tables[tablename], tabledata)
+
     def _associate_users_by_email(self, event):
         # link objects to users by email where possible
         # event principals
@@ -523,13 +773,18 @@ class EventImporter:
             ContributionPrincipal.replace_email_with_user(user, 'contribution')
 
         # event persons
-        query = EventPerson.query.with_parent(event).filter(EventPerson.user_id.is_(None), EventPerson.email != '')
-        for person in query:
-            person.user = get_user_by_email(person.email)
+        persons = (EventPerson.query.with_parent(event)
+                   .filter(EventPerson.user_id.is_(None), EventPerson.email != '')
+                   .all())
+        users = _get_unique_users_by_email(p.email for p in persons)
+        for person in persons:
+            person.user = users.get(person.email.lower().strip())
 
         # registrations
-        for registration in Registration.query.with_parent(event).filter(Registration.user_id.is_(None)):
-            registration.user = get_user_by_email(registration.email)
+        registrations = Registration.query.with_parent(event).filter(Registration.user_id.is_(None)).all()
+        users = _get_unique_users_by_email(r.email for r in registrations)
+        for registration in registrations:
+            registration.user = users.get(registration.email.lower().strip())
 
     def _convert_value(self, colspec, value):
         if not isinstance(value, tuple):
@@ -592,7 +847,15 @@ class EventImporter:
             'md5': md5
         }
 
-    def _deserialize_object(self, table, data):
+    def _prepare_row(self, table, data):
+        """Convert the exported data of a row to the values to insert.
+
+        :return: A tuple containing the values to insert, the UUID of
+                 the row's ID reference (if any), the data of its file
+                 (if any) and a dict mapping columns to the UUIDs of
+                 the ID references that cannot be resolved yet, or
+                 `None` if the row needs to be skipped.
+        """
         is_event = (table == Event.__table__)
         import_defaults = self.spec['defaults'].get(table.fullname, {})
         import_custom = self.spec['custom'].get(table.fullname, {})
@@ -646,11 +909,23 @@ class EventImporter:
             # anything referencing it will also be skipped
             if set_idref is not None:
                 self.id_map[set_idref] = None
-            return
+            return None
         elif missing_user_exec:
             # run custom code to deal with missing users
             for code in missing_user_exec:
                 insert_values.update(_exec_custom(code))
+        return insert_values, set_idref, file_data, deferred_idrefs
+
+    def _echo_row(self, table, insert_values):
+        if self.verbose and table.fullname in self.spec['verbose']:
+            fmt = self.spec['verbose'][table.fullname]
+            click.echo(fmt.format(**insert_values))
+
+    def _deserialize_object(self, table, data):
+        prepared = self._prepare_row(table, data)
+        if prepared is None:
+            return
+        insert_values, set_idref, file_data, deferred_idrefs = prepared
         if file_data is not None:
             if _has_single_pk(table):
                 # restore a file from the import archive and save it in storage
@@ -662,15 +937,13 @@ class EventImporter:
                 insert_values.update(self._process_file(pk_value, file_data))
             else:
                 insert_values.update(self._process_file(str(uuid4()), file_data))
-        if self.verbose and table.fullname in self.spec['verbose']:
-            fmt = self.spec['verbose'][table.fullname]
-            click.echo(fmt.format(**insert_values))
+        self._echo_row(table, insert_values)
         res = db.session.execute(table.insert(), insert_values)
         if set_idref is not None:
             # if a column was marked as having incoming FKs, store
             # the ID so the reference can be resolved to the ID
             self._set_idref(set_idref, _get_inserted_pk(res))
-        if is_event:
+        if table == Event.__table__:
             self.event_id = _get_inserted_pk(res)
         for col, uuid in deferred_idrefs.items():
             # store all the data needed to resolve a deferred ID reference
@@ -685,6 +958,103 @@ class EventImporter:
             db.session.execute(table.update().where(pk == pk_value).values({col: id_}))
 
 
+class BinaryEventImporter(EventImporter):
+    """Import an event exported using the binary format.
+
+    The rows of each table are inserted at once (psycopg2 sends them as
+    multi-row INSERT statements).  The IDs of the new rows are taken
+    from the table's sequence in advance, so references to them can be
+    resolved without inserting the rows one by one.  References which
+    cannot be resolved when inserting a table are updated at the end,
+    using one statement per column.
+    """
+
+    def _load_data(self):
+        data = unpack(self.archive.extractfile(BINARY_METADATA_FILE).read(), allow_pickle=False)
+        for userdata in data['users'].values():
+            if userdata is not None:
+                userdata['title'] = UserTitle(userdata['title'])
+        return data
+
+    def _deserialize_objects(self):
+        for tabledata in self.data['tables']:
+            table = db.metadata.tables[tabledata['name']]
+            self._deserialize_table(table, list(self._load_rows(tabledata['batches'])))
+        self._update_deferred_idrefs()
+
+    def _load_rows(self, batch_names):
+        for name in batch_names:
+            batch = unpack(self.archive.extractfile(name).read(), allow_pickle=False)
+            if not batch['columns']:
+                yield from ({} for __ in range(batch['count']))
+                continue
+            columns = batch['columns']
+            for values in zip(*batch['values']):
+                yield dict(zip(columns, values))
+
+    def _allocate_ids(self, table, pk, count):
+        """Get new IDs for rows in a table.
+
+        :return: A list of IDs or `None` if the table's PK does not
+                 use a sequence
+        """
+        if not count:
+            return []
+        stmt = db.func.nextval(db.func.pg_get_serial_sequence(table.fullname, pk.name))
+        ids = [id_ for id_, in db.session.query(stmt).select_from(db.func.generate_series(1, count))]
+        return ids if ids[0] is not None else None
+
+    def _convert_value(self, colspec, value):
+        # enums are exported as their plain value
+        if value is not None and isinstance(colspec.type, PyIntEnum):
+            return colspec.type.enum(value)
+        return super()._convert_value(colspec, value)
+
+    def _deserialize_table(self, table, rows):
+        pk = _get_pk(table) if _has_single_pk(table) else None
+        ids = self._allocate_ids(table, pk, len(rows)) if pk is not None else None
+        grouped_values = defaultdict(list)
+        for row_id, data in zip(ids or [None] * len(rows), rows):
+            prepared = self._prepare_row(table, data)
+            if prepared is None:
+                continue
+            insert_values, set_idref, file_data, deferred_idrefs = prepared
+            if row_id is not None:
+                insert_values[pk.name] = row_id
+            pk_value = insert_values.get(pk.name) if pk is not None else None
+            if set_idref is not None:
+                assert row_id is not None
+                self.id_map[set_idref] = row_id
+            if table == Event.__table__:
+                self.event_id = row_id
+            if file_data is not None:
+                insert_values.update(self._process_file(row_id if row_id is not None else str(uuid4()), file_data))
+            self._echo_row(table, insert_values)
+            for col, uuid in deferred_idrefs.items():
+                assert pk_value is not None
+                self.deferred_idrefs[uuid].add((table, col, pk_value))
+            # rows with a different set of columns (e.g. due to missing users) cannot
+            # be inserted together
+            grouped_values[tuple(insert_values)].append(insert_values)
+        for values in grouped_values.values():
+            db.session.execute(table.insert(), values)
+
+    def _update_deferred_idrefs(self):
+        updates = defaultdict(list)
+        for uuid in list(self.deferred_idrefs):
+            id_ = self.id_map.get(uuid)
+            if id_ is None:
+                # never imported or skipped, which is reported as an error
+                continue
+            for table, col, pk_value in self.deferred_idrefs.pop(uuid):
+                updates[(table, col)].append((pk_value, id_))
+        for (table, col), values in updates.items():
+            pk = _get_pk(table)
+            data = (db.values(db.column('pk', pk.type), db.column('value', table.c[col].type), name='deferred')
+                    .data(values))
+            db.session.execute(table.update().where(pk == data.c.pk).values({col: data.c.value}))
+
+
 class IdRefDeferred(Exception):
     def __init__(self, uuid):
         self.uuid = uuid
@@ -15,13 +15,25 @@ import pytest
 import yaml
 
 from indico.core.db.sqlalchemy.links import LinkType
+from indico.modules.attachments.models.attachments import Attachment, AttachmentFile, AttachmentType
+from indico.modules.attachments.models.folders import AttachmentFolder
 from indico.modules.attachments.util import get_attached_items
 from indico.modules.events.contributions import Contribution
-from indico.modules.events.export import export_event, import_event
+from indico.modules.events.contributions.models.persons import ContributionPersonLink
+from indico.modules.events.contributions.models.subcontributions import SubContribution
+from indico.modules.events.export import BINARY_METADATA_FILE, _get_insert_order, export_event, import_event
+from indico.modules.events.models.persons import EventPerson
 from indico.modules.events.sessions import Session
+from indico.modules.events.sessions.models.blocks import SessionBlock
+from indico.modules.events.sessions.models.principals import SessionPrincipal
+from indico.modules.events.timetable.models.entries import TimetableEntry
 from indico.util.date_time import as_utc
 
 
+pytest_plugins = ('indico.modules.events.registration.testing.fixtures',
+                  'indico.modules.events.timetable.testing.fixtures')
+
+
 class _MockUUID:
     def __init__(self):
         self.counter = 0
@@ -147,3 +159,90 @@ def test_event_import(db, dummy_user):
     assert attachment.title == 'dummy_attachment'
     # Check that the actual file is accessible
     assert attachment.file.open().read() == b'hello world'
+
+
+def _get_event_data(event):
+    blocks = [b for s in event.sessions for b in s.blocks]
+    return {
+        'title': event.title,
+        'creator': event.creator,
+        'persons': sorted((p.full_name, p.email, p.user) for p in event.persons),
+        'sessions': [(s.title, [(e.principal, e.permissions) for e in s.acl_entries]) for s in event.sessions],
+        'contributions': sorted((c.title, c.friendly_id, c.duration, c.session and c.session.title,
+                                 c.session_block and c.session_block.title,
+                                 [(pl.full_name, pl.is_speaker) for pl in c.person_links],
+                                 [sc.title for sc in c.subcontributions])
+                                for c in event.contributions),
+        'timetable': sorted((e.type.name, e.start_dt, e.object.title, e.parent and e.parent.object.title)
+                            for e in event.timetable_entries),
+        'blocks': [b.title for b in blocks],
+        'regforms': [(f.title, sorted((item.title, item.type.name, item.parent and item.parent.title,
+                                       item.current_data and item.current_data.versioned_data)
+                                      for item in f.form_items))
+                     for f in event.registration_forms],
+        'attachments': sorted((folder.title, folder.link_type.name, attachment.title, attachment.file.open().read())
+                              for folder in AttachmentFolder.query.filter_by(event=event)
+                              for attachment in folder.attachments),
+    }
+
+
+@pytest.mark.usefixtures('dummy_regform')
+def test_event_binary_export(db, dummy_event, dummy_user, create_entry):
+    speaker = EventPerson.create_from_user(dummy_user, dummy_event)
+    sess = Session(event=dummy_event, title='Session',
+                   acl_entries={SessionPrincipal(principal=dummy_user, permissions={'coordinate'})})
+    block = SessionBlock(session=sess, title='Block', duration=timedelta(hours=2))
+    contrib = Contribution(event=dummy_event, title='c1', duration=timedelta(minutes=30), session=sess,
+                           session_block=block, person_links=[ContributionPersonLink(person=speaker, is_speaker=True)])
+    SubContribution(contribution=contrib, title='sc1', duration=timedelta(minutes=10))
+    Contribution(event=dummy_event, title='c2', duration=timedelta(minutes=30))
+    db.session.flush()
+    block_entry = create_entry(block, dummy_event.start_dt)
+    dummy_event.timetable_entries.append(TimetableEntry(parent=block_entry, object=contrib,
+                                                        start_dt=dummy_event.start_dt))
+    folder = AttachmentFolder(object=contrib, title='Slides')
+    file_ = AttachmentFile(user=dummy_user, filename='slides.txt', content_type='text/plain')
+    Attachment(folder=folder, user=dummy_user, title='Slides', type=AttachmentType.file, file=file_)
+    with db.session.no_autoflush:
+        file_.save(b'slide data')
+    db.session.flush()
+
+    yaml_file = BytesIO()
+    export_event(dummy_event, yaml_file)
+    binary_file = BytesIO()
+    export_event(dummy_event, binary_file, binary=True)
+    with tarfile.open(fileobj=BytesIO(binary_file.getvalue())) as tarf:
+        names = tarf.getnames()
+        assert 'data.yaml' not in names
+        assert names[-1] == BINARY_METADATA_FILE
+        assert 'tables/events.contributions/0' in names
+
+    yaml_file.seek(0)
+    binary_file.seek(0)
+    yaml_event = import_event(yaml_file, create_users=False)
+    binary_event = import_event(binary_file, create_users=False)
+    db.session.expire_all()
+    assert binary_event != yaml_event
+    original_data = _get_event_data(dummy_event)
+    assert len(original_data['regforms'][0][1]) > 1
+    assert _get_event_data(yaml_event) == original_data
+    assert _get_event_data(binary_event) == original_data
+
+
+def test_get_insert_order():
+    tables = ['events', 'contributions', 'persons', 'person_links', 'items', 'data']
+    dependencies = {
+        'contributions': {'events': False},
+        'persons': {'events': False},
+        'person_links': {'contributions': False, 'persons': False, 'users': False},
+        'items': {'data': True},
+        'data': {'items': False},
+    }
+    order = _get_insert_order(tables, dependencies)
+    assert order == ['events', 'contributions', 'persons', 'person_links', 'items', 'data']
+    # referencing a table exported later
+    assert _get_insert_order(['persons', 'events'], dependencies) == ['events', 'persons']
+    # circular references in non-nullable columns cannot be imported
+    dependencies['items']['data'] = False
+    with pytest.raises(ValueError):
+        _get_insert_order(tables, dependencies)
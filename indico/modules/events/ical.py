@@ -6,16 +6,20 @@
 # LICENSE file for more details.
 
 import typing as t
+from datetime import timedelta
 from email import message
 from email.mime.base import MIMEBase
 from email.policy import compat32
+from uuid import uuid4
 
 import icalendar
+from flask import g, has_app_context
 from lxml import html
 from lxml.etree import ParserError
 from werkzeug.urls import url_parse
 
 from indico.core import signals
+from indico.core.cache import make_scoped_cache
 from indico.core.config import config
 from indico.core.db.sqlalchemy.protection import ProtectionMode
 from indico.modules.events.contributions.models.contributions import Contribution
@@ -27,6 +31,15 @@ from indico.util.enum import IndicoEnum
 from indico.util.signals import values_from_signal
 
 
+_ical_cache = make_scoped_cache('event-ical')
+
+#: How long serialized iCalendar components are cached.  Changes
+#: in the event itself invalidate the cache, but changes elsewhere
+#: (e.g. in the protection of a parent category) are only picked up
+#: after this time.
+ICAL_CACHE_TTL = timedelta(days=1)
+
+
 class MIMECalendar(MIMEBase):
     """MIME `text/calendar` class which adds the `method=REQUEST` to the Content-Type."""
 
@@ -169,6 +182,130 @@ def event_to_ical(
                           organizer=organizer)
 
 
+def _create_calendar(method=None):
+    calendar = icalendar.Calendar()
+    calendar.add('version', '2.0')
+    calendar.add('prodid', '-//CERN//INDICO//EN')
+
+    if method:
+        calendar.add('method', method)
+
+    return calendar
+
+
+def _generate_event_fragments(event, user, scope, skip_access_check, organizer):
+    """Generate the serialized iCalendar components of an event.
+
+    This does not check whether the user can access contributions or
+    sessions; each fragment is returned together with the key of the
+    object the user needs to be able to access.
+    """
+    from indico.modules.events.contributions.ical import generate_contribution_component
+    from indico.modules.events.sessions.ical import generate_session_block_component
+
+    if scope == CalendarScope.contribution:
+        return [
+            (('contribution', contrib.id), generate_contribution_component(contrib, organizer=organizer).to_ical())
+            for contrib in event.contributions
+            if contrib.start_dt
+        ]
+    elif scope == CalendarScope.session:
+        fragments = [
+            (('session', session.id), generate_session_block_component(block, organizer=organizer).to_ical())
+            for session in event.sessions
+            if session.start_dt
+            for block in session.blocks
+        ]
+        fragments += [
+            (('contribution', contrib.id), generate_contribution_component(contrib, organizer=organizer).to_ical())
+            for contrib in event.contributions
+            if contrib.start_dt and contrib.session_id is None
+        ]
+        return fragments
+    else:
+        component = generate_event_component(event, user, organizer=organizer, skip_access_check=skip_access_check)
+        return [(None, component.to_ical())]
+
+
+def _get_accessible_fragment_keys(event, user, scope):
+    if scope == CalendarScope.contribution:
+        contrib_access = Contribution.can_access_many(event.contributions, user)
+        return {('contribution', contrib.id) for contrib, access in contrib_access.items() if access}
+    elif scope == CalendarScope.session:
+        session_access = Session.can_access_many(event.sessions, user)
+        contrib_access = Contribution.can_access_many(event.contributions, user)
+        return ({('session', session.id) for session, access in session_access.items() if access} |
+                {('contribution', contrib.id) for contrib, access in contrib_access.items() if access})
+    else:
+        return {None}
+
+
+def _filter_fragments(fragments, event, user, scope, skip_access_check):
+    if skip_access_check:
+        return [data for __, data in fragments]
+    accessible = _get_accessible_fragment_keys(event, user, scope)
+    return [data for key, data in fragments if key in accessible]
+
+
+def _get_ical_cache_markers(event_ids):
+    markers = dict(zip(event_ids, _ical_cache.get_many(*(f'marker/{event_id}' for event_id in event_ids))))
+    if missing := {event_id for event_id, marker in markers.items() if marker is None}:
+        new_markers = {event_id: uuid4().hex for event_id in missing}
+        _ical_cache.set_many({f'marker/{event_id}': marker for event_id, marker in new_markers.items()},
+                             timeout=ICAL_CACHE_TTL)
+        markers.update(new_markers)
+    return markers
+
+
+def _get_events_fragments(events, user, scope, skip_access_check, organizer):
+    """Get the serialized iCalendar components of events.
+
+    The components are cached for each event and scope, unless they
+    may depend on the user (when a plugin post-processes the event
+    metadata) or on the context (when an organizer is specified).
+    """
+    if organizer or (scope is None and signals.event.metadata_postprocess.has_receivers_for('ical-export')):
+        for event in events:
+            fragments = _generate_event_fragments(event, user, scope, skip_access_check, organizer)
+            yield from _filter_fragments(fragments, event, user, scope, skip_access_check)
+        return
+
+    if not events:
+        return
+    scope_name = scope.name if scope else 'event'
+    markers = _get_ical_cache_markers([event.id for event in events])
+    keys = [f'{event.id}/{markers[event.id]}/{scope_name}' for event in events]
+    new_fragments = {}
+    for event, key, fragments in zip(events, keys, _ical_cache.get_many(*keys)):
+        if fragments is None:
+            fragments = new_fragments[key] = _generate_event_fragments(event, user, scope, skip_access_check,
+                                                                       organizer)
+        yield from _filter_fragments(fragments, event, user, scope, skip_access_check)
+    if new_fragments:
+        _ical_cache.set_many(new_fragments, timeout=ICAL_CACHE_TTL)
+
+
+def invalidate_event_ical_cache(event):
+    """Invalidate the cached iCalendar components of an event.
+
+    The invalidation happens once the current transaction is committed.
+    """
+    if has_app_context():
+        g.setdefault('event_ical_cache_invalidations', set()).add(event.id)
+
+
+def flush_ical_cache_invalidations():
+    """Invalidate the cached iCalendar components of events changed in the current transaction."""
+    if not has_app_context() or not (event_ids := g.pop('event_ical_cache_invalidations', None)):
+        return
+    _ical_cache.set_many({f'marker/{event_id}': uuid4().hex for event_id in event_ids}, timeout=ICAL_CACHE_TTL)
+
+
+def _filter_accessible_events(events, user):
+    access = Event.can_access_many(events, user)
+    return [event for event in events if access[event]]
+
+
 def events_to_ical(
     events: list[Event],
     user: t.Optional[User] = None,
@@ -187,44 +324,39 @@ def events_to_ical(
     :param method: METHOD field of the iCalendar object
     :param organizer: ORGANIZER field of the iCalendar object
     """
-    from indico.modules.events.contributions.ical import generate_contribution_component
-    from indico.modules.events.sessions.ical import generate_session_block_component
+    calendar = _create_calendar(method)
 
-    calendar = icalendar.Calendar()
-    calendar.add('version', '2.0')
-    calendar.add('prodid', '-//CERN//INDICO//EN')
+    events = list(events)
+    if not skip_access_check:
+        events = _filter_accessible_events(events, user)
+
+    footer = b'END:VCALENDAR\r\n'
+    fragments = _get_events_fragments(events, user, scope, skip_access_check, organizer)
+    return b''.join([calendar.to_ical()[:-len(footer)], *fragments, footer])
 
-    if method:
-        calendar.add('method', method)
 
-    for event in events:
-        if not skip_access_check and not event.can_access(user):
-            continue
-
-        if scope == CalendarScope.contribution:
-            components = [
-                generate_contribution_component(contrib, organizer=organizer)
-                for contrib in event.contributions
-                if contrib.start_dt and contrib.can_access(user)
-            ]
-        elif scope == CalendarScope.session:
-            components = [
-                generate_session_block_component(block, organizer=organizer)
-                for session in event.sessions
-                if session.start_dt and session.can_access(user)
-                for block in session.blocks
-            ]
-            components += [
-                generate_contribution_component(contrib, organizer=organizer)
-                for contrib in event.contributions
-                if contrib.start_dt and contrib.session_id is None and contrib.can_access(user)
-            ]
-        else:
-            components = [
-                generate_event_component(event, user, organizer=organizer, skip_access_check=skip_access_check)
-            ]
-
-        for component in components:
-            calendar.add_component(component)
-
-    return calendar.to_ical()
+def stream_events_ical(
+    event_chunks: t.Iterable[list[Event]],
+    user: t.Optional[User] = None,
+    scope: t.Optional[str] = None,
+    *,
+    skip_access_check: bool = False
+):
+    """Serialize events into an ical incrementally.
+
+    This is equivalent to :func:`events_to_ical`, but the data is
+    generated chunk by chunk so it can be sent in a streaming
+    response without having all events in memory.
+
+    :param event_chunks: An iterable yielding lists of events
+    :param user: The user who needs to be able to access the events
+    :param scope: If specified, use a more detailed timetable using the given scope
+    :param skip_access_check: Do not perform access checks. Defaults to False.
+    """
+    footer = b'END:VCALENDAR\r\n'
+    yield _create_calendar().to_ical()[:-len(footer)]
+    for events in event_chunks:
+        if not skip_access_check:
+            events = _filter_accessible_events(events, user)
+        yield from _get_events_fragments(events, user, scope, skip_access_check, None)
+    yield footer
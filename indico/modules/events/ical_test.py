@@ -0,0 +1,46 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+import pytest
+
+from indico.core.db.sqlalchemy.protection import ProtectionMode
+from indico.modules.events.ical import (CalendarScope, events_to_ical, flush_ical_cache_invalidations,
+                                        invalidate_event_ical_cache)
+
+
+pytest_plugins = 'indico.modules.events.timetable.testing.fixtures'
+
+
+@pytest.mark.usefixtures('request_context')
+def test_events_to_ical_cache(db, create_event):
+    event = create_event(title='Test')
+    db.session.flush()
+    data = events_to_ical([event], skip_access_check=True)
+    assert b'SUMMARY:Test' in data
+    event.title = 'Changed'
+    assert events_to_ical([event], skip_access_check=True) == data
+    invalidate_event_ical_cache(event)
+    flush_ical_cache_invalidations()
+    assert b'SUMMARY:Changed' in events_to_ical([event], skip_access_check=True)
+
+
+@pytest.mark.usefixtures('request_context')
+def test_events_to_ical_cache_access(db, create_event, create_contribution, create_entry, create_user):
+    user = create_user(123)
+    event = create_event()
+    public = create_contribution(event, 'Public')
+    protected = create_contribution(event, 'Protected')
+    create_entry(public, event.start_dt)
+    create_entry(protected, event.start_dt)
+    protected.protection_mode = ProtectionMode.protected
+    protected.update_principal(user, read_access=True)
+    db.session.flush()
+    # the cached components must not leak to users who cannot access them
+    assert b'Protected' in events_to_ical([event], user, CalendarScope.contribution)
+    data = events_to_ical([event], None, CalendarScope.contribution)
+    assert b'Public' in data
+    assert b'Protected' not in data
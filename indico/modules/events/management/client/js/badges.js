@@ -5,6 +5,9 @@
 // modify it under the terms of the MIT License; see the
 // LICENSE file for more details.
 
+import {indicoAxios, handleAxiosError} from 'indico/utils/axios';
+import {$T} from 'indico/utils/i18n';
+
 (function(global) {
   global.setupBadgePrinting = function setupBadgePrinting(templates) {
     const $template = $('#template');
@@ -65,5 +68,34 @@
         $pageLayout.change();
       })
       .change();
+
+    // badges are generated in the background; wait until the PDF can be downloaded
+    async function pollBadgesStatus(statusURL, closeProgress) {
+      let res;
+      try {
+        res = await indicoAxios.get(statusURL);
+      } catch (error) {
+        closeProgress();
+        handleAxiosError(error);
+        return;
+      }
+      closeProgress();
+      if (res.data.download_url) {
+        window.location.href = res.data.download_url;
+        return;
+      }
+      const {done, total} = res.data;
+      const message = total
+        ? $T.gettext('Generating badges ({0} of {1})').format(done, total)
+        : $T.gettext('Generating badges');
+      const progress = IndicoUI.Dialogs.Util.progress(message);
+      setTimeout(() => pollBadgesStatus(statusURL, progress), 1000);
+    }
+
+    $('#badge-settings-form').on('ajaxForm:success', (evt, data) => {
+      if (data.status_url) {
+        pollBadgesStatus(data.status_url, IndicoUI.Dialogs.Util.progress($T.gettext('Generating badges')));
+      }
+    });
   };
 })(window);
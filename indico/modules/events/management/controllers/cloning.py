@@ -18,12 +18,16 @@ from indico.modules.events.management.forms import (CLONE_REPEAT_CHOICES, CloneC
                                                     CloneRepeatOnceForm, CloneRepeatPatternForm, ImportContentsForm,
                                                     ImportSourceEventForm)
 from indico.modules.events.operations import clone_event, clone_into_event
+from indico.modules.events.tasks import clone_event_occurrence
 from indico.modules.events.util import get_event_from_url
 from indico.util.i18n import _
 from indico.web.flask.util import url_for
 from indico.web.util import jsonify_data, jsonify_template
 
 
+#: Recurring clones with more occurrences are created in background tasks
+MAX_INLINE_CLONES = 5
+
 REPEAT_FORM_MAP = {
     'once': CloneRepeatOnceForm,
     'interval': CloneRepeatIntervalForm,
@@ -184,10 +188,18 @@ class RHCloneEvent(RHManageEventBase):
                     # recurring event
                     clone_calculator = get_clone_calculator(form.repeatability.data, self.event)
                     dates = clone_calculator.calculate(request.form)[0]
-                    for n, start_dt in enumerate(dates, 1):
-                        clone_event(self.event, n, start_dt, set(form.selected_items.data), form.category.data,
-                                    form.refresh_users.data)
-                    flash(_('{} new events created.').format(len(dates)), 'success')
+                    if len(dates) <= MAX_INLINE_CLONES:
+                        for n, start_dt in enumerate(dates, 1):
+                            clone_event(self.event, n, start_dt, set(form.selected_items.data), form.category.data,
+                                        form.refresh_users.data, bulk=True)
+                        flash(_('{} new events created.').format(len(dates)), 'success')
+                    else:
+                        # each occurrence is cloned in its own task so large series do not block the request
+                        for n, start_dt in enumerate(dates, 1):
+                            clone_event_occurrence.delay(self.event, n, start_dt, set(form.selected_items.data),
+                                                         form.category.data, form.refresh_users.data, session.user)
+                        flash(_('{} new events are being created. They will show up in the category in a few '
+                                'moments.').format(len(dates)), 'success')
                     return jsonify_data(redirect=form.category.data.url, flash=False)
             else:
                 # back to step 4, since there's been an error
@@ -460,3 +460,32 @@ def test_has_management_permission_db(create_event, create_user, dummy_user):
     assert not _query().count()
     assert _query('foo').one() == entry
     assert _query('ANY').count() == 2
+
+
+@pytest.mark.usefixtures('request_context')
+def test_can_access_many(db, create_category, create_event, create_user, dummy_group, count_queries):
+    user = create_user(123, groups={dummy_group})
+    public_category = create_category(protection_mode=ProtectionMode.public)
+    protected_category = create_category(protection_mode=ProtectionMode.protected)
+    group_category = create_category(parent=protected_category, protection_mode=ProtectionMode.inheriting)
+    group_category.update_principal(dummy_group, read_access=True)
+    expected = {}
+    for i in range(5):
+        expected[create_event(category=public_category).id] = True
+        expected[create_event(category=protected_category).id] = False
+        expected[create_event(category=group_category).id] = True
+        event = create_event(category=protected_category, protection_mode=ProtectionMode.protected)
+        event.update_principal(user, read_access=True)
+        expected[event.id] = True
+    db.session.flush()
+    db.session.expunge_all()
+    user = create_user(123)
+    events = Event.query.filter(Event.id.in_(expected)).all()
+    with count_queries() as cnt:
+        access = Event.can_access_many(events, user)
+    # events, categories (for each level of the tree) and the user's groups
+    assert cnt() < len(events)
+    assert {event.id: rv for event, rv in access.items()} == expected
+    with count_queries() as cnt:
+        assert {event.id: event.can_access(user) for event in events} == expected
+    assert cnt() == 0
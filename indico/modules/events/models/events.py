@@ -81,6 +81,7 @@ class Event(SearchableTitleMixin, DescriptionMixin, LocationMixin, ProtectionMan
     allow_none_protection_parent = True
     allow_access_key = True
     allow_no_access_contact = True
+    protection_parent_relationships = ('category',)
     person_link_relation_name = 'EventPersonLink'
     person_link_backref_name = 'event'
     location_backref_name = 'events'
@@ -451,16 +452,11 @@ class Event(SearchableTitleMixin, DescriptionMixin, LocationMixin, ProtectionMan
         Create a filter that checks whether the event has any of the
         provided category ids in its parent chain.
 
-        Warning: This method cannot be used in a negated filter.
-
         :param category_ids: A list of category ids or a single
                              category id
         """
         from indico.modules.categories import Category
-        if not isinstance(category_ids, (list, tuple, set)):
-            category_ids = [category_ids]
-        cte = Category.get_tree_cte()
-        return (cte.c.id == Event.category_id) & cte.c.path.overlap(category_ids)
+        return Event.category_id.in_(Category.get_subtree_ids_query(category_ids))
 
     @classmethod
     def is_visible_in(cls, category_id):
@@ -90,3 +90,14 @@ def notify_move_request_closure(move_requests, accept, reason=''):
         template = get_template_module('events/emails/move_request_closure.txt',
                                        events=events, target_category=category, accept=accept, reason=reason)
         send_email(make_email(to_list=requestor.email, template=template))
+
+
+def notify_clone_failed(event, start_dt, user):
+    """Send an email notification when cloning an event in the background failed.
+
+    :param event: The `Event` which was cloned.
+    :param start_dt: The start date of the clone which failed.
+    :param user: The `User` who requested the clone.
+    """
+    template = get_template_module('events/emails/clone_failed.txt', event=event, start_dt=start_dt, user=user)
+    send_email(make_email(to_list=user.email, template=template))
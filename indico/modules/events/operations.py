@@ -165,7 +165,7 @@ def update_event(event, update_timetable=False, **data):
     _log_event_update(event, changes, visible_person_link_changes=visible_person_link_changes)
 
 
-def clone_event(event, n_occurrence, start_dt, cloners, category=None, refresh_users=False):
+def clone_event(event, n_occurrence, start_dt, cloners, category=None, refresh_users=False, bulk=False):
     """Clone an event on a given date/time.
 
     Runs all required cloners.
@@ -176,6 +176,8 @@ def clone_event(event, n_occurrence, start_dt, cloners, category=None, refresh_u
     :param category: The `Category` the new event will be created in.
     :aparam refresh_users: Whether `EventPerson` data should be updated from
                            their linked `User` object
+    :param bulk: Whether cloners supporting it should copy the data
+                 using set-based SQL statements instead of the ORM
     """
     end_dt = start_dt + event.duration
     data = {
@@ -191,7 +193,7 @@ def clone_event(event, n_occurrence, start_dt, cloners, category=None, refresh_u
                              add_creator_as_manager=False, cloning=True)
 
     # Run the modular cloning system
-    EventCloner.run_cloners(event, new_event, cloners, n_occurrence)
+    EventCloner.run_cloners(event, new_event, cloners, n_occurrence, bulk=bulk)
     if refresh_users:
         new_event.refresh_event_persons(notify=False)
     signals.event.cloned.send(event, new_event=new_event)
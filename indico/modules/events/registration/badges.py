@@ -10,14 +10,13 @@ from collections import namedtuple
 from itertools import product
 
 from reportlab.lib.units import cm
-from reportlab.lib.utils import ImageReader
 from werkzeug.exceptions import BadRequest
 
 from indico.core import signals
+from indico.modules.designer import PageLayout
 from indico.modules.designer.pdf import DesignerPDFBase
 from indico.modules.events.registration.settings import DEFAULT_BADGE_SETTINGS
 from indico.util.i18n import _
-from indico.util.placeholders import get_placeholders
 from indico.util.signals import values_from_signal
 
 
@@ -30,9 +29,12 @@ def _get_font_size(text):
 
 
 class RegistrantsListToBadgesPDF(DesignerPDFBase):
-    def __init__(self, template, config, event, registrations):
+    def __init__(self, template, config, event, registrations, progress_callback=None):
         super().__init__(template, config)
         self.registrations = registrations
+        self.progress_callback = progress_callback
+        self._badges_done = 0
+        self._sorted_items = {}
 
     def _build_config(self, config_data):
         return ConfigData(**config_data)
@@ -47,9 +49,9 @@ class RegistrantsListToBadgesPDF(DesignerPDFBase):
                        config.top_margin + n_y * (tpl_data.height_cm + config.margin_rows))
             canvas.showPage()
 
-    def _build_pdf(self, canvas):
+    def get_grid_size(self):
+        """Get the number of badges fitting on a page horizontally and vertically."""
         config = self.config
-
         available_width = self.width - (config.left_margin - config.right_margin + config.margin_columns) * cm
         n_horizontal = int(available_width / ((self.tpl_data.width_cm + config.margin_columns) * cm))
         available_height = self.height - (config.top_margin - config.bottom_margin + config.margin_rows) * cm
@@ -57,10 +59,31 @@ class RegistrantsListToBadgesPDF(DesignerPDFBase):
 
         if not n_horizontal or not n_vertical:
             raise BadRequest(_('The template dimensions are too large for the page size you selected'))
+        return n_horizontal, n_vertical
+
+    def _get_sorted_items(self, template, tpl_data):
+        # images are printed first
+        try:
+            return self._sorted_items[template.id]
+        except KeyError:
+            image_placeholders = {name for name, placeholder in self.placeholders.items() if placeholder.is_image}
+            items = self._sorted_items[template.id] = sorted(
+                tpl_data.items, key=lambda item: (int(item.get('zIndex', 10)), item['type'] not in image_placeholders)
+            )
+            return items
+
+    def _badge_done(self):
+        self._badges_done += 1
+        if self.progress_callback:
+            self.progress_callback(self._badges_done, len(self.registrations))
+
+    def _build_pdf(self, canvas):
+        n_horizontal, n_vertical = self.get_grid_size()
 
         # Print a badge for each registration
         for registration, (x, y) in zip(self.registrations, self._iter_position(canvas, n_horizontal, n_vertical)):
             self._draw_badge(canvas, registration, self.template, self.tpl_data, x * cm, y * cm)
+            self._badge_done()
 
     def _draw_badge(self, canvas, registration, template, tpl_data, pos_x, pos_y):
         """
@@ -78,18 +101,11 @@ class RegistrantsListToBadgesPDF(DesignerPDFBase):
             canvas.restoreState()
 
         if template.background_image:
-            with template.background_image.open() as f:
-                self._draw_background(canvas, ImageReader(self._remove_transparency(f)), tpl_data, *badge_rect)
-
-        placeholders = get_placeholders('designer-fields')
-
-        # Print images first
-        image_placeholders = {name for name, placeholder in placeholders.items() if placeholder.is_image}
-        items = sorted(tpl_data.items, key=lambda item: (int(item.get('zIndex', 10)),
-                                                         item['type'] not in image_placeholders))
+            self._draw_background(canvas, self._get_background_image(template), tpl_data, *badge_rect)
 
+        items = self._get_sorted_items(template, tpl_data)
         for item in items:
-            placeholder = placeholders.get(item['type'])
+            placeholder = self.placeholders.get(item['type'])
 
             if placeholder:
                 if placeholder.group == 'registrant':
@@ -113,10 +129,12 @@ class RegistrantsListToBadgesPDF(DesignerPDFBase):
 
 
 class RegistrantsListToBadgesPDFFoldable(RegistrantsListToBadgesPDF):
-    def _build_pdf(self, canvas):
+    def get_grid_size(self):
         # Only one badge per page
-        n_horizontal = 1
-        n_vertical = 1
+        return 1, 1
+
+    def _build_pdf(self, canvas):
+        n_horizontal, n_vertical = self.get_grid_size()
 
         for registration, (x, y) in zip(self.registrations, self._iter_position(canvas, n_horizontal, n_vertical)):
             self._draw_badge(canvas, registration, self.template, self.tpl_data, x * cm, y * cm)
@@ -138,20 +156,12 @@ class RegistrantsListToBadgesPDFFoldable(RegistrantsListToBadgesPDF):
             canvas.lines([(tpl_data.width_cm * cm, self.height, tpl_data.width_cm * cm, tpl_data.height_cm * cm),
                           (0, tpl_data.height_cm * cm, self.width, tpl_data.height_cm * cm)])
             canvas.restoreState()
+            self._badge_done()
 
 
 class RegistrantsListToBadgesPDFDoubleSided(RegistrantsListToBadgesPDF):
     def _build_pdf(self, canvas):
-        config = self.config
-
-        available_width = self.width - (config.left_margin - config.right_margin + config.margin_columns) * cm
-        n_horizontal = int(available_width / ((self.tpl_data.width_cm + config.margin_columns) * cm))
-        available_height = self.height - (config.top_margin - config.bottom_margin + config.margin_rows) * cm
-        n_vertical = int(available_height / ((self.tpl_data.height_cm + config.margin_rows) * cm))
-
-        if not n_horizontal or not n_vertical:
-            raise BadRequest(_('The template dimensions are too large for the page size you selected'))
-
+        n_horizontal, n_vertical = self.get_grid_size()
         per_page = n_horizontal * n_vertical
         # make batch of as many badges as we can fit into one page and add duplicates for printing back sides
         page_used = 0
@@ -177,8 +187,19 @@ class RegistrantsListToBadgesPDFDoubleSided(RegistrantsListToBadgesPDF):
             # odd pages contain front sides, even pages back sides
             if current_page % 2:
                 self._draw_badge(canvas, registration, self.template, self.tpl_data, x * cm, y * cm)
+                self._badge_done()
             else:
                 # mirror badge coordinates
                 x_cm = (self.width - x*cm - self.tpl_data.width_cm*cm)
                 self._draw_badge(canvas, registration, self.template.backside_template,
                                  self.backside_tpl_data, x_cm, y * cm)
+
+
+def get_badges_pdf_class(page_layout):
+    """Get the class generating badges with the given page layout."""
+    if page_layout == PageLayout.foldable:
+        return RegistrantsListToBadgesPDFFoldable
+    elif page_layout == PageLayout.double_sided:
+        return RegistrantsListToBadgesPDFDoubleSided
+    else:
+        return RegistrantsListToBadgesPDF
@@ -0,0 +1,82 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+from flask import request, session
+from PIL import Image
+from werkzeug.exceptions import NotFound
+
+from indico.modules.designer import PageLayout
+from indico.modules.events.registration.badges import get_badges_pdf_class
+from indico.modules.events.registration.controllers.management.reglists import RHRegistrationsBadgesStatus
+from indico.modules.events.registration.models.forms import RegistrationForm
+from indico.modules.events.registration.settings import DEFAULT_BADGE_SETTINGS
+
+
+pytest_plugins = 'indico.modules.events.registration.testing.fixtures'
+
+
+class _MockImage:
+    def __init__(self):
+        self.opened = 0
+        self.data = BytesIO()
+        Image.new('RGBA', (100, 60), (255, 0, 0, 128)).save(self.data, 'PNG')
+
+    def open(self):
+        self.opened += 1
+        return BytesIO(self.data.getvalue())
+
+
+def _make_template(id_, backside_template=None):
+    data = {'width': 425, 'height': 270, 'items': [], 'background_position': 'stretch'}
+    return SimpleNamespace(id=id_, data=data, background_image=_MockImage(), backside_template=backside_template)
+
+
+@pytest.mark.usefixtures('request_context')
+@pytest.mark.parametrize('page_layout', (PageLayout.front_only, PageLayout.double_sided))
+def test_badges_pdf_background_loaded_once(page_layout):
+    template = _make_template(1, _make_template(2))
+    progress = []
+    pdf_class = get_badges_pdf_class(page_layout)
+    pdf = pdf_class(template, dict(DEFAULT_BADGE_SETTINGS, page_layout=page_layout), None, list(range(25)),
+                    progress_callback=lambda done, total: progress.append((done, total)))
+    assert pdf.get_pdf().getvalue().startswith(b'%PDF')
+    assert template.background_image.opened == 1
+    assert template.backside_template.background_image.opened == (page_layout == PageLayout.double_sided)
+    assert progress == [(i, 25) for i in range(1, 26)]
+
+
+@pytest.mark.parametrize('ready', (False, True))
+def test_badges_status(app, db, mocker, dummy_regform, ready):
+    result = mocker.patch('indico.modules.events.registration.controllers.management.reglists.AsyncResult')
+    result.return_value.ready.return_value = ready
+    result.return_value.state = 'PROGRESS'
+    result.return_value.info = {'done': 5, 'total': 10}
+    result.return_value.result = 'https://example.com/badges.pdf'
+    other_regform = RegistrationForm(event=dummy_regform.event, title='Other', currency='USD')
+    db.session.flush()
+    with app.test_request_context():
+        session['badge_tasks'] = {'task': dummy_regform.id, 'other-task': other_regform.id}
+        rh = RHRegistrationsBadgesStatus()
+        request.view_args = {'event_id': dummy_regform.event_id, 'reg_form_id': dummy_regform.id, 'task_id': 'task'}
+        rh._process_args()
+        rv = rh._process().json
+        if ready:
+            assert rv == {'download_url': 'https://example.com/badges.pdf'}
+            assert session['badge_tasks'] == {'other-task': other_regform.id}
+        else:
+            assert rv == {'download_url': None, 'done': 5, 'total': 10}
+        # tasks of other registration forms or users cannot be checked
+        for task_id in ('other-task', 'unknown'):
+            request.view_args['task_id'] = task_id
+            with pytest.raises(NotFound):
+                rh._process_args()
+    # the status is checked without waiting for the task
+    assert not result.return_value.get.called
@@ -101,8 +101,8 @@ _bp.add_url_rule('/manage/registration/<int:reg_form_id>/badges/config', 'regist
                  reglists.RHRegistrationsConfigBadges, methods=('POST',))
 _bp.add_url_rule('/manage/registration/<int:reg_form_id>/tickets/config', 'registrations_config_tickets',
                  reglists.RHRegistrationsConfigTickets, methods=('POST',))
-_bp.add_url_rule('/manage/registration/<int:reg_form_id>/badges/print/<int:template_id>/<uuid>',
-                 'registrations_print_badges', reglists.RHRegistrationsPrintBadges)
+_bp.add_url_rule('/manage/registration/<int:reg_form_id>/badges/status/<task_id>', 'registrations_badges_status',
+                 reglists.RHRegistrationsBadgesStatus)
 
 # Invitation management
 _bp.add_url_rule('/manage/registration/<int:reg_form_id>/invitations/', 'invitations',
@@ -9,12 +9,13 @@ from indico.core import signals
 from indico.core.db import db
 from indico.core.db.sqlalchemy.util.models import get_simple_column_attrs
 from indico.core.db.sqlalchemy.util.session import no_autoflush
-from indico.modules.events.cloning import EventCloner
+from indico.modules.events.cloning import ClonedObjectMap, EventCloner, clone_rows, in_id_map, remap_cloned_column
 from indico.modules.events.features.util import is_feature_enabled
 from indico.modules.events.models.events import EventType
 from indico.modules.events.registration.models.form_fields import RegistrationFormFieldData
 from indico.modules.events.registration.models.forms import RegistrationForm
-from indico.modules.events.registration.models.items import RegistrationFormItem, RegistrationFormSection
+from indico.modules.events.registration.models.items import (RegistrationFormItem, RegistrationFormItemType,
+                                                             RegistrationFormSection)
 from indico.modules.events.registration.models.registrations import Registration, RegistrationData
 from indico.util.i18n import _
 
@@ -22,6 +23,7 @@ from indico.util.i18n import _
 class RegistrationFormCloner(EventCloner):
     name = 'registration_forms'
     friendly_name = _('Registration forms')
+    supports_bulk = True
 
     @property
     def is_visible(self):
@@ -53,6 +55,35 @@ class RegistrationFormCloner(EventCloner):
         return {'form_map': self._form_map,
                 'field_data_map': self._field_data_map}
 
+    def run_bulk(self, new_event, cloners, shared_data):
+        form_map = clone_rows(RegistrationForm, RegistrationForm.event_id == self.old_event.id,
+                              ~RegistrationForm.is_deleted,
+                              values={'event_id': new_event.id},
+                              exclude={'start_dt', 'end_dt', 'modification_end_dt'})
+        section_map = clone_rows(RegistrationFormItem,
+                                 in_id_map(RegistrationFormItem.registration_form_id, form_map),
+                                 RegistrationFormItem.type.in_({RegistrationFormItemType.section,
+                                                                RegistrationFormItemType.section_pd}),
+                                 id_maps={'registration_form_id': form_map})
+        item_map = clone_rows(RegistrationFormItem, in_id_map(RegistrationFormItem.parent_id, section_map),
+                              id_maps={'registration_form_id': form_map, 'parent_id': section_map})
+        # if the registration cloner is also enabled, we have to keep
+        # all revisions since they are likely to be in use
+        field_data_criteria = [in_id_map(RegistrationFormFieldData.field_id, item_map)]
+        if 'registrations' not in cloners:
+            field_data_criteria.append(RegistrationFormFieldData.id.in_(
+                db.select([RegistrationFormItem.current_data_id])
+                .where(in_id_map(RegistrationFormItem.id, item_map))
+            ))
+        field_data_map = clone_rows(RegistrationFormFieldData, *field_data_criteria,
+                                    id_maps={'field_id': item_map})
+        remap_cloned_column(RegistrationFormItem, 'current_data_id', item_map, field_data_map)
+        form_map = ClonedObjectMap(RegistrationForm, form_map)
+        for old_form, new_form in form_map.items():
+            signals.event.registration.after_registration_form_clone.send(old_form, new_form=new_form)
+        return {'form_map': form_map,
+                'field_data_map': ClonedObjectMap(RegistrationFormFieldData, field_data_map)}
+
     def _has_content(self, event):
         return bool(event.registration_forms)
 
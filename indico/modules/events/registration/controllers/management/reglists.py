@@ -6,19 +6,19 @@
 # LICENSE file for more details.
 
 import os
-import uuid
 from io import BytesIO
 
 from flask import flash, jsonify, redirect, render_template, request, session
-from sqlalchemy.orm import joinedload, subqueryload
+from sqlalchemy.orm import joinedload, selectinload, subqueryload
 from webargs import fields
-from werkzeug.exceptions import BadRequest, Forbidden, NotFound
+from werkzeug.exceptions import BadRequest, NotFound
 
 from indico.core import signals
-from indico.core.cache import make_scoped_cache
+from indico.core.celery import AsyncResult
 from indico.core.config import config
 from indico.core.db import db
-from indico.core.errors import NoReportError
+from indico.core.db.sqlalchemy.util.queries import iter_query_chunks
+from indico.core.errors import IndicoError, NoReportError
 from indico.core.notifications import make_email, send_email
 from indico.legacy.pdfinterface.conference import RegistrantsListToBookPDF, RegistrantsListToPDF
 from indico.modules.designer import PageLayout, TemplateType
@@ -28,9 +28,7 @@ from indico.modules.events import EventLogRealm
 from indico.modules.events.payment.models.transactions import TransactionAction
 from indico.modules.events.payment.util import register_transaction
 from indico.modules.events.registration import logger
-from indico.modules.events.registration.badges import (RegistrantsListToBadgesPDF,
-                                                       RegistrantsListToBadgesPDFDoubleSided,
-                                                       RegistrantsListToBadgesPDFFoldable)
+from indico.modules.events.registration.badges import get_badges_pdf_class
 from indico.modules.events.registration.controllers import RegistrationEditMixin
 from indico.modules.events.registration.controllers.management import (RHManageRegFormBase, RHManageRegFormsBase,
                                                                        RHManageRegistrationBase)
@@ -41,6 +39,7 @@ from indico.modules.events.registration.models.items import PersonalDataType, Re
 from indico.modules.events.registration.models.registrations import Registration, RegistrationData, RegistrationState
 from indico.modules.events.registration.notifications import notify_registration_state_update
 from indico.modules.events.registration.settings import event_badge_settings
+from indico.modules.events.registration.tasks import generate_badges
 from indico.modules.events.registration.util import (create_registration, generate_spreadsheet_from_registrations,
                                                      get_event_section_data, get_flat_section_submission_data,
                                                      get_ticket_attachments, get_title_uuid,
@@ -59,9 +58,6 @@ from indico.web.flask.util import send_file, url_for
 from indico.web.util import jsonify_data, jsonify_form, jsonify_template
 
 
-badge_cache = make_scoped_cache('badge-printing')
-
-
 def _render_registration_details(registration):
     from indico.modules.events.registration.schemas import RegistrationTagSchema
 
@@ -173,18 +169,22 @@ class RHRegistrationsActionBase(RHManageRegFormBase):
     """Base class for classes performing actions on registrations."""
 
     registration_query_options = ()
+    #: Whether to load all selected registrations into `registrations`.
+    #: When disabled, they need to be loaded from `registrations_query`.
+    load_registrations = True
 
     @use_kwargs({
         'registration_ids': fields.List(fields.Integer(), data_key='registration_id', load_default=[]),
     })
     def _process_args(self, registration_ids):
         RHManageRegFormBase._process_args(self)
-        self.registrations = (Registration.query.with_parent(self.regform)
-                              .filter(Registration.id.in_(registration_ids),
-                                      ~Registration.is_deleted)
-                              .order_by(*Registration.order_by_name)
-                              .options(*self.registration_query_options)
-                              .all())
+        self.registrations_query = (Registration.query.with_parent(self.regform)
+                                    .filter(Registration.id.in_(registration_ids),
+                                            ~Registration.is_deleted)
+                                    .order_by(*Registration.order_by_name))
+        self.registrations = None
+        if self.load_registrations:
+            self.registrations = self.registrations_query.options(*self.registration_query_options).all()
 
 
 class RHRegistrationEmailRegistrantsPreview(RHRegistrationsActionBase):
@@ -359,22 +359,41 @@ class RHRegistrationsExportPDFBook(RHRegistrationsExportBase):
         return send_file('RegistrantsBook.pdf', BytesIO(pdf.getPDFBin()), 'application/pdf')
 
 
-class RHRegistrationsExportCSV(RHRegistrationsExportBase):
+class RHRegistrationsExportSpreadsheetBase(RHRegistrationsExportBase):
+    """Base class for registration list spreadsheet export RHs.
+
+    The registrations are loaded in chunks while writing the
+    spreadsheet, so exporting a huge number of registrations does not
+    require them to be in memory at the same time.
+    """
+
+    load_registrations = False
+    registration_query_options = (selectinload('data').joinedload('field_data'), selectinload('tags'),
+                                  joinedload('transaction'))
+
+    def _iter_registrations(self):
+        for chunk in iter_query_chunks(self.registrations_query, chunk_size=500,
+                                       options=self.registration_query_options):
+            yield from chunk
+
+    def _generate_spreadsheet(self):
+        return generate_spreadsheet_from_registrations(self._iter_registrations(),
+                                                       self.export_config['regform_items'],
+                                                       self.export_config['static_item_ids'])
+
+
+class RHRegistrationsExportCSV(RHRegistrationsExportSpreadsheetBase):
     """Export registration list to a CSV file."""
 
     def _process(self):
-        headers, rows = generate_spreadsheet_from_registrations(self.registrations, self.export_config['regform_items'],
-                                                                self.export_config['static_item_ids'])
-        return send_csv('registrations.csv', headers, rows)
+        return send_csv('registrations.csv', *self._generate_spreadsheet(), stream=True)
 
 
-class RHRegistrationsExportExcel(RHRegistrationsExportBase):
+class RHRegistrationsExportExcel(RHRegistrationsExportSpreadsheetBase):
     """Export registration list to an XLSX file."""
 
     def _process(self):
-        headers, rows = generate_spreadsheet_from_registrations(self.registrations, self.export_config['regform_items'],
-                                                                self.export_config['static_item_ids'])
-        return send_xlsx('registrations.xlsx', headers, rows, tz=self.event.tzinfo)
+        return send_xlsx('registrations.xlsx', *self._generate_spreadsheet(), tz=self.event.tzinfo)
 
 
 class RHRegistrationsImport(RHRegistrationsActionBase):
@@ -397,50 +416,6 @@ class RHRegistrationsImport(RHRegistrationsActionBase):
                                 regform=self.regform)
 
 
-class RHRegistrationsPrintBadges(RHRegistrationsActionBase):
-    ALLOW_LOCKED = True
-    normalize_url_spec = {
-        'locators': {
-            lambda self: self.regform
-        },
-        'preserved_args': {'uuid', 'template_id'}
-    }
-
-    def _process_args(self):
-        RHRegistrationsActionBase._process_args(self)
-        self.template = DesignerTemplate.get_or_404(request.view_args['template_id'])
-
-    def _check_access(self):
-        RHRegistrationsActionBase._check_access(self)
-
-        # Check that template belongs to this event or a category that
-        # is a parent
-        if self.template.owner != self.event and self.template.owner.id not in self.event.category_chain:
-            raise Forbidden
-
-    def _process(self):
-        config_params = badge_cache.get(request.view_args['uuid'])
-        if not config_params:
-            raise NotFound
-        if config_params['page_layout'] == PageLayout.foldable:
-            pdf_class = RegistrantsListToBadgesPDFFoldable
-        elif config_params['page_layout'] == PageLayout.double_sided:
-            pdf_class = RegistrantsListToBadgesPDFDoubleSided
-        else:
-            pdf_class = RegistrantsListToBadgesPDF
-        registration_ids = config_params.pop('registration_ids')
-        registrations = (Registration.query.with_parent(self.event)
-                         .filter(Registration.id.in_(registration_ids),
-                                 Registration.is_active)
-                         .order_by(*Registration.order_by_name)
-                         .options(subqueryload('data').joinedload('field_data'))
-                         .all())
-        signals.event.designer.print_badge_template.send(self.template, regform=self.regform,
-                                                         registrations=registrations)
-        pdf = pdf_class(self.template, config_params, self.event, registrations)
-        return send_file(f'Badges-{self.event.id}.pdf', pdf.get_pdf(), 'application/pdf')
-
-
 class RHRegistrationsConfigBadges(RHRegistrationsActionBase):
     """Print badges for the selected registrations."""
 
@@ -493,17 +468,48 @@ class RHRegistrationsConfigBadges(RHRegistrationsActionBase):
             template_id = data.pop('template')
             if data.pop('save_values', False):
                 event_badge_settings.set_multi(self.event, data)
-            data['registration_ids'] = [x.id for x in registrations]
-
-            key = str(uuid.uuid4())
-            badge_cache.set(key, data, timeout=1800)
-            download_url = url_for('.registrations_print_badges', self.regform, template_id=template_id, uuid=key)
-            return jsonify_data(flash=False, redirect=download_url, redirect_no_loading=True)
+            template = DesignerTemplate.get_or_404(template_id)
+            # fail early in case the badges do not fit on the page
+            get_badges_pdf_class(data['page_layout'])(template, data, self.event, []).get_grid_size()
+            task = generate_badges.delay(template, data, self.regform, [x.id for x in registrations], session.lang)
+            # only the user who started the task may check its status and download the badges
+            session.setdefault('badge_tasks', {})[task.id] = self.regform.id
+            session.modified = True
+            status_url = url_for('.registrations_badges_status', self.regform, task_id=task.id)
+            return jsonify_data(flash=False, status_url=status_url)
         return jsonify_template('events/registration/management/print_badges.html', event=self.event,
                                 regform=self.regform, settings_form=form, templates=badge_templates,
                                 registrations=registrations, all_registrations=all_registrations)
 
 
+class RHRegistrationsBadgesStatus(RHRegistrationsActionBase):
+    """Check the status of the badge generation."""
+
+    ALLOW_LOCKED = True
+    load_registrations = False
+
+    def _process_args(self):
+        RHRegistrationsActionBase._process_args(self)
+        self.task_id = request.view_args['task_id']
+        if session.get('badge_tasks', {}).get(self.task_id) != self.regform.id:
+            raise NotFound
+
+    def _process(self):
+        res = AsyncResult(self.task_id)
+        if not res.ready():
+            progress = res.info if res.state == 'PROGRESS' else {}
+            return jsonify(download_url=None, done=progress.get('done', 0), total=progress.get('total'))
+        del session['badge_tasks'][self.task_id]
+        session.modified = True
+        try:
+            if res.successful():
+                return jsonify(download_url=res.result)
+            else:
+                raise IndicoError(_('Badge generation failed'))
+        finally:
+            res.forget()
+
+
 class RHRegistrationsConfigTickets(RHRegistrationsConfigBadges):
     """Print tickets for selected registrations."""
 
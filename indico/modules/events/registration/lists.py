@@ -6,7 +6,7 @@
 # LICENSE file for more details.
 
 from flask import request
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, subqueryload
 
 from indico.core.db import db
 from indico.modules.events.registration.models.form_fields import RegistrationFormFieldData
@@ -24,6 +24,12 @@ class RegistrationListGenerator(ListGeneratorBase):
 
     endpoint = '.manage_reglist'
     list_link_type = 'registration'
+    default_loader_options = (subqueryload('data').joinedload('field_data').joinedload('field'),)
+    item_loader_options = {
+        'payment_date': (joinedload('transaction'),),
+        # the backref of the tags is eager, but loading all registrations of each tag is pointless here
+        'tags_present': (subqueryload('tags').lazyload('registrations'),),
+    }
 
     def __init__(self, regform):
         super().__init__(regform.event, entry_parent=regform)
@@ -86,9 +92,9 @@ class RegistrationListGenerator(ListGeneratorBase):
         """
         ids = set(ids)
         result = []
+        personal_data_fields = {x.personal_data_type: x for x in self.regform.form_items if x.is_field}
         for item_id in [x for x in self.personal_items if x in ids]:
-            field = RegistrationFormItem.query.filter_by(registration_form=self.regform,
-                                                         personal_data_type=PersonalDataType[item_id]).one()
+            field = personal_data_fields[PersonalDataType[item_id]]
             result.append({'id': field.id, 'caption': field.title})
         for item_id in [x for x in self.static_items if x in ids]:
             result.append({'id': item_id, 'caption': self.static_items[item_id]['title']})
@@ -136,7 +142,6 @@ class RegistrationListGenerator(ListGeneratorBase):
         return (Registration.query
                 .with_parent(self.regform)
                 .filter(~Registration.is_deleted)
-                .options(joinedload('data').joinedload('field_data').joinedload('field'))
                 .order_by(db.func.lower(Registration.last_name), db.func.lower(Registration.first_name)))
 
     def _filter_list_entries(self, query, filters):
@@ -186,7 +191,9 @@ class RegistrationListGenerator(ListGeneratorBase):
         reg_list_config = self._get_config()
         registrations_query = self._build_query()
         total_entries = registrations_query.count()
-        registrations = self._filter_list_entries(registrations_query, reg_list_config['filters']).all()
+        registrations = (self._filter_list_entries(registrations_query, reg_list_config['filters'])
+                         .options(*self._get_loader_options(reg_list_config['items']))
+                         .all())
         dynamic_item_ids, static_item_ids = self._split_item_ids(reg_list_config['items'], 'dynamic')
         static_columns = self._get_static_columns(static_item_ids)
         regform_items = self._get_sorted_regform_items(dynamic_item_ids)
@@ -0,0 +1,61 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+import pytest
+from flask import session
+
+from indico.modules.events.registration.lists import RegistrationListGenerator
+from indico.modules.events.registration.models.items import PersonalDataType
+from indico.modules.events.registration.models.registrations import Registration, RegistrationData, RegistrationState
+from indico.modules.events.registration.models.tags import RegistrationTag
+
+
+pytest_plugins = 'indico.modules.events.registration.testing.fixtures'
+
+
+def _create_registrations(db, regform, tag, field, start, end):
+    for i in range(start, end):
+        reg = Registration(registration_form=regform, friendly_id=i + 1, first_name=f'Guinea {i}', last_name='Pig',
+                           email=f'pig{i}@example.com', state=RegistrationState.complete, currency='USD', tags={tag})
+        reg.data.append(RegistrationData(field_data=field.current_data, data='ACME'))
+        db.session.add(reg)
+    db.session.flush()
+    db.session.expire_all()
+
+
+def _count_list_queries(count_queries, regform, field):
+    list_generator = RegistrationListGenerator(regform=regform)
+    with count_queries() as cnt:
+        kwargs = list_generator.get_list_kwargs()
+        # access everything the list template needs to render the entries
+        for reg in kwargs['registrations']:
+            assert reg.data_by_field[field.id].friendly_data == 'ACME'
+            assert [t.title for t in reg.tags] == ['VIP']
+            assert reg.payment_dt is None
+            assert not reg.has_files
+            reg.render_price()
+    return len(kwargs['registrations']), cnt()
+
+
+@pytest.mark.usefixtures('request_context')
+def test_registration_list_query_count(db, dummy_event, dummy_regform, count_queries):
+    tag = RegistrationTag(event=dummy_event, title='VIP', color='red')
+    field = next(f for f in dummy_regform.form_items if f.personal_data_type == PersonalDataType.affiliation)
+    session[f'registration_config_{dummy_regform.id}'] = {
+        'items': ['affiliation', 'reg_date', 'state', 'price', 'payment_date', 'tags_present', field.id],
+        'filters': {'fields': {}, 'items': {}}
+    }
+    query_counts = set()
+    created = 0
+    for count in (10, 1000, 10000):
+        _create_registrations(db, dummy_regform, tag, field, created, count)
+        created = count
+        num_registrations, num_queries = _count_list_queries(count_queries, dummy_regform, field)
+        assert num_registrations == count
+        query_counts.add(num_queries)
+    # the number of queries must not depend on the number of registrations
+    assert len(query_counts) == 1
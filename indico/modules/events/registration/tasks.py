@@ -0,0 +1,54 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from flask import session
+from sqlalchemy.orm import subqueryload
+
+from indico.core import signals
+from indico.core.celery import celery
+from indico.core.db import db
+from indico.modules.events.registration import logger
+from indico.modules.events.registration.badges import get_badges_pdf_class
+from indico.modules.events.registration.models.registrations import Registration
+from indico.modules.files.models.files import File
+
+
+#: How often (in badges) the progress of the badge generation is updated
+BADGE_PROGRESS_INTERVAL = 100
+
+
+@celery.task(bind=True, ignore_result=False, request_context=True)
+def generate_badges(task, template, config_params, regform, registration_ids, lang):
+    """Generate a PDF file with badges for registrations.
+
+    The progress is stored in the task's ``PROGRESS`` state as the
+    number of badges which have been generated so far.
+
+    :return: The URL to download the PDF file.
+    """
+    session.lang = lang
+    event = regform.event
+    registrations = (Registration.query.with_parent(regform)
+                     .filter(Registration.id.in_(registration_ids),
+                             Registration.is_active)
+                     .order_by(*Registration.order_by_name)
+                     .options(subqueryload('data').joinedload('field_data'))
+                     .all())
+    signals.event.designer.print_badge_template.send(template, regform=regform, registrations=registrations)
+
+    def _update_progress(done, total):
+        if done % BADGE_PROGRESS_INTERVAL == 0:
+            task.update_state(state='PROGRESS', meta={'done': done, 'total': total})
+
+    logger.info('Generating %d badges for %r', len(registrations), regform)
+    pdf_class = get_badges_pdf_class(config_params['page_layout'])
+    pdf = pdf_class(template, config_params, event, registrations, progress_callback=_update_progress)
+    f = File(filename=f'Badges-{event.id}.pdf', content_type='application/pdf', meta={'event_id': event.id})
+    f.save(('event', event.id, 'badges'), pdf.get_pdf())
+    db.session.add(f)
+    db.session.commit()
+    return f.signed_download_url
@@ -384,9 +384,13 @@ def modify_registration(registration, data, management=False, notify_user=True):
 def generate_spreadsheet_from_registrations(registrations, regform_items, static_items):
     """Generate a spreadsheet data from a given registration list.
 
-    :param registrations: The list of registrations to include in the file
+    :param registrations: The registrations to include in the file;
+                          any iterable works and it is only consumed
+                          while iterating over the rows
     :param regform_items: The registration form items to be used as columns
     :param static_items: Registration form information as extra columns
+    :return: A tuple containing the column names and an iterator
+             yielding the rows
     """
     field_names = ['ID', 'Name']
     special_item_mapping = {
@@ -407,32 +411,34 @@ def generate_spreadsheet_from_registrations(registrations, regform_items, static
             field_names.append(unique_col('{} ({})'.format(item.title, 'Arrival'), item.id))
             field_names.append(unique_col('{} ({})'.format(item.title, 'Departure'), item.id))
     field_names.extend(title for name, (title, fn) in special_item_mapping.items() if name in static_items)
-    rows = []
-    for registration in registrations:
-        data = registration.data_by_field
-        registration_dict = {
-            'ID': registration.friendly_id,
-            'Name': f'{registration.first_name} {registration.last_name}'
-        }
-        for item in regform_items:
-            key = unique_col(item.title, item.id)
-            if item.input_type == 'accommodation':
-                registration_dict[key] = data[item.id].friendly_data.get('choice') if item.id in data else ''
-                key = unique_col('{} ({})'.format(item.title, 'Arrival'), item.id)
-                arrival_date = data[item.id].friendly_data.get('arrival_date') if item.id in data else None
-                registration_dict[key] = format_date(arrival_date) if arrival_date else ''
-                key = unique_col('{} ({})'.format(item.title, 'Departure'), item.id)
-                departure_date = data[item.id].friendly_data.get('departure_date') if item.id in data else None
-                registration_dict[key] = format_date(departure_date) if departure_date else ''
-            else:
-                registration_dict[key] = data[item.id].friendly_data if item.id in data else ''
-        for name, (title, fn) in special_item_mapping.items():
-            if name not in static_items:
-                continue
-            value = fn(registration)
-            registration_dict[title] = value
-        rows.append(registration_dict)
-    return field_names, rows
+
+    def _iter_rows():
+        for registration in registrations:
+            data = registration.data_by_field
+            registration_dict = {
+                'ID': registration.friendly_id,
+                'Name': f'{registration.first_name} {registration.last_name}'
+            }
+            for item in regform_items:
+                key = unique_col(item.title, item.id)
+                if item.input_type == 'accommodation':
+                    registration_dict[key] = data[item.id].friendly_data.get('choice') if item.id in data else ''
+                    key = unique_col('{} ({})'.format(item.title, 'Arrival'), item.id)
+                    arrival_date = data[item.id].friendly_data.get('arrival_date') if item.id in data else None
+                    registration_dict[key] = format_date(arrival_date) if arrival_date else ''
+                    key = unique_col('{} ({})'.format(item.title, 'Departure'), item.id)
+                    departure_date = data[item.id].friendly_data.get('departure_date') if item.id in data else None
+                    registration_dict[key] = format_date(departure_date) if departure_date else ''
+                else:
+                    registration_dict[key] = data[item.id].friendly_data if item.id in data else ''
+            for name, (title, fn) in special_item_mapping.items():
+                if name not in static_items:
+                    continue
+                value = fn(registration)
+                registration_dict[title] = value
+            yield registration_dict
+
+    return field_names, _iter_rows()
 
 
 def get_registrations_with_tickets(user, event):
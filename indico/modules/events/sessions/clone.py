@@ -10,7 +10,8 @@ from sqlalchemy.orm import joinedload, subqueryload
 from indico.core.db import db
 from indico.core.db.sqlalchemy.principals import clone_principals
 from indico.core.db.sqlalchemy.util.models import get_simple_column_attrs
-from indico.modules.events.cloning import EventCloner
+from indico.modules.events.cloning import (ClonedObjectMap, EventCloner, clone_principal_rows, clone_rows, get_id_map,
+                                           in_id_map)
 from indico.modules.events.sessions import Session
 from indico.modules.events.sessions.models.blocks import SessionBlock
 from indico.modules.events.sessions.models.persons import SessionBlockPersonLink
@@ -24,6 +25,7 @@ class SessionCloner(EventCloner):
     requires = {'event_persons'}
     uses = {'event_roles', 'registration_forms'}
     is_internal = True
+    supports_bulk = True
 
     # We do not override `is_available` as we have cloners depending
     # on this internal cloner even if it won't clone anything.
@@ -48,6 +50,21 @@ class SessionCloner(EventCloner):
         db.session.flush()
         return {'session_map': self._session_map, 'session_block_map': self._session_block_map}
 
+    def run_bulk(self, new_event, cloners, shared_data):
+        event_role_map = shared_data['event_roles']['event_role_map'] if 'event_roles' in cloners else None
+        regform_map = shared_data['registration_forms']['form_map'] if 'registration_forms' in cloners else None
+        person_map = get_id_map(shared_data['event_persons']['person_map'])
+        session_map = clone_rows(Session, Session.event_id == self.old_event.id, ~Session.is_deleted,
+                                 values={'event_id': new_event.id}, extra_columns={'room_id', 'venue_id'})
+        session_block_map = clone_rows(SessionBlock, in_id_map(SessionBlock.session_id, session_map),
+                                       id_maps={'session_id': session_map}, extra_columns={'room_id', 'venue_id'})
+        clone_rows(SessionBlockPersonLink, in_id_map(SessionBlockPersonLink.session_block_id, session_block_map),
+                   id_maps={'session_block_id': session_block_map, 'person_id': person_map})
+        clone_principal_rows(SessionPrincipal, 'session_id', session_map, event_role_map, regform_map)
+        self._synchronize_friendly_id(new_event)
+        return {'session_map': ClonedObjectMap(Session, session_map),
+                'session_block_map': ClonedObjectMap(SessionBlock, session_block_map)}
+
     def _clone_sessions(self, new_event, event_exists=False):
         attrs = get_simple_column_attrs(Session) | {'own_room', 'own_venue'}
         query = (Session.query.with_parent(self.old_event)
@@ -80,9 +80,10 @@ def session_to_ical(
         contributions = (Contribution.query.with_parent(session)
                          .filter(Contribution.is_scheduled)
                          .all())
+        access = Contribution.can_access_many(contributions, user)
         components = [generate_contribution_component(contribution, related_event_uid, organizer=organizer)
                       for contribution in contributions
-                      if contribution.can_access(user)]
+                      if access[contribution]]
         for component in components:
             calendar.add_component(component)
 
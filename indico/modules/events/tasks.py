@@ -0,0 +1,38 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from flask import session
+
+from indico.core.celery import celery
+from indico.core.db import db
+from indico.core.notifications import flush_email_queue
+from indico.modules.events import logger
+from indico.modules.events.notifications import notify_clone_failed
+from indico.modules.events.operations import clone_event
+
+
+@celery.task(request_context=True)
+def clone_event_occurrence(event, n_occurrence, start_dt, cloners, category, refresh_users, user):
+    """Create one occurrence of a recurring event clone.
+
+    Each occurrence is cloned in a separate task (and transaction)
+    using the bulk mode of the cloners, so cloning a large event many
+    times neither blocks the request nor holds a long transaction.
+    If cloning fails, the user who requested it is notified by email.
+    """
+    session.set_session_user(user)
+    try:
+        new_event = clone_event(event, n_occurrence, start_dt, cloners, category, refresh_users, bulk=True)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        logger.exception('Cloning event %r to %s (occurrence %d) failed for %r', event, start_dt, n_occurrence, user)
+        notify_clone_failed(event, start_dt, user)
+        # the task is about to fail, so the queued email would not be sent otherwise
+        flush_email_queue()
+        raise
+    logger.info('Event %r cloned to %r (occurrence %d) by %r', event, new_event, n_occurrence, user)
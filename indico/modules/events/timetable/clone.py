@@ -9,7 +9,7 @@ from sqlalchemy.orm import defaultload, joinedload
 
 from indico.core.db import db
 from indico.core.db.sqlalchemy.util.models import get_simple_column_attrs
-from indico.modules.events.cloning import EventCloner
+from indico.modules.events.cloning import EventCloner, clone_rows, get_id_map, in_id_map
 from indico.modules.events.models.events import EventType
 from indico.modules.events.timetable.models.breaks import Break
 from indico.modules.events.timetable.models.entries import TimetableEntry, TimetableEntryType
@@ -20,6 +20,7 @@ class TimetableCloner(EventCloner):
     name = 'timetable'
     friendly_name = _('Timetable')
     requires = {'sessions', 'contributions'}
+    supports_bulk = True
 
     @property
     def is_available(self):
@@ -50,6 +51,22 @@ class TimetableCloner(EventCloner):
             self._clone_timetable(new_event)
         db.session.flush()
 
+    def run_bulk(self, new_event, cloners, shared_data):
+        offset = new_event.start_dt - self.old_event.start_dt
+        old_break_ids = (db.select([TimetableEntry.break_id])
+                         .where(TimetableEntry.event_id == self.old_event.id))
+        break_map = clone_rows(Break, Break.id.in_(old_break_ids), extra_columns={'room_id', 'venue_id'})
+        id_maps = {'session_block_id': get_id_map(shared_data['sessions']['session_block_map']),
+                   'contribution_id': get_id_map(shared_data['contributions']['contrib_map']),
+                   'break_id': break_map}
+        values = {'event_id': new_event.id, 'start_dt': TimetableEntry.start_dt + db.literal(offset, db.Interval)}
+        # top-level entries first so nested entries can be mapped to their new parents
+        entry_map = clone_rows(TimetableEntry, TimetableEntry.event_id == self.old_event.id,
+                               TimetableEntry.parent_id.is_(None),
+                               values=values, id_maps=id_maps)
+        clone_rows(TimetableEntry, in_id_map(TimetableEntry.parent_id, entry_map),
+                   values=values, id_maps=dict(id_maps, parent_id=entry_map))
+
     def _has_content(self, event):
         return event.timetable_entries.has_rows()
 
@@ -13,8 +13,10 @@ from flask import render_template, request, session
 from sqlalchemy.orm import joinedload
 
 from indico.core import signals
+from indico.modules.events.contributions import Contribution
 from indico.modules.events.layout import theme_settings
 from indico.modules.events.management.views import WPEventManagement
+from indico.modules.events.sessions import Session
 from indico.modules.events.timetable.models.entries import TimetableEntryType
 from indico.modules.events.timetable.views.weeks import inject_week_timetable
 from indico.modules.events.util import get_theme
@@ -95,14 +97,20 @@ def inject_meeting_body(event, **kwargs):
                 str(entry.object.session.friendly_id) != show_session):
             continue
 
-        if entry.type == TimetableEntryType.BREAK:
-            entries.append(entry)
-        elif entry.object.can_access(session.user):
-            entries.append(entry)
+        entries.append(entry)
         if not entry.object.inherit_location:
             show_siblings_location = True
         show_children_location[entry.id] = not all(child.object.inherit_location for child in entry.children)
 
+    # check access for all contributions and sessions at once instead of once per entry
+    contribs = [e.object for e in entries if e.type == TimetableEntryType.CONTRIBUTION]
+    sessions = {e.object.session for e in entries if e.type == TimetableEntryType.SESSION_BLOCK}
+    access = {**Contribution.can_access_many(contribs, session.user),
+              **Session.can_access_many(sessions, session.user)}
+    entries = [e for e in entries
+               if e.type == TimetableEntryType.BREAK or
+               access[e.object.session if e.type == TimetableEntryType.SESSION_BLOCK else e.object]]
+
     entries.sort(key=attrgetter('end_dt'), reverse=True)
     entries.sort(key=lambda entry: (entry.start_dt, _entry_title_key(entry)))
 
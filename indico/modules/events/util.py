@@ -15,7 +15,6 @@ from contextlib import contextmanager
 from copy import deepcopy
 from mimetypes import guess_extension
 from tempfile import NamedTemporaryFile
-from zipfile import ZipFile
 
 from flask import current_app, flash, g, redirect, request, session
 from sqlalchemy import inspect
@@ -49,7 +48,8 @@ from indico.util.fs import chmod_umask, secure_filename
 from indico.util.i18n import _
 from indico.util.string import strip_tags
 from indico.util.user import principal_from_identifier
-from indico.web.flask.util import send_file, url_for
+from indico.util.zip import ZipStreamEntry, iter_zip_stream
+from indico.web.flask.util import send_stream, url_for
 from indico.web.forms.colors import get_colors
 
 
@@ -229,6 +229,13 @@ class ListGeneratorBase:
     list_link_type = None
     #: The default list configuration dictionary
     default_list_config = None
+    #: Query options to load everything needed to render any list entry,
+    #: regardless of the visible columns
+    default_loader_options = ()
+    #: Query options to load the data needed to render specific columns,
+    #: keyed by item id.  Using them, the data of a column is loaded for
+    #: all list entries at once instead of lazily for each entry.
+    item_loader_options = {}
 
     def __init__(self, event, entry_parent=None):
         #: The event the list is associated with
@@ -296,6 +303,18 @@ class ListGeneratorBase:
         """Apply user's filters to query and return it."""
         raise NotImplementedError
 
+    def _get_loader_options(self, item_ids):
+        """Get the query options to preload the data for the given items.
+
+        :param item_ids: The ids of the visible list items.
+        :return: A list of query options which can be applied to the
+                 query returned by :meth:`_build_query`.
+        """
+        options = list(self.default_loader_options)
+        for item_id in item_ids:
+            options.extend(self.item_loader_options.get(item_id, ()))
+        return options
+
     def _get_filters_from_request(self):
         """Get the new filters after the filter form is submitted."""
         def get_selected_options(item_id, item):
@@ -663,30 +682,39 @@ class ZipGeneratorMixin:
     def _iter_items(self, files_holder):
         yield from files_holder
 
+    def _iter_zip_entries(self, files_holder):
+        self.used_filenames = set()
+        for item in self._iter_items(files_holder):
+            name = self._prepare_folder_structure(item)
+            self.used_filenames.add(name)
+            yield ZipStreamEntry(name, item.open, size=item.size, content_type=item.content_type,
+                                 modified_dt=getattr(item, 'created_dt', None))
+
     def _generate_zip_file(self, files_holder, name_prefix='material', name_suffix=None, return_file=False):
         """Generate a zip file containing the files passed.
 
+        The zip file is streamed to the client while it is being
+        generated, so it is never stored on disk.
+
         :param files_holder: An iterable (or an iterable containing) object that
                              contains the files to be added in the zip file.
         :param name_prefix: The prefix to the zip file name
         :param name_suffix: The suffix to the zip file name
-        :param return_file: Return the temp file instead of a response
+        :param return_file: Write the zip file to a temp file and return it
+                            instead of a response
         """
-
-        temp_file = NamedTemporaryFile(suffix='.zip', dir=config.TEMP_DIR, delete=False)
-        with ZipFile(temp_file.name, 'w', allowZip64=True) as zip_handler:
-            self.used_filenames = set()
-            for item in self._iter_items(files_holder):
-                name = self._prepare_folder_structure(item)
-                self.used_filenames.add(name)
-                with item.get_local_path() as filepath:
-                    zip_handler.write(filepath, name)
-
-        zip_file_name = f'{name_prefix}-{name_suffix}.zip' if name_suffix else f'{name_prefix}.zip'
-        chmod_umask(temp_file.name)
+        zip_data = iter_zip_stream(self._iter_zip_entries(files_holder))
         if return_file:
+            temp_file = NamedTemporaryFile(suffix='.zip', dir=config.TEMP_DIR, delete=False)
+            for chunk in zip_data:
+                temp_file.write(chunk)
+            temp_file.flush()
+            temp_file.seek(0)
+            chmod_umask(temp_file.name)
             return temp_file
-        return send_file(zip_file_name, temp_file.name, 'application/zip', inline=False)
+
+        zip_file_name = f'{name_prefix}-{name_suffix}.zip' if name_suffix else f'{name_prefix}.zip'
+        return send_stream(zip_file_name, zip_data, 'application/zip', inline=False)
 
     def _prepare_folder_structure(self, item):
         file_name = secure_filename(f'{item.id}_{item.filename}', str(item.id))
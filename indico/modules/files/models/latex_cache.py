@@ -0,0 +1,48 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+import posixpath
+
+from indico.core.config import config
+from indico.core.db import db
+from indico.core.db.sqlalchemy import UTCDateTime
+from indico.core.storage import StoredFileMixin
+from indico.util.date_time import now_utc
+from indico.util.string import format_repr
+
+
+class LatexCacheEntry(StoredFileMixin, db.Model):
+    """A cached PDF file generated using LaTeX."""
+
+    __tablename__ = 'latex_cache_entries'
+    __table_args__ = {'schema': 'indico'}
+
+    id = db.Column(
+        db.Integer,
+        primary_key=True
+    )
+    #: A hash of the LaTeX source and all files it uses
+    hash = db.Column(
+        db.String,
+        unique=True,
+        nullable=False
+    )
+    #: The last time the cached file was used
+    accessed_dt = db.Column(
+        UTCDateTime,
+        nullable=False,
+        index=True,
+        default=now_utc
+    )
+
+    def _build_storage_path(self):
+        self.assign_id()
+        path = posixpath.join('latex-cache', self.hash[:2], f'{self.id}-{self.hash}.pdf')
+        return config.LATEX_CACHE_STORAGE, path
+
+    def __repr__(self):
+        return format_repr(self, 'id', 'hash', size=None)
@@ -0,0 +1,95 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+import os
+from datetime import timedelta
+from tempfile import NamedTemporaryFile
+
+import pytest
+
+from indico.legacy.pdfinterface.latex import LatexRunner
+from indico.modules.files.models.latex_cache import LatexCacheEntry
+from indico.modules.files.tasks import latex_cache_cleanup
+from indico.util.date_time import now_utc
+
+
+@pytest.fixture
+def make_runner(app, tmp_path, mocker):
+    mocker.patch.dict(app.config, {'INDICO': dict(app.config['INDICO'], XELATEX_PATH='/usr/bin/xelatex',
+                                                  LATEX_CACHE_SIZE=1)})
+
+    def _make_runner(source, image=None, has_toc=False):
+        source_dir = tmp_path / f'src{len(list(tmp_path.iterdir()))}'
+        source_dir.mkdir()
+        if image is not None:
+            with NamedTemporaryFile(dir=source_dir, suffix='.png', delete=False) as f:
+                f.write(image)
+            source = source.format(image=os.path.basename(f.name))
+        source_file = source_dir / 'test.tex'
+        source_file.write_text(source)
+        return LatexRunner(str(source_dir), has_toc=has_toc), str(source_file)
+
+    return _make_runner
+
+
+def test_cache_key(make_runner):
+    runner, source_file = make_runner(r'\includegraphics{{{image}}}', b'foo')
+    key = runner._get_cache_key(source_file)
+    # images have random names, only their contents matter
+    runner, source_file = make_runner(r'\includegraphics{{{image}}}', b'foo')
+    assert runner._get_cache_key(source_file) == key
+    runner, source_file = make_runner(r'\includegraphics{{{image}}}', b'bar')
+    assert runner._get_cache_key(source_file) != key
+    runner, source_file = make_runner(r'\includegraphics{{{image}}} \today', b'foo')
+    assert runner._get_cache_key(source_file) != key
+    runner, source_file = make_runner(r'\includegraphics{{{image}}}', b'foo', has_toc=True)
+    assert runner._get_cache_key(source_file) != key
+
+
+def _make_pdf(runner, data):
+    target_file = os.path.join(runner.source_dir, 'test.pdf')
+    with open(target_file, 'wb') as f:
+        f.write(data)
+    return target_file
+
+
+def _load_cached(runner, source_file):
+    target_file = os.path.join(runner.source_dir, 'cached.pdf')
+    if not runner._load_cached_pdf(runner._get_cache_key(source_file), target_file):
+        return None
+    with open(target_file, 'rb') as f:
+        return f.read()
+
+
+def test_cache_hit_miss(db, make_runner):
+    runner, source_file = make_runner(r'\includegraphics{{{image}}}', b'foo')
+    assert _load_cached(runner, source_file) is None
+    runner._cache_pdf(runner._get_cache_key(source_file), _make_pdf(runner, b'%PDF-foo'))
+    # same source and images
+    runner, source_file = make_runner(r'\includegraphics{{{image}}}', b'foo')
+    assert _load_cached(runner, source_file) == b'%PDF-foo'
+    # different image
+    runner, source_file = make_runner(r'\includegraphics{{{image}}}', b'bar')
+    assert _load_cached(runner, source_file) is None
+    assert LatexCacheEntry.query.count() == 1
+
+
+def test_cache_lru_eviction(db, make_runner):
+    entries = []
+    for i in range(3):
+        runner, source_file = make_runner(f'source {i}')
+        runner._cache_pdf(runner._get_cache_key(source_file), _make_pdf(runner, b'x' * 400 * 1024))
+        entry = LatexCacheEntry.query.filter_by(hash=runner._get_cache_key(source_file)).one()
+        entry.accessed_dt = now_utc() - timedelta(hours=3 - i)
+        entries.append((runner, source_file))
+    # using the oldest entry makes it the most recently used one
+    runner, source_file = entries[0]
+    assert _load_cached(runner, source_file)
+    db.session.flush()
+    # 1.2 MB exceed the cache size of 1 MB, so the least recently used entry is removed
+    latex_cache_cleanup()
+    assert [bool(_load_cached(runner, source_file)) for runner, source_file in entries] == [True, False, True]
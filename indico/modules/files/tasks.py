@@ -16,6 +16,7 @@ from indico.core.db import db
 from indico.core.storage import StorageError, StorageReadOnlyError
 from indico.modules.files import logger
 from indico.modules.files.models.files import File
+from indico.modules.files.models.latex_cache import LatexCacheEntry
 from indico.util.date_time import now_utc
 
 
@@ -46,3 +47,32 @@ def delete_unclaimed_files():
         else:
             logger.info('Removed unclaimed file %s', file_repr)
         db.session.commit()
+
+
+@celery.periodic_task(name='latex_cache_cleanup', run_every=crontab(minute='15'))
+def latex_cache_cleanup():
+    """Remove the least recently used PDFs from the LaTeX cache.
+
+    Files are removed until the total size of the cache is below the
+    limit set in :data:`LATEX_CACHE_SIZE`.
+    """
+    max_size = config.LATEX_CACHE_SIZE * 1024 * 1024
+    total_size = db.session.query(db.func.coalesce(db.func.sum(LatexCacheEntry.size), 0)).scalar()
+    if total_size <= max_size:
+        return
+    removed = 0
+    for entry in LatexCacheEntry.query.order_by(LatexCacheEntry.accessed_dt).all():
+        if total_size <= max_size:
+            break
+        entry_repr = repr(entry)
+        entry_size = entry.size
+        try:
+            entry.delete(delete_from_db=True)
+        except StorageError as exc:
+            db.session.rollback()  # undo deletion from db
+            logger.error('Could not delete cached PDF %s: %s', entry_repr, exc)
+            continue
+        db.session.commit()
+        total_size -= entry_size
+        removed += 1
+    logger.info('Removed %d PDFs from the LaTeX cache', removed)
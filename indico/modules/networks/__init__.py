@@ -5,18 +5,20 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
-from flask import has_request_context, request, session
+from flask import session
 
 from indico.core import signals
 from indico.core.logger import Logger
 from indico.modules.attachments import Attachment, AttachmentFolder
 from indico.modules.networks.models.networks import IPNetworkGroup
-from indico.util.caching import memoize_request
+from indico.modules.networks.util import has_attachment_network_access
 from indico.util.i18n import _
 from indico.web.flask.util import url_for
 from indico.web.menu import SideMenuItem
 
 
+__all__ = ('logger', 'IPNetworkGroup')
+
 logger = Logger.get('networks')
 
 
@@ -30,13 +32,7 @@ def _sidemenu_items(sender, **kwargs):
 @signals.acl.can_access.connect_via(AttachmentFolder)
 def _can_access(cls, obj, user, authorized, **kwargs):
     # Grant full access to attachments/folders to certain networks
-    if not has_request_context() or not request.remote_addr or authorized is not None:
+    if authorized is not None:
         return
-    ip = str(request.remote_addr)
-    if any(net.contains_ip(ip) for net in _get_attachment_access_networks()):
+    if has_attachment_network_access():
         return True
-
-
-@memoize_request
-def _get_attachment_access_networks():
-    return IPNetworkGroup.query.filter_by(attachment_access_override=True).all()
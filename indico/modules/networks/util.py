@@ -5,6 +5,25 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
+from flask import has_request_context, request
+
+from indico.modules.networks.models.networks import IPNetworkGroup
+from indico.util.caching import memoize_request
+
+
+@memoize_request
+def _get_attachment_access_networks():
+    return IPNetworkGroup.query.filter_by(attachment_access_override=True).all()
+
+
+def has_attachment_network_access():
+    """Check whether the current request comes from a network with full attachment access."""
+    if not has_request_context() or not request.remote_addr:
+        return False
+    ip = str(request.remote_addr)
+    return any(net.contains_ip(ip) for net in _get_attachment_access_networks())
+
+
 def serialize_ip_network_group(group):
     """Serialize group to JSON-like object."""
     return {
@@ -14,7 +14,7 @@ from indico.util.caching import memoize_redis
 from indico.util.date_time import now_utc
 
 
-@memoize_redis(3600)
+@memoize_redis(3600, local_ttl=60)
 def get_recent_news():
     """Get a list of recent news for the home page."""
     settings = news_settings.get_all()
@@ -5,7 +5,7 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
-from flask import session
+from flask import has_app_context, session
 
 from indico.core import signals
 from indico.core.cache import make_scoped_cache
@@ -149,3 +149,43 @@ def _get_management_permissions(sender, **kwargs):
 @signals.core.app_created.connect
 def _check_permissions(app, **kwargs):
     check_permissions(Room)
+
+
+@signals.rb.booking_created.connect
+@signals.rb.booking_state_changed.connect
+@signals.rb.booking_deleted.connect
+def _booking_changed(reservation, **kwargs):
+    from indico.modules.rb.statistics import queue_room_occupancy_update
+    queue_room_occupancy_update(reservation.room_id, reservation.start_dt.date(), reservation.end_dt.date())
+
+
+@signals.rb.booking_modified.connect
+def _booking_modified(reservation, changes, **kwargs):
+    from indico.modules.rb.statistics import queue_room_occupancy_update
+    start_date = reservation.start_dt.date()
+    end_date = reservation.end_dt.date()
+    if 'start_dt/date' in changes:
+        start_date = min(start_date, changes['start_dt/date']['old'])
+    if 'end_dt/date' in changes:
+        end_date = max(end_date, changes['end_dt/date']['old'])
+    queue_room_occupancy_update(reservation.room_id, start_date, end_date)
+
+
+@signals.rb.booking_occurrence_state_changed.connect
+def _booking_occurrence_state_changed(occurrence, **kwargs):
+    from indico.modules.rb.statistics import queue_room_occupancy_update
+    queue_room_occupancy_update(occurrence.reservation.room_id, occurrence.date)
+
+
+@signals.core.before_commit.connect
+def _update_room_occupancy(sender, **kwargs):
+    from indico.modules.rb.statistics import flush_room_occupancy_queue
+    if has_app_context():
+        flush_room_occupancy_queue()
+
+
+@signals.core.after_rollback.connect
+def _discard_room_occupancy_updates(sender, **kwargs):
+    from indico.modules.rb.statistics import discard_room_occupancy_queue
+    if has_app_context():
+        discard_room_occupancy_queue()
@@ -0,0 +1,49 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from indico.core.db import db
+from indico.util.string import format_repr
+
+
+class RoomOccupancy(db.Model):
+    """The aggregated occupancy of a room on a single day.
+
+    The entries are derived from the valid occurrences of all bookings
+    of the room and kept up to date whenever bookings are created or
+    change; they are only used for statistics.
+    """
+
+    __tablename__ = 'room_occupancy'
+    __table_args__ = {'schema': 'roombooking'}
+
+    #: The ID of the room
+    room_id = db.Column(
+        db.Integer,
+        db.ForeignKey('roombooking.rooms.id', ondelete='CASCADE'),
+        primary_key=True,
+        autoincrement=False
+    )
+    #: The day of the occupancy
+    date = db.Column(
+        db.Date,
+        primary_key=True
+    )
+    #: The booked time within the working hours, in seconds
+    booked_time = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0
+    )
+    #: The number of valid occurrences on that day
+    bookings = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0
+    )
+
+    def __repr__(self):
+        return format_repr(self, 'room_id', 'date', 'booked_time', 'bookings')
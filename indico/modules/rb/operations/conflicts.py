@@ -5,9 +5,10 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
-from datetime import datetime
-from itertools import combinations
+from datetime import datetime, timedelta
+from operator import attrgetter
 
 from flask import session
 from sqlalchemy.orm import contains_eager
@@ -20,6 +21,42 @@ from indico.util.date_time import get_overlap
 from indico.util.iterables import group_list
 
 
+class IntervalIndex:
+    """An index to efficiently find intervals overlapping a given range.
+
+    The intervals are sorted by their start, so the candidates for an
+    overlap can be found using bisection instead of comparing the range
+    with every single interval.
+
+    :param items: The objects to index
+    :param key: A callable returning the ``(start, end)`` tuple of an
+                object; the end is exclusive.
+    """
+
+    def __init__(self, items, key=attrgetter('start_dt', 'end_dt')):
+        ranges = sorted(((key(item), item) for item in items), key=lambda x: x[0][0])
+        self._items = [item for __, item in ranges]
+        self._starts = [start for (start, __), __ in ranges]
+        self._ends = [end for (__, end), __ in ranges]
+        self._max_duration = max((end - start for start, end in zip(self._starts, self._ends)), default=None)
+
+    def __len__(self):
+        return len(self._items)
+
+    def overlapping(self, start, end):
+        """Get the objects overlapping with a range, ordered by their start."""
+        if not self._items:
+            return []
+        # nothing can overlap if it started before the range minus the longest interval
+        lo = bisect_right(self._starts, start - self._max_duration)
+        hi = bisect_left(self._starts, end)
+        return [self._items[i] for i in range(lo, hi) if self._ends[i] > start]
+
+    def overlaps(self, start, end):
+        """Check whether any object overlaps with a range."""
+        return bool(self.overlapping(start, end))
+
+
 def get_rooms_conflicts(rooms, start_dt, end_dt, repeat_frequency, repeat_interval, blocked_rooms,
                         nonbookable_periods, unbookable_hours, skip_conflicts_with=None, allow_admin=False,
                         skip_past_conflicts=False):
@@ -29,9 +66,9 @@ def get_rooms_conflicts(rooms, start_dt, end_dt, repeat_frequency, repeat_interv
     skip_conflicts_with = skip_conflicts_with or []
 
     candidates = ReservationOccurrence.create_series(start_dt, end_dt, (repeat_frequency, repeat_interval))
-    room_ids = [room.id for room in rooms]
+    rooms_by_id = {room.id: room for room in rooms}
     query = (ReservationOccurrence.query
-             .filter(Reservation.room_id.in_(room_ids),
+             .filter(Reservation.room_id.in_(list(rooms_by_id)),
                      ReservationOccurrence.is_valid,
                      ReservationOccurrence.filter_overlap(candidates))
              .join(ReservationOccurrence.reservation)
@@ -43,8 +80,8 @@ def get_rooms_conflicts(rooms, start_dt, end_dt, repeat_frequency, repeat_interv
     if skip_past_conflicts:
         query = query.filter(ReservationOccurrence.start_dt > datetime.now())
 
-    overlapping_occurrences = group_list(query, key=lambda obj: obj.reservation.room.id,
-                                         sort_by=lambda obj: obj.reservation.room.id)
+    overlapping_occurrences = group_list(query, key=lambda obj: obj.reservation.room_id,
+                                         sort_by=lambda obj: obj.reservation.room_id)
     for room_id, occurrences in overlapping_occurrences.items():
         conflicts = get_room_bookings_conflicts(candidates, occurrences, skip_conflicts_with)
         rooms_conflicts[room_id], rooms_pre_conflicts[room_id], rooms_conflicting_candidates[room_id] = conflicts
@@ -56,14 +93,14 @@ def get_rooms_conflicts(rooms, start_dt, end_dt, repeat_frequency, repeat_interv
 
     if not (allow_admin and rb_is_admin(session.user)):
         for room_id, occurrences in nonbookable_periods.items():
-            room = Room.get_or_404(room_id)
+            room = rooms_by_id.get(room_id) or Room.get_or_404(room_id)
             if not room.can_override(session.user, allow_admin=allow_admin):
                 conflicts, conflicting_candidates = get_room_nonbookable_periods_conflicts(candidates, occurrences)
                 rooms_conflicts[room_id] |= conflicts
                 rooms_conflicting_candidates[room_id] |= conflicting_candidates
 
         for room_id, occurrences in unbookable_hours.items():
-            room = Room.get_or_404(room_id)
+            room = rooms_by_id.get(room_id) or Room.get_or_404(room_id)
             if not room.can_override(session.user, allow_admin=allow_admin):
                 conflicts, conflicting_candidates = get_room_unbookable_hours_conflicts(candidates, occurrences)
                 rooms_conflicts[room_id] |= conflicts
@@ -76,73 +113,91 @@ def get_room_bookings_conflicts(candidates, occurrences, skip_conflicts_with=fro
     conflicts = set()
     pre_conflicts = set()
     conflicting_candidates = set()
+    index = IntervalIndex(occ for occ in occurrences if occ.reservation.id not in skip_conflicts_with)
     for candidate in candidates:
-        for occurrence in occurrences:
-            if occurrence.reservation.id in skip_conflicts_with:
-                continue
-            if candidate.overlaps(occurrence):
-                overlap = candidate.get_overlap(occurrence)
-                obj = TempReservationOccurrence(*overlap, reservation=occurrence.reservation)
-                if occurrence.reservation.is_accepted:
-                    conflicting_candidates.add(candidate)
-                    conflicts.add(obj)
-                else:
-                    pre_conflicts.add(obj)
+        for occurrence in index.overlapping(candidate.start_dt, candidate.end_dt):
+            overlap = get_overlap((candidate.start_dt, candidate.end_dt), (occurrence.start_dt, occurrence.end_dt))
+            obj = TempReservationOccurrence(*overlap, reservation=occurrence.reservation)
+            if occurrence.reservation.is_accepted:
+                conflicting_candidates.add(candidate)
+                conflicts.add(obj)
+            else:
+                pre_conflicts.add(obj)
     return conflicts, pre_conflicts, conflicting_candidates
 
 
 def get_room_blockings_conflicts(room_id, candidates, occurrences, allow_admin):
     conflicts = set()
     conflicting_candidates = set()
+    room = Room.get(room_id)
+    blockings = {occurrence.blocking for occurrence in occurrences}
+    # the blocking dates are inclusive, so they are indexed as a range ending on the next day
+    index = IntervalIndex((blocking for blocking in blockings
+                           if not blocking.can_override(session.user, room=room, allow_admin=allow_admin)),
+                          key=lambda blocking: (blocking.start_date, blocking.end_date + timedelta(days=1)))
+    if not index:
+        return conflicts, conflicting_candidates
     for candidate in candidates:
-        for occurrence in occurrences:
-            blocking = occurrence.blocking
-            if blocking.start_date <= candidate.start_dt.date() <= blocking.end_date:
-                if blocking.can_override(session.user, room=Room.get(room_id), allow_admin=allow_admin):
-                    continue
-                conflicting_candidates.add(candidate)
-                obj = TempReservationOccurrence(candidate.start_dt, candidate.end_dt, None)
-                conflicts.add(obj)
+        date = candidate.start_dt.date()
+        if index.overlaps(date, date + timedelta(days=1)):
+            conflicting_candidates.add(candidate)
+            conflicts.add(TempReservationOccurrence(candidate.start_dt, candidate.end_dt, None))
     return conflicts, conflicting_candidates
 
 
 def get_room_nonbookable_periods_conflicts(candidates, occurrences):
     conflicts = set()
     conflicting_candidates = set()
+    index = IntervalIndex(occurrences)
     for candidate in candidates:
-        for occurrence in occurrences:
+        for occurrence in index.overlapping(candidate.start_dt, candidate.end_dt):
             overlap = get_overlap((candidate.start_dt, candidate.end_dt), (occurrence.start_dt, occurrence.end_dt))
-            if overlap.count(None) != len(overlap):
-                conflicting_candidates.add(candidate)
-                obj = TempReservationOccurrence(overlap[0], overlap[1], None)
-                conflicts.add(obj)
+            conflicting_candidates.add(candidate)
+            conflicts.add(TempReservationOccurrence(overlap[0], overlap[1], None))
     return conflicts, conflicting_candidates
 
 
 def get_room_unbookable_hours_conflicts(candidates, occurrences):
     conflicts = set()
     conflicting_candidates = set()
+    hours = [(occurrence.start_time, occurrence.end_time) for occurrence in occurrences]
+    # all candidates of a series usually have the same times, so we only need to check once
+    # which unbookable hours may overlap with them
+    overlapping_hours = {}
     for candidate in candidates:
-        for occurrence in occurrences:
-            hours_start_dt = candidate.start_dt.replace(hour=occurrence.start_time.hour,
-                                                        minute=occurrence.start_time.minute)
-            hours_end_dt = candidate.end_dt.replace(hour=occurrence.end_time.hour,
-                                                    minute=occurrence.end_time.minute)
+        times = (candidate.start_dt.time(), candidate.end_dt.time(),
+                 candidate.end_dt.date() - candidate.start_dt.date())
+        if times not in overlapping_hours:
+            overlapping_hours[times] = [
+                (start_time, end_time) for start_time, end_time in hours
+                if _overlaps_time_of_day(candidate, start_time, end_time)
+            ]
+        for start_time, end_time in overlapping_hours[times]:
+            hours_start_dt = candidate.start_dt.replace(hour=start_time.hour, minute=start_time.minute)
+            hours_end_dt = candidate.end_dt.replace(hour=end_time.hour, minute=end_time.minute)
             overlap = get_overlap((candidate.start_dt, candidate.end_dt), (hours_start_dt, hours_end_dt))
-            if overlap.count(None) != len(overlap):
-                conflicting_candidates.add(candidate)
-                obj = TempReservationOccurrence(overlap[0], overlap[1], None)
-                conflicts.add(obj)
+            conflicting_candidates.add(candidate)
+            conflicts.add(TempReservationOccurrence(overlap[0], overlap[1], None))
     return conflicts, conflicting_candidates
 
 
+def _overlaps_time_of_day(candidate, start_time, end_time):
+    hours_start_dt = candidate.start_dt.replace(hour=start_time.hour, minute=start_time.minute)
+    hours_end_dt = candidate.end_dt.replace(hour=end_time.hour, minute=end_time.minute)
+    return candidate.start_dt < hours_end_dt and hours_start_dt < candidate.end_dt
+
+
 def get_concurrent_pre_bookings(pre_bookings, skip_conflicts_with=frozenset()):
     concurrent_pre_bookings = []
-    for (x, y) in combinations(pre_bookings, 2):
-        if any(pre_booking.reservation.id in skip_conflicts_with for pre_booking in [x, y]):
-            continue
-        if x.overlaps(y):
-            overlap = x.get_overlap(y)
-            obj = TempReservationConcurrentOccurrence(*overlap, reservations=[x.reservation, y.reservation])
-            concurrent_pre_bookings.append(obj)
+    index = IntervalIndex(((i, pre_booking) for i, pre_booking in enumerate(pre_bookings)
+                           if pre_booking.reservation.id not in skip_conflicts_with),
+                          key=lambda x: (x[1].start_dt, x[1].end_dt))
+    # keep the order we would get when checking all combinations of the pre-bookings
+    pairs = sorted((i, j) for i, x in enumerate(pre_bookings) if x.reservation.id not in skip_conflicts_with
+                   for j, __ in index.overlapping(x.start_dt, x.end_dt) if j > i)
+    for i, j in pairs:
+        x, y = pre_bookings[i], pre_bookings[j]
+        overlap = x.get_overlap(y)
+        obj = TempReservationConcurrentOccurrence(*overlap, reservations=[x.reservation, y.reservation])
+        concurrent_pre_bookings.append(obj)
     return concurrent_pre_bookings
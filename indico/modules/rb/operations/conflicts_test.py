@@ -0,0 +1,119 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+import random
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from itertools import combinations
+
+import pytest
+
+from indico.modules.rb.models.reservation_occurrences import ReservationOccurrence
+from indico.modules.rb.models.reservations import RepeatFrequency, Reservation
+from indico.modules.rb.operations.conflicts import (IntervalIndex, get_concurrent_pre_bookings,
+                                                    get_room_bookings_conflicts, get_room_nonbookable_periods_conflicts,
+                                                    get_room_unbookable_hours_conflicts)
+from indico.util.date_time import get_overlap, overlaps
+
+
+_Reservation = namedtuple('_Reservation', ('id', 'is_accepted'))
+_Occurrence = namedtuple('_Occurrence', ('start_dt', 'end_dt', 'reservation'))
+_Hours = namedtuple('_Hours', ('start_time', 'end_time'))
+
+
+def _make_occurrences(count, seed=42):
+    rnd = random.Random(seed)
+    occurrences = []
+    for i in range(count):
+        start_dt = datetime(2022, 1, 3, 8) + timedelta(days=rnd.randrange(365), minutes=15 * rnd.randrange(40))
+        end_dt = start_dt + timedelta(minutes=15 * rnd.randint(1, 16))
+        occurrences.append(_Occurrence(start_dt, end_dt, _Reservation(i, rnd.random() > 0.3)))
+    return occurrences
+
+
+def _get_candidates():
+    return ReservationOccurrence.create_series(datetime(2022, 1, 3, 10), datetime(2022, 12, 31, 12),
+                                               (RepeatFrequency.WEEK, 1))
+
+
+@pytest.mark.parametrize(('start', 'end', 'expected'), (
+    (0, 1, []),
+    (1, 3, ['a']),
+    (3, 4, []),
+    (4, 6, ['b', 'c']),
+    (9, 25, ['c', 'd']),
+    (30, 40, []),
+))
+def test_interval_index(start, end, expected):
+    index = IntervalIndex([('c', 5, 20), ('a', 1, 3), ('b', 4, 5), ('d', 21, 22)], key=lambda x: (x[1], x[2]))
+    assert [x[0] for x in index.overlapping(start, end)] == expected
+    assert index.overlaps(start, end) == bool(expected)
+
+
+def test_interval_index_empty():
+    index = IntervalIndex([])
+    assert not index
+    assert index.overlapping(datetime(2022, 1, 1), datetime(2022, 1, 2)) == []
+
+
+def test_get_room_bookings_conflicts():
+    candidates = _get_candidates()
+    occurrences = _make_occurrences(2000)
+    skip = {1, 2, 3}
+    expected_conflicts = set()
+    expected_pre_conflicts = set()
+    expected_candidates = set()
+    for candidate in candidates:
+        for occ in occurrences:
+            if occ.reservation.id in skip or not overlaps((candidate.start_dt, candidate.end_dt),
+                                                          (occ.start_dt, occ.end_dt)):
+                continue
+            overlap = get_overlap((candidate.start_dt, candidate.end_dt), (occ.start_dt, occ.end_dt))
+            if occ.reservation.is_accepted:
+                expected_candidates.add(candidate)
+                expected_conflicts.add(_Occurrence(*overlap, occ.reservation))
+            else:
+                expected_pre_conflicts.add(_Occurrence(*overlap, occ.reservation))
+    conflicts, pre_conflicts, conflicting_candidates = get_room_bookings_conflicts(candidates, occurrences, skip)
+    assert expected_conflicts
+    assert conflicts == expected_conflicts
+    assert pre_conflicts == expected_pre_conflicts
+    assert conflicting_candidates == expected_candidates
+
+
+def test_get_room_nonbookable_periods_conflicts():
+    candidates = _get_candidates()
+    periods = [_Occurrence(datetime(2022, 3, 1), datetime(2022, 4, 1), None),
+               _Occurrence(datetime(2022, 6, 6, 11), datetime(2022, 6, 6, 14), None)]
+    conflicts, conflicting_candidates = get_room_nonbookable_periods_conflicts(candidates, periods)
+    assert len(conflicting_candidates) == 5
+    assert {c.start_dt.date() for c in conflicting_candidates} == {
+        date(2022, 3, 7), date(2022, 3, 14), date(2022, 3, 21), date(2022, 3, 28), date(2022, 6, 6)
+    }
+    assert _Occurrence(datetime(2022, 6, 6, 11), datetime(2022, 6, 6, 12), None) in conflicts
+
+
+def test_get_room_unbookable_hours_conflicts():
+    candidates = _get_candidates()
+    hours = [_Hours(time(0, 0), time(8, 0)), _Hours(time(11, 30), time(13, 0)), _Hours(time(18, 0), time(23, 59))]
+    conflicts, conflicting_candidates = get_room_unbookable_hours_conflicts(candidates, hours)
+    assert conflicting_candidates == set(candidates)
+    assert conflicts == {_Occurrence(c.start_dt.replace(minute=30, hour=11), c.end_dt, None) for c in candidates}
+
+
+def test_get_concurrent_pre_bookings():
+    pre_bookings = [occ for occ in _make_occurrences(500) if not occ.reservation.is_accepted]
+    expected = [(x, y) for x, y in combinations(pre_bookings, 2)
+                if overlaps((x.start_dt, x.end_dt), (y.start_dt, y.end_dt))]
+    concurrent = get_concurrent_pre_bookings([
+        ReservationOccurrence(start_dt=occ.start_dt, end_dt=occ.end_dt, reservation=Reservation(id=occ.reservation.id))
+        for occ in pre_bookings
+    ])
+    assert expected
+    assert [(c.start_dt, c.end_dt) for c in concurrent] == [
+        get_overlap((x.start_dt, x.end_dt), (y.start_dt, y.end_dt)) for x, y in expected
+    ]
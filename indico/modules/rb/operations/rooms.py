@@ -5,7 +5,7 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
-from datetime import date, datetime, time
+from datetime import date
 
 from dateutil.relativedelta import relativedelta
 from flask import session
@@ -13,16 +13,14 @@ from sqlalchemy.orm import joinedload, load_only
 
 from indico.core.db import db
 from indico.core.db.sqlalchemy.principals import PrincipalType
-from indico.core.db.sqlalchemy.util.queries import db_dates_overlap, escape_like
+from indico.core.db.sqlalchemy.util.queries import escape_like
 from indico.modules.rb import rb_settings
 from indico.modules.rb.models.equipment import EquipmentType, RoomEquipmentAssociation
 from indico.modules.rb.models.favorites import favorite_room_table
 from indico.modules.rb.models.principals import RoomPrincipal
-from indico.modules.rb.models.reservation_occurrences import ReservationOccurrence
-from indico.modules.rb.models.reservations import Reservation
 from indico.modules.rb.models.room_features import RoomFeature
 from indico.modules.rb.models.rooms import Room
-from indico.modules.rb.statistics import calculate_rooms_occupancy
+from indico.modules.rb.statistics import calculate_rooms_bookable_time, get_rooms_occupancy_totals
 from indico.modules.rb.util import rb_is_admin
 from indico.util.caching import memoize_redis
 
@@ -106,18 +104,13 @@ def get_room_statistics(room):
     }
     ranges = [7, 30, 365]
     end_date = date.today()
+    start_dates = {days: end_date - relativedelta(days=days) for days in ranges}
+    totals = get_rooms_occupancy_totals([room], start_dates.values(), end_date)
     for days in ranges:
-        start_date = date.today() - relativedelta(days=days)
-        count = (ReservationOccurrence.query
-                 .join(ReservationOccurrence.reservation)
-                 .join(Reservation.room)
-                 .filter(Room.id == room.id,
-                         ReservationOccurrence.is_valid,
-                         db_dates_overlap(ReservationOccurrence,
-                                          'start_dt', datetime.combine(start_date, time()),
-                                          'end_dt', datetime.combine(end_date, time.max)))
-                 .count())
-        percentage = calculate_rooms_occupancy([room], start_date, end_date) * 100
+        start_date = start_dates[days]
+        booked_time, count = totals[start_date]
+        bookable_time = calculate_rooms_bookable_time([room], start_date, end_date)
+        percentage = (booked_time / bookable_time * 100) if bookable_time else 0
         if count > 0 or percentage > 0:
             data['count']['values'].append({'days': days, 'value': count})
             data['percentage']['values'].append({'days': days, 'value': percentage})
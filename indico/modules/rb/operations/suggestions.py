@@ -8,7 +8,7 @@
 from datetime import datetime, timedelta
 from functools import cmp_to_key
 
-from indico.modules.rb import rb_settings
+from indico.modules.rb import rb_cache, rb_settings
 from indico.modules.rb.models.blocked_rooms import BlockedRoomState
 from indico.modules.rb.models.reservation_occurrences import ReservationOccurrence
 from indico.modules.rb.models.reservations import RepeatFrequency
@@ -18,11 +18,11 @@ from indico.modules.rb.operations.conflicts import get_rooms_conflicts
 from indico.modules.rb.operations.misc import get_rooms_nonbookable_periods, get_rooms_unbookable_hours
 from indico.modules.rb.operations.rooms import search_for_rooms
 from indico.modules.rb.util import group_by_occurrence_date
-from indico.util.date_time import overlaps
 
 
 BOOKING_TIME_DIFF = 20  # (minutes)
 DURATION_FACTOR = 0.25
+FREE_INTERVALS_CACHE_TTL = timedelta(minutes=1)
 
 
 def get_suggestions(filters, limit=None):
@@ -40,6 +40,64 @@ def get_suggestions(filters, limit=None):
     return suggestions
 
 
+def _get_taken_periods(rooms, start_dt, end_dt):
+    unbookable_hours = get_rooms_unbookable_hours(rooms)
+    rooms_occurrences = get_existing_rooms_occurrences(rooms, start_dt, end_dt, RepeatFrequency.NEVER, None,
+                                                       allow_overlapping=True)
+    for room in rooms:
+        taken_periods = [(occ.start_dt, occ.end_dt) for occ in rooms_occurrences.get(room.id, [])]
+        taken_periods.extend((datetime.combine(start_dt, uh.start_time), datetime.combine(end_dt, uh.end_time))
+                             for uh in unbookable_hours.get(room.id, []))
+        yield room.id, taken_periods
+
+
+def get_free_intervals(taken_periods, start_dt, end_dt):
+    """Get the free intervals within a period.
+
+    :param taken_periods: ``(start, end)`` tuples of the periods which
+                          are not available; they may overlap
+    :param start_dt: The start of the period
+    :param end_dt: The end of the period
+    :return: A sorted list of ``(start, end)`` tuples
+    """
+    free_intervals = []
+    period_start = start_dt
+    for taken_start, taken_end in sorted(taken_periods):
+        if period_start < taken_start:
+            free_intervals.append((period_start, min(taken_start, end_dt)))
+        period_start = max(period_start, taken_end)
+        if period_start >= end_dt:
+            break
+    if period_start < end_dt:
+        free_intervals.append((period_start, end_dt))
+    return free_intervals
+
+
+def get_rooms_free_intervals(rooms, start_dt, end_dt):
+    """Get the free intervals of rooms within a period.
+
+    The intervals are cached for a short time since the booking UI
+    tends to ask for the same suggestions several times in a row.
+    Since they are only used for suggestions, a booking made in the
+    meantime is not a problem; the conflicts are checked anyway when
+    actually booking a room.
+
+    :return: A dict mapping room ids to lists of ``(start, end)`` tuples
+    """
+    cache_keys = {room.id: f'free-intervals/{room.id}/{start_dt.isoformat()}/{end_dt.isoformat()}'
+                  for room in rooms}
+    free_intervals = {room_id: intervals
+                      for room_id, intervals in zip(cache_keys, rb_cache.get_many(*cache_keys.values()))
+                      if intervals is not None}
+    if missing_rooms := [room for room in rooms if room.id not in free_intervals]:
+        new_free_intervals = {room_id: get_free_intervals(taken_periods, start_dt, end_dt)
+                              for room_id, taken_periods in _get_taken_periods(missing_rooms, start_dt, end_dt)}
+        rb_cache.set_many({cache_keys[room_id]: intervals for room_id, intervals in new_free_intervals.items()},
+                          timeout=FREE_INTERVALS_CACHE_TTL)
+        free_intervals.update(new_free_intervals)
+    return free_intervals
+
+
 def get_single_booking_suggestions(rooms, start_dt, end_dt, limit=None):
     data = []
     new_start_dt = start_dt - timedelta(minutes=BOOKING_TIME_DIFF)
@@ -50,28 +108,21 @@ def get_single_booking_suggestions(rooms, start_dt, end_dt, limit=None):
     if not rooms:
         return data
 
-    unbookable_hours = get_rooms_unbookable_hours(rooms)
-    rooms_occurrences = get_existing_rooms_occurrences(rooms, new_start_dt, new_end_dt, RepeatFrequency.NEVER, None,
-                                                       allow_overlapping=True)
+    rooms_free_intervals = get_rooms_free_intervals(rooms, new_start_dt, new_end_dt)
+    original_duration = (end_dt - start_dt).total_seconds() / 60
     for room in rooms:
         if limit and len(data) == limit:
             break
 
         suggestions = {}
-        taken_periods = [(occ.start_dt, occ.end_dt) for occ in rooms_occurrences.get(room.id, [])]
-        if room.id in unbookable_hours:
-            taken_periods.extend((datetime.combine(start_dt, uh.start_time), datetime.combine(end_dt, uh.end_time))
-                                 for uh in unbookable_hours[room.id])
-
-        taken_periods = sorted(taken_periods)
-        suggested_time = get_start_time_suggestion(taken_periods, start_dt, end_dt)
+        free_intervals = rooms_free_intervals[room.id]
+        suggested_time = get_start_time_suggestion(free_intervals, start_dt, end_dt)
         if suggested_time:
             suggested_time_change = (suggested_time - start_dt).total_seconds() / 60
             if suggested_time_change and abs(suggested_time_change) <= BOOKING_TIME_DIFF:
                 suggestions['time'] = suggested_time_change
 
-        duration_suggestion = get_duration_suggestion(taken_periods, start_dt, end_dt)
-        original_duration = (end_dt - start_dt).total_seconds() / 60
+        duration_suggestion = get_duration_suggestion(free_intervals, start_dt, end_dt)
         if duration_suggestion and duration_suggestion <= DURATION_FACTOR * original_duration:
             suggestions['duration'] = duration_suggestion
         if suggestions:
@@ -109,53 +160,25 @@ def get_recurring_booking_suggestions(rooms, start_dt, end_dt, repeat_frequency,
     return data
 
 
-def get_start_time_suggestion(occurrences, from_, to):
-    duration = (to - from_).total_seconds() / 60
-    new_start_dt = from_ - timedelta(minutes=BOOKING_TIME_DIFF)
-    new_end_dt = to + timedelta(minutes=BOOKING_TIME_DIFF)
-
-    if not occurrences:
-        return new_start_dt
-
-    candidates = []
-    period_start = new_start_dt
-    for (occ_start, occ_end) in occurrences:
-        if period_start < occ_start:
-            candidates.append((period_start, occ_start))
-        period_start = occ_end
-
-    if period_start < new_end_dt:
-        candidates.append((period_start, new_end_dt))
-
-    for candidate in candidates:
-        start, end = candidate
-        candidate_duration = (end - start).total_seconds() / 60
-        if duration <= candidate_duration:
-            return start
-
-
-def get_duration_suggestion(occurrences, from_, to):
-    old_duration = (to - from_).total_seconds() / 60
-    duration = old_duration
-    all_occurrences_overlap = all(overlaps((from_, to), occ) for occ in occurrences)
-
-    # Don't calculate duration suggestion, if there are at least
-    # two existing bookings conflicting with the specified dates
-    if all_occurrences_overlap and len(occurrences) > 1:
-        return
-
-    for (start, end) in occurrences:
-        if start <= from_:
-            continue
-        if from_ < end < to:
-            if start > from_:
-                continue
-            duration -= (end - from_).total_seconds() / 60
-        if from_ < start < to:
-            if end < to:
-                continue
-            duration -= (to - start).total_seconds() / 60
-    return abs(duration - old_duration) if old_duration != duration else None
+def get_start_time_suggestion(free_intervals, from_, to):
+    """Get the start time closest to the requested one that fits into a free interval."""
+    duration = to - from_
+    suggestions = [min(max(from_, start), end - duration)
+                   for start, end in free_intervals
+                   if end - start >= duration]
+    return min(suggestions, key=lambda dt: abs(dt - from_), default=None)
+
+
+def get_duration_suggestion(free_intervals, from_, to):
+    """Get by how many minutes a booking needs to be shortened to fit.
+
+    This is only possible if the requested start time is free; in that
+    case the booking can end when the free interval containing the start
+    time ends.
+    """
+    for start, end in free_intervals:
+        if start <= from_ < end < to:
+            return (to - end).total_seconds() / 60
 
 
 def sort_suggestions(suggestions):
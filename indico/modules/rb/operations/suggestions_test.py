@@ -0,0 +1,56 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from datetime import datetime
+
+import pytest
+
+from indico.modules.rb.operations.suggestions import (get_duration_suggestion, get_free_intervals,
+                                                      get_start_time_suggestion)
+
+
+def _dt(hour, minute=0):
+    return datetime(2022, 1, 10, hour, minute)
+
+
+@pytest.mark.parametrize(('taken', 'expected'), (
+    ([], [(8, 12)]),
+    ([(7, 13)], []),
+    ([(7, 9)], [(9, 12)]),
+    ([(9, 10), (11, 13)], [(8, 9), (10, 11)]),
+    ([(10, 11), (9, 10)], [(8, 9), (11, 12)]),
+    ([(9, 11), (9, 10), (10, 10.5)], [(8, 9), (11, 12)]),
+))
+def test_get_free_intervals(taken, expected):
+    def _to_dt(value):
+        return _dt(int(value), int(value % 1 * 60))
+
+    taken = [(_to_dt(start), _to_dt(end)) for start, end in taken]
+    expected = [(_to_dt(start), _to_dt(end)) for start, end in expected]
+    assert get_free_intervals(taken, _dt(8), _dt(12)) == expected
+
+
+@pytest.mark.parametrize(('free_intervals', 'expected'), (
+    ([], None),
+    ([(_dt(9, 40), _dt(10, 20))], None),
+    ([(_dt(9, 40), _dt(11, 20))], _dt(10)),
+    ([(_dt(9, 40), _dt(10, 50))], _dt(9, 50)),
+    ([(_dt(9, 40), _dt(10, 40)), (_dt(10, 50), _dt(12))], _dt(9, 40)),
+    ([(_dt(9), _dt(9, 50)), (_dt(10, 10), _dt(11, 20))], _dt(10, 10)),
+))
+def test_get_start_time_suggestion(free_intervals, expected):
+    assert get_start_time_suggestion(free_intervals, _dt(10), _dt(11)) == expected
+
+
+@pytest.mark.parametrize(('free_intervals', 'expected'), (
+    ([], None),
+    ([(_dt(9, 40), _dt(11, 20))], None),
+    ([(_dt(9, 40), _dt(10, 45))], 15),
+    ([(_dt(10, 10), _dt(10, 45))], None),
+))
+def test_get_duration_suggestion(free_intervals, expected):
+    assert get_duration_suggestion(free_intervals, _dt(10), _dt(11)) == expected
@@ -5,24 +5,37 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
+from collections import defaultdict
 from datetime import date, datetime, time
 
 from dateutil.relativedelta import relativedelta
+from flask import g, has_app_context
+from sqlalchemy.dialects.postgresql import insert
 
 from indico.core.db import db
 from indico.modules.rb.models.reservation_occurrences import ReservationOccurrence
 from indico.modules.rb.models.reservations import Reservation
+from indico.modules.rb.models.room_occupancy import RoomOccupancy
 from indico.util.date_time import iterdays
 
 
 WORKING_TIME_PERIODS = ((time(8, 30), time(12, 30)), (time(13, 30), time(17, 30)))
 
 
-def calculate_rooms_bookable_time(rooms, start_date=None, end_date=None):
+def _get_default_range(start_date, end_date):
     if end_date is None:
         end_date = date.today() - relativedelta(days=1)
     if start_date is None:
         start_date = end_date - relativedelta(days=29)
+    return start_date, end_date
+
+
+def _is_working_day(date_column):
+    return db.extract('dow', date_column).between(1, 5)
+
+
+def calculate_rooms_bookable_time(rooms, start_date=None, end_date=None):
+    start_date, end_date = _get_default_range(start_date, end_date)
     working_time_per_day = sum((datetime.combine(date.today(), end) - datetime.combine(date.today(), start)).seconds
                                for start, end in WORKING_TIME_PERIODS)
     working_days = sum(1 for __ in iterdays(start_date, end_date, skip_weekends=True))
@@ -30,35 +43,115 @@ def calculate_rooms_bookable_time(rooms, start_date=None, end_date=None):
 
 
 def calculate_rooms_booked_time(rooms, start_date=None, end_date=None):
-    if end_date is None:
-        end_date = date.today() - relativedelta(days=1)
-    if start_date is None:
-        start_date = end_date - relativedelta(days=29)
-    # Reservations on working days
-    reservations_query = (Reservation.query
-                          .filter(Reservation.room_id.in_(r.id for r in rooms),
-                                  db.extract('dow', ReservationOccurrence.start_dt).between(1, 5),
-                                  db.cast(ReservationOccurrence.start_dt, db.Date) >= start_date,
-                                  db.cast(ReservationOccurrence.end_dt, db.Date) <= end_date,
-                                  ReservationOccurrence.is_valid)
-                          .join(Reservation.occurrences))
+    start_date, end_date = _get_default_range(start_date, end_date)
+    return (db.session.query(db.func.sum(RoomOccupancy.booked_time))
+            .filter(RoomOccupancy.room_id.in_(r.id for r in rooms),
+                    RoomOccupancy.date.between(start_date, end_date),
+                    _is_working_day(RoomOccupancy.date))
+            .scalar() or 0)
+
+
+def calculate_rooms_occupancy(rooms, start=None, end=None):
+    bookable_time = calculate_rooms_bookable_time(rooms, start, end)
+    booked_time = calculate_rooms_booked_time(rooms, start, end)
+    return booked_time / bookable_time if bookable_time else 0
+
+
+def get_rooms_occupancy_totals(rooms, start_dates, end_date):
+    """Get the booked time and number of bookings for several periods.
 
+    All periods end on the same day, so the totals for all of them are
+    retrieved using a single query.
+
+    :param rooms: The rooms to get the totals for
+    :param start_dates: The first days of the periods
+    :param end_date: The last day of all periods
+    :return: A dict mapping each start date to a ``(booked_time, bookings)``
+             tuple; the booked time only includes working days.
+    """
+    start_dates = list(start_dates)
+    columns = []
+    for start_date in start_dates:
+        in_range = RoomOccupancy.date >= start_date
+        columns.append(db.func.coalesce(db.func.sum(RoomOccupancy.booked_time)
+                                        .filter(in_range & _is_working_day(RoomOccupancy.date)), 0))
+        columns.append(db.func.coalesce(db.func.sum(RoomOccupancy.bookings).filter(in_range), 0))
+    row = (db.session.query(*columns)
+           .filter(RoomOccupancy.room_id.in_(r.id for r in rooms),
+                   RoomOccupancy.date.between(min(start_dates), end_date))
+           .one())
+    return {start_date: (row[2 * i], row[2 * i + 1]) for i, start_date in enumerate(start_dates)}
+
+
+def _get_booked_time_expr():
     rsv_start = db.cast(ReservationOccurrence.start_dt, db.TIME)
     rsv_end = db.cast(ReservationOccurrence.end_dt, db.TIME)
     slots = ((db.cast(start, db.TIME), db.cast(end, db.TIME)) for start, end in WORKING_TIME_PERIODS)
 
     # this basically handles all possible ways an occurrence overlaps with each one of the working time slots
-    overlaps = sum(db.case([
+    return sum(db.case([
         ((rsv_start < start) & (rsv_end > end), db.extract('epoch', end - start)),
         ((rsv_start < start) & (rsv_end > start) & (rsv_end <= end), db.extract('epoch', rsv_end - start)),
         ((rsv_start >= start) & (rsv_start < end) & (rsv_end > end), db.extract('epoch', end - rsv_start)),
         ((rsv_start >= start) & (rsv_end <= end), db.extract('epoch', rsv_end - rsv_start))
     ], else_=0) for start, end in slots)
 
-    return reservations_query.with_entities(db.func.sum(overlaps)).scalar() or 0
 
+def _store_room_occupancy(*criteria):
+    """Recalculate the occupancy from the occurrences matching the criteria."""
+    occ_date = db.cast(ReservationOccurrence.start_dt, db.Date)
+    query = (db.session.query(Reservation.room_id, occ_date, db.cast(db.func.sum(_get_booked_time_expr()), db.Integer),
+                              db.func.count())
+             .select_from(ReservationOccurrence)
+             .join(ReservationOccurrence.reservation)
+             .filter(ReservationOccurrence.is_valid, *criteria)
+             .group_by(Reservation.room_id, occ_date))
+    stmt = insert(RoomOccupancy.__table__).from_select(['room_id', 'date', 'booked_time', 'bookings'], query.statement)
+    stmt = stmt.on_conflict_do_update(index_elements=['room_id', 'date'],
+                                      set_={'booked_time': stmt.excluded.booked_time,
+                                            'bookings': stmt.excluded.bookings})
+    db.session.execute(stmt)
 
-def calculate_rooms_occupancy(rooms, start=None, end=None):
-    bookable_time = calculate_rooms_bookable_time(rooms, start, end)
-    booked_time = calculate_rooms_booked_time(rooms, start, end)
-    return booked_time / bookable_time if bookable_time else 0
+
+def update_room_occupancy(room_id, start_date, end_date):
+    """Update the occupancy of a room for the given days."""
+    (RoomOccupancy.query
+     .filter(RoomOccupancy.room_id == room_id, RoomOccupancy.date.between(start_date, end_date))
+     .delete(synchronize_session=False))
+    occ_date = db.cast(ReservationOccurrence.start_dt, db.Date)
+    _store_room_occupancy(Reservation.room_id == room_id, occ_date.between(start_date, end_date))
+
+
+def rebuild_room_occupancy():
+    """Recalculate the occupancy of all rooms from scratch."""
+    RoomOccupancy.query.delete(synchronize_session=False)
+    _store_room_occupancy()
+
+
+def queue_room_occupancy_update(room_id, start_date, end_date=None):
+    """Queue an update of the occupancy of a room for the given days.
+
+    The update happens when the transaction is committed, so it includes
+    all changes made to the bookings of the room until then.
+    """
+    if not has_app_context():
+        return
+    g.setdefault('room_occupancy_queue', []).append((room_id, start_date, end_date or start_date))
+
+
+def discard_room_occupancy_queue():
+    """Discard all queued room occupancy updates."""
+    g.pop('room_occupancy_queue', None)
+
+
+def flush_room_occupancy_queue():
+    """Update the occupancy of all rooms with queued updates."""
+    queue = g.pop('room_occupancy_queue', None)
+    if not queue:
+        return
+    db.session.flush()
+    ranges = defaultdict(list)
+    for room_id, start_date, end_date in queue:
+        ranges[room_id].append((start_date, end_date))
+    for room_id, room_ranges in ranges.items():
+        update_room_occupancy(room_id, min(start for start, __ in room_ranges), max(end for __, end in room_ranges))
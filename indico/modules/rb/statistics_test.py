@@ -0,0 +1,74 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from datetime import date, datetime
+
+import pytest
+from flask import g
+
+from indico.modules.rb.models.reservations import RepeatFrequency
+from indico.modules.rb.models.room_occupancy import RoomOccupancy
+from indico.modules.rb.statistics import (calculate_rooms_booked_time, flush_room_occupancy_queue,
+                                          get_rooms_occupancy_totals, rebuild_room_occupancy, update_room_occupancy)
+
+
+pytest_plugins = 'indico.modules.rb.testing.fixtures'
+
+
+def test_update_room_occupancy(db, create_reservation, dummy_room):
+    # monday to sunday, 9:00-13:00 (3.5h within the working hours)
+    create_reservation(start_dt=datetime(2022, 1, 10, 9), end_dt=datetime(2022, 1, 16, 13),
+                       repeat_frequency=RepeatFrequency.DAY)
+    update_room_occupancy(dummy_room.id, date(2022, 1, 1), date(2022, 1, 31))
+    occupancy = RoomOccupancy.query.filter_by(room_id=dummy_room.id).order_by(RoomOccupancy.date).all()
+    assert [o.date for o in occupancy] == [date(2022, 1, d) for d in range(10, 17)]
+    assert all(o.booked_time == 3.5 * 3600 and o.bookings == 1 for o in occupancy)
+    # weekends are not taken into account for the booked time
+    assert calculate_rooms_booked_time([dummy_room], date(2022, 1, 1), date(2022, 1, 31)) == 5 * 3.5 * 3600
+    assert get_rooms_occupancy_totals([dummy_room], [date(2022, 1, 1), date(2022, 1, 14)], date(2022, 1, 31)) == {
+        date(2022, 1, 1): (5 * 3.5 * 3600, 7),
+        date(2022, 1, 14): (3.5 * 3600, 3),
+    }
+
+
+@pytest.mark.usefixtures('request_context')
+def test_room_occupancy_cancel_occurrence(db, create_reservation, dummy_room, dummy_user):
+    reservation = create_reservation(start_dt=datetime(2022, 1, 10, 8), end_dt=datetime(2022, 1, 11, 18),
+                                     repeat_frequency=RepeatFrequency.DAY)
+    rebuild_room_occupancy()
+    assert calculate_rooms_booked_time([dummy_room], date(2022, 1, 10), date(2022, 1, 11)) == 2 * 8 * 3600
+    reservation.occurrences[0].cancel(dummy_user, silent=True)
+    flush_room_occupancy_queue()
+    assert calculate_rooms_booked_time([dummy_room], date(2022, 1, 10), date(2022, 1, 11)) == 8 * 3600
+    reservation.reject(dummy_user, 'Testing', silent=True)
+    flush_room_occupancy_queue()
+    assert not RoomOccupancy.query.filter_by(room_id=dummy_room.id).has_rows()
+
+
+@pytest.mark.usefixtures('request_context')
+def test_room_occupancy_updated_on_commit(db, create_reservation, dummy_room, dummy_user):
+    reservation = create_reservation(start_dt=datetime(2022, 1, 10, 8), end_dt=datetime(2022, 1, 11, 18),
+                                     repeat_frequency=RepeatFrequency.DAY)
+    rebuild_room_occupancy()
+    reservation.occurrences[0].cancel(dummy_user, silent=True)
+    assert calculate_rooms_booked_time([dummy_room], date(2022, 1, 10), date(2022, 1, 11)) == 2 * 8 * 3600
+    db.session.commit()
+    assert calculate_rooms_booked_time([dummy_room], date(2022, 1, 10), date(2022, 1, 11)) == 8 * 3600
+
+
+@pytest.mark.usefixtures('request_context')
+def test_room_occupancy_queue_discarded_on_rollback(db, create_reservation, dummy_room, dummy_user):
+    reservation = create_reservation(start_dt=datetime(2022, 1, 10, 8), end_dt=datetime(2022, 1, 11, 18),
+                                     repeat_frequency=RepeatFrequency.DAY)
+    rebuild_room_occupancy()
+    with pytest.raises(ZeroDivisionError), db.session.begin_nested():
+        reservation.occurrences[0].cancel(dummy_user, silent=True)
+        assert g.room_occupancy_queue
+        1 / 0
+    assert 'room_occupancy_queue' not in g
+    db.session.commit()
+    assert calculate_rooms_booked_time([dummy_room], date(2022, 1, 10), date(2022, 1, 11)) == 2 * 8 * 3600
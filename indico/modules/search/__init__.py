@@ -5,7 +5,7 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
-from flask import g, render_template, request
+from flask import g, has_app_context, render_template, request
 
 from indico.core import signals
 from indico.web.flask.templating import template_hook
@@ -26,3 +26,82 @@ def _add_conference_search_box(event, **kwargs):
         request.endpoint != 'search.event_search'
     ):
         return render_template('search/event_search_bar.html', event=event)
+
+
+@signals.core.import_tasks.connect
+def _import_tasks(sender, **kwargs):
+    import indico.modules.search.tasks  # noqa: F401
+
+
+@signals.acl.protection_changed.connect
+@signals.acl.entry_changed.connect
+def _protection_changed(sender, obj, **kwargs):
+    from indico.modules.attachments import Attachment, AttachmentFolder
+    from indico.modules.categories import Category
+    from indico.modules.events import Event
+    from indico.modules.events.contributions import Contribution
+    from indico.modules.events.sessions import Session
+    from indico.modules.search.protection import queue_protection_update
+    if isinstance(obj, (Category, Event, Session, Contribution, AttachmentFolder, Attachment)):
+        queue_protection_update(obj)
+
+
+@signals.category.created.connect
+@signals.category.moved.connect
+@signals.event.created.connect
+@signals.event.moved.connect
+@signals.event.restored.connect
+@signals.event.contribution_created.connect
+@signals.attachments.folder_created.connect
+@signals.attachments.folder_updated.connect
+@signals.attachments.attachment_created.connect
+@signals.attachments.attachment_updated.connect
+def _protected_object_changed(obj, **kwargs):
+    from indico.modules.search.protection import queue_protection_update
+    queue_protection_update(obj)
+
+
+@signals.event.updated.connect
+def _event_updated(event, changes, **kwargs):
+    from indico.modules.search.protection import queue_protection_update
+    if 'access_key' in changes:
+        queue_protection_update(event)
+
+
+@signals.event.contribution_updated.connect
+def _contribution_updated(contrib, changes, **kwargs):
+    from indico.modules.search.protection import queue_protection_update
+    if 'session' in changes:
+        queue_protection_update(contrib)
+
+
+@signals.core.before_commit.connect
+def _update_protection_index(sender, **kwargs):
+    from indico.modules.search.protection import flush_protection_index_queue
+    if not has_app_context():
+        return
+    if category_ids := flush_protection_index_queue():
+        g.setdefault('protection_index_categories', set()).update(category_ids)
+
+
+@signals.core.after_rollback.connect
+def _discard_protection_index_updates(sender, **kwargs):
+    from indico.modules.search.protection import discard_protection_index_queue
+    if not has_app_context():
+        return
+    discard_protection_index_queue()
+    g.pop('protection_index_categories', None)
+
+
+@signals.core.after_commit.connect
+def _update_category_protection_index(sender, **kwargs):
+    from indico.modules.search.tasks import update_category_protection_index_task
+    if not has_app_context() or not (category_ids := g.pop('protection_index_categories', None)):
+        return
+    update_category_protection_index_task.delay(sorted(category_ids))
+
+
+@signals.users.merged.connect
+def _merge_users(target, source, **kwargs):
+    from indico.modules.search.protection import merge_user_principal_tokens
+    merge_user_principal_tokens(target, source)
@@ -27,7 +27,9 @@ from indico.modules.events.notes.models.notes import EventNote, EventNoteRevisio
 from indico.modules.events.sessions.models.blocks import SessionBlock
 from indico.modules.events.sessions.models.principals import SessionPrincipal
 from indico.modules.events.sessions.models.sessions import Session
+from indico.modules.networks.util import has_attachment_network_access
 from indico.modules.search.base import IndicoSearchProvider, SearchTarget
+from indico.modules.search.protection import apply_protection_filter
 from indico.modules.search.result_schemas import (AttachmentResultSchema, CategoryResultSchema,
                                                   ContributionResultSchema, EventNoteResultSchema, EventResultSchema)
 from indico.modules.search.schemas import (AttachmentSchema, DetailedCategorySchema, HTMLStrippingContributionSchema,
@@ -60,6 +62,13 @@ def _apply_contrib_access_strategy(rel):
     return rel
 
 
+def _filter_accessible(query, object_type, id_column, user, admin_override_enabled):
+    # admins can access everything, so there's nothing to filter out
+    if admin_override_enabled and user and user.is_admin:
+        return query
+    return apply_protection_filter(query, object_type, id_column, user)
+
+
 class InternalSearch(IndicoSearchProvider):
     def search(self, query, user=None, page=None, object_types=(), *, admin_override_enabled=False,
                **params):
@@ -186,6 +195,7 @@ class InternalSearch(IndicoSearchProvider):
                  .options(undefer('chain'),
                           undefer(Category.effective_protection_mode),
                           subqueryload(Category.acl_entries)))
+        query = _filter_accessible(query, SearchTarget.category, Category.id, user, admin_override_enabled)
 
         objs, pagenav = self._paginate(query, page, Category.id, user, admin_override_enabled)
         res = DetailedCategorySchema(many=True).dump(objs)
@@ -209,6 +219,7 @@ class InternalSearch(IndicoSearchProvider):
                 _apply_acl_entry_strategy(selectinload(Event.acl_entries), EventPrincipal)
             )
         )
+        query = _filter_accessible(query, SearchTarget.event, Event.id, user, admin_override_enabled)
         objs, pagenav = self._paginate(query, page, Event.id, user, admin_override_enabled)
 
         query = (
@@ -259,6 +270,7 @@ class InternalSearch(IndicoSearchProvider):
                 )
             )
         )
+        query = _filter_accessible(query, SearchTarget.contribution, Contribution.id, user, admin_override_enabled)
 
         objs, pagenav = self._paginate(query, page, Contribution.id, user, admin_override_enabled)
 
@@ -401,6 +413,9 @@ class InternalSearch(IndicoSearchProvider):
             .outerjoin(AttachmentFolder.session)
             .outerjoin(Session.event.of_type(session_event))
         )
+        # some networks may have access to all attachments which cannot be handled in the protection index
+        if not has_attachment_network_access():
+            query = _filter_accessible(query, SearchTarget.attachment, Attachment.id, user, admin_override_enabled)
 
         objs, pagenav = self._paginate(query, page, Attachment.id, user, admin_override_enabled)
 
@@ -0,0 +1,65 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from indico.core.db import db
+from indico.core.db.sqlalchemy import PyIntEnum
+from indico.core.db.sqlalchemy.protection import ProtectionMode
+from indico.modules.search.base import SearchTarget
+from indico.util.string import format_repr
+
+
+class EffectiveProtection(db.Model):
+    """The resolved protection of a searchable object.
+
+    Each entry contains the effective protection mode of an object
+    (after resolving inheritance) and a flattened list of principal
+    tokens which may grant access to it.  The principals are a superset
+    of the principals actually granting read access; an object not
+    matching any of them is guaranteed to be inaccessible unless
+    `needs_check` is set, which indicates that the ACL contains
+    principals that cannot be resolved in SQL (e.g. multipass groups
+    or IP networks) and a regular access check is required.
+    """
+
+    __tablename__ = 'effective_protection'
+    __table_args__ = (db.Index(None, 'principals', postgresql_using='gin'),
+                      {'schema': 'indico'})
+
+    #: The type of the object
+    object_type = db.Column(
+        PyIntEnum(SearchTarget),
+        primary_key=True
+    )
+    #: The ID of the object
+    object_id = db.Column(
+        db.Integer,
+        primary_key=True,
+        autoincrement=False
+    )
+    #: The effective protection mode of the object
+    protection_mode = db.Column(
+        PyIntEnum(ProtectionMode, exclude_values={ProtectionMode.inheriting}),
+        nullable=False
+    )
+    #: Tokens of all principals that may grant access to the object
+    principals = db.Column(
+        ARRAY(db.String),
+        nullable=False,
+        default=[]
+    )
+    #: Whether a full access check is needed for users not matching
+    #: any of the principals
+    needs_check = db.Column(
+        db.Boolean,
+        nullable=False,
+        default=False
+    )
+
+    def __repr__(self):
+        return format_repr(self, 'object_type', 'object_id', 'protection_mode', needs_check=False)
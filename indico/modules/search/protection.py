@@ -0,0 +1,440 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+import itertools
+from collections import namedtuple
+
+from flask import g, has_app_context
+from sqlalchemy.dialects.postgresql import insert
+
+from indico.core.db import db
+from indico.core.db.sqlalchemy.links import LinkType
+from indico.core.db.sqlalchemy.principals import PrincipalType
+from indico.core.db.sqlalchemy.protection import ProtectionMode
+from indico.modules.attachments.models.attachments import Attachment
+from indico.modules.attachments.models.folders import AttachmentFolder
+from indico.modules.attachments.models.principals import AttachmentFolderPrincipal, AttachmentPrincipal
+from indico.modules.categories import Category
+from indico.modules.categories.models.closure import CategoryClosure
+from indico.modules.categories.models.principals import CategoryPrincipal
+from indico.modules.events import Event
+from indico.modules.events.contributions.models.contributions import Contribution
+from indico.modules.events.contributions.models.principals import ContributionPrincipal
+from indico.modules.events.contributions.models.subcontributions import SubContribution
+from indico.modules.events.models.principals import EventPrincipal
+from indico.modules.events.sessions.models.principals import SessionPrincipal
+from indico.modules.events.sessions.models.sessions import Session
+from indico.modules.search.base import SearchTarget
+from indico.modules.search.models.protection import EffectiveProtection
+from indico.util.caching import memoize_request
+from indico.util.iterables import committing_iterator
+
+
+#: Number of events whose protection data is loaded at once
+EVENT_BATCH_SIZE = 500
+
+_Protection = namedtuple('_Protection', ('protection_mode', 'principals', 'needs_check'))
+_NO_ACL = (frozenset(), False)
+
+
+def _make_principal_token(type_, data):
+    """Get the token identifying a principal in the protection index.
+
+    Only principals which can be matched against a user in SQL have a
+    token; for all other principals ``None`` is returned.
+    """
+    if type_ == PrincipalType.user:
+        return 'u:{}'.format(data['user_id'])
+    elif type_ == PrincipalType.local_group:
+        return 'g:{}'.format(data['local_group_id'])
+    elif type_ == PrincipalType.event_role:
+        return 'er:{}'.format(data['event_role_id'])
+    elif type_ == PrincipalType.category_role:
+        return 'cr:{}'.format(data['category_role_id'])
+    elif type_ == PrincipalType.email:
+        return 'e:{}'.format(data['email'])
+    return None
+
+
+@memoize_request
+def get_user_principal_tokens(user):
+    """Get the protection index tokens of all principals a user matches."""
+    if user is None:
+        return set()
+    tokens = {f'u:{user.id}'}
+    tokens |= {f'g:{group.id}' for group in user.local_groups}
+    tokens |= {f'er:{role.id}' for role in user.event_roles}
+    tokens |= {f'cr:{role.id}' for role in user.category_roles}
+    tokens |= {f'e:{email}' for email in user.all_emails}
+    return tokens
+
+
+def _get_acl_data(principal_cls, fk_column, ids):
+    """Get the principal tokens for the ACLs of the given objects.
+
+    :return: a dict mapping object ids to a ``(tokens, unresolved)``
+             tuple, with `unresolved` indicating whether the ACL has
+             entries which do not have a token.
+    """
+    if not ids:
+        return {}
+    columns = {'user_id': principal_cls.user_id, 'local_group_id': principal_cls.local_group_id}
+    if principal_cls.allow_emails:
+        columns['email'] = principal_cls.email
+    if principal_cls.allow_event_roles:
+        columns['event_role_id'] = principal_cls.event_role_id
+    if principal_cls.allow_category_roles:
+        columns['category_role_id'] = principal_cls.category_role_id
+    query = (db.session.query(fk_column, principal_cls.type, *columns.values())
+             .filter(fk_column.in_(list(ids))))
+    tokens = {}
+    unresolved = set()
+    for obj_id, type_, *values in query:
+        token = _make_principal_token(type_, dict(zip(columns, values)))
+        if token is None:
+            unresolved.add(obj_id)
+        else:
+            tokens.setdefault(obj_id, set()).add(token)
+    return {obj_id: (frozenset(tokens.get(obj_id, ())), obj_id in unresolved)
+            for obj_id in tokens.keys() | unresolved}
+
+
+def _resolve_protection(protection_mode, parent, acl=_NO_ACL, has_access_key=False):
+    """Resolve the protection of an object based on its parent's protection.
+
+    The principals of the object are the tokens from its own ACL and
+    those of its parent, regardless of whether the ACL entries are
+    actually used in the access check. This ensures they include any
+    managers of parent objects.
+    """
+    tokens, unresolved = acl
+    if parent is not None:
+        tokens = tokens | parent.principals
+    needs_check = unresolved or has_access_key or (parent is not None and parent.needs_check)
+    if protection_mode != ProtectionMode.inheriting:
+        effective_mode = protection_mode
+    elif parent is not None:
+        effective_mode = parent.protection_mode
+    else:
+        # unlisted events have no parent and are only accessible through their ACL
+        effective_mode = ProtectionMode.protected
+    return _Protection(effective_mode, frozenset(tokens), needs_check)
+
+
+def _resolve_categories(category_ids):
+    """Resolve the protection of the given categories.
+
+    The ids must include all the parent categories of each category.
+    """
+    rows = {cat_id: (parent_id, protection_mode)
+            for cat_id, parent_id, protection_mode
+            in db.session.query(Category.id, Category.parent_id, Category.protection_mode)
+                         .filter(Category.id.in_(list(category_ids)))}
+    acls = _get_acl_data(CategoryPrincipal, CategoryPrincipal.category_id, rows)
+    resolved = {}
+
+    def _resolve(cat_id):
+        if cat_id not in resolved:
+            parent_id, protection_mode = rows[cat_id]
+            parent = _resolve(parent_id) if parent_id is not None else None
+            resolved[cat_id] = _resolve_protection(protection_mode, parent, acls.get(cat_id, _NO_ACL))
+        return resolved[cat_id]
+
+    for cat_id in rows:
+        _resolve(cat_id)
+    return resolved
+
+
+def _get_subtree_ids(category_ids):
+    """Get the ids of the given categories and all their descendants and ancestors.
+
+    :return: a ``(subtree_ids, all_ids)`` tuple where the `all_ids` set
+             includes the parents of the given categories as well.
+    """
+    category_ids = list(category_ids)
+    subtree_ids = {cat_id for cat_id, in (db.session.query(Category.id)
+                                          .filter(Category.id.in_(Category.get_subtree_ids_query(category_ids)),
+                                                  ~Category.is_deleted))}
+    parent_ids = {cat_id for cat_id, in (db.session.query(CategoryClosure.ancestor_id)
+                                         .filter(CategoryClosure.descendant_id.in_(category_ids)))}
+    return subtree_ids, subtree_ids | parent_ids
+
+
+def _store_protection(object_type, data):
+    if not data:
+        return
+    stmt = insert(EffectiveProtection.__table__)
+    stmt = stmt.on_conflict_do_update(index_elements=['object_type', 'object_id'],
+                                      set_={'protection_mode': stmt.excluded.protection_mode,
+                                            'principals': stmt.excluded.principals,
+                                            'needs_check': stmt.excluded.needs_check})
+    db.session.execute(stmt, [{'object_type': object_type,
+                               'object_id': obj_id,
+                               'protection_mode': protection.protection_mode,
+                               'principals': sorted(protection.principals),
+                               'needs_check': protection.needs_check}
+                              for obj_id, protection in data.items()])
+
+
+def _index_attachments(folder_query, folder_parents):
+    """Index the attachments in the given folders.
+
+    :param folder_query: A query returning the id and protection mode
+                         of each folder, followed by columns identifying
+                         the folder's parent object.
+    :param folder_parents: A callable receiving the parent columns of
+                           the folder query and returning the protection
+                           of the folder's parent object or ``None`` if
+                           it should not be indexed.
+    """
+    folders = {}
+    for folder_id, protection_mode, *parent_key in folder_query:
+        parent = folder_parents(*parent_key)
+        if parent is not None:
+            folders[folder_id] = (protection_mode, parent)
+    folder_acls = _get_acl_data(AttachmentFolderPrincipal, AttachmentFolderPrincipal.folder_id, folders)
+    folders = {folder_id: _resolve_protection(protection_mode, parent, folder_acls.get(folder_id, _NO_ACL))
+               for folder_id, (protection_mode, parent) in folders.items()}
+    if not folders:
+        return
+    attachments = (db.session.query(Attachment.id, Attachment.folder_id, Attachment.protection_mode)
+                   .filter(Attachment.folder_id.in_(list(folders)), ~Attachment.is_deleted)
+                   .all())
+    attachment_acls = _get_acl_data(AttachmentPrincipal, AttachmentPrincipal.attachment_id,
+                                    {attachment_id for attachment_id, __, __ in attachments})
+    _store_protection(SearchTarget.attachment, {
+        attachment_id: _resolve_protection(protection_mode, folders[folder_id],
+                                           attachment_acls.get(attachment_id, _NO_ACL))
+        for attachment_id, folder_id, protection_mode in attachments
+    })
+
+
+def _index_events(event_ids, categories):
+    """Index the given events including their contents and attachments.
+
+    :param event_ids: The ids of the events to index
+    :param categories: A dict containing the resolved protection of
+                       the categories of the events
+    """
+    events = (db.session.query(Event.id, Event.category_id, Event.protection_mode, Event.access_key != '')
+              .filter(Event.id.in_(list(event_ids)), ~Event.is_deleted)
+              .all())
+    event_ids = {event_id for event_id, __, __, __ in events}
+    event_acls = _get_acl_data(EventPrincipal, EventPrincipal.event_id, event_ids)
+    events = {event_id: _resolve_protection(protection_mode, categories.get(category_id),
+                                            event_acls.get(event_id, _NO_ACL), has_access_key=has_access_key)
+              for event_id, category_id, protection_mode, has_access_key in events}
+    _store_protection(SearchTarget.event, events)
+    if not events:
+        return
+
+    sessions = (db.session.query(Session.id, Session.event_id, Session.protection_mode)
+                .filter(Session.event_id.in_(list(event_ids)), ~Session.is_deleted)
+                .all())
+    session_acls = _get_acl_data(SessionPrincipal, SessionPrincipal.session_id,
+                                 {session_id for session_id, __, __ in sessions})
+    sessions = {session_id: _resolve_protection(protection_mode, events[event_id],
+                                                session_acls.get(session_id, _NO_ACL))
+                for session_id, event_id, protection_mode in sessions}
+
+    contribs = (db.session.query(Contribution.id, Contribution.event_id, Contribution.session_id,
+                                 Contribution.protection_mode)
+                .filter(Contribution.event_id.in_(list(event_ids)), ~Contribution.is_deleted)
+                .all())
+    contrib_acls = _get_acl_data(ContributionPrincipal, ContributionPrincipal.contribution_id,
+                                 {contrib_id for contrib_id, __, __, __ in contribs})
+    contribs = {contrib_id: _resolve_protection(protection_mode,
+                                                sessions.get(session_id) if session_id else events[event_id],
+                                                contrib_acls.get(contrib_id, _NO_ACL))
+                for contrib_id, event_id, session_id, protection_mode in contribs
+                # skip contributions in deleted sessions
+                if not session_id or session_id in sessions}
+    _store_protection(SearchTarget.contribution, contribs)
+
+    # subcontributions have no protection on their own
+    subcontribs = {subcontrib_id: contribs[contrib_id]
+                   for subcontrib_id, contrib_id
+                   in (db.session.query(SubContribution.id, SubContribution.contribution_id)
+                                 .filter(SubContribution.contribution_id.in_(list(contribs)),
+                                         ~SubContribution.is_deleted))}
+    _store_protection(SearchTarget.subcontribution, subcontribs)
+
+    parents = {
+        LinkType.event: events,
+        LinkType.session: sessions,
+        LinkType.contribution: contribs,
+        LinkType.subcontribution: subcontribs,
+    }
+    folder_query = (db.session.query(AttachmentFolder.id, AttachmentFolder.protection_mode, AttachmentFolder.link_type,
+                                     db.func.coalesce(AttachmentFolder.linked_event_id,
+                                                      AttachmentFolder.session_id,
+                                                      AttachmentFolder.contribution_id,
+                                                      AttachmentFolder.subcontribution_id))
+                    .filter(AttachmentFolder.event_id.in_(list(event_ids)), ~AttachmentFolder.is_deleted))
+    _index_attachments(folder_query, lambda link_type, obj_id: parents[link_type].get(obj_id))
+
+
+def _index_category_attachments(categories):
+    folder_query = (db.session.query(AttachmentFolder.id, AttachmentFolder.protection_mode,
+                                     AttachmentFolder.category_id)
+                    .filter(AttachmentFolder.link_type == LinkType.category,
+                            AttachmentFolder.category_id.in_(list(categories)),
+                            ~AttachmentFolder.is_deleted))
+    _index_attachments(folder_query, categories.get)
+
+
+def _index_category_events(categories):
+    query = (db.session.query(Event.id)
+             .filter(Event.category_id.in_(list(categories)), ~Event.is_deleted)
+             .order_by(Event.id))
+    event_ids = [event_id for event_id, in query]
+    for offset in range(0, len(event_ids), EVENT_BATCH_SIZE):
+        _index_events(event_ids[offset:offset+EVENT_BATCH_SIZE], categories)
+
+
+def update_category_protection_index(category_ids):
+    """Update the protection index for categories and everything inside them.
+
+    This includes all subcategories of the categories and their
+    events, contributions and attachments.
+    """
+    subtree_ids, all_ids = _get_subtree_ids(category_ids)
+    if not subtree_ids:
+        return
+    categories = _resolve_categories(all_ids)
+    _store_protection(SearchTarget.category, {cat_id: protection
+                                              for cat_id, protection in categories.items()
+                                              if cat_id in subtree_ids})
+    subtree = {cat_id: categories[cat_id] for cat_id in subtree_ids}
+    _index_category_attachments(subtree)
+    _index_category_events(subtree)
+
+
+def update_protection_index(event_ids=(), category_attachment_ids=()):
+    """Update the protection index for events and category attachments.
+
+    :param event_ids: The ids of events which will be indexed along
+                      with their contributions and attachments.
+    :param category_attachment_ids: The ids of categories whose
+                                    attachments will be indexed.
+    """
+    category_ids = set(category_attachment_ids)
+    event_ids = set(event_ids)
+    if event_ids:
+        category_chains = db.session.query(Event.category_chain).filter(Event.id.in_(list(event_ids)))
+        category_ids.update(itertools.chain.from_iterable(chain for chain, in category_chains if chain))
+    if not category_ids and not event_ids:
+        return
+    if category_attachment_ids:
+        category_ids.update(itertools.chain.from_iterable(
+            chain for chain, in (db.session.query(Category.chain_ids)
+                                 .filter(Category.id.in_(list(category_attachment_ids))))
+        ))
+    categories = _resolve_categories(category_ids) if category_ids else {}
+    if category_attachment_ids:
+        _index_category_attachments({cat_id: categories[cat_id]
+                                     for cat_id in category_attachment_ids if cat_id in categories})
+    if event_ids:
+        _index_events(event_ids, categories)
+
+
+def rebuild_protection_index():
+    """Rebuild the whole protection index from scratch.
+
+    The index is built one top-level category at a time with a commit
+    after each one to avoid keeping a huge transaction open.
+    """
+    EffectiveProtection.query.delete()
+    root = Category.get_root()
+    update_protection_index(category_attachment_ids={root.id})
+    _store_protection(SearchTarget.category, _resolve_categories({root.id}))
+    top_level = Category.query.filter(Category.parent_id == root.id, ~Category.is_deleted).order_by(Category.id)
+    for category in committing_iterator(top_level, n=1):
+        update_category_protection_index({category.id})
+    # events directly in the root category and unlisted events
+    query = (db.session.query(Event.id)
+             .filter(db.or_(Event.category_id == root.id, Event.category_id.is_(None)), ~Event.is_deleted)
+             .order_by(Event.id))
+    event_ids = [event_id for event_id, in query]
+    for offset in range(0, len(event_ids), EVENT_BATCH_SIZE):
+        update_protection_index(event_ids=event_ids[offset:offset+EVENT_BATCH_SIZE])
+    db.session.commit()
+
+
+def apply_protection_filter(query, object_type, id_column, user):
+    """Filter a query to exclude objects the user certainly cannot access.
+
+    Objects which are not in the protection index are never excluded,
+    so the regular access check must still be performed on the query's
+    results; this filter merely avoids loading most of the objects which
+    would fail that check.
+
+    :param query: The query to filter
+    :param object_type: A `SearchTarget` indicating the indexed object type
+    :param id_column: The column containing the object id
+    :param user: The user to check access for
+    """
+    entry = db.aliased(EffectiveProtection)
+    criteria = [entry.object_id.is_(None), entry.protection_mode == ProtectionMode.public, entry.needs_check]
+    if tokens := get_user_principal_tokens(user):
+        criteria.append(entry.principals.overlap(sorted(tokens)))
+    return (query
+            .outerjoin(entry, (entry.object_type == object_type) & (entry.object_id == id_column))
+            .filter(db.or_(*criteria)))
+
+
+def queue_protection_update(obj):
+    """Queue an object whose protection index entries need to be updated."""
+    if not has_app_context():
+        return
+    g.setdefault('protection_index_queue', set()).add(obj)
+
+
+def discard_protection_index_queue():
+    """Discard all objects queued for a protection index update."""
+    g.pop('protection_index_queue', None)
+
+
+def flush_protection_index_queue():
+    """Update the protection index for all queued objects.
+
+    Events and category attachments are updated immediately while
+    categories, which may contain a huge number of objects, are
+    returned so they can be updated asynchronously once the current
+    transaction has been committed.
+    """
+    queue = g.pop('protection_index_queue', None)
+    if not queue:
+        return set()
+    db.session.flush()
+    category_ids = set()
+    event_ids = set()
+    category_attachment_ids = set()
+    for obj in queue:
+        if isinstance(obj, Attachment):
+            obj = obj.folder
+        if isinstance(obj, Category):
+            category_ids.add(obj.id)
+        elif isinstance(obj, AttachmentFolder) and obj.link_type == LinkType.category:
+            category_attachment_ids.add(obj.category_id)
+        elif isinstance(obj, Event):
+            event_ids.add(obj.id)
+        else:
+            event_ids.add(obj.event.id)
+    update_protection_index(event_ids=event_ids, category_attachment_ids=category_attachment_ids - category_ids)
+    return category_ids
+
+
+def merge_user_principal_tokens(target, source):
+    """Replace the principal token of a merged user in the protection index."""
+    source_token = f'u:{source.id}'
+    target_token = f'u:{target.id}'
+    principals = EffectiveProtection.principals
+    (EffectiveProtection.query
+     .filter(principals.contains([source_token]))
+     .update({principals: db.func.array_append(db.func.array_remove(principals, source_token), target_token)},
+             synchronize_session=False))
@@ -0,0 +1,141 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from datetime import timedelta
+
+import pytest
+
+from indico.core import signals
+from indico.core.db.sqlalchemy.protection import ProtectionMode
+from indico.modules.events import Event
+from indico.modules.events.contributions.models.subcontributions import SubContribution
+from indico.modules.search.base import SearchTarget
+from indico.modules.search.models.protection import EffectiveProtection
+from indico.modules.search.protection import (_Protection, _resolve_protection, apply_protection_filter,
+                                              queue_protection_update, update_category_protection_index,
+                                              update_protection_index)
+
+
+@pytest.mark.parametrize(('mode', 'parent_mode', 'expected'), (
+    (ProtectionMode.public, ProtectionMode.protected, ProtectionMode.public),
+    (ProtectionMode.protected, ProtectionMode.public, ProtectionMode.protected),
+    (ProtectionMode.inheriting, ProtectionMode.public, ProtectionMode.public),
+    (ProtectionMode.inheriting, ProtectionMode.protected, ProtectionMode.protected),
+))
+def test_resolve_protection_mode(mode, parent_mode, expected):
+    parent = _Protection(parent_mode, frozenset(), False)
+    assert _resolve_protection(mode, parent).protection_mode == expected
+
+
+def test_resolve_protection_no_parent():
+    # unlisted events are inheriting but have no parent
+    rv = _resolve_protection(ProtectionMode.inheriting, None, (frozenset({'u:1'}), False))
+    assert rv == _Protection(ProtectionMode.protected, frozenset({'u:1'}), False)
+
+
+@pytest.mark.parametrize(('unresolved', 'has_access_key', 'parent_needs_check', 'expected'), (
+    (False, False, False, False),
+    (True,  False, False, True),
+    (False, True,  False, True),
+    (False, False, True,  True),
+))
+def test_resolve_protection_needs_check(unresolved, has_access_key, parent_needs_check, expected):
+    parent = _Protection(ProtectionMode.protected, frozenset({'u:1'}), parent_needs_check)
+    rv = _resolve_protection(ProtectionMode.protected, parent, (frozenset({'u:2'}), unresolved),
+                             has_access_key=has_access_key)
+    assert rv.principals == {'u:1', 'u:2'}
+    assert rv.needs_check == expected
+
+
+def _get_index_entry(obj, object_type):
+    return EffectiveProtection.query.filter_by(object_type=object_type, object_id=obj.id).one()
+
+
+@pytest.mark.usefixtures('request_context')
+def test_index_category_subtree(db, create_category, create_event, create_user):
+    user = create_user(123)
+    category = create_category(protection_mode=ProtectionMode.protected)
+    subcategory = create_category(parent=category, protection_mode=ProtectionMode.inheriting)
+    event = create_event(category=subcategory, protection_mode=ProtectionMode.inheriting)
+    public_event = create_event(category=subcategory, protection_mode=ProtectionMode.public)
+    category.update_principal(user, read_access=True)
+    db.session.flush()
+    update_category_protection_index({category.id})
+    entry = _get_index_entry(subcategory, SearchTarget.category)
+    assert entry.protection_mode == ProtectionMode.protected
+    assert entry.principals == ['u:123']
+    assert not entry.needs_check
+    assert _get_index_entry(event, SearchTarget.event).principals == ['u:123']
+    assert _get_index_entry(public_event, SearchTarget.event).protection_mode == ProtectionMode.public
+
+
+@pytest.mark.usefixtures('request_context')
+def test_index_event_access_key(db, create_category, create_event):
+    category = create_category(protection_mode=ProtectionMode.protected)
+    event = create_event(category=category, protection_mode=ProtectionMode.inheriting, access_key='secret')
+    db.session.flush()
+    update_protection_index(event_ids={event.id})
+    entry = _get_index_entry(event, SearchTarget.event)
+    assert entry.protection_mode == ProtectionMode.protected
+    assert entry.needs_check
+
+
+@pytest.mark.usefixtures('request_context')
+def test_index_subcontributions(db, dummy_event, create_contribution, create_user):
+    user = create_user(123)
+    contrib = create_contribution(dummy_event, 'Protected', protection_mode=ProtectionMode.protected)
+    contrib.update_principal(user, read_access=True)
+    subcontrib = SubContribution(contribution=contrib, title='Sub', duration=timedelta(minutes=10))
+    deleted_subcontrib = SubContribution(contribution=contrib, title='Deleted', duration=timedelta(minutes=10),
+                                         is_deleted=True)
+    db.session.flush()
+    update_protection_index(event_ids={dummy_event.id})
+    entry = _get_index_entry(subcontrib, SearchTarget.subcontribution)
+    assert entry.protection_mode == ProtectionMode.protected
+    assert 'u:123' in entry.principals
+    assert not EffectiveProtection.query.filter_by(object_type=SearchTarget.subcontribution,
+                                                   object_id=deleted_subcontrib.id).has_rows()
+
+
+@pytest.mark.usefixtures('request_context')
+def test_protection_index_queue_discarded_on_rollback(mocker, db, dummy_category, dummy_event):
+    delay = mocker.patch('indico.modules.search.tasks.update_category_protection_index_task.delay')
+    queue_protection_update(dummy_event)
+    queue_protection_update(dummy_category)
+    db.session.rollback()
+    db.session.commit()
+    signals.core.after_commit.send()
+    assert not EffectiveProtection.query.filter_by(object_type=SearchTarget.event, object_id=dummy_event.id).has_rows()
+    assert not delay.called
+    # categories queued for the asynchronous update are discarded as well
+    queue_protection_update(dummy_category)
+    db.session.commit()
+    db.session.rollback()
+    signals.core.after_commit.send()
+    assert not delay.called
+
+
+@pytest.mark.usefixtures('request_context')
+def test_apply_protection_filter(db, create_category, create_event, create_user, dummy_group):
+    user = create_user(123, groups=[dummy_group])
+    other_user = create_user(456)
+    category = create_category(protection_mode=ProtectionMode.protected)
+    hidden_event = create_event(category=category, protection_mode=ProtectionMode.inheriting)
+    group_event = create_event(category=category, protection_mode=ProtectionMode.protected)
+    group_event.update_principal(dummy_group, read_access=True)
+    public_event = create_event(category=category, protection_mode=ProtectionMode.public)
+    unindexed_event = create_event(category=category, protection_mode=ProtectionMode.inheriting)
+    db.session.flush()
+    update_protection_index(event_ids={hidden_event.id, group_event.id, public_event.id})
+
+    def _get_events(user):
+        query = Event.query.filter(Event.category_id == category.id)
+        return set(apply_protection_filter(query, SearchTarget.event, Event.id, user))
+
+    assert _get_events(user) == {group_event, public_event, unindexed_event}
+    assert _get_events(other_user) == {public_event, unindexed_event}
+    assert _get_events(None) == {public_event, unindexed_event}
@@ -0,0 +1,16 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from indico.core.celery import celery
+from indico.core.db import db
+from indico.modules.search.protection import update_category_protection_index
+
+
+@celery.task(name='update_category_protection_index')
+def update_category_protection_index_task(category_ids):
+    update_category_protection_index(set(category_ids))
+    db.session.commit()
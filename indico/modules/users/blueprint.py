@@ -11,13 +11,13 @@ from indico.modules.users.api import RHUserAPI
 from indico.modules.users.controllers import (RHAcceptRegistrationRequest, RHAdmins, RHExportDashboardICS,
                                               RHExportDashboardICSLegacy, RHPersonalData, RHProfilePictureDisplay,
                                               RHProfilePicturePage, RHProfilePicturePreview, RHRegistrationRequestList,
-                                              RHRejectRegistrationRequest, RHSaveProfilePicture, RHUserBlock,
-                                              RHUserDashboard, RHUserEmails, RHUserEmailsDelete, RHUserEmailsSetPrimary,
-                                              RHUserEmailsVerify, RHUserFavorites, RHUserFavoritesAPI,
-                                              RHUserFavoritesCategoryAPI, RHUserPreferences, RHUsersAdmin,
-                                              RHUsersAdminCreate, RHUsersAdminMerge, RHUsersAdminMergeCheck,
-                                              RHUsersAdminSettings, RHUserSearch, RHUserSearchInfo,
-                                              RHUserSuggestionsRemove)
+                                              RHRejectRegistrationRequest, RHSaveProfilePicture, RHUserAutocomplete,
+                                              RHUserBlock, RHUserDashboard, RHUserEmails, RHUserEmailsDelete,
+                                              RHUserEmailsSetPrimary, RHUserEmailsVerify, RHUserFavorites,
+                                              RHUserFavoritesAPI, RHUserFavoritesCategoryAPI, RHUserPreferences,
+                                              RHUsersAdmin, RHUsersAdminCreate, RHUsersAdminMerge,
+                                              RHUsersAdminMergeCheck, RHUsersAdminSettings, RHUserSearch,
+                                              RHUserSearchInfo, RHUserSuggestionsRemove)
 from indico.web.flask.wrappers import IndicoBlueprint
 
 
@@ -75,6 +75,7 @@ _bp.add_url_rule('/<int:user_id>/picture-<slug>', 'user_profile_picture_display'
 # User search
 _bp.add_url_rule('/search/info', 'user_search_info', RHUserSearchInfo)
 _bp.add_url_rule('/search/', 'user_search', RHUserSearch)
+_bp.add_url_rule('/search/autocomplete', 'user_autocomplete', RHUserAutocomplete)
 
 # Users API
 _bp.add_url_rule('!/api/user/', 'authenticated_user', RHUserAPI)
@@ -42,9 +42,10 @@ from indico.modules.users.models.emails import UserEmail
 from indico.modules.users.models.users import ProfilePictureSource
 from indico.modules.users.operations import create_user
 from indico.modules.users.schemas import BasicCategorySchema
-from indico.modules.users.util import (get_avatar_url_from_name, get_gravatar_for_user, get_linked_events,
-                                       get_related_categories, get_suggested_categories, get_unlisted_events,
-                                       merge_users, search_users, send_avatar, serialize_user, set_user_avatar)
+from indico.modules.users.util import (autocomplete_users, get_avatar_url_from_name, get_gravatar_for_user,
+                                       get_linked_events, get_related_categories, get_suggested_categories,
+                                       get_unlisted_events, merge_users, search_users, send_avatar, serialize_user,
+                                       set_user_avatar)
 from indico.modules.users.views import WPUser, WPUserDashboard, WPUserFavorites, WPUserProfilePic, WPUsersAdmin
 from indico.util.date_time import now_utc
 from indico.util.i18n import _
@@ -764,6 +765,23 @@ class RHUserSearch(RHProtected):
         return jsonify(users=results, total=total)
 
 
+class RHUserAutocomplete(RHProtected):
+    """Find the users best matching a search term.
+
+    This is a lightweight alternative to :class:`RHUserSearch` which
+    does not search external users and only returns the best matches.
+    """
+
+    @use_kwargs({
+        'q': fields.Str(required=True, validate=validate.Length(min=1)),
+        'limit': fields.Int(load_default=10, validate=validate.Range(1, 50)),
+        'favorites_first': fields.Bool(load_default=False)
+    }, location='query')
+    def _process(self, q, limit, favorites_first):
+        users = autocomplete_users(q, limit=limit, include_pending=True, favorites_first=favorites_first)
+        return jsonify(users=search_result_schema.dump(users, many=True))
+
+
 class RHUserSearchInfo(RHProtected):
     def _process(self):
         external_users_available = any(auth.supports_search for auth in multipass.identity_providers.values())
@@ -18,6 +18,7 @@ from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import object_session
 from sqlalchemy.sql import select
+from sqlalchemy.sql.elements import conv
 from werkzeug.utils import cached_property
 
 from indico.core import signals
@@ -772,3 +773,17 @@ define_unaccented_lowercase_index(User.first_name)
 define_unaccented_lowercase_index(User.last_name)
 define_unaccented_lowercase_index(User.phone)
 define_unaccented_lowercase_index(User.address)
+
+
+#: The lowercase and unaccented full name of a user.  There is a trigram
+#: index on it, so it can be used to efficiently search users by name
+#: using ``ILIKE '%...%'`` or the pg_trgm similarity functions.
+user_search_name = db.func.indico.indico_unaccent(db.func.lower(
+    User.__table__.c.first_name.op('||')(db.literal_column("' '")).op('||')(User.__table__.c.last_name)
+))
+
+
+@listens_for(User.__table__, 'after_create')
+def _create_search_name_index(target, conn, **kw):
+    db.Index(conv('ix_users_search_name_unaccent'), user_search_name, postgresql_using='gin',
+             postgresql_ops={user_search_name.key: 'gin_trgm_ops'}).create(conn)
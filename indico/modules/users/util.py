@@ -6,22 +6,27 @@
 # LICENSE file for more details.
 
 import hashlib
+import itertools
 import os
 import typing as t
 from collections import defaultdict
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from io import BytesIO
 from operator import itemgetter
 
 import requests
-from flask import render_template, session
+from flask import current_app, render_template, session
+from flask_multipass import IdentityInfo
 from PIL import Image
 from sqlalchemy.orm import contains_eager, joinedload, load_only, undefer
 from sqlalchemy.sql.expression import nullslast
+from werkzeug.datastructures import MultiDict
 from werkzeug.http import http_date, parse_date
 
 from indico.core import signals
 from indico.core.auth import multipass
+from indico.core.cache import make_scoped_cache
 from indico.core.db import db
 from indico.core.db.sqlalchemy.custom.unaccent import unaccent_match
 from indico.core.db.sqlalchemy.principals import PrincipalType
@@ -34,12 +39,12 @@ from indico.modules.users.models.affiliations import UserAffiliation
 from indico.modules.users.models.emails import UserEmail
 from indico.modules.users.models.favorites import favorite_user_table
 from indico.modules.users.models.suggestions import SuggestedCategory
-from indico.modules.users.models.users import ProfilePictureSource
+from indico.modules.users.models.users import ProfilePictureSource, user_search_name
 from indico.util.date_time import now_utc
 from indico.util.event import truncate_path
 from indico.util.fs import secure_filename
 from indico.util.i18n import _
-from indico.util.string import crc32, remove_accents
+from indico.util.string import crc32
 from indico.web.flask.util import send_file, url_for
 
 
@@ -48,6 +53,12 @@ user_colors = ['#e06055', '#ff8a65', '#e91e63', '#f06292', '#673ab7', '#ba68c8',
                '#00a4e4', '#4dd0e1', '#0097a7', '#d4e157', '#aed581', '#57bb8a', '#4db6ac', '#607d8b', '#795548',
                '#a1887f', '#fdd835', '#a3a3a3', '#556c60', '#605264', '#923035', '#915a30', '#55526f', '#67635a']
 
+# how long the results of searching users in identity providers are cached
+EXTERNAL_SEARCH_CACHE_TTL = timedelta(minutes=5)
+EXTERNAL_SEARCH_NEGATIVE_CACHE_TTL = timedelta(minutes=1)
+
+_external_search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='external-user-search')
+
 
 def get_admin_emails():
     """Get the email addresses of all Indico admins."""
@@ -189,10 +200,14 @@ def serialize_user(user):
     }
 
 
+def _unaccented_like_pattern(value):
+    return db.func.indico.indico_unaccent('%{}%'.format(escape_like(value.lower())))
+
+
 def _build_name_search(name_list):
-    text = remove_accents('%{}%'.format('%'.join(escape_like(name) for name in name_list)))
-    return db.or_(db.func.indico.indico_unaccent(db.func.concat(User.first_name, ' ', User.last_name)).ilike(text),
-                  db.func.indico.indico_unaccent(db.func.concat(User.last_name, ' ', User.first_name)).ilike(text))
+    # each word needs to be present somewhere in the name, which allows using
+    # the trigram index on the full name regardless of the order of the words
+    return db.and_(*(user_search_name.ilike(_unaccented_like_pattern(name)) for name in name_list))
 
 
 def build_user_search_query(criteria, exact=False, include_deleted=False, include_pending=False,
@@ -240,6 +255,108 @@ def build_user_search_query(criteria, exact=False, include_deleted=False, includ
     return query
 
 
+def autocomplete_users(term, limit=10, include_pending=False, include_blocked=False, favorites_first=False):
+    """Find the users best matching a search term.
+
+    Unlike :func:`search_users` this is meant for autocompletion: the
+    term is matched against the names, emails and affiliations of users
+    at the same time, and only the users most similar to the term are
+    returned.  All matching is done using trigram indexes, and ranking
+    and limiting the results happens in the database.
+
+    :param term: The search term
+    :param limit: The maximum number of users to return
+    :param include_pending: Whether to include pending users
+    :param include_blocked: Whether to include blocked users
+    :param favorites_first: Whether to return the favorite users of
+                            the current user first
+    :return: A list of :class:`.User` objects, with only the data
+             needed to display them loaded
+    """
+    words = term.replace(',', ' ').split()
+    if not words:
+        return []
+    term = ' '.join(words)
+    value = db.func.indico.indico_unaccent(term.lower())
+    email = db.func.indico.indico_unaccent(db.func.lower(UserEmail.email))
+    affiliation = db.func.indico.indico_unaccent(db.func.lower(UserAffiliation.name))
+    matches = [
+        (db.session.query(User.id.label('user_id'), db.func.similarity(user_search_name, value).label('score'))
+         .filter(_build_name_search(words))),
+        (db.session.query(UserEmail.user_id.label('user_id'), db.func.similarity(email, value).label('score'))
+         .filter(~UserEmail.is_user_deleted, unaccent_match(UserEmail.email, term, exact=False))),
+        # affiliations are shared by many users, so they are ranked lower than personal data
+        (db.session.query(UserAffiliation.user_id.label('user_id'),
+                          (db.func.similarity(affiliation, value) / 2).label('score'))
+         .filter(unaccent_match(UserAffiliation.name, term, exact=False))),
+    ]
+    scores = matches[0].union_all(*matches[1:]).subquery()
+    ranking = (db.session.query(scores.c.user_id, db.func.max(scores.c.score).label('score'))
+               .group_by(scores.c.user_id)
+               .subquery())
+    query = (User.query
+             .join(ranking, ranking.c.user_id == User.id)
+             .filter(~User.is_deleted, ~User.is_system)
+             .options(load_only('id', 'first_name', 'last_name', '_title', 'picture_metadata', 'is_system')))
+    if not include_pending:
+        query = query.filter(~User.is_pending)
+    if not include_blocked:
+        query = query.filter(~User.is_blocked)
+    if favorites_first:
+        query = (query.outerjoin(favorite_user_table, db.and_(favorite_user_table.c.user_id == session.user.id,
+                                                              favorite_user_table.c.target_id == User.id))
+                 .order_by(nullslast(favorite_user_table.c.user_id)))
+    return (query.order_by(ranking.c.score.desc(), user_search_name, User.id)
+            .limit(limit)
+            .all())
+
+
+def _get_external_search_cache_key(provider, exact, criteria):
+    normalized = sorted((key, ' '.join(value.lower().split())) for key, value in criteria.items())
+    data = repr((exact, normalized)).encode()
+    return f'{provider.name}/{hashlib.sha1(data).hexdigest()}'
+
+
+def _serialize_identity(identity):
+    return {'identifier': identity.identifier, 'multipass_data': identity.multipass_data,
+            'data': identity.data.to_dict(flat=False)}
+
+
+def _deserialize_identity(provider, data):
+    identity = IdentityInfo(provider, data['identifier'], data['multipass_data'])
+    identity.data = MultiDict(data['data'])
+    return identity
+
+
+def _search_provider_identities(app, provider, exact, criteria):
+    with app.app_context():
+        cache = make_scoped_cache('external-user-search')
+        cache_key = _get_external_search_cache_key(provider, exact, criteria)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return [_deserialize_identity(provider, data) for data in cached]
+        identities = list(multipass.search_identities(providers={provider.name}, exact=exact, **criteria))
+        # empty results are cached as well, but not as long since they are more likely to change
+        # once the person the user is looking for has been added to the directory
+        timeout = EXTERNAL_SEARCH_CACHE_TTL if identities else EXTERNAL_SEARCH_NEGATIVE_CACHE_TTL
+        cache.set(cache_key, [_serialize_identity(identity) for identity in identities], timeout=timeout)
+        return identities
+
+
+def _search_external_identities(exact, criteria):
+    """Search all identity providers supporting it in the background.
+
+    The results of each provider are cached for a short time, since
+    the same searches are usually repeated while a user is typing.
+
+    :return: A list of futures returning lists of identities.
+    """
+    app = current_app._get_current_object()
+    return [_external_search_executor.submit(_search_provider_identities, app, provider, exact, criteria)
+            for provider in multipass.identity_providers.values()
+            if provider.supports_search]
+
+
 def _deduplicate_identities(identities):
     by_email = defaultdict(list)
     for ident in identities:
@@ -288,6 +405,9 @@ def search_users(exact=False, include_deleted=False, include_pending=False, incl
     if not criteria:
         return set()
 
+    # the identity providers are queried in the background while searching local users
+    external_searches = _search_external_identities(exact, criteria) if external else []
+
     query = (build_user_search_query(dict(criteria), exact=exact, include_deleted=include_deleted,
                                      include_pending=include_pending, include_blocked=include_blocked)
              .options(db.joinedload(User.identities),
@@ -306,8 +426,7 @@ def search_users(exact=False, include_deleted=False, include_pending=False, incl
 
     # external user providers
     if external:
-        identities = multipass.search_identities(exact=exact, **criteria)
-
+        identities = itertools.chain.from_iterable(future.result() for future in external_searches)
         for ident in _deduplicate_identities(identities):
             if ((ident.provider.name, ident.identifier) not in found_identities and
                     ident.data['email'].lower() not in found_emails):
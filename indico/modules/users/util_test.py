@@ -0,0 +1,89 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from flask_multipass import IdentityInfo
+
+from indico.modules.users.util import _search_external_identities, autocomplete_users, search_users
+
+
+@pytest.fixture
+def search_test_users(create_user):
+    users = {
+        'john': create_user(10, first_name='John', last_name='Smith', email='john.smith@example.com'),
+        'joan': create_user(11, first_name='Joan', last_name='Smyth', email='js@example.com'),
+        'jose': create_user(12, first_name='José', last_name='Müller', email='jose@cern.example'),
+        'anna': create_user(13, first_name='Anna', last_name='Johnson', email='anna@example.com'),
+    }
+    users['anna'].affiliation = 'Smithsonian Institution'
+    users['joan'].is_pending = True
+    return users
+
+
+@pytest.mark.parametrize(('name', 'expected'), (
+    ('smith', {'john'}),
+    ('smith john', {'john'}),
+    ('john smith', {'john'}),
+    ('john', {'john', 'anna'}),
+    ('jose muller', {'jose'}),
+    ('müll', {'jose'}),
+    ('nobody', set()),
+))
+def test_search_users_name(search_test_users, name, expected):
+    assert search_users(name=name) == {search_test_users[x] for x in expected}
+
+
+@pytest.mark.parametrize(('term', 'include_pending', 'expected'), (
+    ('smith', False, ['john', 'anna']),
+    ('smith', True, ['john', 'anna']),
+    ('smyth', True, ['joan']),
+    ('smyth', False, []),
+    ('john smith', False, ['john']),
+    ('Smith, John', False, ['john']),
+    ('cern', False, ['jose']),
+    ('josé', False, ['jose']),
+    ('  ', False, []),
+))
+def test_autocomplete_users(search_test_users, term, include_pending, expected):
+    users = autocomplete_users(term, include_pending=include_pending)
+    assert users == [search_test_users[x] for x in expected]
+
+
+def test_autocomplete_users_limit(create_user):
+    users = [create_user(20 + i, first_name='Guinea', last_name=f'Pig{i}') for i in range(5)]
+    create_user(30, first_name='Guinea', last_name='Pig')
+    # the best match comes first, then everything else sorted by name
+    assert autocomplete_users('guinea pig', limit=3) == [create_user(30), *users[:2]]
+
+
+@pytest.mark.usefixtures('app_context')
+def test_search_external_identities_cached(mocker):
+    provider = SimpleNamespace(name='ldap', supports_search=True, supports_refresh=False,
+                               settings={'mapping': {}, 'identity_info_keys': {'first_name', 'email'}})
+    other_provider = SimpleNamespace(name='other', supports_search=False)
+    results = {'foo': [IdentityInfo(provider, 'foo', first_name='Foo', email='foo@example.com')], 'bar': []}
+    multipass = mocker.patch('indico.modules.users.util.multipass')
+    multipass.identity_providers = {'ldap': provider, 'other': other_provider}
+    multipass.search_identities.side_effect = lambda providers, exact, first_name: results[first_name.split('-')[0]]
+
+    def _search(**criteria):
+        return [identity for future in _search_external_identities(False, criteria) for identity in future.result()]
+
+    token = uuid4().hex
+    for __ in range(2):
+        identities = _search(first_name=f'foo-{token}')
+        assert [(x.provider, x.identifier, x.data['email']) for x in identities] == [
+            (provider, 'foo', 'foo@example.com')
+        ]
+        assert _search(first_name=f'bar-{token}') == []
+    assert multipass.search_identities.call_count == 2
+    # criteria are normalized for the cache key
+    assert len(_search(first_name=f'  FOO-{token} ')) == 1
+    assert multipass.search_identities.call_count == 2
@@ -17,6 +17,7 @@ import pytest
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 
+from indico.core import signals
 from indico.core.db import db as db_
 from indico.core.db.sqlalchemy.util.management import create_all_tables, delete_all_tables
 from indico.util.process import silent_check_call
@@ -100,13 +101,19 @@ def database(app, postgresql):
 @pytest.fixture
 def db(database, monkeypatch):
     """Provide database access and ensure changes do not persist."""
+    def _commit():
+        # only flush, but still let signal handlers write queued data like on a real commit
+        signals.core.before_commit.send()
+        database.session.flush()
+
     # Prevent database/session modifications
-    monkeypatch.setattr(database.session, 'commit', database.session.flush)
+    monkeypatch.setattr(database.session, 'commit', _commit)
     monkeypatch.setattr(database.session, 'remove', lambda: None)
     rollback = database.session.rollback
-    # disable rollback in case we use the test client where RHs do a rollback
+    # disable rollback in case we use the test client where RHs do a rollback,
+    # but still let signal handlers discard queued data like on a real rollback
     # XXX maybe we should do nested transactions?
-    monkeypatch.setattr(database.session, 'rollback', lambda: None)
+    monkeypatch.setattr(database.session, 'rollback', signals.core.after_rollback.send)
 
     @contextmanager
     def _tmp_session():
@@ -5,8 +5,15 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
+import math
+import pickle
+import random
+import time
+from collections import OrderedDict, namedtuple
+from datetime import timedelta
 from functools import wraps
 from inspect import getcallargs
+from threading import Lock
 
 from flask import current_app, g, has_request_context
 
@@ -57,7 +64,63 @@ def memoize_request(f):
     return memoizer
 
 
-def memoize_redis(ttl):
+class LocalCache:
+    """A small thread-safe in-process LRU cache with expiring entries.
+
+    Values are stored pickled so callers never share mutable objects
+    (which may also be SQLAlchemy objects bound to another session).
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, data = self._data[key]
+            except KeyError:
+                return default
+            if expires <= time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+        return pickle.loads(data)
+
+    def set(self, key, value, expires):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (expires, data)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _MemoizedValue(namedtuple('_MemoizedValue', ('value', 'expires', 'duration'))):
+    """A memoized value along with the information needed to refresh it early."""
+
+    __slots__ = ()
+
+    def should_recompute(self, beta):
+        # "probabilistic early expiration": the closer the value is to its
+        # expiry and the more expensive it is to compute, the more likely
+        # it is refreshed before it expires, so usually only one worker
+        # recomputes it while everyone else still gets the old value.
+        if not beta:
+            return False
+        return time.time() - self.duration * beta * math.log(1 - random.random()) >= self.expires
+
+
+def memoize_redis(ttl, local_ttl=None, local_size=1000, lock_timeout=30, early_recompute=1):
     """Memoize a function in redis.
 
     The cached value can be cleared by calling the method
@@ -66,33 +129,130 @@ def memoize_redis(ttl):
     whether a value has been cached call ``is_cached()`` in the
     same way.
 
+    Only one process computes a missing value at a time; others wait
+    for its result (up to `lock_timeout` seconds).  If that process
+    fails to compute the value, one of the waiting processes takes
+    over as soon as the lock has been released.  Values which are
+    about to expire are refreshed early by a single process while the
+    other ones keep using the old value.
+
     :param ttl: How long the result should be cached.  May be a
                 timedelta or a number (seconds).
+    :param local_ttl: If set, results are also cached in memory in the
+                      current process for this long (timedelta or
+                      number of seconds).  Clearing the cached value
+                      only affects the current process, so only use
+                      this for data where slightly outdated values are
+                      acceptable.
+    :param local_size: The maximum number of results cached in memory.
+    :param lock_timeout: How long to wait for another process to compute
+                         a missing value before computing it anyway.
+    :param early_recompute: How eagerly values are refreshed before they
+                            expire; 0 disables early refreshing.
     """
     from indico.core.cache import make_scoped_cache
     cache = make_scoped_cache('memoize')
+    ttl_seconds = ttl.total_seconds() if isinstance(ttl, timedelta) else ttl
+    if isinstance(local_ttl, timedelta):
+        local_ttl = local_ttl.total_seconds()
+    local_cache = LocalCache(local_size) if local_ttl else None
 
     def decorator(f):
         def _get_key(args, kwargs):
             return f.__module__, f.__name__, make_hashable(getcallargs(f, *args, **kwargs))
 
+        def _get_local(key):
+            if local_cache is None:
+                return _notset
+            return local_cache.get(str(key), _notset)
+
+        def _set_local(key, value, expires):
+            if local_cache is not None:
+                local_cache.set(str(key), value, min(expires, time.time() + local_ttl))
+
+        def _acquire_lock(key):
+            # `None` means that redis is not available, in which case
+            # waiting for someone else to compute the value is pointless
+            return cache.add(('lock',) + key, True, timeout=lock_timeout) is not False
+
+        def _release_lock(key):
+            cache.delete(('lock',) + key)
+
+        def _is_locked(key):
+            return cache.get(('lock',) + key) is not None
+
+        def _compute(key, args, kwargs):
+            start = time.time()
+            value = f(*args, **kwargs)
+            now = time.time()
+            expires = now + ttl_seconds
+            cache.set(key, _MemoizedValue(value, expires, now - start), timeout=ttl)
+            _set_local(key, value, expires)
+            return value
+
+        def _compute_locked(key, args, kwargs):
+            deadline = time.time() + lock_timeout
+            while True:
+                if _acquire_lock(key):
+                    try:
+                        return _compute(key, args, kwargs)
+                    finally:
+                        _release_lock(key)
+                # someone else is computing the value, so we wait for it
+                while _is_locked(key):
+                    if time.time() >= deadline:
+                        return _compute(key, args, kwargs)
+                    time.sleep(0.05)
+                    entry = cache.get(key, _notset)
+                    if entry is not _notset:
+                        return _use_entry(key, entry)
+                # the lock has been released without storing a value (most
+                # likely computing it failed), so we try to compute it ourselves
+                entry = cache.get(key, _notset)
+                if entry is not _notset:
+                    return _use_entry(key, entry)
+
+        def _use_entry(key, entry):
+            if not isinstance(entry, _MemoizedValue):
+                # cached by an older version
+                return entry
+            _set_local(key, entry.value, entry.expires)
+            return entry.value
+
+        def _get(key, entry, args, kwargs):
+            if entry is _notset:
+                return _compute_locked(key, args, kwargs)
+            elif isinstance(entry, _MemoizedValue) and entry.should_recompute(early_recompute):
+                if _acquire_lock(key):
+                    try:
+                        return _compute(key, args, kwargs)
+                    finally:
+                        _release_lock(key)
+            return _use_entry(key, entry)
+
+        def _is_disabled():
+            # No memoization during tests or in the shell
+            return current_app.config['TESTING'] or current_app.config.get('REPL')
+
         def _clear_cached(*args, **kwargs):
-            cache.delete(_get_key(args, kwargs))
+            key = _get_key(args, kwargs)
+            cache.delete(key)
+            if local_cache is not None:
+                local_cache.delete(str(key))
 
         def _is_cached(*args, **kwargs):
-            return cache.get(_get_key(args, kwargs), _notset) is not _notset
+            key = _get_key(args, kwargs)
+            return _get_local(key) is not _notset or cache.get(key, _notset) is not _notset
 
         @wraps(f)
         def memoizer(*args, **kwargs):
-            if current_app.config['TESTING'] or current_app.config.get('REPL'):
-                # No memoization during tests or in the shell
+            if _is_disabled():
                 return f(*args, **kwargs)
 
             key = _get_key(args, kwargs)
-            value = cache.get(key, _notset)
+            value = _get_local(key)
             if value is _notset:
-                value = f(*args, **kwargs)
-                cache.set(key, value, timeout=ttl)
+                value = _get(key, cache.get(key, _notset), args, kwargs)
             return value
 
         memoizer.clear_cached = _clear_cached
@@ -5,9 +5,12 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
+import time
+
 import pytest
 
-from indico.util.caching import memoize_request
+from indico.core.cache import ScopedCache, make_scoped_cache
+from indico.util.caching import _MemoizedValue, make_hashable, memoize_redis, memoize_request
 
 
 @pytest.fixture
@@ -46,3 +49,92 @@ def test_memoize_request_args():
     assert calls[0] == 3
     fn(a=2, b=2, foo='bar')
     assert calls[0] == 3
+
+
+@pytest.fixture
+def memoized(app_context):
+    calls = []
+
+    def _make(**kwargs):
+        @memoize_redis(60, **kwargs)
+        def fn(a, b=0):
+            calls.append((a, b))
+            return {'sum': a + b}
+        return fn
+
+    return _make, calls
+
+
+@pytest.mark.usefixtures('not_testing')
+def test_memoize_redis(memoized):
+    make_fn, calls = memoized
+    fn = make_fn()
+    fn.clear_cached(1, 2)
+    assert not fn.is_cached(1, 2)
+    assert fn(1, 2) == {'sum': 3}
+    assert fn(1, b=2) == {'sum': 3}
+    assert calls == [(1, 2)]
+    assert fn.is_cached(1, 2)
+    fn.clear_cached(1, 2)
+    assert fn(1, 2) == {'sum': 3}
+    assert calls == [(1, 2), (1, 2)]
+
+
+@pytest.mark.usefixtures('not_testing')
+def test_memoize_redis_local(memoized, mocker):
+    make_fn, calls = memoized
+    fn = make_fn(local_ttl=60)
+    fn.clear_cached(1)
+    fn(1)
+    get = mocker.spy(ScopedCache, 'get')
+    value = fn(1)
+    assert value == {'sum': 1}
+    # served from memory, without going to redis
+    assert not get.called
+    # the caller gets a copy it may modify
+    value['sum'] = 42
+    assert fn(1) == {'sum': 1}
+    assert calls == [(1, 0)]
+
+
+@pytest.mark.usefixtures('not_testing')
+def test_memoize_redis_locked(memoized, mocker):
+    make_fn, calls = memoized
+    fn = make_fn(lock_timeout=1)
+    fn.clear_cached(1)
+    cache = make_scoped_cache('memoize')
+    key = ('indico.util.caching_test', 'fn', make_hashable({'a': 1, 'b': 0}))
+    # another process is computing the value and stores it while we wait
+    assert cache.add(('lock',) + key, True, timeout=1)
+    mocker.patch('indico.util.caching.time.sleep',
+                 side_effect=lambda s: cache.set(key, _MemoizedValue({'sum': 123}, time.time() + 60, 0)))
+    assert fn(1) == {'sum': 123}
+    assert not calls
+    cache.delete(('lock',) + key)
+
+
+@pytest.mark.usefixtures('not_testing')
+def test_memoize_redis_locked_failed(memoized, mocker):
+    make_fn, calls = memoized
+    fn = make_fn(lock_timeout=30)
+    fn.clear_cached(1)
+    cache = make_scoped_cache('memoize')
+    key = ('indico.util.caching_test', 'fn', make_hashable({'a': 1, 'b': 0}))
+    # another process is computing the value but fails and releases the lock while we wait
+    assert cache.add(('lock',) + key, True, timeout=30)
+    sleep = mocker.patch('indico.util.caching.time.sleep', side_effect=lambda s: cache.delete(('lock',) + key))
+    assert fn(1) == {'sum': 1}
+    assert calls == [(1, 0)]
+    assert sleep.call_count == 1
+    assert not cache.get(('lock',) + key)
+
+
+@pytest.mark.parametrize(('remaining', 'duration', 'expected'), (
+    (3600, 1, False),
+    (-1, 0, True),
+    (1, 100000, True),
+))
+def test_memoized_value_should_recompute(remaining, duration, expected):
+    entry = _MemoizedValue(None, time.time() + remaining, duration)
+    assert entry.should_recompute(1) == expected
+    assert not entry.should_recompute(0)
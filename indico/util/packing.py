@@ -0,0 +1,336 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+"""A compact binary serialization format.
+
+Compared to pickle, the format stores only the data itself and no
+information about the classes used, which makes the serialized data
+smaller and independent from the Python code.  It supports the usual
+builtin types (``None``, booleans, numbers, strings, bytes, lists,
+tuples, dicts, sets) as well as dates, times, timedeltas, decimals
+and UUIDs.  Naive datetimes and datetimes in UTC are supported; other
+objects are stored using pickle unless this is disabled.
+"""
+
+import pickle
+import struct
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID
+
+import pytz
+
+
+_NONE = 0x00
+_FALSE = 0x01
+_TRUE = 0x02
+_INT = 0x03
+_FLOAT = 0x04
+_STR = 0x05
+_STR_REF = 0x06
+_BYTES = 0x07
+_LIST = 0x08
+_TUPLE = 0x09
+_DICT = 0x0a
+_SET = 0x0b
+_FROZENSET = 0x0c
+_DATETIME = 0x0d
+_DATETIME_UTC = 0x0e
+_DATE = 0x0f
+_TIME = 0x10
+_TIMEDELTA = 0x11
+_DECIMAL = 0x12
+_UUID = 0x13
+_PICKLE = 0x14
+
+_EPOCH = datetime(1970, 1, 1)
+_float = struct.Struct('>d')
+
+
+class UnpackError(ValueError):
+    """Raised when packed data cannot be loaded."""
+
+
+def _write_uint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_int(out, value):
+    # zigzag encoding so small negative numbers are small as well
+    _write_uint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+
+
+def _write_bytes(out, value):
+    _write_uint(out, len(value))
+    out += value
+
+
+def _micros(delta):
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+class _Packer:
+    def __init__(self, allow_pickle):
+        self.allow_pickle = allow_pickle
+        self.out = bytearray()
+        # strings which occur more than once (e.g. dict keys in a list of
+        # dicts) are only stored the first time and referenced afterwards
+        self.strings = {}
+        self.handlers = {
+            bytes: self._pack_bytes,
+            tuple: self._pack_tuple,
+            set: self._pack_set,
+            frozenset: self._pack_frozenset,
+            float: self._pack_float,
+            datetime: self._pack_datetime,
+            date: self._pack_date,
+            time: self._pack_time,
+            timedelta: self._pack_timedelta,
+            Decimal: self._pack_decimal,
+            UUID: self._pack_uuid,
+        }
+
+    def pack(self, obj):
+        # the most common types are checked explicitly since it is faster
+        # than looking up the handler
+        out = self.out
+        cls = type(obj)
+        if cls is str:
+            index = self.strings.get(obj)
+            if index is not None:
+                out.append(_STR_REF)
+                _write_uint(out, index)
+            else:
+                self.strings[obj] = len(self.strings)
+                out.append(_STR)
+                _write_bytes(out, obj.encode('utf-8', 'surrogatepass'))
+        elif cls is int:
+            out.append(_INT)
+            _write_int(out, obj)
+        elif cls is dict:
+            out.append(_DICT)
+            _write_uint(out, len(obj))
+            for key, value in obj.items():
+                self.pack(key)
+                self.pack(value)
+        elif cls is list:
+            self._pack_sequence(_LIST, obj)
+        elif obj is None:
+            out.append(_NONE)
+        elif obj is True:
+            out.append(_TRUE)
+        elif obj is False:
+            out.append(_FALSE)
+        else:
+            self.handlers.get(cls, self._pack_other)(obj)
+
+    def _pack_float(self, obj):
+        self.out.append(_FLOAT)
+        self.out += _float.pack(obj)
+
+    def _pack_bytes(self, obj):
+        self.out.append(_BYTES)
+        _write_bytes(self.out, obj)
+
+    def _pack_sequence(self, tag, obj):
+        self.out.append(tag)
+        _write_uint(self.out, len(obj))
+        for item in obj:
+            self.pack(item)
+
+    def _pack_tuple(self, obj):
+        self._pack_sequence(_TUPLE, obj)
+
+    def _pack_set(self, obj):
+        self._pack_sequence(_SET, obj)
+
+    def _pack_frozenset(self, obj):
+        self._pack_sequence(_FROZENSET, obj)
+
+    def _pack_datetime(self, obj):
+        if obj.tzinfo is None:
+            self.out.append(_DATETIME)
+        elif obj.tzinfo in (pytz.utc, timezone.utc):
+            self.out.append(_DATETIME_UTC)
+            obj = obj.replace(tzinfo=None)
+        else:
+            self._pack_other(obj)
+            return
+        _write_int(self.out, _micros(obj - _EPOCH))
+
+    def _pack_date(self, obj):
+        self.out.append(_DATE)
+        _write_uint(self.out, obj.toordinal())
+
+    def _pack_time(self, obj):
+        if obj.tzinfo is not None:
+            self._pack_other(obj)
+            return
+        self.out.append(_TIME)
+        _write_uint(self.out, ((obj.hour * 60 + obj.minute) * 60 + obj.second) * 1000000 + obj.microsecond)
+
+    def _pack_timedelta(self, obj):
+        self.out.append(_TIMEDELTA)
+        _write_int(self.out, _micros(obj))
+
+    def _pack_decimal(self, obj):
+        self.out.append(_DECIMAL)
+        _write_bytes(self.out, str(obj).encode('ascii'))
+
+    def _pack_uuid(self, obj):
+        self.out.append(_UUID)
+        self.out += obj.bytes
+
+    def _pack_other(self, obj):
+        if not self.allow_pickle:
+            raise TypeError(f'Cannot pack objects of type {type(obj).__name__}')
+        self.out.append(_PICKLE)
+        _write_bytes(self.out, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class _Unpacker:
+    def __init__(self, data, allow_pickle):
+        self.data = bytes(data)
+        self.pos = 0
+        self.allow_pickle = allow_pickle
+        self.strings = []
+        self.handlers = {
+            _FLOAT: self._unpack_float,
+            _BYTES: self._read_bytes,
+            _TUPLE: lambda: tuple(self._unpack_items()),
+            _SET: lambda: set(self._unpack_items()),
+            _FROZENSET: lambda: frozenset(self._unpack_items()),
+            _DATETIME: lambda: _EPOCH + timedelta(microseconds=self._read_int()),
+            _DATETIME_UTC: lambda: pytz.utc.localize(_EPOCH + timedelta(microseconds=self._read_int())),
+            _DATE: lambda: date.fromordinal(self._read_uint()),
+            _TIME: self._unpack_time,
+            _TIMEDELTA: lambda: timedelta(microseconds=self._read_int()),
+            _DECIMAL: lambda: Decimal(self._read_bytes().decode('ascii')),
+            _UUID: lambda: UUID(bytes=self._read_raw(16)),
+            _PICKLE: self._unpack_pickle,
+        }
+
+    def unpack(self):
+        try:
+            tag = self.data[self.pos]
+        except IndexError:
+            raise UnpackError('Unexpected end of data')
+        self.pos += 1
+        if tag == _STR_REF:
+            try:
+                return self.strings[self._read_uint()]
+            except IndexError:
+                raise UnpackError('Invalid string reference')
+        elif tag == _STR:
+            size = self._read_uint()
+            rv = str(self._read_raw(size), 'utf-8', 'surrogatepass')
+            self.strings.append(rv)
+            return rv
+        elif tag == _INT:
+            return self._read_int()
+        elif tag == _DICT:
+            unpack = self.unpack
+            return {unpack(): unpack() for __ in range(self._read_uint())}
+        elif tag == _LIST:
+            return self._unpack_items()
+        elif tag == _NONE:
+            return None
+        elif tag == _TRUE:
+            return True
+        elif tag == _FALSE:
+            return False
+        try:
+            handler = self.handlers[tag]
+        except KeyError:
+            raise UnpackError(f'Invalid type tag: {tag:#x}')
+        return handler()
+
+    def _read_raw(self, size):
+        end = self.pos + size
+        if end > len(self.data):
+            raise UnpackError('Unexpected end of data')
+        rv = self.data[self.pos:end]
+        self.pos = end
+        return rv
+
+    def _read_uint(self):
+        data = self.data
+        pos = self.pos
+        try:
+            value = data[pos]
+            pos += 1
+            if value >= 0x80:
+                value &= 0x7f
+                shift = 7
+                while True:
+                    byte = data[pos]
+                    pos += 1
+                    value |= (byte & 0x7f) << shift
+                    if byte < 0x80:
+                        break
+                    shift += 7
+        except IndexError:
+            raise UnpackError('Unexpected end of data')
+        self.pos = pos
+        return value
+
+    def _read_int(self):
+        value = self._read_uint()
+        return -((value + 1) >> 1) if value & 1 else value >> 1
+
+    def _read_bytes(self):
+        return self._read_raw(self._read_uint())
+
+    def _unpack_items(self):
+        unpack = self.unpack
+        return [unpack() for __ in range(self._read_uint())]
+
+    def _unpack_float(self):
+        return _float.unpack(self._read_raw(8))[0]
+
+    def _unpack_time(self):
+        seconds, microsecond = divmod(self._read_uint(), 1000000)
+        minutes, second = divmod(seconds, 60)
+        hour, minute = divmod(minutes, 60)
+        return time(hour, minute, second, microsecond)
+
+    def _unpack_pickle(self):
+        if not self.allow_pickle:
+            raise UnpackError('Pickled data is not allowed')
+        return pickle.loads(self._read_bytes())
+
+
+def pack(obj, allow_pickle=True):
+    """Serialize an object to the compact binary format.
+
+    :param obj: The object to serialize
+    :param allow_pickle: Whether objects of unsupported types should
+                         be pickled; if disabled, a :exc:`TypeError`
+                         is raised for them
+    :return: A `bytes` object
+    """
+    packer = _Packer(allow_pickle)
+    packer.pack(obj)
+    return bytes(packer.out)
+
+
+def unpack(data, allow_pickle=True):
+    """Load an object serialized using :func:`pack`.
+
+    :param data: A bytes-like object containing the serialized data
+    :param allow_pickle: Whether pickled objects may be loaded; only
+                         enable this for trusted data
+    :raise UnpackError: if the data is not valid
+    """
+    unpacker = _Unpacker(data, allow_pickle)
+    rv = unpacker.unpack()
+    if unpacker.pos != len(unpacker.data):
+        raise UnpackError('Unexpected data after the end of the object')
+    return rv
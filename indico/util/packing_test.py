@@ -0,0 +1,60 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+import pickle
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from uuid import uuid4
+
+import pytest
+import pytz
+
+from indico.util.packing import UnpackError, pack, unpack
+
+
+class _Color(Enum):
+    red = 1
+
+
+@pytest.mark.parametrize('value', (
+    None, True, False, 0, 1, -1, 63, -64, 2**70, -2**70, 1.5, float('inf'),
+    '', 'hello', '\U0001f600 unicode', b'', b'\x00\xff',
+    [], [1, [2, [3]]], (1, 'a', None), {'a': 1, 2: ['b'], (1, 2): {'c': None}}, {1, 2, 3}, frozenset({'x'}),
+    datetime(2022, 1, 25, 13, 37, 42, 123456), datetime(1901, 12, 13), pytz.utc.localize(datetime(2022, 1, 25, 12)),
+    date(2022, 1, 25), time(23, 59, 59, 999999), timedelta(days=-3, microseconds=5), Decimal('12.50'), uuid4(),
+))
+def test_pack_roundtrip(value):
+    rv = unpack(pack(value))
+    assert rv == value
+    assert type(rv) == type(value)
+
+
+def test_pack_utc_datetime():
+    dt = unpack(pack(pytz.utc.localize(datetime(2022, 1, 25, 12))))
+    assert dt.tzinfo == pytz.utc
+
+
+def test_pack_pickle_fallback():
+    value = {'color': _Color.red, 'dt': pytz.timezone('Europe/Zurich').localize(datetime(2022, 1, 25, 12))}
+    assert unpack(pack(value)) == value
+    with pytest.raises(TypeError):
+        pack(value, allow_pickle=False)
+    with pytest.raises(UnpackError):
+        unpack(pack(value), allow_pickle=False)
+
+
+def test_pack_compact():
+    value = {'_user_id': 1337, '_lang': 'en_GB', '_expires': datetime(2022, 1, 25, 12), '_secure': True,
+             '_csrf_token': str(uuid4())}
+    assert len(pack(value)) < len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)) * 0.75
+
+
+@pytest.mark.parametrize('data', (b'', b'\x03', b'\x05\x05abc', b'\xff', b'\x00\x00'))
+def test_unpack_invalid(data):
+    with pytest.raises(UnpackError):
+        unpack(data)
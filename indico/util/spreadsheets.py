@@ -5,18 +5,21 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
+import codecs
 import csv
 import re
 from contextlib import contextmanager
 from datetime import datetime
-from io import BytesIO, TextIOWrapper
+from io import BytesIO, StringIO, TextIOWrapper
+from tempfile import TemporaryFile
 
 from markupsafe import Markup
 from speaklater import is_lazy_string
 from xlsxwriter import Workbook
 
+from indico.core.config import config
 from indico.util.date_time import format_datetime
-from indico.web.flask.util import send_file
+from indico.web.flask.util import send_file, send_stream
 
 
 def unique_col(name, id_):
@@ -64,6 +67,41 @@ def csv_text_io_wrapper(buf):
         w.detach()
 
 
+def _iter_row_values(headers, rows):
+    header_positions = {name: i for i, name in enumerate(headers)}
+    for row in rows:
+        assert len(row) == len(headers)
+        yield [v for k, v in sorted(row.items(), key=lambda x: header_positions[x[0]])]
+
+
+def iter_csv(headers, rows, *, include_header=True, chunk_size=65536):
+    """Generate CSV data from a list of headers and rows in chunks.
+
+    Unlike :func:`generate_csv` this never keeps the whole file in
+    memory, so as long as `rows` is a generator the memory usage does
+    not depend on the number of rows.
+
+    :param headers: a list of cell captions
+    :param rows: an iterable of dicts mapping captions to values
+    :param include_header: whether to include a header in the data
+    :param chunk_size: the minimum size of the yielded chunks (except
+                       for the last one)
+    :return: an iterator yielding the CSV data as bytes
+    """
+    encoder = codecs.getincrementalencoder('utf-8-sig')()
+    buf = StringIO()
+    writer = csv.writer(buf)
+    if include_header:
+        writer.writerow(map(_prepare_header, headers))
+    for values in _iter_row_values(headers, rows):
+        writer.writerow([_prepare_csv_data(v) for v in values])
+        if buf.tell() >= chunk_size:
+            yield encoder.encode(buf.getvalue())
+            buf.seek(0)
+            buf.truncate()
+    yield encoder.encode(buf.getvalue(), final=True)
+
+
 def generate_csv(headers, rows, *, include_header=True):
     """Generate a CSV file from a list of headers and rows.
 
@@ -72,22 +110,11 @@ def generate_csv(headers, rows, *, include_header=True):
     *not* handle such cells properly...
 
     :param headers: a list of cell captions
-    :param rows: a list of dicts mapping captions to values
+    :param rows: an iterable of dicts mapping captions to values
     :param include_header: whether to include a header in the data
     :return: an `io.BytesIO` containing the CSV data
     """
-    buf = BytesIO()
-    with csv_text_io_wrapper(buf) as csvbuf:
-        writer = csv.writer(csvbuf)
-        if include_header:
-            writer.writerow(map(_prepare_header, headers))
-        header_positions = {name: i for i, name in enumerate(headers)}
-        assert all(len(row) == len(headers) for row in rows)
-        for row in rows:
-            row = sorted(list(row.items()), key=lambda x: header_positions[x[0]])
-            writer.writerow([_prepare_csv_data(v) for k, v in row])
-    buf.seek(0)
-    return buf
+    return BytesIO(b''.join(iter_csv(headers, rows, include_header=include_header)))
 
 
 def _prepare_excel_data(data, tz=None):
@@ -105,37 +132,42 @@ def _prepare_excel_data(data, tz=None):
 def generate_xlsx(headers, rows, tz=None):
     """Generate an XLSX file from a list of headers and rows.
 
+    The worksheet is written row by row, so as long as `rows` is a
+    generator the memory usage does not depend on the number of rows.
+
     :param headers: a list of cell captions
-    :param rows: a list of dicts mapping captions to values
-    :return: an `io.BytesIO` containing the XLSX data
+    :param rows: an iterable of dicts mapping captions to values
+    :return: a temporary file containing the XLSX data
     """
-    workbook_options = {'in_memory': True, 'strings_to_formulas': False, 'strings_to_numbers': False,
-                        'strings_to_urls': False}
-    buf = BytesIO()
-    header_positions = {name: i for i, name in enumerate(headers)}
-    # convert row dicts to lists
-    rows = [[x[1] for x in sorted(list(row.items()), key=lambda x: header_positions[x[0]])] for row in rows]
-    assert all(len(row) == len(headers) for row in rows)
+    workbook_options = {'constant_memory': True, 'tmpdir': config.TEMP_DIR, 'strings_to_formulas': False,
+                        'strings_to_numbers': False, 'strings_to_urls': False}
+    buf = TemporaryFile(dir=config.TEMP_DIR)
     with Workbook(buf, workbook_options) as workbook:
         bold = workbook.add_format({'bold': True})
         sheet = workbook.add_worksheet()
         for col, name in enumerate(map(_prepare_header, headers)):
             sheet.write(0, col, name, bold)
-        for row, values in enumerate(rows, 1):
+        for row, values in enumerate(_iter_row_values(headers, rows), 1):
             sheet.write_row(row, 0, [_prepare_excel_data(data, tz) for data in values])
     buf.seek(0)
     return buf
 
 
-def send_csv(filename, headers, rows, *, include_header=True):
+def send_csv(filename, headers, rows, *, include_header=True, stream=False):
     """Send a CSV file to the client.
 
     :param filename: The name of the CSV file
     :param headers: a list of cell captions
-    :param rows: a list of dicts mapping captions to values
+    :param rows: an iterable of dicts mapping captions to values
     :param include_header: whether to include a header in the data
+    :param stream: whether to stream the data to the client while it
+                   is being generated instead of building the whole
+                   file first
     :return: a flask response containing the CSV data
     """
+    if stream:
+        return send_stream(filename, iter_csv(headers, rows, include_header=include_header), 'text/csv',
+                           inline=False)
     buf = generate_csv(headers, rows, include_header=include_header)
     return send_file(filename, buf, 'text/csv', inline=False)
 
@@ -145,7 +177,7 @@ def send_xlsx(filename, headers, rows, tz=None):
 
     :param filename: The name of the CSV file
     :param headers: a list of cell captions
-    :param rows: a list of dicts mapping captions to values
+    :param rows: an iterable of dicts mapping captions to values
     :param tz: the timezone for the values that are datetime objects
     :return: a flask response containing the XLSX data
     """
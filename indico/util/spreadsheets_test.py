@@ -5,11 +5,13 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
+import codecs
 import textwrap
+from zipfile import ZipFile
 
 import pytest
 
-from indico.util.spreadsheets import generate_csv
+from indico.util.spreadsheets import generate_csv, generate_xlsx, iter_csv
 
 
 def test_generate_csv():
@@ -51,3 +53,22 @@ def test_generate_csv_malicious(value, expected):
     rows = [{'foo': value, 'bar': ''}]
     csv = generate_csv(headers, rows).read().decode('utf-8-sig').strip().splitlines()
     assert csv == ['foo,bar', f'{expected},']
+
+
+def test_iter_csv():
+    headers = ['foo', 'bar']
+    rows = [{'bar': i, 'foo': 'x' * i} for i in range(100)]
+    chunks = list(iter_csv(headers, iter(rows), chunk_size=500))
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 500 for chunk in chunks[:-1])
+    assert b''.join(chunks) == generate_csv(headers, rows).read()
+    assert b''.join(chunks).startswith(codecs.BOM_UTF8 + b'foo,bar\r\n,0\r\n')
+
+
+@pytest.mark.usefixtures('app')
+def test_generate_xlsx():
+    headers = ['foo', 'bar']
+    rows = ({'foo': f'row {i}', 'bar': i} for i in range(100))
+    with ZipFile(generate_xlsx(headers, rows)) as zf:
+        sheet = zf.read('xl/worksheets/sheet1.xml').decode()
+    assert sheet.count('<row ') == 101
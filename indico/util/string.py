@@ -11,8 +11,10 @@ String manipulation functions
 
 
 import binascii
+import hashlib
 import re
 import string
+import time
 import unicodedata
 from enum import Enum
 from itertools import chain
@@ -23,6 +25,7 @@ import bleach
 import email_validator
 import markdown
 import translitcodec
+from flask import has_app_context
 from html2text import HTML2Text
 from jinja2.filters import do_striptags
 from lxml import etree, html
@@ -69,6 +72,14 @@ BLEACH_ALLOWED_STYLES_HTML = [
 
 LATEX_MATH_PLACEHOLDER = '\uE000'
 
+# rendered markdown is cached based on a hash of the source text, so the
+# entries never become stale; the version needs to be bumped whenever the
+# way markdown is rendered/sanitized changes
+MARKDOWN_CACHE_VERSION = 1
+MARKDOWN_CACHE_TTL = 86400 * 7
+MARKDOWN_LOCAL_CACHE_TTL = 3600
+MARKDOWN_LOCAL_CACHE_SIZE = 5000
+
 
 def remove_accents(text):
     return ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
@@ -135,9 +146,39 @@ def strip_tags(text):
     return do_striptags(text)
 
 
+_markdown_local_cache = _markdown_cache = None
+
+
+def _get_markdown_cache_key(text, escape_latex_math, kwargs):
+    if callable(escape_latex_math) or set(kwargs) - {'extensions'}:
+        return None
+    extensions = kwargs.get('extensions', ())
+    # extension objects may have custom settings, so we only cache
+    # markdown rendered with extensions specified by name
+    if not all(isinstance(ext, str) for ext in extensions):
+        return None
+    data = '\n'.join([str(MARKDOWN_CACHE_VERSION), markdown.__version__, bleach.__version__,
+                      str(bool(escape_latex_math)), ','.join(extensions), text])
+    return hashlib.sha256(data.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _get_markdown_caches():
+    global _markdown_local_cache, _markdown_cache
+    if _markdown_cache is None:
+        from indico.core.cache import make_scoped_cache
+        from indico.util.caching import LocalCache
+        _markdown_local_cache = LocalCache(MARKDOWN_LOCAL_CACHE_SIZE)
+        _markdown_cache = make_scoped_cache('markdown')
+    return _markdown_local_cache, _markdown_cache
+
+
 def render_markdown(text, escape_latex_math=True, md=None, **kwargs):
     """Mako markdown to HTML filter.
 
+    The HTML generated by the default markdown processor is cached
+    in memory and in Redis, so rendering the same text again (e.g.
+    the abstracts of a large conference) does not parse it again.
+
     :param text: Markdown source to convert to HTML
     :param escape_latex_math: Whether math expression should be left untouched or a function that will be called
                               to replace math-mode segments.
@@ -146,6 +187,25 @@ def render_markdown(text, escape_latex_math=True, md=None, **kwargs):
     :param kwargs: Extra arguments to pass on to the markdown
                    processor
     """
+    cache_key = None
+    if md is None and has_app_context():
+        cache_key = _get_markdown_cache_key(text, escape_latex_math, kwargs)
+    if cache_key is None:
+        return _render_markdown(text, escape_latex_math, md, **kwargs)
+
+    local_cache, cache = _get_markdown_caches()
+    result = local_cache.get(cache_key)
+    if result is not None:
+        return result
+    result = cache.get(cache_key)
+    if result is None:
+        result = _render_markdown(text, escape_latex_math, md, **kwargs)
+        cache.set(cache_key, result, timeout=MARKDOWN_CACHE_TTL)
+    local_cache.set(cache_key, result, time.time() + MARKDOWN_LOCAL_CACHE_TTL)
+    return result
+
+
+def _render_markdown(text, escape_latex_math, md, **kwargs):
     if escape_latex_math:
         math_segments = []
 
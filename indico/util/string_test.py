@@ -8,9 +8,11 @@
 import textwrap
 from enum import Enum
 from itertools import count
+from uuid import uuid4
 
 import pytest
 
+from indico.util import string
 from indico.util.string import (camelize, camelize_keys, crc32, format_repr, html_to_plaintext, make_unique_token,
                                 normalize_phone_number, render_markdown, sanitize_email, sanitize_for_platypus,
                                 sanitize_html, seems_html, slugify, snakify, snakify_keys, strip_tags, text_to_repr)
@@ -212,6 +214,31 @@ def test_markdown(input, output):
     assert render_markdown(input,  extensions=('tables',)) == output
 
 
+@pytest.mark.usefixtures('app_context')
+def test_markdown_cache(mocker):
+    mocker.patch('indico.util.string._markdown_local_cache', None)
+    mocker.patch('indico.util.string._markdown_cache', None)
+    markdown = mocker.spy(string.markdown, 'markdown')
+    token = uuid4().hex
+    text = f'**{token}** $*a* < b$'
+    expected = f'<p><strong>{token}</strong> $*a* < b$</p>'
+    assert render_markdown(text) == expected
+    assert markdown.call_count == 1
+    assert render_markdown(text) == expected
+    assert markdown.call_count == 1
+    # redis is used when the in-memory cache does not contain the text
+    string._markdown_local_cache.clear()
+    assert render_markdown(text) == expected
+    assert markdown.call_count == 1
+    # different options are cached separately
+    assert render_markdown(text, escape_latex_math=False) == f'<p><strong>{token}</strong> $<em>a</em> &lt; b$</p>'
+    assert markdown.call_count == 2
+    # custom processors and escaping functions are never cached
+    assert render_markdown(text, escape_latex_math=lambda s: s.upper()) == expected.replace('$*a* < b$', '$*A* < B$')
+    assert render_markdown(text, escape_latex_math=lambda s: s.upper()) == expected.replace('$*a* < b$', '$*A* < B$')
+    assert markdown.call_count == 4
+
+
 def test_sanitize_html_imagemaps():
     html = '''
         <img src="example.jpg" usemap="#image-map">
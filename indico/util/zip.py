@@ -0,0 +1,116 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from contextlib import closing
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+from indico.util.date_time import now_utc
+
+
+#: Content types which are worth compressing.  Most other files (images,
+#: videos, archives, PDFs, office documents, ...) are already compressed.
+COMPRESSIBLE_CONTENT_TYPES = {
+    'application/javascript',
+    'application/json',
+    'application/postscript',
+    'application/rtf',
+    'application/x-latex',
+    'application/x-tex',
+    'application/xml',
+    'image/bmp',
+    'image/svg+xml',
+    'image/tiff',
+}
+
+
+class ZipStreamEntry:
+    """A file to be added to a streamed zip archive.
+
+    :param name: The path of the file inside the archive
+    :param open_file: A callable returning a file-like object with the
+                      file's contents; it is called right before the
+                      file is added to the archive
+    :param size: The size of the file in bytes, if known
+    :param content_type: The MIME type of the file, used to decide
+                         whether the file should be compressed
+    :param modified_dt: The modification date of the file
+    """
+
+    def __init__(self, name, open_file, size=None, content_type=None, modified_dt=None):
+        self.name = name
+        self.open_file = open_file
+        self.size = size
+        self.content_type = content_type
+        self.modified_dt = modified_dt
+
+    @property
+    def compress_type(self):
+        content_type = (self.content_type or '').split(';')[0].strip().lower()
+        if content_type.startswith('text/') or content_type in COMPRESSIBLE_CONTENT_TYPES:
+            return ZIP_DEFLATED
+        return ZIP_STORED
+
+    def get_zip_info(self):
+        # zip files cannot contain dates before 1980
+        date_time = (self.modified_dt or now_utc()).timetuple()[:6]
+        info = ZipInfo(self.name, date_time=max(date_time, (1980, 1, 1, 0, 0, 0)))
+        info.compress_type = self.compress_type
+        info.external_attr = 0o644 << 16
+        if self.size is not None:
+            info.file_size = self.size
+        return info
+
+
+class _ZipOutput:
+    """A write-only file-like object buffering the data written to it.
+
+    Since it cannot be seeked, `ZipFile` writes the archive sequentially,
+    using data descriptors after each file instead of updating the local
+    headers afterwards.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip_stream(entries, chunk_size=256*1024):
+    """Generate a zip archive on the fly.
+
+    The files are read in chunks and the archive is yielded as it is
+    being written, so neither the files nor the archive need to be kept
+    in memory or written to disk.  Only the central directory is kept
+    in memory until the end.  ZIP64 extensions are used for large files
+    and archives.
+
+    :param entries: An iterable of :class:`ZipStreamEntry` objects
+    :param chunk_size: The size of the chunks in which the files are read
+    :return: An iterator yielding the archive's data
+    """
+    output = _ZipOutput()
+    with ZipFile(output, 'w', allowZip64=True) as zip_file:
+        for entry in entries:
+            info = entry.get_zip_info()
+            with closing(entry.open_file()) as src, zip_file.open(info, 'w', force_zip64=(entry.size is None)) as dest:
+                while data := src.read(chunk_size):
+                    dest.write(data)
+                    if chunk := output.pop():
+                        yield chunk
+            if chunk := output.pop():
+                yield chunk
+    yield output.pop()
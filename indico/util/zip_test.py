@@ -0,0 +1,61 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from datetime import datetime
+from io import BytesIO
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+import pytest
+import pytz
+
+from indico.util.zip import ZipStreamEntry, iter_zip_stream
+
+
+def _entry(name, data, content_type=None, with_size=True, **kwargs):
+    return ZipStreamEntry(name, lambda: BytesIO(data), size=(len(data) if with_size else None),
+                          content_type=content_type, **kwargs)
+
+
+@pytest.mark.parametrize('with_size', (True, False))
+def test_iter_zip_stream(with_size):
+    big = bytes(range(256)) * 4096
+    entries = [
+        _entry('foo/hello.txt', b'hello world\n' * 1000, 'text/plain', with_size),
+        _entry('foo/big.bin', big, 'application/octet-stream', with_size),
+        _entry('empty.pdf', b'', 'application/pdf', with_size,
+               modified_dt=datetime(2022, 1, 27, 12, 34, 56, tzinfo=pytz.utc)),
+    ]
+    chunks = list(iter_zip_stream(iter(entries), chunk_size=65536))
+    assert len(chunks) > 5
+    with ZipFile(BytesIO(b''.join(chunks))) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == ['foo/hello.txt', 'foo/big.bin', 'empty.pdf']
+        assert zip_file.read('foo/hello.txt') == b'hello world\n' * 1000
+        assert zip_file.read('foo/big.bin') == big
+        assert zip_file.read('empty.pdf') == b''
+        assert zip_file.getinfo('foo/hello.txt').compress_type == ZIP_DEFLATED
+        assert zip_file.getinfo('foo/big.bin').compress_type == ZIP_STORED
+        assert zip_file.getinfo('empty.pdf').date_time == (2022, 1, 27, 12, 34, 56)
+
+
+def test_iter_zip_stream_empty():
+    with ZipFile(BytesIO(b''.join(iter_zip_stream([])))) as zip_file:
+        assert zip_file.namelist() == []
+
+
+@pytest.mark.parametrize(('content_type', 'compressed'), (
+    (None, False),
+    ('text/plain', True),
+    ('text/html; charset=utf-8', True),
+    ('application/json', True),
+    ('application/pdf', False),
+    ('image/png', False),
+    ('application/zip', False),
+))
+def test_zip_stream_entry_compress_type(content_type, compressed):
+    entry = _entry('test', b'', content_type)
+    assert entry.compress_type == (ZIP_DEFLATED if compressed else ZIP_STORED)
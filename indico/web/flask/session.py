@@ -6,6 +6,7 @@
 # LICENSE file for more details.
 
 import pickle
+import struct
 import uuid
 from datetime import datetime, timedelta
 
@@ -19,17 +20,63 @@ from indico.core.config import config
 from indico.modules.users import User
 from indico.util.date_time import get_display_tz
 from indico.util.i18n import set_best_lang
+from indico.util.packing import UnpackError, pack, unpack
 from indico.web.util import get_request_user
 
 
+def _loads_data(name):
+    method = getattr(CallbackDict, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._load()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
 class BaseSession(CallbackDict, SessionMixin):
-    def __init__(self, initial=None, sid=None, new=False):
+    """A session whose data is only loaded when it is first accessed.
+
+    :param initial: The initial session data
+    :param sid: The session id
+    :param new: Whether this is a new session
+    :param loader: A callable that loads the session data when the
+                   session is first accessed.  It receives the session
+                   and returns a dict containing its data, or ``None``
+                   if there is no stored data for the session.  In
+                   that case the loader needs to mark the session as
+                   new.
+    """
+
+    def __init__(self, initial=None, sid=None, new=False, loader=None):
         def on_update(self):
             self.modified = True
         CallbackDict.__init__(self, initial, on_update)
         self.sid = sid
         self.new = new
         self.modified = False
+        #: The serialized session data as it was loaded from the storage
+        self.stored_data = None
+        self._loader = loader
+        if loader is None:
+            self._apply_defaults()
+
+    @property
+    def loaded(self):
+        """Whether the session data has been loaded."""
+        return self._loader is None
+
+    def _load(self):
+        if self._loader is None:
+            return
+        loader, self._loader = self._loader, None
+        data = loader(self)
+        if data:
+            dict.update(self, data)
+        self._apply_defaults()
+
+    def _apply_defaults(self):
         defaults = self._get_defaults()
         if defaults:
             self.update(defaults)
@@ -38,6 +85,26 @@ class BaseSession(CallbackDict, SessionMixin):
         # Note: This is called before there is a DB connection available!
         return None
 
+    __getitem__ = _loads_data('__getitem__')
+    __setitem__ = _loads_data('__setitem__')
+    __delitem__ = _loads_data('__delitem__')
+    __contains__ = _loads_data('__contains__')
+    __iter__ = _loads_data('__iter__')
+    __len__ = _loads_data('__len__')
+    __eq__ = _loads_data('__eq__')
+    __ne__ = _loads_data('__ne__')
+    __repr__ = _loads_data('__repr__')
+    get = _loads_data('get')
+    keys = _loads_data('keys')
+    values = _loads_data('values')
+    items = _loads_data('items')
+    copy = _loads_data('copy')
+    pop = _loads_data('pop')
+    popitem = _loads_data('popitem')
+    setdefault = _loads_data('setdefault')
+    update = _loads_data('update')
+    clear = _loads_data('clear')
+
 
 # Hey, if you intend on adding a custom property to this class:
 # - Only do it if you need logic behind it. Otherwise use the dict API!
@@ -130,9 +197,77 @@ class IndicoSession(BaseSession):
         return get_display_tz(as_timezone=True)
 
 
+class SessionSerializer:
+    """Serialize sessions using a compact, versioned binary format.
+
+    Volatile keys, i.e. those containing metadata which is updated
+    whenever the session is saved, are stored separately from the other
+    data.  This allows checking whether the session data changed by
+    simply comparing the serialized data.
+
+    Sessions stored by older versions of Indico are pickled; they can
+    still be loaded and are converted when the session is saved again.
+
+    :param volatile_keys: The keys to store separately
+    """
+
+    header = b'IS'
+    version = 1
+    _length = struct.Struct('>I')
+
+    def __init__(self, volatile_keys):
+        self.volatile_keys = volatile_keys
+
+    def dumps_persistent(self, data):
+        """Serialize the non-volatile session data."""
+        return pack({k: v for k, v in data.items() if k not in self.volatile_keys})
+
+    def dumps(self, data, persistent=None):
+        """Serialize the session data.
+
+        :param data: The session data
+        :param persistent: The data returned by :meth:`dumps_persistent`
+                           in case it is already available
+        """
+        if persistent is None:
+            persistent = self.dumps_persistent(data)
+        volatile = pack({k: data[k] for k in self.volatile_keys if k in data})
+        return b''.join((self.header, bytes([self.version]), self._length.pack(len(persistent)), persistent, volatile))
+
+    def _split(self, data):
+        if not data.startswith(self.header):
+            return None
+        if len(data) == len(self.header):
+            raise UnpackError('Session data is truncated')
+        version = data[len(self.header)]
+        if version != self.version:
+            raise UnpackError(f'Unsupported session format version: {version}')
+        start = len(self.header) + 1 + self._length.size
+        if len(data) < start:
+            raise UnpackError('Session data is truncated')
+        end = start + self._length.unpack_from(data, start - self._length.size)[0]
+        return data[start:end], data[end:]
+
+    def get_persistent(self, data):
+        """Get the serialized non-volatile data from serialized session data."""
+        parts = self._split(data)
+        return parts[0] if parts else None
+
+    def loads(self, data):
+        parts = self._split(data)
+        if parts is None:
+            return pickle.loads(data)
+        persistent, volatile = parts
+        return dict(unpack(persistent), **unpack(volatile))
+
+
 class IndicoSessionInterface(SessionInterface):
     pickle_based = True
-    serializer = pickle
+    #: Session keys which are updated whenever the session is saved and
+    #: thus do not need to be saved when they are the only ones that
+    #: changed
+    volatile_keys = frozenset({'_expires', '_permanent', '_secure'})
+    serializer = SessionSerializer(volatile_keys)
     session_class = IndicoSession
     temporary_session_lifetime = timedelta(days=7)
 
@@ -167,21 +302,48 @@ class IndicoSessionInterface(SessionInterface):
             return True
         return False
 
-    def open_session(self, app, request):
-        sid = request.cookies.get(app.session_cookie_name)
-        if not sid:
-            return self.session_class(sid=self.generate_sid(), new=True)
-        data = self.storage.get(sid)
+    def get_changed_data(self, session):
+        """Get the session data if it needs to be saved.
+
+        :return: The serialized non-volatile session data if the
+                 session has been modified, or ``None`` if there were
+                 no actual changes.
+        """
+        if not session.modified:
+            return None
+        # mutable objects in the session may have been modified in place, so
+        # we compare the serialized data instead of the modified flag
+        data = self.serializer.dumps_persistent(session)
+        if session.stored_data is not None and data == self.serializer.get_persistent(session.stored_data):
+            return None
+        return data
+
+    def _load_session_data(self, session):
+        data = self.storage.get(session.sid)
         if data is not None:
             try:
-                return self.session_class(self.serializer.loads(data), sid=sid)
-            except TypeError:
+                rv = self.serializer.loads(data)
+                session.stored_data = data
+                return rv
+            except (TypeError, ValueError, pickle.UnpicklingError):
                 # fall through to generating a new session; this likely happens when
                 # you have a session saved on Python 2
                 pass
-        return self.session_class(sid=self.generate_sid(), new=True)
+        session.sid = self.generate_sid()
+        session.new = True
+        return None
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(app.session_cookie_name)
+        if not sid:
+            return self.session_class(sid=self.generate_sid(), new=True)
+        # the session data is only loaded from the storage when the session is used
+        return self.session_class(sid=sid, loader=self._load_session_data)
 
     def save_session(self, app, session, response):
+        if not session.loaded:
+            # session has not been used during the request, so there is nothing to save
+            return
         domain = self.get_cookie_domain(app)
         secure = self.get_cookie_secure(app)
         refresh_sid = self.should_refresh_sid(app, session)
@@ -191,7 +353,8 @@ class IndicoSessionInterface(SessionInterface):
             response.delete_cookie(app.session_cookie_name, domain=domain)
             return
 
-        if not refresh_sid and not session.modified and not self.should_refresh_session(app, session):
+        changed_data = self.get_changed_data(session)
+        if not refresh_sid and changed_data is None and not self.should_refresh_session(app, session):
             # If the session has not been modified we only store if it needs to be refreshed
             return
 
@@ -209,6 +372,7 @@ class IndicoSessionInterface(SessionInterface):
             session.sid = self.generate_sid()
 
         session['_secure'] = request.is_secure
-        self.storage.set(session.sid, self.serializer.dumps(dict(session)), storage_ttl)
+        # the non-volatile data is not affected by the changes above, so we can reuse it
+        self.storage.set(session.sid, self.serializer.dumps(session, changed_data), storage_ttl)
         response.set_cookie(app.session_cookie_name, session.sid, expires=cookie_lifetime, httponly=True,
                             secure=secure)
@@ -0,0 +1,120 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+import pickle
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Response
+
+from indico.web.flask.session import IndicoSessionInterface
+
+
+class _MemoryStorage(dict):
+    def get(self, key, default=None):
+        self.reads = getattr(self, 'reads', 0) + 1
+        return super().get(key, default)
+
+    def set(self, key, value, timeout=None):
+        self[key] = value
+
+    def delete(self, key):
+        self.pop(key, None)
+
+
+@pytest.fixture
+def session_interface():
+    interface = IndicoSessionInterface()
+    interface.storage = _MemoryStorage()
+    return interface
+
+
+def _open_session(app, interface, sid):
+    with app.test_request_context(headers={'Cookie': f'indico_session_http={sid}'}) as ctx:
+        return interface.open_session(app, ctx.request)
+
+
+def _save_session(app, interface, session):
+    response = Response()
+    with app.test_request_context():
+        interface.save_session(app, session, response)
+    return response
+
+
+def _store_session(interface, sid, data):
+    data = dict(data, _expires=datetime.now() + timedelta(days=7))
+    interface.storage.set(sid, interface.serializer.dumps(data))
+
+
+def test_session_lazy(app, session_interface):
+    _store_session(session_interface, 'sid', {'foo': 'bar'})
+    session = _open_session(app, session_interface, 'sid')
+    assert not session.loaded
+    assert not hasattr(session_interface.storage, 'reads')
+    # an unused session is never saved
+    assert 'Set-Cookie' not in _save_session(app, session_interface, session).headers
+    assert not session.loaded
+    assert session['foo'] == 'bar'
+    assert session.loaded
+    assert session_interface.storage.reads == 1
+    assert not session.new
+    assert session.sid == 'sid'
+
+
+def test_session_expired(app, session_interface):
+    session = _open_session(app, session_interface, 'sid')
+    assert session.get('foo') is None
+    assert session.new
+    assert session.sid != 'sid'
+    session['foo'] = 'bar'
+    response = _save_session(app, session_interface, session)
+    assert session.sid in response.headers['Set-Cookie']
+    assert session_interface.serializer.loads(session_interface.storage[session.sid])['foo'] == 'bar'
+
+
+def test_session_legacy_pickle(app, session_interface):
+    session_interface.storage.set('sid', pickle.dumps({'foo': 'bar'}))
+    session = _open_session(app, session_interface, 'sid')
+    assert session['foo'] == 'bar'
+    assert not session.new
+
+
+def test_session_unchanged(app, session_interface):
+    _store_session(session_interface, 'sid', {'foo': 'bar', 'data': {'a': 1}})
+    stored = session_interface.storage['sid']
+    session = _open_session(app, session_interface, 'sid')
+    session.setdefault('foo', 'bar')
+    session.pop('missing', None)
+    session['data'] = {'a': 1}
+    session['_secure'] = False
+    assert session.modified
+    assert session_interface.get_changed_data(session) is None
+    assert 'Set-Cookie' not in _save_session(app, session_interface, session).headers
+    assert session_interface.storage['sid'] == stored
+
+
+@pytest.mark.parametrize('change', (
+    lambda s: s.__setitem__('foo', 'baz'),
+    lambda s: s.__delitem__('foo'),
+    lambda s: s.__setitem__('new', 1),
+    lambda s: s['data'].update(a=2),
+))
+def test_session_changed(app, session_interface, change):
+    _store_session(session_interface, 'sid', {'foo': 'bar', 'data': {'a': 1}, 'other': 1})
+    session = _open_session(app, session_interface, 'sid')
+    change(session)
+    session.modified = True
+    assert session_interface.get_changed_data(session) is not None
+    assert 'Set-Cookie' in _save_session(app, session_interface, session).headers
+
+
+@pytest.mark.parametrize('data', (b'IS', b'IS\x01\x00', b'IS\x02\x00\x00\x00\x00'))
+def test_session_invalid_data(app, session_interface, data):
+    session_interface.storage.set('sid', data)
+    session = _open_session(app, session_interface, 'sid')
+    assert 'foo' not in session
+    assert session.new
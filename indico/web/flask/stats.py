@@ -5,12 +5,131 @@
 # modify it under the terms of the MIT License; see the
 # LICENSE file for more details.
 
+import json
+import re
+import sys
 import time
+from collections import defaultdict
 
-from flask import g, request_started
+from flask import g, has_request_context, request, request_started, session
+from itsdangerous import BadData
 from sqlalchemy.engine import Engine
 from sqlalchemy.event import listens_for
 
+from indico.core.config import config
+from indico.core.logger import Logger
+from indico.util.signing import secure_serializer
+
+
+#: The header containing a token to enable query profiling for a request
+PROFILE_HEADER = 'X-Indico-Profile'
+#: How often the same statement needs to be executed from the same place
+#: to be considered a N+1 query pattern
+REPEATED_QUERY_THRESHOLD = 5
+
+_ignored_modules = ('indico.core.db.sqlalchemy', 'indico.web.flask.stats')
+_sql_param_re = re.compile(r'%\(\w+\)s|%s|\$\d+')
+_sql_literal_re = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_sql_in_list_re = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_sql_whitespace_re = re.compile(r'\s+')
+
+logger = Logger.get('profiler')
+
+
+def normalize_sql(statement):
+    """Normalize an SQL statement so identical queries can be grouped.
+
+    Parameters and literals are replaced with ``?`` and lists of them
+    (e.g. in ``IN`` criteria) are collapsed, so statements which only
+    differ in their parameters are considered the same.
+    """
+    statement = _sql_param_re.sub('?', statement)
+    statement = _sql_literal_re.sub('?', statement)
+    statement = _sql_in_list_re.sub('(...)', statement)
+    return _sql_whitespace_re.sub(' ', statement).strip()
+
+
+def _get_query_location():
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith(('indico.', 'indico_')) and not module.startswith(_ignored_modules):
+            return f'{module}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return None
+
+
+class QueryProfile:
+    """Detailed information about the queries executed in a request."""
+
+    def __init__(self):
+        self.queries = []
+
+    def add(self, statement, duration, location):
+        self.queries.append({'sql': normalize_sql(statement), 'duration': duration, 'location': location})
+
+    @property
+    def duration(self):
+        return sum(q['duration'] for q in self.queries)
+
+    def get_slowest(self, limit=10):
+        """Get the slowest queries."""
+        return sorted(self.queries, key=lambda q: q['duration'], reverse=True)[:limit]
+
+    def get_repeated(self, threshold=REPEATED_QUERY_THRESHOLD):
+        """Get statements which were executed many times from the same place.
+
+        This usually indicates a N+1 query pattern, i.e. a relationship
+        being lazy-loaded for each object in a list instead of being
+        loaded eagerly together with the list.
+
+        :return: A list of dicts containing the normalized statement, the
+                 location of the code running it, the number of times it
+                 was executed and the total time spent on it, sorted by
+                 the number of executions.
+        """
+        groups = defaultdict(list)
+        for query in self.queries:
+            groups[query['sql'], query['location']].append(query['duration'])
+        repeated = [{'sql': sql, 'location': location, 'count': len(durations), 'duration': sum(durations)}
+                    for (sql, location), durations in groups.items()
+                    if len(durations) >= threshold]
+        return sorted(repeated, key=lambda x: (x['count'], x['duration']), reverse=True)
+
+    def to_dict(self):
+        return {'query_count': len(self.queries),
+                'query_duration': self.duration,
+                'repeated': self.get_repeated(),
+                'slowest': self.get_slowest()}
+
+
+def generate_profile_token(validity):
+    """Generate a token that enables query profiling.
+
+    The token needs to be sent in the :data:`PROFILE_HEADER` header.
+
+    :param validity: A `timedelta` indicating how long the token is valid.
+    """
+    return secure_serializer.dumps(int(time.time() + validity.total_seconds()), salt='request-profile')
+
+
+def _is_profiling_requested():
+    """Check whether the queries of the current request should be profiled.
+
+    Since the profile is included in the response, this is only the
+    case if the request contains a valid profiling token, or if query
+    profiling is enabled in the config and the user is an admin.
+    """
+    if token := request.headers.get(PROFILE_HEADER):
+        try:
+            valid_until = secure_serializer.loads(token, salt='request-profile')
+        except BadData:
+            pass
+        else:
+            if valid_until > time.time():
+                return True
+    return config.PROFILE_QUERIES and session.user is not None and session.user.is_admin
+
 
 def request_stats_request_started():
     if g.get('request_stats_initialized'):
@@ -18,13 +137,46 @@ def request_stats_request_started():
     g.request_stats_initialized = True
     g.query_count = 0
     g.query_duration = 0
+    g.query_profile = None
     g.req_start_ts = time.time()
 
 
+def _format_server_timing(name, duration, desc=None):
+    rv = f'{name};dur={duration * 1000:.1f}'
+    if desc:
+        desc = desc.replace('\\', '\\\\').replace('"', '\\"').encode('latin1', 'replace').decode('latin1')
+        rv += f';desc="{desc}"'
+    return rv
+
+
+def _add_profile_headers(response):
+    stats = get_request_stats()
+    profile = g.query_profile
+    timings = [_format_server_timing('sql', stats['query_duration'], f'{stats["query_count"]} queries'),
+               _format_server_timing('req', stats['req_duration'])]
+    for i, item in enumerate(profile.get_repeated()[:5], 1):
+        timings.append(_format_server_timing(f'repeated-{i}', item['duration'],
+                                             f'{item["count"]}x {item["location"] or "unknown location"}'))
+    response.headers['Server-Timing'] = ', '.join(timings)
+    threshold = config.PROFILE_QUERIES_LOG_THRESHOLD
+    if threshold is not None and stats['req_duration'] >= threshold:
+        data = dict(profile.to_dict(), method=request.method, url=request.url, endpoint=request.endpoint,
+                    req_duration=stats['req_duration'])
+        logger.warning('Slow request: %s', json.dumps(data))
+
+
 def setup_request_stats(app):
     @request_started.connect_via(app)
     def _request_started(sender, **kwargs):
         request_stats_request_started()
+        if has_request_context() and _is_profiling_requested():
+            g.query_profile = QueryProfile()
+
+    @app.after_request
+    def _after_request(response):
+        if g.get('query_profile') is not None:
+            _add_profile_headers(response)
+        return response
 
     @listens_for(Engine, 'before_cursor_execute', named=True)
     def before_cursor_execute(context, **unused):
@@ -33,12 +185,14 @@ def setup_request_stats(app):
         context._query_start_time = time.time()
 
     @listens_for(Engine, 'after_cursor_execute', named=True)
-    def after_cursor_execute(context, **unused):
+    def after_cursor_execute(context, statement, **unused):
         if not g.get('request_stats_initialized'):
             return
         total = time.time() - context._query_start_time
         g.query_count += 1
         g.query_duration += total
+        if g.query_profile is not None:
+            g.query_profile.add(statement, total, _get_query_location())
 
 
 def get_request_stats():
@@ -46,5 +200,6 @@ def get_request_stats():
     return {
         'query_count': g.query_count if initialized else 0,
         'query_duration': g.query_duration if initialized else 0,
-        'req_duration': (time.time() - g.req_start_ts) if initialized else 0
+        'req_duration': (time.time() - g.req_start_ts) if initialized else 0,
+        'query_profile': g.query_profile if initialized else None,
     }
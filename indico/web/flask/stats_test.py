@@ -0,0 +1,74 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from datetime import timedelta
+
+import pytest
+
+from indico.web.flask.stats import (PROFILE_HEADER, QueryProfile, _is_profiling_requested, generate_profile_token,
+                                    normalize_sql)
+
+
+@pytest.mark.parametrize(('statement', 'expected'), (
+    ('SELECT * FROM users WHERE id = %(id_1)s', 'SELECT * FROM users WHERE id = ?'),
+    ('SELECT *\n  FROM users\n  WHERE id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)',
+     'SELECT * FROM users WHERE id IN (...)'),
+    ("SELECT * FROM users WHERE first_name = 'O''Brien' AND id > 42",
+     'SELECT * FROM users WHERE first_name = ? AND id > ?'),
+    ('SELECT col1 FROM table1 LIMIT %s', 'SELECT col1 FROM table1 LIMIT ?'),
+))
+def test_normalize_sql(statement, expected):
+    assert normalize_sql(statement) == expected
+
+
+def test_query_profile():
+    profile = QueryProfile()
+    profile.add('SELECT * FROM events WHERE id = %(id_1)s', 0.5, 'indico.modules.events:1 (foo)')
+    for i in range(10):
+        profile.add('SELECT * FROM users WHERE id = %(id_1)s', 0.01, 'indico.modules.users:1 (bar)')
+        profile.add('SELECT * FROM users WHERE id = %(id_1)s', 0.01, 'indico.modules.users:2 (baz)')
+    for i in range(3):
+        profile.add('SELECT * FROM categories WHERE id = %(id_1)s', 0.01, 'indico.modules.categories:1 (foo)')
+    assert profile.get_slowest(1) == [{'sql': 'SELECT * FROM events WHERE id = ?', 'duration': 0.5,
+                                       'location': 'indico.modules.events:1 (foo)'}]
+    repeated = profile.get_repeated()
+    assert [(x['location'], x['count']) for x in repeated] == [
+        ('indico.modules.users:1 (bar)', 10),
+        ('indico.modules.users:2 (baz)', 10),
+    ]
+    assert repeated[0]['duration'] == pytest.approx(0.1)
+    assert profile.to_dict()['query_count'] == 24
+
+
+@pytest.mark.parametrize(('token', 'expected'), (
+    (None, False),
+    ('garbage', False),
+    (lambda: generate_profile_token(timedelta(hours=1)), True),
+    (lambda: generate_profile_token(timedelta(hours=-1)), False),
+))
+def test_is_profiling_requested(app, token, expected):
+    if callable(token):
+        with app.app_context():
+            token = token()
+    headers = {PROFILE_HEADER: token} if token else {}
+    with app.test_request_context(headers=headers):
+        assert _is_profiling_requested() == expected
+
+
+@pytest.mark.parametrize('is_admin', (False, True))
+def test_profile_output_only_for_admins(mocker, app, db, test_client, dummy_user, is_admin):
+    mocker.patch.dict(app.config, {'INDICO': dict(app.config['INDICO'], PROFILE_QUERIES=True)})
+    dummy_user.is_admin = is_admin
+    db.session.flush()
+    with test_client.session_transaction() as sess:
+        sess.set_session_user(dummy_user)
+    resp = test_client.get('/user/preferences/')
+    assert resp.status_code == 200
+    html = resp.get_data(as_text=True)
+    assert ('Repeated queries (possible N+1 patterns)' in html) == is_admin
+    assert ('Slowest queries' in html) == is_admin
+    assert ('Server-Timing' in resp.headers) == is_admin
@@ -8,10 +8,13 @@
 import inspect
 import os
 import re
+import unicodedata
 from importlib import import_module
+from urllib.parse import quote
 
 from flask import Blueprint, current_app, g, redirect, request
 from flask import send_file as _send_file
+from flask import stream_with_context
 from flask import url_for as _url_for
 from flask.helpers import get_root_path
 from werkzeug.exceptions import HTTPException, NotFound
@@ -283,6 +286,37 @@ def send_file(name, path_or_fd, mimetype, last_modified=None, no_cache=True, inl
     return rv
 
 
+def send_stream(name, data, mimetype, inline=True, no_cache=True):
+    """Send data to the user while it is being generated.
+
+    This is useful for large files which are generated on the fly, since
+    they do not need to be kept in memory or written to disk first.  The
+    request context is kept alive until all data has been sent.
+
+    `name` is the filename visible to the user.
+    `data` is an iterable yielding the data, usually a generator.
+    `mimetype` SHOULD be a proper MIME type such as text/csv.
+    `inline` and `no_cache` behave like in :func:`send_file`.
+    """
+    name = re.sub(r'\s+', ' ', name).strip()
+    if request.user_agent.platform == 'Android' or _is_office_mimetype(mimetype):
+        inline = False
+    rv = current_app.response_class(stream_with_context(data), mimetype=mimetype)
+    try:
+        name.encode('ascii')
+    except UnicodeEncodeError:
+        filenames = {'filename': unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii'),
+                     'filename*': "UTF-8''" + quote(name, safe='')}
+    else:
+        filenames = {'filename': name}
+    rv.headers.set('Content-Disposition', 'inline' if inline else 'attachment', **filenames)
+    rv.headers.add('Content-Security-Policy', "script-src 'self'; object-src 'self'")
+    if no_cache:
+        rv.cache_control.private = True
+        rv.cache_control.no_cache = True
+    return rv
+
+
 def endpoint_for_url(url, base_url=None):
     if base_url is None:
         base_url = config.BASE_URL
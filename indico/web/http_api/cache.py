@@ -0,0 +1,163 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+"""
+HTTP API - Response cache
+
+Serialized responses are cached together with a set of tags (e.g. the
+events and categories they contain).  Whenever something changes, the
+affected tags are invalidated by storing the time of the change, and
+any response generated before that time is considered stale.
+
+There are three kinds of tags:
+
+- ``event-<id>``: something in the event changed
+- ``category-<id>``: something in an event or subcategory inside the
+  category changed
+- ``category-tree-<id>``: the protection or position of the category
+  changed, which may affect anything inside it
+"""
+
+import hashlib
+import time
+from datetime import timedelta
+
+from flask import current_app, g, has_app_context, request
+
+from indico.core.cache import make_scoped_cache
+
+
+API_CACHE = make_scoped_cache('legacy-http-api')
+
+#: How long tag invalidations are remembered; cached responses are never
+#: kept longer than this, as they could not be invalidated anymore.
+TAG_TIMEOUT = timedelta(days=7)
+
+
+def get_event_cache_tags(event_id, category_chain):
+    """Get the cache tags of a response containing an event.
+
+    :param event_id: The ID of the event
+    :param category_chain: The IDs of the event's parent categories
+    """
+    return {f'event-{event_id}'} | {f'category-tree-{id_}' for id_ in category_chain}
+
+
+def get_category_cache_tags(category_chain):
+    """Get the cache tags of a response containing the events in a category.
+
+    :param category_chain: The IDs of the parent categories, ending
+                           with the category itself
+    """
+    return {f'category-{category_chain[-1]}'} | {f'category-tree-{id_}' for id_ in category_chain}
+
+
+def _queue_invalidation(tags):
+    if has_app_context():
+        g.setdefault('http_api_cache_invalidations', set()).update(tags)
+
+
+def _get_chain_tags(category):
+    # categories which have not been flushed yet cannot be in any cached data
+    while category is not None and category.id is None:
+        category = category.parent
+    if category is None:
+        return set()
+    return {f'category-{id_}' for id_ in category.chain_ids}
+
+
+def invalidate_event_cache(event, old_category=None):
+    """Invalidate cached responses containing an event.
+
+    The invalidation happens once the current transaction is committed.
+
+    :param event: The event that changed
+    :param old_category: The previous category in case the event was moved
+    """
+    tags = {f'event-{event.id}'}
+    for category in (event.category, old_category):
+        tags |= _get_chain_tags(category)
+    _queue_invalidation(tags)
+
+
+def invalidate_category_cache(category, old_parent=None, tree=False):
+    """Invalidate cached responses containing the events in a category.
+
+    The invalidation happens once the current transaction is committed.
+
+    :param category: The category that changed
+    :param old_parent: The previous parent in case the category was moved
+    :param tree: Whether everything inside the category is affected by
+                 the change, e.g. because its protection changed
+    """
+    tags = {f'category-{category.id}'}
+    for parent in (category.parent, old_parent):
+        tags |= _get_chain_tags(parent)
+    if tree:
+        tags.add(f'category-tree-{category.id}')
+    _queue_invalidation(tags)
+
+
+def flush_cache_invalidations():
+    """Invalidate the cache tags queued during the current request."""
+    if not has_app_context() or not (tags := g.pop('http_api_cache_invalidations', None)):
+        return
+    now = time.time()
+    API_CACHE.set_many({f'tag/{tag}': now for tag in tags}, timeout=TAG_TIMEOUT)
+
+
+def _get_etag(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def make_api_response(data, content_type=None, etag=None, headers=None):
+    """Create a conditional response for serialized HTTP API data.
+
+    If the client already has the data (according to the ETag it sent
+    in ``If-None-Match``), the response has a 304 status code instead.
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    response = current_app.response_class(data, headers=headers)
+    if content_type:
+        response.content_type = content_type
+    response.set_etag(etag or _get_etag(data))
+    return response.make_conditional(request)
+
+
+def get_cached_response(key):
+    """Get a cached response unless it has been invalidated.
+
+    :param key: The cache key of the response
+    :return: A response object or ``None`` if nothing valid is cached
+    """
+    entry = API_CACHE.get(key)
+    if entry is None:
+        return None
+    data, content_type, headers, etag, tags, created = entry
+    if tags and any(ts is not None and ts >= created
+                    for ts in API_CACHE.get_many(*(f'tag/{tag}' for tag in tags))):
+        return None
+    return make_api_response(data, content_type, etag, headers)
+
+
+def cache_response(key, data, content_type, tags, created, ttl, headers=None):
+    """Cache a serialized response.
+
+    :param key: The cache key of the response
+    :param data: The serialized response data
+    :param content_type: The content type of the response
+    :param tags: The cache tags the response depends on. If the tags
+                 are ``None`` the response is only expired by its TTL.
+    :param created: The timestamp when generating the response started
+    :param ttl: The number of seconds to keep the response in the cache
+    :param headers: A dict containing additional response headers
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    entry = (data, content_type, headers, _get_etag(data), sorted(tags or ()), created)
+    API_CACHE.set(key, entry, min(ttl, int(TAG_TIMEOUT.total_seconds())))
@@ -0,0 +1,69 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+import time
+
+import pytest
+from flask import g
+
+from indico.web.http_api.cache import (cache_response, flush_cache_invalidations, get_cached_response,
+                                       get_category_cache_tags, get_event_cache_tags)
+
+
+pytestmark = pytest.mark.usefixtures('request_context')
+
+
+def _invalidate(*tags):
+    g.http_api_cache_invalidations = set(tags)
+    flush_cache_invalidations()
+
+
+def test_cache_tags():
+    assert get_event_cache_tags(3, [0, 1]) == {'event-3', 'category-tree-0', 'category-tree-1'}
+    assert get_category_cache_tags([0, 1]) == {'category-1', 'category-tree-0', 'category-tree-1'}
+
+
+def test_cached_response():
+    tags = get_event_cache_tags(3, [0, 1])
+    cache_response('json/test', '{"results": []}', 'application/json', tags, time.time() - 1, 60)
+    response = get_cached_response('json/test')
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    assert response.get_data() == b'{"results": []}'
+    assert response.get_etag()[0]
+    # unrelated changes do not affect the cached response
+    _invalidate('event-4', 'category-1', 'category-tree-2')
+    assert get_cached_response('json/test') is not None
+    # but changes to the event or its categories do
+    _invalidate('category-tree-0')
+    assert get_cached_response('json/test') is None
+
+
+def test_cached_response_invalidated_during_generation():
+    created = time.time()
+    _invalidate('event-3')
+    cache_response('json/test', '{}', 'application/json', {'event-3'}, created, 60)
+    assert get_cached_response('json/test') is None
+
+
+def test_cached_response_without_tags():
+    cache_response('json/test', '{}', 'application/json', None, time.time(), 60)
+    _invalidate('event-3')
+    assert get_cached_response('json/test') is not None
+
+
+def test_cached_response_etag(app):
+    cache_response('ics/test', b'BEGIN:VCALENDAR', 'text/calendar', set(), time.time(), 60,
+                   {'Content-Disposition': 'inline; filename=events.ics'})
+    etag = get_cached_response('ics/test').get_etag()[0]
+    with app.test_request_context(headers={'If-None-Match': f'"{etag}"'}):
+        response = get_cached_response('ics/test')
+        assert response.status_code == 304
+    with app.test_request_context(headers={'If-None-Match': '"something-else"'}):
+        response = get_cached_response('ics/test')
+        assert response.status_code == 200
+        assert response.headers['Content-Disposition'] == 'inline; filename=events.ics'
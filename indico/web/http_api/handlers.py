@@ -19,26 +19,24 @@ from uuid import UUID
 
 import sentry_sdk
 from authlib.oauth2 import OAuth2Error
-from flask import current_app, g, request, session
+from flask import current_app, g, request, session, stream_with_context
 from werkzeug.exceptions import BadRequest, NotFound
 
-from indico.core.cache import make_scoped_cache
 from indico.core.db import db
 from indico.core.logger import Logger
 from indico.core.oauth import require_oauth
 from indico.modules.api import APIMode, api_settings
 from indico.modules.api.models.keys import APIKey
 from indico.web.http_api import HTTPAPIHook
+from indico.web.http_api.cache import cache_response, get_cached_response, make_api_response
 from indico.web.http_api.metadata.serializer import Serializer
-from indico.web.http_api.responses import HTTPAPIError, HTTPAPIResult, HTTPAPIResultSchema
+from indico.web.http_api.responses import HTTPAPIError, HTTPAPIResult, HTTPAPIResultSchema, HTTPAPIResultStream
 from indico.web.http_api.util import get_query_parameter
 
 
 # Remove the extension at the end or before the querystring
 RE_REMOVE_EXTENSION = re.compile(r'\.(\w+)(?:$|(?=\?))')
 
-API_CACHE = make_scoped_cache('legacy-http-api')
-
 
 def normalizeQuery(path, query, remove=('signature',), separate=False):
     """Normalize request path and query so it can be used for caching and signing.
@@ -100,6 +98,20 @@ def checkAK(apiKey, signature, timestamp, path, query):
     return ak, onlyPublic
 
 
+def _stream_serialized(serializer, result, logger, path, query):
+    try:
+        yield from serializer.stream(result)
+    except Exception:
+        logger.exception('Serialization error in request %s?%s', path, query)
+        raise
+
+
+def _cache_response(key, hook, data, content_type, created, headers=None):
+    ttl = api_settings.get('cache_ttl')
+    if ttl > 0:
+        cache_response(key, data, content_type, hook.get_cache_tags(), created, ttl, headers)
+
+
 def handler(prefix, path):
     path = posixpath.join('/', prefix, path)
     logger = Logger.get('httpapi')
@@ -125,6 +137,7 @@ def handler(prefix, path):
     pretty = get_query_parameter(queryParams, ['p', 'pretty'], 'no') == 'yes'
     onlyPublic = get_query_parameter(queryParams, ['op', 'onlypublic'], 'no') == 'yes'
     onlyAuthed = get_query_parameter(queryParams, ['oa', 'onlyauthed'], 'no') == 'yes'
+    stream = get_query_parameter(queryParams, ['stream'], 'no') == 'yes'
     scope = 'read:legacy_api' if request.method == 'GET' else 'write:legacy_api'
 
     oauth_token = None
@@ -143,8 +156,15 @@ def handler(prefix, path):
     if request.method == 'POST' or hook.NO_CACHE:
         noCache = True
 
-    ak = error = result = None
-    ts = int(time.time())
+    # Streamed results are never cached since they are not kept in memory
+    stream = (stream and request.method == 'GET' and hook.STREAMABLE and not hook.COMMIT and
+              Serializer.registry[dformat].streamable)
+    if stream:
+        noCache = True
+
+    ak = error = result = cached_response = None
+    started = time.time()
+    ts = int(started)
     typeMap = {}
     status_code = None
     is_response = False
@@ -210,35 +230,28 @@ def handler(prefix, path):
         if onlyAuthed and not user:
             raise HTTPAPIError('Not authenticated', 403)
 
-        addToCache = not hook.NO_CACHE
-        cacheKey = RE_REMOVE_EXTENSION.sub('', cacheKey)
+        addToCache = not hook.NO_CACHE and not stream
+        # The cache contains serialized data, so each format is cached separately
+        cacheKey = f'{dformat}/' + RE_REMOVE_EXTENSION.sub('', cacheKey)
         if not noCache:
-            obj = API_CACHE.get(cacheKey)
-            if obj is not None:
-                result, extra, ts, complete, typeMap = obj
-                addToCache = False
-        if result is None:
+            cached_response = get_cached_response(cacheKey)
+        if cached_response is None:
             g.current_api_user = user
             # Perform the actual exporting
-            res = hook(user)
+            res = hook(user, stream=stream)
             if isinstance(res, current_app.response_class):
-                addToCache = False
                 is_response = True
-                result, extra, complete, typeMap = res, {}, True, {}
+                result, extra, typeMap = res, {}, {}
             elif isinstance(res, tuple) and len(res) == 4:
-                result, extra, complete, typeMap = res
+                result, extra, __, typeMap = res
             else:
-                result, extra, complete, typeMap = res, {}, True, {}
-        if result is not None and addToCache:
-            ttl = api_settings.get('cache_ttl')
-            if ttl > 0:
-                API_CACHE.set(cacheKey, (result, extra, ts, complete, typeMap), ttl)
+                result, extra, typeMap = res, {}, {}
     except HTTPAPIError as e:
         error = e
         if e.code:
             status_code = e.code
 
-    if result is None and error is None:
+    if result is None and cached_response is None and error is None:
         raise NotFound
     else:
         if ak and error is None:
@@ -255,8 +268,19 @@ def handler(prefix, path):
         # Log successful POST api requests
         if error is None and request.method == 'POST':
             logger.info('API request: %s?%s', path, query)
-        if is_response:
-            return result
+        if cached_response is not None:
+            return cached_response
+        elif is_response:
+            if not addToCache or result.status_code != 200:
+                return result
+            # responses created by the hook (e.g. iCal files) are cached as well
+            result.direct_passthrough = False
+            data = result.get_data()
+            headers = None
+            if 'Content-Disposition' in result.headers:
+                headers = {'Content-Disposition': result.headers['Content-Disposition']}
+            _cache_response(cacheKey, hook, data, result.content_type, started, headers)
+            return make_api_response(data, result.content_type, headers=headers)
         serializer = Serializer.create(dformat, query_params=queryParams, pretty=pretty, typeMap=typeMap,
                                        **hook.serializer_args)
         if error:
@@ -266,18 +290,31 @@ def handler(prefix, path):
                 serializer = Serializer.create('json')
 
             result = {'message': error.message}
+        elif stream:
+            result = HTTPAPIResultStream(result, path, query, ts, extra_func=extra,
+                                         extra_keys=hook.STREAM_EXTRA_KEYS)
         elif serializer.encapsulate:
             result = HTTPAPIResultSchema().dump(HTTPAPIResult(result, path, query, ts, extra))
 
         try:
-            data = serializer(result)
-            response = current_app.make_response(data)
             content_type = serializer.get_response_content_type()
-            if content_type:
-                response.content_type = content_type
-            if status_code:
-                response.status_code = status_code
-            return response
+            if error:
+                response = current_app.make_response(serializer(result))
+                if content_type:
+                    response.content_type = content_type
+                if status_code:
+                    response.status_code = status_code
+                return response
+            elif stream:
+                data = _stream_serialized(serializer, result, logger, path, query)
+                response = current_app.response_class(stream_with_context(data))
+                if content_type:
+                    response.content_type = content_type
+                return response
+            data = serializer(result)
+            if addToCache:
+                _cache_response(cacheKey, hook, data, content_type, started)
+            return make_api_response(data, content_type)
         except Exception:
             logger.exception('Serialization error in request %s?%s', path, query)
             raise
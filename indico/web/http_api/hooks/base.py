@@ -11,15 +11,17 @@ Base export interface
 
 import re
 from datetime import datetime, time, timedelta
+from functools import partial
 from types import GeneratorType
 from urllib.parse import unquote
 
 import pytz
-from flask import current_app, request
+from flask import current_app, g, request
 
 from indico.core import signals
 from indico.core.config import config
 from indico.core.db import db
+from indico.core.db.sqlalchemy.util.queries import iter_query_chunks
 from indico.core.logger import Logger
 from indico.core.notifications import flush_email_queue, init_email_queue
 from indico.util.date_time import now_utc
@@ -51,6 +53,8 @@ class HTTPAPIHook:
     COMMIT = False  # commit database changes
     HTTP_POST = False  # require (and allow) HTTP POST
     NO_CACHE = False
+    STREAMABLE = False  # results may be generated while sending the response (stream=yes)
+    STREAM_EXTRA_KEYS = ()  # result keys the extra function needs when streaming
 
     @classmethod
     def parseRequest(cls, path, queryParams):
@@ -95,6 +99,7 @@ class HTTPAPIHook:
         self._queryParams = queryParams
         self._type = type
         self._pathParams = pathParams
+        self._stream = False
 
     def _getParams(self):
         self._offset = get_query_parameter(self._queryParams, ['O', 'offset'], 0, integer=True)
@@ -137,6 +142,14 @@ class HTTPAPIHook:
     def serializer_args(self):
         return {}
 
+    def get_cache_tags(self):
+        """Get the tags used to invalidate cached results of the hook.
+
+        This is called after performing the export.  If it returns
+        ``None``, cached results are only expired after the cache TTL.
+        """
+        return None
+
     def _getMethodName(self):
         if self.METHOD_NAME:
             return self.METHOD_NAME
@@ -147,7 +160,10 @@ class HTTPAPIHook:
         complete = True
         try:
             res = func(user)
-            if isinstance(res, GeneratorType):
+            if self._stream:
+                # the results are consumed while sending the response
+                resultList = res
+            elif isinstance(res, GeneratorType):
                 for obj in res:
                     resultList.append(obj)
             else:
@@ -163,11 +179,23 @@ class HTTPAPIHook:
         resultList, complete = self._performCall(func, user)
         if isinstance(resultList, current_app.response_class):
             return True, resultList, None, None
-        extra = extra_func(user, resultList) if extra_func else None
+        if self._stream:
+            # the extra data can only be built once all results have been sent
+            extra = partial(extra_func, user) if extra_func else None
+        else:
+            extra = extra_func(user, resultList) if extra_func else None
         return False, resultList, complete, extra
 
-    def __call__(self, user):
-        """Perform the actual exporting."""
+    def __call__(self, user, stream=False):
+        """Perform the actual exporting.
+
+        :param user: The user performing the request.
+        :param stream: Whether to stream the results.  In this case the
+                       results are an iterable that is only consumed
+                       when sending the response, and instead of the
+                       extra data a callable building it is returned.
+        """
+        self._stream = stream
         if self.HTTP_POST != (request.method == 'POST'):
             # XXX: this should never happen, since HTTP_POST is only used within /api/,
             # where the flask url rule requires POST
@@ -284,6 +312,23 @@ class IteratedDataFetcher(DataFetcher):
         self._descending = hook._descending
         self._fromDT = hook._fromDT
         self._toDT = hook._toDT
+        self._stream = hook._stream
+
+    def _iter_chunked(self, query, options=(), chunk_size=100):
+        """Iterate over the objects from a query, loading them in chunks.
+
+        This is used when streaming results, so only a single chunk of
+        objects needs to be kept in memory.
+
+        :param query: A query returning a single entity
+        :param options: Query options (e.g. eager loading) used when
+                        loading the objects of each chunk
+        :param chunk_size: The number of objects to load at once
+        """
+        for chunk in iter_query_chunks(query, chunk_size, options):
+            yield chunk
+            # per-request caches would otherwise keep all the objects alive
+            g.pop('memoize_cache', None)
 
 
 Serializer.register('html', HTML4Serializer)
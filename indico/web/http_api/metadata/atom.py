@@ -8,7 +8,9 @@
 from datetime import datetime
 
 import dateutil.parser
+from feedgen.entry import FeedEntry
 from feedgen.feed import FeedGenerator
+from lxml import etree
 from pytz import timezone, utc
 
 from indico.util.string import sanitize_html
@@ -26,23 +28,39 @@ def _deserialize_date(date_dict):
 class AtomSerializer(Serializer):
 
     schemaless = False
+    streamable = True
     _mime = 'application/atom+xml'
 
+    def _create_feed(self, url):
+        feed = FeedGenerator()
+        feed.id(url)
+        feed.title('Indico Feed')
+        feed.link(href=url, rel='self')
+        return feed
+
+    def _populate_entry(self, entry, fossil):
+        entry.id(fossil['url'])
+        entry.title(fossil['title'] or None)
+        entry.summary(sanitize_html(fossil['description']) or None, type='html')
+        entry.link(href=fossil['url'])
+        entry.updated(_deserialize_date(fossil['startDate']))
+
     def _execute(self, fossils):
         results = fossils['results']
         if not isinstance(results, list):
             results = [results]
 
-        feed = FeedGenerator()
-        feed.id(fossils['url'])
-        feed.title('Indico Feed')
-        feed.link(href=fossils['url'], rel='self')
-
+        feed = self._create_feed(fossils['url'])
         for fossil in results:
-            entry = feed.add_entry(order='append')
-            entry.id(fossil['url'])
-            entry.title(fossil['title'] or None)
-            entry.summary(sanitize_html(fossil['description']) or None, type='html')
-            entry.link(href=fossil['url'])
-            entry.updated(_deserialize_date(fossil['startDate']))
+            self._populate_entry(feed.add_entry(order='append'), fossil)
         return feed.atom_str(pretty=True)
+
+    def stream(self, result):
+        footer = b'</feed>\n'
+        header = self._create_feed(result.url).atom_str(pretty=True)[:-len(footer)]
+        yield header
+        for fossil in result:
+            entry = FeedEntry()
+            self._populate_entry(entry, fossil)
+            yield etree.tostring(entry.atom_entry(), pretty_print=True)
+        yield footer
@@ -13,9 +13,18 @@ class JSONSerializer(Serializer):
     """Basically direct translation from the fossil."""
 
     _mime = 'application/json'
+    streamable = True
 
     def _execute(self, fossil):
         return json.dumps(fossil, pretty=self.pretty)
 
+    def stream(self, result):
+        # the metadata is only available after all results have been
+        # written, so we cannot put it before the results
+        yield '{"results": ['
+        for i, fossil in enumerate(result):
+            yield (', ' if i else '') + json.dumps(fossil, pretty=self.pretty)
+        yield '], ' + json.dumps(result.dump_metadata(), pretty=self.pretty)[1:]
+
 
 Serializer.register('json', JSONSerializer)
@@ -17,3 +17,8 @@ class JSONPSerializer(JSONSerializer):
         return '// fetched from Indico\n%s(%s);' % \
                (self._query_params.get('jsonp', 'read'),
                 super()._execute(results))
+
+    def stream(self, result):
+        yield '// fetched from Indico\n%s(' % self._query_params.get('jsonp', 'read')
+        yield from super().stream(result)
+        yield ');'
@@ -9,6 +9,8 @@ class Serializer:
 
     schemaless = True
     encapsulate = True
+    #: Whether the serializer can write its output incrementally
+    streamable = False
 
     registry = {}
 
@@ -51,6 +53,14 @@ class Serializer:
         self._data = self._execute(obj, *args, **kwargs)
         return self._data
 
+    def stream(self, result):
+        """Serialize a result incrementally.
+
+        :param result: An :class:`.HTTPAPIResultStream`
+        :return: An iterator yielding chunks of the serialized data
+        """
+        raise NotImplementedError
+
 
 from indico.web.http_api.metadata.json import JSONSerializer  # noqa: F401,E402
 from indico.web.http_api.metadata.xml import XMLSerializer  # noqa: F401,E402
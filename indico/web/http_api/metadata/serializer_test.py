@@ -0,0 +1,93 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2022 CERN
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see the
+# LICENSE file for more details.
+
+from datetime import datetime
+
+import pytest
+from lxml import etree
+
+from indico.util import json
+from indico.web.http_api.hooks.base import Serializer
+from indico.web.http_api.responses import HTTPAPIResult, HTTPAPIResultSchema, HTTPAPIResultStream
+
+
+FOSSILS = [
+    {
+        '_type': 'Conference',
+        '_fossil': 'conferenceMetadata',
+        'id': str(id_),
+        'categoryId': category_id,
+        'title': f'Event {id_}',
+        'description': f'<p>Description of event {id_}</p>',
+        'url': f'http://localhost/event/{id_}/',
+        'location': 'CERN',
+        'roomFullname': '',
+        'startDate': {'date': '2022-01-0%d' % id_, 'time': '10:00:00', 'tz': 'UTC'},
+        'endDate': {'date': '2022-01-0%d' % id_, 'time': '12:00:00', 'tz': 'UTC'},
+        'keywords': ['foo', 'bar'],
+    }
+    for id_, category_id in ((1, 1), (2, 1), (3, 2))
+]
+
+
+def _get_extra(results):
+    return {'categories': sorted({r['categoryId'] for r in results})}
+
+
+def _serialize(dformat, stream):
+    serializer = Serializer.create(dformat, query_params={})
+    if stream:
+        result = HTTPAPIResultStream(iter(FOSSILS), '/export/categ/1.json', '', 123, extra_func=_get_extra,
+                                     extra_keys=('categoryId',))
+        chunks = list(serializer.stream(result))
+        return b''.join(x.encode() if isinstance(x, str) else x for x in chunks)
+    else:
+        data = serializer(HTTPAPIResultSchema().dump(HTTPAPIResult(FOSSILS, '/export/categ/1.json', '', 123,
+                                                                   _get_extra(FOSSILS))))
+        return data.encode() if isinstance(data, str) else data
+
+
+@pytest.fixture(autouse=True)
+def _freeze_now(freeze_time):
+    freeze_time(datetime(2022, 1, 10, 12, 0))
+
+
+def test_stream_json():
+    data = json.loads(_serialize('json', True))
+    assert data == json.loads(_serialize('json', False))
+    assert data['count'] == 3
+    assert data['additionalInfo'] == {'categories': [1, 2]}
+
+
+def test_stream_jsonp():
+    data = _serialize('jsonp', True).decode()
+    prefix = '// fetched from Indico\nread('
+    assert data.startswith(prefix)
+    assert data.endswith(');')
+    assert json.loads(data[len(prefix):-2]) == json.loads(_serialize('json', False))
+
+
+def test_stream_xml():
+    def _get_children(data):
+        root = etree.fromstring(data)
+        return root.tag, {child.tag: etree.tostring(child) for child in root}
+
+    assert _get_children(_serialize('xml', True)) == _get_children(_serialize('xml', False))
+
+
+def test_stream_ical():
+    assert _serialize('ics', True) == _serialize('ics', False)
+
+
+def test_stream_atom():
+    def _get_entries(data):
+        root = etree.fromstring(data, etree.XMLParser(remove_blank_text=True))
+        return [etree.tostring(entry) for entry in root.iterfind('{http://www.w3.org/2005/Atom}entry')]
+
+    entries = _get_entries(_serialize('atom', True))
+    assert len(entries) == 3
+    assert entries == _get_entries(_serialize('atom', False))
@@ -7,6 +7,7 @@
 
 import re
 from datetime import datetime
+from io import BytesIO
 
 import dateutil.parser
 from lxml import etree
@@ -22,12 +23,20 @@ def _deserialize_date(date_dict):
     return timezone(date_dict['tz']).localize(dt).astimezone(utc)
 
 
+def _pop_buffer(buf):
+    data = buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    return data
+
+
 class XMLSerializer(Serializer):
     """
     Receive a fossil (or a collection of them) and converts them to XML.
     """
 
     _mime = 'text/xml'
+    streamable = True
 
     def __init__(self, query_params, pretty=False, **kwargs):
         self._typeMap = kwargs.pop('typeMap', {})
@@ -64,35 +73,39 @@ class XMLSerializer(Serializer):
         for k, v in fossil.items():
             if k in ['_fossil', '_type', 'id']:
                 continue
-            if isinstance(k, (int, float)) or (isinstance(k, str) and k.isdigit()):
-                elem = etree.SubElement(felement, 'entry', {'key': str(k)})
-            else:
-                elem = etree.SubElement(felement, k)
-            if isinstance(v, dict) and set(v.keys()) == {'date', 'time', 'tz'}:
-                v = _deserialize_date(v)
-            if isinstance(v, (list, tuple)):
-                onlyDicts = all(isinstance(subv, dict) for subv in v)
-                if onlyDicts:
-                    for subv in v:
-                        elem.append(self._xmlForFossil(subv))
-                else:
-                    for subv in v:
-                        if isinstance(subv, dict):
-                            elem.append(self._xmlForFossil(subv))
-                        else:
-                            subelem = etree.SubElement(elem, 'item')
-                            subelem.text = self._convert(subv)
-            elif isinstance(v, dict):
-                elem.append(self._xmlForFossil(v))
-            else:
-                txt = self._convert(v)
-                try:
-                    elem.text = txt
-                except Exception:
-                    Logger.get('xmlSerializer').exception('Setting XML text value failed (id: %s, value %r)', id, txt)
+            self._xmlForValue(felement, k, v, id)
 
         return felement
 
+    def _xmlForValue(self, felement, k, v, id=None):
+        if isinstance(k, (int, float)) or (isinstance(k, str) and k.isdigit()):
+            elem = etree.SubElement(felement, 'entry', {'key': str(k)})
+        else:
+            elem = etree.SubElement(felement, k)
+        if isinstance(v, dict) and set(v.keys()) == {'date', 'time', 'tz'}:
+            v = _deserialize_date(v)
+        if isinstance(v, (list, tuple)):
+            onlyDicts = all(isinstance(subv, dict) for subv in v)
+            if onlyDicts:
+                for subv in v:
+                    elem.append(self._xmlForFossil(subv))
+            else:
+                for subv in v:
+                    if isinstance(subv, dict):
+                        elem.append(self._xmlForFossil(subv))
+                    else:
+                        subelem = etree.SubElement(elem, 'item')
+                        subelem.text = self._convert(subv)
+        elif isinstance(v, dict):
+            elem.append(self._xmlForFossil(v))
+        else:
+            txt = self._convert(v)
+            try:
+                elem.text = txt
+            except Exception:
+                Logger.get('xmlSerializer').exception('Setting XML text value failed (id: %s, value %r)', id, txt)
+        return elem
+
     def _execute(self, fossil, xml_declaration=True):
         if isinstance(fossil, list):
             # collection of fossils
@@ -106,5 +119,23 @@ class XMLSerializer(Serializer):
         return etree.tostring(result, pretty_print=self.pretty,
                               xml_declaration=xml_declaration, encoding='utf-8')
 
+    def stream(self, result):
+        buf = BytesIO()
+        root_name = self._typeMap.get('HTTPAPIResult', 'HTTPAPIResult').lower()
+        with etree.xmlfile(buf, encoding='utf-8', buffered=False) as xf:
+            xf.write_declaration()
+            with xf.element(root_name):
+                with xf.element('results'):
+                    for fossil in result:
+                        xf.write(self._xmlForFossil(fossil), pretty_print=self.pretty)
+                        yield _pop_buffer(buf)
+                # the metadata is only available after all results have
+                # been written, so it comes after the results
+                container = etree.Element(root_name)
+                for k, v in result.dump_metadata().items():
+                    if k not in ('_fossil', '_type', 'id'):
+                        xf.write(self._xmlForValue(container, k, v), pretty_print=self.pretty)
+        yield _pop_buffer(buf)
+
 
 Serializer.register('xml', XMLSerializer)
@@ -42,6 +42,51 @@ class HTTPAPIResult:
         return len(self.results)
 
 
+class HTTPAPIResultStream(HTTPAPIResult):
+    """An API result whose results are generated while it is being sent.
+
+    The results can only be iterated over once.  Since the number of
+    results and the extra data are only known after all results have
+    been consumed, serializers must write them after the results.
+
+    :param extra_func: A callable returning the extra data.  It
+                       receives a list of dicts containing the distinct
+                       values of `extra_keys` among all results.
+    :param extra_keys: The result keys needed to build the extra data.
+    """
+
+    def __init__(self, results, path='', query='', ts=None, extra_func=None, extra_keys=()):
+        super().__init__(results, path, query, ts)
+        self._count = 0
+        self._extra_func = extra_func
+        self._extra_keys = extra_keys
+        self._extra_values = set()
+
+    def __iter__(self):
+        for result in self.results:
+            self._count += 1
+            if self._extra_keys:
+                self._extra_values.add(tuple(result.get(key) for key in self._extra_keys))
+            yield result
+
+    @property
+    def count(self):
+        return self._count
+
+    def get_extra(self):
+        if self._extra_func is None:
+            return {}
+        return self._extra_func([dict(zip(self._extra_keys, values)) for values in self._extra_values]) or {}
+
+    def dump_metadata(self):
+        """Dump everything except the results.
+
+        This must only be called after iterating over the results.
+        """
+        self.extra = self.get_extra()
+        return HTTPAPIResultSchema(exclude=('results',)).dump(self)
+
+
 class HTTPAPIResultSchema(mm.Schema):
     count = fields.Integer()
     extra = fields.Raw(data_key='additionalInfo')